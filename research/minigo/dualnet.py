@@ -108,13 +108,11 @@ class DualNetRunner(object):
       probabilities, value: The policy and value outputs (defined in
         dualnet_model.py)
     """
-    def _extract_features(positions):
-      return features.extract_features(self.hparams.board_size, positions)
-    processed = list(map(_extract_features, positions))
-    # processed = [
-    #  features.extract_features(self.hparams.board_size, p) for p in positions]
+    processed = features.extract_features_batch(
+        self.hparams.board_size, positions)
     if use_random_symmetry:
-      syms_used, processed = symmetries.randomize_symmetries_feat(processed)
+      syms_used, processed = symmetries.randomize_symmetries_feat_batch(
+          processed)
     # feed_dict is a dict object to provide the input examples for the step of
     # inference. sess.run() returns the inference predictions (indicated by
     # self.inference_output) of the given input as outputs
@@ -122,7 +120,7 @@ class DualNetRunner(object):
         self.inference_output, feed_dict={self.inference_input: processed})
     probabilities, value = outputs['policy_output'], outputs['value_output']
     if use_random_symmetry:
-      probabilities = symmetries.invert_symmetries_pi(
+      probabilities = symmetries.invert_symmetries_pi_batch(
           self.hparams.board_size, syms_used, probabilities)
     return probabilities, value
 
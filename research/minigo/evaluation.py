@@ -17,102 +17,258 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import json
+import math
 import os
 import time
 
 import go
 from gtp_wrapper import MCTSPlayer
+from selfplay_mcts import ConcurrentGames
 import sgf_wrapper
 
 
-def play_match(params, black_net, white_net, games, readouts,
-               sgf_dir, verbosity):
-  """Plays matches between two neural nets.
+class SPRT(object):
+  """Sequential probability ratio test of the win rate of a model.
 
-  One net that wins by a margin of 55% will be the winner.
+  After every game, the log likelihood ratio of the hypothesis H1 that the
+  model wins with upper_win_rate, against the hypothesis H0 that it wins with
+  lower_win_rate, is compared to the bounds of Wald's test: the test stops as
+  soon as one of the hypotheses is accepted, with error rates alpha of
+  accepting H1 when H0 holds, and beta of accepting H0 when H1 holds.
+  """
+
+  def __init__(self, lower_win_rate, upper_win_rate, alpha=0.05, beta=0.05):
+    """Initializes the test.
+
+    Args:
+      lower_win_rate: the win rate of H0.
+      upper_win_rate: the win rate of H1, greater than lower_win_rate.
+      alpha: the probability of accepting H1 when H0 holds.
+      beta: the probability of accepting H0 when H1 holds.
+
+    Raises:
+      ValueError: if the win rates are not ordered in (0, 1).
+    """
+    if not 0 < lower_win_rate < upper_win_rate < 1:
+      raise ValueError('Expected 0 < lower_win_rate < upper_win_rate < 1, '
+                       'got {} and {}'.format(lower_win_rate, upper_win_rate))
+    self.win_llr = math.log(upper_win_rate / lower_win_rate)
+    self.loss_llr = math.log((1 - upper_win_rate) / (1 - lower_win_rate))
+    self.lower_bound = math.log(beta / (1 - alpha))
+    self.upper_bound = math.log((1 - beta) / alpha)
+    self.wins = 0
+    self.losses = 0
+
+  @property
+  def llr(self):
+    """The log likelihood ratio of H1 against H0."""
+    return self.wins * self.win_llr + self.losses * self.loss_llr
+
+  def update(self, won):
+    """Records the result of a game of the model."""
+    if won:
+      self.wins += 1
+    else:
+      self.losses += 1
+
+  def decision(self):
+    """Returns True if H1 is accepted, False if H0 is, None to go on."""
+    if self.llr >= self.upper_bound:
+      return True
+    if self.llr <= self.lower_bound:
+      return False
+    return None
+
+
+def elo_difference(win_rate):
+  """Returns the Elo rating difference corresponding to a win rate."""
+  if win_rate <= 0:
+    return float('-inf')
+  if win_rate >= 1:
+    return float('inf')
+  return -400 * math.log10(1 / win_rate - 1)
+
+
+class _MatchGame(object):
+  """The state of a game of ParallelMatch."""
+
+  def __init__(self, index, black, white, black_name, white_name):
+    self.index = index
+    self.black = black
+    self.white = white
+    self.black_name = black_name
+    self.white_name = white_name
+    # The root of the player to move is expanded before its search starts.
+    self.readouts_target = None
+    self.start = None
+
+  def player_to_move(self):
+    return self.black if self.black.root.position.to_play == go.BLACK else (
+        self.white)
+
+
+class ParallelMatch(ConcurrentGames):
+  """Plays evaluation games between two networks concurrently.
+
+  The models alternate colors from game to game. Each step selects
+  simultaneous_leaves leaves in the tree of the player to move of every
+  active game, and evaluates the leaves of each network with a single
+  run_many call, so each network runs on batches of up to
+  num_parallel_games * simultaneous_leaves positions.
+  """
+
+  def __init__(self, params, name_a, net_a, name_b, net_b, readouts,
+               num_parallel_games, sgf_dir=None, verbosity=0):
+    """Initializes the match.
+
+    Args:
+      params: An object of hyperparameters.
+      name_a: The name of the model of net_a, playing black in even games.
+      net_a: Instance of the DualNetRunner class.
+      name_b: The name of the model of net_b, playing black in odd games.
+      net_b: Instance of the DualNetRunner class.
+      readouts: Number of readouts to perform for each move in each game.
+      num_parallel_games: Number of games played concurrently.
+      sgf_dir: Directory to write the sgf of the games, if not None.
+      verbosity: Verbosity to show evaluation process.
+    """
+    super(ParallelMatch, self).__init__(readouts, num_parallel_games)
+    self.params = params
+    self.models = [(name_a, net_a), (name_b, net_b)]
+    self.sgf_dir = sgf_dir
+    self.verbosity = verbosity
+
+  def _new_player(self, network):
+    player = MCTSPlayer(
+        self.params.board_size, network, verbosity=self.verbosity,
+        two_player_mode=True, num_parallel=self.params.simultaneous_leaves)
+    player.initialize_game()
+    return player
+
+  def _new_game(self, index):
+    (black_name, black_net), (white_name, white_net) = (
+        self.models if index % 2 == 0 else self.models[::-1])
+    return _MatchGame(index, self._new_player(black_net),
+                      self._new_player(white_net), black_name, white_name)
+
+  def _play_searched_move(self, game):
+    """Plays the move of the player to move, returns True if the game is over.
+    """
+    active = game.player_to_move()
+    inactive = game.white if active is game.black else game.black
+    if self.verbosity >= 3:
+      print(active.root.position)
+
+    if active.should_resign():
+      for player in (active, inactive):
+        player.set_result(-active.root.position.to_play, was_resign=True)
+      return True
+    move = active.pick_move()
+    active.play_move(move)
+    inactive.play_move(move)
+    if active.root.is_done():
+      for player in (active, inactive):
+        player.set_result(active.root.position.result(), was_resign=False)
+      return True
+
+    if (self.verbosity > 1) or (
+        self.verbosity == 1 and active.root.position.n % 10 == 9):
+      dur = time.time() - game.start
+      print(active.root.position)
+      print('{:d}: {:d} readouts, {:.3f} s/100. ({:.2f} sec)'.format(
+          active.root.position.n, self.readouts,
+          dur / self.readouts * 100.0, dur))
+    return False
+
+  def _game_result(self, game):
+    """Writes the sgf of a finished game and returns its result."""
+    position = game.black.root.position
+    result = {
+        'game': game.index,
+        'black': game.black_name,
+        'white': game.white_name,
+        'winner': game.black_name if game.black.result == go.BLACK else (
+            game.white_name),
+        'result': game.black.result_string,
+        'moves': position.n,
+        'time': int(time.time()),
+    }
+    if self.sgf_dir is not None:
+      fname = '{:d}-{:s}-vs-{:s}-{:d}.sgf'.format(
+          result['time'], game.white_name, game.black_name, game.index)
+      with open(os.path.join(self.sgf_dir, fname), 'w') as f:
+        f.write(sgf_wrapper.make_sgf(
+            self.params.board_size, position.recent, result['result'],
+            black_name=game.black_name, white_name=game.white_name))
+      result['sgf'] = fname
+    return result
+
+  def play(self, num_games):
+    """Plays the games of the match.
+
+    Stopping the iteration early abandons the games in progress.
+
+    Args:
+      num_games: The maximum number of games to play.
+
+    Yields:
+      A dict with the result of each game once it is over: its 'game' index,
+      the 'black', 'white' and 'winner' model names, the 'result' string, the
+      number of 'moves', the end 'time' and the 'sgf' filename if written.
+    """
+    for game in self._play_games(num_games):
+      result = self._game_result(game)
+      print('Finished game', game.index, result['result'])
+      yield result
+
+
+def play_match(params, candidate_name, candidate_net, best_name, best_net,
+               sgf_dir, results_file=None):
+  """Plays an evaluation match of a candidate model against the best model.
+
+  The games are played concurrently with ParallelMatch, until an SPRT of the
+  win rate of the candidate, between params.eval_sprt_lower_win_rate and
+  params.eval_sprt_upper_win_rate, stops the match, or params.eval_games are
+  played.
 
   Args:
     params: An object of hyperparameters.
-    black_net: Instance of the DualNetRunner class to play as black.
-    white_net: Instance of the DualNetRunner class to play as white.
-    games: Number of games to play. We play all the games at the same time.
-    readouts: Number of readouts to perform for each step in each game.
+    candidate_name: The name of the candidate model.
+    candidate_net: Instance of the DualNetRunner class of the candidate model.
+    best_name: The name of the best model so far.
+    best_net: Instance of the DualNetRunner class of the best model so far.
     sgf_dir: Directory to write the sgf results.
-    verbosity: Verbosity to show evaluation process.
+    results_file: A file to append the result of each game to, as a line of
+      JSON, for instance to compute Elo ratings of the models, if not None.
 
   Returns:
-    'B' is the winner is black_net, otherwise 'W'.
+    True if the candidate is stronger: the SPRT accepts its higher win rate,
+    or, if no hypothesis is accepted within params.eval_games, it won at least
+    params.eval_win_rate of the games.
   """
-  # For n games, we create lists of n black and n white players
-  black = MCTSPlayer(
-      params.board_size, black_net, verbosity=verbosity, two_player_mode=True,
-      num_parallel=params.simultaneous_leaves)
-  white = MCTSPlayer(
-      params.board_size, white_net, verbosity=verbosity, two_player_mode=True,
-      num_parallel=params.simultaneous_leaves)
-
-  black_name = os.path.basename(black_net.save_file)
-  white_name = os.path.basename(white_net.save_file)
-
-  black_win_counts = 0
-  white_win_counts = 0
-
-  for i in range(games):
-    num_move = 0  # The move number of the current game
-
-    black.initialize_game()
-    white.initialize_game()
-
-    while True:
-      start = time.time()
-      active = white if num_move % 2 else black
-      inactive = black if num_move % 2 else white
-
-      current_readouts = active.root.N
-      while active.root.N < current_readouts + readouts:
-        active.tree_search()
-
-      # print some stats on the search
-      if verbosity >= 3:
-        print(active.root.position)
-
-      # First, check the roots for hopeless games.
-      if active.should_resign():  # Force resign
-        active.set_result(-active.root.position.to_play, was_resign=True)
-        inactive.set_result(
-            active.root.position.to_play, was_resign=True)
-
-      if active.is_done():
-        fname = '{:d}-{:s}-vs-{:s}-{:d}.sgf'.format(
-            int(time.time()), white_name, black_name, i)
-        with open(os.path.join(sgf_dir, fname), 'w') as f:
-          sgfstr = sgf_wrapper.make_sgf(
-              params.board_size, active.position.recent, active.result_string,
-              black_name=black_name, white_name=white_name)
-          f.write(sgfstr)
-        print('Finished game', i, active.result_string)
-        if active.result_string is not None:
-          if active.result_string[0] == 'B':
-            black_win_counts += 1
-          elif active.result_string[0] == 'W':
-            white_win_counts += 1
-
-        break
-
-      move = active.pick_move()
-      active.play_move(move)
-      inactive.play_move(move)
-
-      dur = time.time() - start
-      num_move += 1
-
-      if (verbosity > 1) or (verbosity == 1 and num_move % 10 == 9):
-        timeper = (dur / readouts) * 100.0
-        print(active.root.position)
-        print('{:d}: {:d} readouts, {:.3f} s/100. ({:.2f} sec)'.format(
-            num_move, readouts, timeper, dur))
-
-  if (black_win_counts - white_win_counts) > params.eval_win_rate * games:
-    return go.BLACK_NAME
-  else:
-    return go.WHITE_NAME
+  sprt = SPRT(params.eval_sprt_lower_win_rate,
+              params.eval_sprt_upper_win_rate,
+              alpha=params.eval_sprt_alpha, beta=params.eval_sprt_beta)
+  match = ParallelMatch(
+      params, candidate_name, candidate_net, best_name, best_net,
+      params.eval_readouts, params.eval_parallel_games, sgf_dir,
+      params.eval_verbose)
+  for result in match.play(params.eval_games):
+    sprt.update(result['winner'] == candidate_name)
+    if results_file is not None:
+      with open(results_file, 'a') as f:
+        f.write(json.dumps(result, sort_keys=True) + '\n')
+    if sprt.decision() is not None:
+      break
+
+  num_games = sprt.wins + sprt.losses
+  print('{} won {} of {} games against {}, {:+.0f} Elo, LLR {:.2f} in '
+        '[{:.2f}, {:.2f}]'.format(
+            candidate_name, sprt.wins, num_games, best_name,
+            elo_difference(sprt.wins / max(num_games, 1)), sprt.llr,
+            sprt.lower_bound, sprt.upper_bound))
+  decision = sprt.decision()
+  if decision is None:
+    return num_games > 0 and sprt.wins / num_games >= params.eval_win_rate
+  return decision
@@ -0,0 +1,140 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for evaluation."""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import tempfile
+import unittest.mock
+
+import tensorflow as tf  # pylint: disable=g-bad-import-order
+
+import evaluation
+import model_params
+import numpy as np
+from strategies_test import DummyNet
+import utils_test
+
+tf.logging.set_verbosity(tf.logging.ERROR)
+
+
+class TestSPRT(utils_test.MiniGoUnitTest):
+
+  def test_accepts_upper_win_rate(self):
+    sprt = evaluation.SPRT(0.45, 0.55)
+    games = 0
+    while sprt.decision() is None:
+      sprt.update(won=games % 10 != 0)  # 90% wins
+      games += 1
+    self.assertTrue(sprt.decision())
+    self.assertLess(games, 25)
+
+  def test_accepts_lower_win_rate(self):
+    sprt = evaluation.SPRT(0.45, 0.55)
+    for _ in range(30):
+      sprt.update(won=False)
+    self.assertFalse(sprt.decision())
+
+  def test_undecided_on_even_results(self):
+    sprt = evaluation.SPRT(0.45, 0.55)
+    for i in range(100):
+      sprt.update(won=i % 2 == 0)
+    self.assertIsNone(sprt.decision())
+    self.assertAlmostEqual(0, sprt.llr)
+
+  def test_invalid_win_rates(self):
+    with self.assertRaises(ValueError):
+      evaluation.SPRT(0.55, 0.45)
+
+  def test_elo_difference(self):
+    self.assertAlmostEqual(0, evaluation.elo_difference(0.5))
+    self.assertAlmostEqual(400, evaluation.elo_difference(10 / 11))
+    self.assertEqual(float('inf'), evaluation.elo_difference(1))
+
+
+class TestParallelMatch(utils_test.MiniGoUnitTest):
+
+  def test_play(self):
+    params = model_params.DummyMiniGoParams()
+    params.simultaneous_leaves = 2
+    net_a, net_b = DummyNet(), DummyNet()
+    sgf_dir = tempfile.mkdtemp()
+    match = evaluation.ParallelMatch(
+        params, 'a', net_a, 'b', net_b, readouts=4, num_parallel_games=2,
+        sgf_dir=sgf_dir)
+    results = list(match.play(3))
+
+    self.assertEqual(3, len(results))
+    self.assertEqual([0, 1, 2], sorted(r['game'] for r in results))
+    for result in results:
+      # The models alternate colors.
+      self.assertEqual(('a', 'b') if result['game'] % 2 == 0 else ('b', 'a'),
+                       (result['black'], result['white']))
+      self.assertIn(result['winner'], ('a', 'b'))
+      self.assertTrue(result['result'])
+      self.assertTrue(os.path.exists(os.path.join(sgf_dir, result['sgf'])))
+    # Both networks evaluated positions, batched across games.
+    self.assertGreater(net_a.num_evaluations, 0)
+    self.assertGreater(net_b.num_evaluations, 0)
+    self.assertEqual(net_a.num_evaluations + net_b.num_evaluations,
+                     match.num_evaluated_positions)
+    self.assertGreater(match.num_evaluated_positions / match.num_batches, 1)
+
+  def test_play_match_stops_early(self):
+    params = model_params.DummyMiniGoParams()
+    params.eval_games = 20
+    params.eval_readouts = 2
+    params.eval_parallel_games = 2
+    params.eval_verbose = 0
+    params.simultaneous_leaves = 2
+    # The best model always passes, so the candidate wins every game.
+    pass_priors = np.full([utils_test.BOARD_SIZE ** 2 + 1], 1e-3)
+    pass_priors[-1] = 1
+    results_file = os.path.join(tempfile.mkdtemp(), 'results.jsonl')
+    self.assertTrue(evaluation.play_match(
+        params, 'candidate', DummyNet(), 'best', DummyNet(pass_priors), None,
+        results_file))
+
+    with open(results_file) as f:
+      results = [json.loads(line) for line in f]
+    self.assertLess(len(results), params.eval_games)
+    self.assertTrue(all(r['winner'] == 'candidate' for r in results))
+
+  def test_play_match_undecided_uses_win_rate(self):
+    params = model_params.DummyMiniGoParams()
+    params.eval_games = 10
+    params.eval_verbose = 0
+
+    def play(unused_self, num_games):
+      # 6 wins in 10 games, alternating, so the SPRT does not decide.
+      for i in range(num_games):
+        yield {'winner': 'candidate' if i % 2 == 0 or i == 9 else 'best'}
+
+    with unittest.mock.patch.object(evaluation.ParallelMatch, 'play', play):
+      params.eval_win_rate = 0.55
+      self.assertTrue(evaluation.play_match(
+          params, 'candidate', DummyNet(), 'best', DummyNet(), None))
+      # The likelihood ratio favors the candidate, but it won less than
+      # eval_win_rate of the games.
+      params.eval_win_rate = 0.7
+      self.assertFalse(evaluation.play_match(
+          params, 'candidate', DummyNet(), 'best', DummyNet(), None))
+
+
+if __name__ == '__main__':
+  tf.test.main()
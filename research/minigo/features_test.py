@@ -22,6 +22,7 @@ import tensorflow as tf  # pylint: disable=g-bad-import-order
 import features
 import go
 import numpy as np
+import sgf_wrapper
 import utils_test
 
 tf.logging.set_verbosity(tf.logging.ERROR)
@@ -107,6 +108,20 @@ class TestFeatureExtraction(utils_test.MiniGoUnitTest):
       self.assertEqualNPArray(
           f[:, :, i], np.zeros([utils_test.BOARD_SIZE, utils_test.BOARD_SIZE]))
 
+  def test_extract_features_batch(self):
+    # A game with a capture and a pass.
+    sgf = '''(;CA[UTF-8]SZ[9]KM[6.5]RE[W+1.5];B[fd];W[cf];B[eg];W[dd];
+             B[dc];W[cc];B[de];W[cd];B[ed];W[he];B[ce];W[be];B[df];W[bf];
+             B[];W[ge];B[gd];W[gg];B[db];W[cb];B[cg];W[bg];B[gh];W[fh])'''
+    positions = [pwc.position for pwc in sgf_wrapper.replay_sgf(
+        utils_test.BOARD_SIZE, sgf)]
+    positions += [TEST_POSITION, TEST_POSITION2, TEST_POSITION3]
+    expected = np.stack([features.extract_features(utils_test.BOARD_SIZE, p)
+                         for p in positions])
+    actual = features.extract_features_batch(utils_test.BOARD_SIZE, positions)
+    self.assertEqual(actual.dtype, np.uint8)
+    self.assertEqualNPArray(actual, expected)
+
 
 if __name__ == '__main__':
   tf.test.main()
@@ -48,8 +48,27 @@ def _check_bounds(board_size, c):
   return c[0] % board_size == c[0] and c[1] % board_size == c[1]
 
 
+# Caches of get_neighbors_diagonals and zobrist_table, by board size.
+_NEIGHBORS_DIAGONALS = {}
+_ZOBRIST_TABLES = {}
+
+# Number of board states of the history of a position which are hashed, the
+# board states used by features.stone_features.
+ZOBRIST_HISTORY_LENGTH = 8
+
+
 def get_neighbors_diagonals(board_size):
-  """Return coordinates of neighbors and diagonals for a go board."""
+  """Return coordinates of neighbors and diagonals for a go board.
+
+  The dicts are cached by board size and shared by all positions, and must
+  not be modified.
+  """
+  if board_size not in _NEIGHBORS_DIAGONALS:
+    _NEIGHBORS_DIAGONALS[board_size] = _build_neighbors_diagonals(board_size)
+  return _NEIGHBORS_DIAGONALS[board_size]
+
+
+def _build_neighbors_diagonals(board_size):
   all_coords = [(i, j) for i in range(board_size) for j in range(board_size)]
   def check_bounds(c):
     return _check_bounds(board_size, c)
@@ -63,6 +82,34 @@ def get_neighbors_diagonals(board_size):
   return neighbors, diagonals
 
 
+def zobrist_table(board_size):
+  """Returns the Zobrist keys of a go board.
+
+  Args:
+    board_size: the go board size.
+
+  Returns:
+    A uint64 np.array of shape [3, board_size * board_size] with the key of a
+    WHITE, EMPTY or BLACK stone at each flattened coordinate, in rows
+    color + 1. The keys of EMPTY are 0. The keys do not depend on the process,
+    so that hashes can be compared across processes.
+  """
+  if board_size not in _ZOBRIST_TABLES:
+    rs = np.random.RandomState(board_size)
+    table = rs.randint(np.iinfo(np.int64).max, size=[3, board_size * board_size],
+                       dtype=np.int64).astype(np.uint64)
+    table[EMPTY + 1] = 0
+    _ZOBRIST_TABLES[board_size] = table
+  return _ZOBRIST_TABLES[board_size]
+
+
+def zobrist_hash(board_size, board):
+  """Returns the Zobrist hash of a board, the XOR of the keys of its stones."""
+  table = zobrist_table(board_size)
+  keys = table[board.ravel() + 1, np.arange(board_size * board_size)]
+  return int(np.bitwise_xor.reduce(keys))
+
+
 class IllegalMove(Exception):
   pass
 
@@ -315,7 +362,7 @@ class Position(object):
 
   def __init__(self, board_size, board=None, n=0, komi=7.5, caps=(0, 0),
                lib_tracker=None, ko=None, recent=tuple(),
-               board_deltas=None, to_play=BLACK):
+               board_deltas=None, to_play=BLACK, zobrist_history=None):
     """Initialize position class.
 
     Args:
@@ -331,6 +378,10 @@ class Position(object):
         made to the board at each move (played move and captures).
         Should satisfy next_pos.board - next_pos.board_deltas[0] == pos.board
       to_play: BLACK or WHITE
+      zobrist_history: a tuple of the Zobrist hashes of the last
+        ZOBRIST_HISTORY_LENGTH boards, the current one first, repeating the
+        oldest board as features.stone_features does. Computed from board and
+        board_deltas if None.
     """
     if not isinstance(recent, tuple):
       raise TypeError('Recent must be a tuple!')
@@ -349,13 +400,37 @@ class Position(object):
     self.to_play = to_play
     self.last_eight = None
     self.neighbors, _ = get_neighbors_diagonals(board_size)
+    self.zobrist_history = (zobrist_history if zobrist_history is not None
+                            else self._compute_zobrist_history())
+
+  def _compute_zobrist_history(self):
+    boards = [self.board]
+    for delta in self.board_deltas[:ZOBRIST_HISTORY_LENGTH - 1]:
+      boards.append(boards[-1] - delta)
+    boards += boards[-1:] * (ZOBRIST_HISTORY_LENGTH - len(boards))
+    return tuple(zobrist_hash(self.board_size, board) for board in boards)
+
+  @property
+  def zobrist_hash(self):
+    """The Zobrist hash of the board, updated incrementally by play_move."""
+    return self.zobrist_history[0]
+
+  def transposition_key(self):
+    """Returns a key equal for positions with the same network features.
+
+    The key covers the boards and the player to play used by
+    features.extract_features, so positions reached by different move orders
+    share the key, and the network evaluations, when these are equal.
+    """
+    return (self.to_play,) + self.zobrist_history
 
   def __deepcopy__(self, memodict=None):
     new_board = np.copy(self.board)
     new_lib_tracker = copy.deepcopy(self.lib_tracker)
     return Position(
         self.board_size, new_board, self.n, self.komi, self.caps,
-        new_lib_tracker, self.ko, self.recent, self.board_deltas, self.to_play)
+        new_lib_tracker, self.ko, self.recent, self.board_deltas, self.to_play,
+        self.zobrist_history)
 
   def __str__(self):
     pretty_print_map = {
@@ -457,6 +532,8 @@ class Position(object):
     pos.board_deltas = np.concatenate((
         np.zeros([1, self.board_size, self.board_size], dtype=np.int8),
         pos.board_deltas[:6]))
+    pos.zobrist_history = (
+        (pos.zobrist_hash,) + pos.zobrist_history[:ZOBRIST_HISTORY_LENGTH - 1])
     pos.to_play *= -1
     pos.ko = None
     return pos
@@ -536,6 +613,13 @@ class Position(object):
     pos.board_deltas = np.concatenate((
         new_board_delta.reshape(1, self.board_size, self.board_size),
         pos.board_deltas[:6]))
+    table = zobrist_table(self.board_size)
+    new_hash = pos.zobrist_hash ^ int(
+        table[color + 1, coords.to_flat(self.board_size, c)])
+    for s in captured_stones:
+      new_hash ^= int(table[opp_color + 1, coords.to_flat(self.board_size, s)])
+    pos.zobrist_history = (
+        (new_hash,) + pos.zobrist_history[:ZOBRIST_HISTORY_LENGTH - 1])
     pos.to_play *= -1
     return pos
 
@@ -699,6 +699,50 @@ class TestPosition(utils_test.MiniGoUnitTest):
     for sgf_pos, replay_pos in zip(sgf_positions, replayed_positions):
       self.assertEqualPositions(sgf_pos.position, replay_pos.position)
 
+  def test_zobrist_hash_incremental(self):
+    sgf_positions = list(sgf_wrapper.replay_sgf(
+        utils_test.BOARD_SIZE, NO_HANDICAP_SGF))
+    final = sgf_positions[-1].position.play_move(
+        sgf_positions[-1].next_move)
+    # The game has captures and passes.
+    for position in [p.position for p in sgf_positions] + [final]:
+      recomputed = Position(
+          utils_test.BOARD_SIZE, board=position.board,
+          board_deltas=position.board_deltas, to_play=position.to_play)
+      self.assertEqual(position.zobrist_history, recomputed.zobrist_history)
+      self.assertEqual(
+          position.zobrist_hash,
+          go.zobrist_hash(utils_test.BOARD_SIZE, position.board))
+    self.assertEqual(go.ZOBRIST_HISTORY_LENGTH, len(final.zobrist_history))
+
+  def test_transposition_key(self):
+    def play(moves):
+      position = Position(utils_test.BOARD_SIZE)
+      for move in moves.split():
+        position = position.play_move(
+            coords.from_kgs(utils_test.BOARD_SIZE, move))
+      return position
+
+    self.assertEqual(play('A1 B1 C1').zobrist_hash,
+                     play('C1 B1 A1').zobrist_hash)
+    # The board history differs, and so do the network features.
+    self.assertNotEqual(play('A1 B1 C1').transposition_key(),
+                        play('C1 B1 A1').transposition_key())
+    # Once the moves in a different order are older than the history, the
+    # positions share their key.
+    later_moves = ' D5 E5 F5 G5 H5 J5 D6 E6'
+    self.assertNotEqual(play('A1 B1 C1' + later_moves[:-6]).transposition_key(),
+                        play('C1 B1 A1' + later_moves[:-6]).transposition_key())
+    self.assertEqual(play('A1 B1 C1' + later_moves).transposition_key(),
+                     play('C1 B1 A1' + later_moves).transposition_key())
+    self.assertEqual(play('A1 pass').zobrist_hash, play('A1').zobrist_hash)
+    self.assertNotEqual(play('A1 pass').transposition_key(),
+                        play('A1').flip_playerturn().transposition_key())
+    empty = Position(utils_test.BOARD_SIZE)
+    self.assertNotEqual(empty.transposition_key(),
+                        empty.flip_playerturn().transposition_key())
+    self.assertEqual(0, empty.zobrist_hash)
+
 
 if __name__ == '__main__':
   tf.test.main()
@@ -30,6 +30,7 @@ from __future__ import division
 from __future__ import print_function
 
 import argparse
+import json
 import os
 import random
 import socket
@@ -40,13 +41,13 @@ import tensorflow as tf  # pylint: disable=g-bad-import-order
 
 import dualnet
 import evaluation
-import go
 import model_params
 import preprocessing
 import selfplay_mcts
 import utils
 
 _TF_RECORD_SUFFIX = '.tfrecord.zz'
+_GATHER_MANIFEST = 'manifest.json'
 
 
 def _ensure_dir_exists(directory):
@@ -97,8 +98,41 @@ def selfplay(selfplay_dirs, selfplay_model, params):
     player = selfplay_mcts.play(
         params.board_size, selfplay_model, params.selfplay_readouts,
         params.selfplay_resign_threshold, params.simultaneous_leaves,
-        params.selfplay_verbose)
+        params.selfplay_verbose, params.selfplay_transposition_table_size)
 
+  _write_selfplay_game(selfplay_dirs, player, params)
+
+
+def selfplay_many(selfplay_dirs, selfplay_model, num_games, params):
+  """Perform selfplay of concurrent games with a specific model.
+
+  The games are played by selfplay_mcts.MultiGameSelfplay, which batches the
+  network evaluations of params.selfplay_parallel_games games.
+
+  Args:
+    selfplay_dirs: A dict to specify the directories used in selfplay, see
+      selfplay().
+    selfplay_model: The actual Dualnet runner for selfplay.
+    num_games: The number of games to play.
+    params: A MiniGoParams instance of hyperparameters for the model.
+  """
+  multi_game_selfplay = selfplay_mcts.MultiGameSelfplay(
+      params.board_size, selfplay_model, params.selfplay_readouts,
+      params.selfplay_resign_threshold, params.simultaneous_leaves,
+      params.selfplay_parallel_games, params.selfplay_verbose,
+      params.selfplay_transposition_table_size)
+  for player in multi_game_selfplay.play(num_games):
+    _write_selfplay_game(selfplay_dirs, player, params)
+  stats = multi_game_selfplay.stats()
+  message = ('{num_games} games: {games_per_hour:.1f} games/hour, '
+             '{average_batch_size:.1f} positions per batch '
+             '({average_batch_fill:.0%} fill)').format(**stats)
+  print(message)
+  tf.logging.info(message)
+
+
+def _write_selfplay_game(selfplay_dirs, player, params):
+  """Writes the SGF files and the training examples of a selfplay game."""
   output_name = '{}-{}'.format(int(time.time()), socket.gethostname())
 
   def _write_sgf_data(dir_sgf, use_comments):
@@ -148,34 +182,75 @@ def gather(selfplay_dir, training_chunk_dir, params):
   for model_name, record_files in sorted(model_gamedata.items()):
     print('    {}: {} files'.format(model_name, len(record_files)))
 
-  meta_file = os.path.join(training_chunk_dir, 'meta.txt')
-  try:
-    with tf.gfile.GFile(meta_file, 'r') as f:
-      already_processed = set(f.read().split())
-  except tf.errors.NotFoundError:
-    already_processed = set()
-
-  num_already_processed = len(already_processed)
+  manifest = _read_gather_manifest(training_chunk_dir)
+  num_already_processed = sum(
+      len(entry['files']) for entry in manifest.values())
 
   for model_name, record_files in sorted(model_gamedata.items()):
-    if set(record_files) <= already_processed:
+    entry = manifest.get(model_name, {'files': [], 'chunks': []})
+    if set(record_files) <= set(entry['files']):
       continue
     print('Gathering files from {}:'.format(model_name))
-    tf_examples = preprocessing.shuffle_tf_examples(
-        params.shuffle_buffer_size, params.examples_per_chunk, record_files)
-    # tqdm to make the loops show a smart progress meter
-    for i, example_batch in enumerate(tf_examples):
-      output_record = os.path.join(
-          training_chunk_dir,
-          ('{}-{}'+_TF_RECORD_SUFFIX).format(model_name, str(i)))
-      preprocessing.write_tf_examples(
-          output_record, example_batch, serialize=False)
-    already_processed.update(record_files)
+    with utils.logged_timer('Gathering {} files'.format(len(record_files))):
+      chunks, num_examples = preprocessing.gather_tf_records(
+          record_files, params.examples_per_chunk,
+          os.path.join(training_chunk_dir,
+                       model_name + '-{}' + _TF_RECORD_SUFFIX),
+          num_workers=params.gather_num_workers)
+    # Chunks of a previous gathering of the model which were not overwritten.
+    for stale_chunk in set(entry['chunks']) - set(chunks):
+      tf.gfile.Remove(stale_chunk)
+    manifest[model_name] = {
+        'files': sorted(record_files),
+        'chunks': chunks,
+        'num_examples': num_examples,
+    }
+    # Written after every model, so that an interrupted gather resumes.
+    _write_gather_manifest(training_chunk_dir, manifest)
 
   print('Processed {} new files'.format(
-      len(already_processed) - num_already_processed))
-  with tf.gfile.GFile(meta_file, 'w') as f:
-    f.write('\n'.join(sorted(already_processed)))
+      sum(len(entry['files']) for entry in manifest.values()) -
+      num_already_processed))
+
+
+def _read_gather_manifest(training_chunk_dir):
+  """Read which selfplay games were gathered into which chunks.
+
+  Args:
+    training_chunk_dir: Where the chunks and their manifest are.
+
+  Returns:
+    A dictionary from model names to dictionaries with the sorted 'files' of
+    the games of the model already gathered, and the 'chunks' they were
+    gathered into. The meta.txt list of processed files of previous versions is
+    converted, in which case the chunks are found by their names.
+  """
+  manifest_file = os.path.join(training_chunk_dir, _GATHER_MANIFEST)
+  if tf.gfile.Exists(manifest_file):
+    with tf.gfile.GFile(manifest_file, 'r') as f:
+      return json.load(f)
+
+  manifest = {}
+  meta_file = os.path.join(training_chunk_dir, 'meta.txt')
+  if tf.gfile.Exists(meta_file):
+    with tf.gfile.GFile(meta_file, 'r') as f:
+      for record_file in f.read().split():
+        model_name = os.path.basename(os.path.dirname(record_file))
+        manifest.setdefault(model_name, {'files': [], 'chunks': []})
+        manifest[model_name]['files'].append(record_file)
+    for model_name, entry in manifest.items():
+      entry['files'].sort()
+      entry['chunks'] = sorted(tf.gfile.Glob(os.path.join(
+          training_chunk_dir, model_name + '-*' + _TF_RECORD_SUFFIX)))
+  return manifest
+
+
+def _write_gather_manifest(training_chunk_dir, manifest):
+  """Atomically replace the manifest of the gathered chunks."""
+  manifest_file = os.path.join(training_chunk_dir, _GATHER_MANIFEST)
+  with tf.gfile.GFile(manifest_file + '.tmp', 'w') as f:
+    json.dump(manifest, f, indent=2, sort_keys=True)
+  tf.gfile.Rename(manifest_file + '.tmp', manifest_file, overwrite=True)
 
 
 def train(trained_models_dir, estimator_model_dir, training_chunk_dir,
@@ -246,38 +321,34 @@ def validate(trained_models_dir, holdout_dir, estimator_model_dir, params):
     dualnet.validate(estimator_model_dir, tf_records, params)
 
 
-def evaluate(black_model_name, black_net, white_model_name, white_net,
+def evaluate(best_model_name, best_net, candidate_model_name, candidate_net,
              evaluate_dir, params):
   """Evaluate with two models.
 
-  With two DualNetRunners to play as black and white in a Go match. Two models
-  play several games, and the model that wins by a margin of 55% will be the
-  winner.
+  The candidate model plays a match against the best model so far, the models
+  alternating colors, and replaces it if it wins by a margin of 55%. The match
+  stops early if a sequential probability ratio test decides that the
+  candidate is clearly stronger or weaker, see evaluation.play_match.
 
   Args:
-    black_model_name: The name of the model playing black.
-    black_net: The DualNetRunner model for black
-    white_model_name: The name of the model playing white.
-    white_net: The DualNetRunner model for white.
+    best_model_name: The name of the best model so far.
+    best_net: The DualNetRunner of the best model so far.
+    candidate_model_name: The name of the candidate model.
+    candidate_net: The DualNetRunner of the candidate model.
     evaluate_dir: Where to write the evaluation results. Set as
-      'base_dir/sgf/evaluate/'.
+      'base_dir/sgf/evaluate/'. The result of every game is appended to its
+      results.jsonl, to compute Elo ratings of the models.
     params: A MiniGoParams instance of hyperparameters for the model.
 
   Returns:
     The model name of the winner.
-
-  Raises:
-      ValueError: if neither `WHITE` or `BLACK` is returned.
   """
-  with utils.logged_timer('{} games'.format(params.eval_games)):
-    winner = evaluation.play_match(
-        params, black_net, white_net, params.eval_games,
-        params.eval_readouts, evaluate_dir, params.eval_verbose)
-
-  if winner != go.WHITE_NAME and winner != go.BLACK_NAME:
-    raise ValueError('Winner should be either White or Black!')
+  with utils.logged_timer('Evaluation of {}'.format(candidate_model_name)):
+    candidate_wins = evaluation.play_match(
+        params, candidate_model_name, candidate_net, best_model_name, best_net,
+        evaluate_dir, os.path.join(evaluate_dir, 'results.jsonl'))
 
-  return black_model_name if winner == go.BLACK_NAME else white_model_name
+  return candidate_model_name if candidate_wins else best_model_name
 
 
 def _set_params(flags):
@@ -364,8 +435,11 @@ def run_selfplay(selfplay_model, selfplay_games, dirs, params):
       dirs.holdout_dir, dirs.sgf_dir, params)
 
   print('Self-play with model: {}'.format(selfplay_model))
-  for _ in range(selfplay_games):
-    selfplay(selfplay_dirs, network, params)
+  if params.selfplay_parallel_games > 1:
+    selfplay_many(selfplay_dirs, network, selfplay_games, params)
+  else:
+    for _ in range(selfplay_games):
+      selfplay(selfplay_dirs, network, params)
 
 
 def main(_):
@@ -382,6 +456,9 @@ def main(_):
     # Set directories for models and datasets
     base_dir = FLAGS.base_dir + str(FLAGS.board_size) + '_size/'
 
+  if FLAGS.selfplay_parallel_games:
+    params.selfplay_parallel_games = FLAGS.selfplay_parallel_games
+
   dirs = utils.MiniGoDirectory(base_dir)
 
   # Run selfplay only if user specifies the argument.
@@ -431,15 +508,15 @@ def main(_):
     if FLAGS.evaluation:  # Perform evaluation if needed
       print('Evaluate models between {} and {}'.format(
           best_model_so_far, current_model))
-      black_model = os.path.join(dirs.trained_models_dir, best_model_so_far)
-      white_model = os.path.join(dirs.trained_models_dir, current_model)
+      best_model = os.path.join(dirs.trained_models_dir, best_model_so_far)
+      candidate_model = os.path.join(dirs.trained_models_dir, current_model)
       _ensure_dir_exists(dirs.evaluate_dir)
       with utils.logged_timer('Loading weights'):
-        black_net = dualnet.DualNetRunner(black_model, params)
-        white_net = dualnet.DualNetRunner(white_model, params)
+        best_net = dualnet.DualNetRunner(best_model, params)
+        candidate_net = dualnet.DualNetRunner(candidate_model, params)
 
       best_model_so_far = evaluate(
-          best_model_so_far, black_net, current_model, white_net,
+          best_model_so_far, best_net, current_model, candidate_net,
           dirs.evaluate_dir, params)
       print('Winner of evaluation: {}!'.format(best_model_so_far))
     else:
@@ -501,6 +578,13 @@ if __name__ == '__main__':
       default=None,
       metavar='SMG',
       help='The number of game data self-play only needs to generate')
+  parser.add_argument(
+      '--selfplay_parallel_games',
+      type=int,
+      default=None,
+      metavar='SPG',
+      help='The number of self-play games played concurrently, with their '
+      'network evaluations batched together.')
 
   FLAGS, unparsed = parser.parse_known_args()
   tf.app.run(main=main, argv=[sys.argv[0]] + unparsed)
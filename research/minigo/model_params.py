@@ -50,6 +50,10 @@ class MiniGoParams(object):
 
   # the number of simultaneous leaves in MCTS
   simultaneous_leaves = 8
+  # how many network evaluations to share between transpositions in MCTS
+  selfplay_transposition_table_size = 20000
+  # how many games to play concurrently, batching their network evaluations
+  selfplay_parallel_games = 1
 
   # holdout data for validation
   holdout_pct = 0.05  # How many games to hold out for validation
@@ -57,6 +61,7 @@ class MiniGoParams(object):
 
   # gather
   gather_generation = 50  # How many recent generations/models for gathered data
+  gather_num_workers = 8  # threads reading games and writing chunks
 
   # How many positions we should aggregate per 'chunk'.
   examples_per_chunk = 10000
@@ -69,6 +74,16 @@ class MiniGoParams(object):
   eval_readouts = 100  # How many readouts to make per move in evaluation
   eval_verbose = 1  # How verbose the players should be in evaluation
   eval_win_rate = 0.55  # Winner needs to win by a margin of 55%.
+  # The match stops early once an SPRT of the win rate of the candidate
+  # accepts eval_sprt_upper_win_rate or eval_sprt_lower_win_rate, with these
+  # error rates. Both must be far enough from each other for the test to
+  # decide within eval_games: with 0.35 and 0.75, 4 straight wins or losses
+  # decide. Otherwise the candidate needs to win eval_win_rate of the games.
+  eval_sprt_lower_win_rate = 0.35
+  eval_sprt_upper_win_rate = 0.75
+  eval_sprt_alpha = 0.05
+  eval_sprt_beta = 0.05
+  eval_parallel_games = 8  # how many evaluation games to play concurrently
 
 
 class DummyMiniGoParams(MiniGoParams):
@@ -17,8 +17,16 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
 import functools
+import itertools
+from multiprocessing.pool import ThreadPool
+import os
 import random
+import shutil
+import struct
+import tempfile
+import zlib
 
 import tensorflow as tf  # pylint: disable=g-bad-import-order
 
@@ -26,6 +34,7 @@ import coords
 import features as features_lib
 import numpy as np
 import sgf_wrapper
+import symmetries
 
 TF_RECORD_CONFIG = tf.python_io.TFRecordOptions(
     tf.python_io.TFRecordCompressionType.ZLIB)
@@ -182,19 +191,36 @@ def get_input_tensors(params, batch_size, tf_records, num_repeats=None,
 
 
 # End-to-end utility functions
-def make_dataset_from_selfplay(data_extracts, params):
+def make_dataset_from_selfplay(data_extracts, params,
+                               use_random_symmetry=False):
   """Make an iterable of tf.Examples.
 
+  The features of all positions are extracted together, see
+  features.extract_features_batch.
+
   Args:
     data_extracts: An iterable of (position, pi, result) tuples
     params: An object of hyperparameters
+    use_random_symmetry: Whether to apply a random symmetry (defined in
+      symmetries.py) to the features and the pi of each example.
 
   Returns:
     An iterable of tf.Examples.
   """
   board_size = params.board_size
-  tf_examples = (make_tf_example(features_lib.extract_features(
-      board_size, pos), pi, result) for pos, pi, result in data_extracts)
+  data_extracts = list(data_extracts)
+  if not data_extracts:
+    return iter([])
+  positions, pis, results = zip(*data_extracts)
+  features = features_lib.extract_features_batch(board_size, positions)
+  pis = np.stack(pis).astype(np.float32)
+  if use_random_symmetry:
+    symmetries_used, features = symmetries.randomize_symmetries_feat_batch(
+        features)
+    pis = symmetries.apply_symmetries_pi_batch(
+        board_size, symmetries_used, pis)
+  tf_examples = (make_tf_example(feature, pi, result)
+                 for feature, pi, result in zip(features, pis, results))
   return tf_examples
 
 
@@ -236,3 +262,171 @@ def shuffle_tf_examples(shuffle_buffer_size, gather_size, records_to_shuffle):
       yield list(result)
     except tf.errors.OutOfRangeError:
       break
+
+
+# Gathering records without TensorFlow sessions
+
+
+def read_raw_tf_records(filename):
+  """Read the serialized records of a ZLIB compressed tf.Record file.
+
+  The tf.Record framing is parsed directly, without building TensorFlow ops, so
+  that files can be read in parallel by plain Python threads. The CRCs of the
+  records are not verified.
+
+  Args:
+    filename: A tf.Record file written by write_tf_examples.
+
+  Returns:
+    A list of bytes, which are serialized tf.Examples.
+
+  Raises:
+    ValueError: if the file ends in the middle of a record.
+  """
+  with tf.gfile.GFile(filename, 'rb') as f:
+    # The compression here must agree with TF_RECORD_CONFIG.
+    data = zlib.decompress(f.read())
+  records = []
+  offset = 0
+  while offset < len(data):
+    # Each record is framed by its uint64 length and the masked CRC32C of the
+    # length, and followed by the masked CRC32C of the data.
+    if offset + 12 > len(data):
+      raise ValueError('Truncated record in {}'.format(filename))
+    length, = struct.unpack_from('<Q', data, offset)
+    start = offset + 12
+    offset = start + length + 4
+    if offset > len(data):
+      raise ValueError('Truncated record in {}'.format(filename))
+    records.append(data[start:start + length])
+  return records
+
+
+def _read_scratch_bucket(filename):
+  """Read the records appended to a scratch bucket by _shuffled_chunks."""
+  with open(filename, 'rb') as f:
+    data = f.read()
+  records = []
+  offset = 0
+  while offset < len(data):
+    length, = struct.unpack_from('<I', data, offset)
+    offset += 4
+    records.append(data[offset:offset + length])
+    offset += length
+  return records
+
+
+def _read_files_ahead(pool, filenames, max_files_ahead):
+  """Yield the records of filenames in order, read ahead by the pool.
+
+  Unlike pool.imap, which reads every file as fast as the pool can, at most
+  max_files_ahead files are being read or waiting to be consumed, which bounds
+  the number of decompressed files held in memory.
+  """
+  pending = collections.deque()
+  for filename in filenames:
+    if len(pending) >= max_files_ahead:
+      yield pending.popleft().get()
+    pending.append(pool.apply_async(read_raw_tf_records, (filename,)))
+  while pending:
+    yield pending.popleft().get()
+
+
+def _shuffled_chunks(records_to_shuffle, gather_size, pool, scratch_dir, rng,
+                     files_for_estimate, max_files_ahead):
+  """Yield lists of shuffled, serialized tf.Examples, see gather_tf_records."""
+  # Reads files ahead of the scatter pass, in the order of records_to_shuffle.
+  files_records = _read_files_ahead(pool, records_to_shuffle, max_files_ahead)
+  head = []
+  for records in files_records:
+    head.append(records)
+    if len(head) == files_for_estimate:
+      break
+  # The number of buckets only bounds the memory used by the gather pass: the
+  # shuffle is uniform whatever the number of buckets.
+  records_per_file = sum(map(len, head)) / max(1, len(head))
+  num_buckets = max(1, int(np.ceil(
+      records_per_file * len(records_to_shuffle) / gather_size)))
+
+  # Scatter pass: every record goes to a uniformly random bucket.
+  bucket_dir = tempfile.mkdtemp(prefix='gather-', dir=scratch_dir)
+  try:
+    bucket_files = [os.path.join(bucket_dir, str(i))
+                    for i in range(num_buckets)]
+    buckets = [open(f, 'wb') for f in bucket_files]
+    try:
+      for records in itertools.chain(head, files_records):
+        for record, bucket in zip(records,
+                                  rng.randint(0, num_buckets, len(records))):
+          buckets[bucket].write(struct.pack('<I', len(record)))
+          buckets[bucket].write(record)
+    finally:
+      for bucket in buckets:
+        bucket.close()
+
+    # Gather pass: shuffling each bucket and concatenating the buckets yields a
+    # uniformly random permutation of all records, which is cut into chunks.
+    pending = []
+    for bucket_file in bucket_files:
+      records = _read_scratch_bucket(bucket_file)
+      os.remove(bucket_file)
+      rng.shuffle(records)
+      pending.extend(records)
+      while len(pending) >= gather_size:
+        yield pending[:gather_size]
+        pending = pending[gather_size:]
+    if pending:
+      yield pending
+  finally:
+    shutil.rmtree(bucket_dir, ignore_errors=True)
+
+
+def gather_tf_records(records_to_shuffle, gather_size, output_pattern,
+                      num_workers=8, scratch_dir=None, seed=None):
+  """Shuffle tf.Records into chunks, without TensorFlow sessions.
+
+  This is an external shuffle with bounded memory: the records are first
+  scattered to random buckets in scratch files on local disk, then each bucket
+  is shuffled in memory and the buckets are cut into chunks of gather_size
+  records. Input files are read, and chunks written, by num_workers threads, so
+  that gathering is bound by I/O rather than by a TensorFlow session.
+
+  Args:
+    records_to_shuffle: A list of filenames of tf.Records written by
+      write_tf_examples.
+    gather_size: The number of tf.Examples to be gathered together per chunk.
+    output_pattern: A format string, formatted with the index of a chunk to
+      get its filename.
+    num_workers: Number of threads reading files and writing chunks.
+    scratch_dir: Local directory for the scratch buckets, in a system
+      temporary directory if None. Holds a copy of the uncompressed records.
+    seed: Seed of the shuffle, for reproducibility.
+
+  Returns:
+    A tuple of the list of chunk filenames written, and the number of
+    tf.Examples in the chunks.
+  """
+  rng = np.random.RandomState(seed)
+  pool = ThreadPool(num_workers)
+  try:
+    chunks = _shuffled_chunks(
+        records_to_shuffle, gather_size, pool, scratch_dir, rng,
+        files_for_estimate=4 * num_workers, max_files_ahead=num_workers)
+    filenames = []
+    pending_writes = []
+    num_examples = 0
+    for i, chunk in enumerate(chunks):
+      filename = output_pattern.format(i)
+      # Bound the number of chunks held in memory while they are written.
+      if len(pending_writes) >= num_workers:
+        pending_writes.pop(0).get()
+      pending_writes.append(pool.apply_async(
+          write_tf_examples, (filename, chunk), {'serialize': False}))
+      filenames.append(filename)
+      num_examples += len(chunk)
+    for pending_write in pending_writes:
+      pending_write.get()
+  finally:
+    pool.close()
+    pool.join()
+  return filenames, num_examples
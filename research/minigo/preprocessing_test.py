@@ -18,7 +18,12 @@ from __future__ import division
 from __future__ import print_function
 
 import itertools
+from multiprocessing.pool import ThreadPool
+import os
 import tempfile
+import threading
+import time
+import unittest.mock
 
 import tensorflow as tf  # pylint: disable=g-bad-import-order
 
@@ -135,6 +140,84 @@ class TestPreprocessing(utils_test.MiniGoUnitTest):
 
     self.assertEqualData(original_data, recovered_data)
 
+  def test_read_raw_tf_records(self):
+    np.random.seed(1)
+    raw_data = self.create_random_data(10)
+    tfexamples = list(map(preprocessing.make_tf_example, *zip(*raw_data)))
+
+    with tempfile.NamedTemporaryFile() as record_file:
+      preprocessing.write_tf_examples(record_file.name, tfexamples)
+      records = preprocessing.read_raw_tf_records(record_file.name)
+
+    self.assertEqual([ex.SerializeToString() for ex in tfexamples], records)
+
+  def test_gather_tf_records(self):
+    np.random.seed(1)
+    raw_data = self.create_random_data(25)
+    tfexamples = list(map(preprocessing.make_tf_example, *zip(*raw_data)))
+    input_dir = tempfile.mkdtemp()
+    output_dir = tempfile.mkdtemp()
+    input_files = []
+    for i in range(5):
+      input_files.append(os.path.join(input_dir, '{}.tfrecord.zz'.format(i)))
+      preprocessing.write_tf_examples(input_files[-1], tfexamples[i::5])
+
+    chunks, num_examples = preprocessing.gather_tf_records(
+        input_files, 10, os.path.join(output_dir, 'chunk-{}.tfrecord.zz'),
+        num_workers=2, scratch_dir=output_dir, seed=1)
+    # 2 chunks of 10, 1 incomplete chunk of 5, and no scratch files left.
+    self.assertEqual(25, num_examples)
+    self.assertEqual(
+        [os.path.join(output_dir, 'chunk-{}.tfrecord.zz'.format(i))
+         for i in range(3)], chunks)
+    self.assertEqual(sorted(os.path.basename(c) for c in chunks),
+                     sorted(os.listdir(output_dir)))
+    self.assertEqual([10, 10, 5], [
+        len(preprocessing.read_raw_tf_records(c)) for c in chunks])
+
+    original_data = list(itertools.chain.from_iterable(
+        self.extract_data(f) for f in input_files))
+    recovered_data = list(itertools.chain.from_iterable(
+        self.extract_data(c) for c in chunks))
+    # The chunks are shuffled across input files.
+    self.assertNotEqual([d[2] for d in original_data],
+                        [d[2] for d in recovered_data])
+
+    def sort_key(nparray_tuple):
+      return nparray_tuple[2]
+    self.assertEqualData(sorted(original_data, key=sort_key),
+                         sorted(recovered_data, key=sort_key))
+
+  def test_gather_tf_records_bounded_read_ahead(self):
+    lock = threading.Lock()
+    state = {'read': 0, 'consumed': 0, 'max_ahead': 0}
+
+    def fake_read(filename):
+      with lock:
+        state['read'] += 1
+        state['max_ahead'] = max(state['max_ahead'],
+                                 state['read'] - state['consumed'])
+      return [filename.encode()]
+
+    pool = ThreadPool(4)
+    try:
+      with unittest.mock.patch.object(
+          preprocessing, 'read_raw_tf_records', fake_read):
+        filenames = [str(i) for i in range(200)]
+        read = []
+        for records in preprocessing._read_files_ahead(pool, filenames, 4):
+          time.sleep(0.001)
+          with lock:
+            state['consumed'] += 1
+          read.extend(records)
+    finally:
+      pool.close()
+      pool.join()
+    # Files are yielded in order, and at most 4 are read but not consumed, plus
+    # the one being consumed.
+    self.assertEqual([f.encode() for f in filenames], read)
+    self.assertLessEqual(state['max_ahead'], 5)
+
   def test_make_dataset_from_sgf(self):
     with tempfile.NamedTemporaryFile() as sgf_file, \
         tempfile.NamedTemporaryFile() as record_file:
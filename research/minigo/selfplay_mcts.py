@@ -23,10 +23,68 @@ import time
 
 import coords
 from gtp_wrapper import MCTSPlayer
+from strategies import TranspositionTable
+
+
+def _new_player(board_size, network, resign_threshold, simultaneous_leaves,
+                verbosity, transposition_table_size=0):
+  """Creates a player for a new self-play game."""
+  player = MCTSPlayer(board_size, network, resign_threshold=resign_threshold,
+                      verbosity=verbosity, num_parallel=simultaneous_leaves,
+                      transposition_table_size=transposition_table_size)
+  # Disable resign in 5% of games
+  if random.random() < 0.05:
+    player.resign_threshold = -1.0
+
+  player.initialize_game()
+  return player
+
+
+def _play_searched_move(player, readouts, start, verbosity):
+  """Plays the move of a player once its readouts are done.
+
+  Args:
+    player: the MCTSPlayer.
+    readouts: the number of readouts of the search.
+    start: the time the search started.
+    verbosity: the verbosity of the self-play match
+
+  Returns:
+    True if the game is over.
+  """
+  if verbosity >= 3:
+    print(player.root.position)
+    print(player.root.describe())
+
+  if player.should_resign():
+    player.set_result(-1 * player.root.position.to_play, was_resign=True)
+    return True
+  move = player.pick_move()
+  player.play_move(move)
+  if player.root.is_done():
+    player.set_result(player.root.position.result(), was_resign=False)
+    return True
+
+  if (verbosity >= 2) or (
+      verbosity >= 1 and player.root.position.n % 10 == 9):
+    print("Q: {:.5f}".format(player.root.Q))
+    dur = time.time() - start
+    print("%d: %d readouts, %.3f s/100. (%.2f sec)" % (
+        player.root.position.n, readouts, dur / readouts * 100.0, dur))
+  if verbosity >= 3:
+    print("Played >>", coords.to_kgs(player.board_size, move))
+  return False
+
+
+def _print_result(player, verbosity):
+  if verbosity >= 2:
+    print("%s: %.3f" % (player.result_string, player.root.Q), file=sys.stderr)
+    print(player.root.position,
+          player.root.position.score(), file=sys.stderr)
 
 
 def play(board_size, network, readouts, resign_threshold, simultaneous_leaves,
-         verbosity=0):
+         verbosity=0, transposition_table_size=0):
   """Plays out a self-play match.
 
   Args:
@@ -36,6 +94,9 @@ def play(board_size, network, readouts, resign_threshold, simultaneous_leaves,
     resign_threshold: the threshold to resign at in the match
     simultaneous_leaves: the number of simultaneous leaves in MCTS
     verbosity: the verbosity of the self-play match
+    transposition_table_size: the number of network evaluations shared by
+      transpositions in MCTS, see strategies.TranspositionTable. 0 disables
+      the sharing.
 
   Returns:
     the final position
@@ -43,13 +104,8 @@ def play(board_size, network, readouts, resign_threshold, simultaneous_leaves,
     the n-ary tensor of floats representing the original value-net estimate
       where n is the number of moves in the game.
   """
-  player = MCTSPlayer(board_size, network, resign_threshold=resign_threshold,
-                      verbosity=verbosity, num_parallel=simultaneous_leaves)
-  # Disable resign in 5% of games
-  if random.random() < 0.05:
-    player.resign_threshold = -1.0
-
-  player.initialize_game()
+  player = _new_player(board_size, network, resign_threshold,
+                       simultaneous_leaves, verbosity, transposition_table_size)
 
   # Must run this once at the start, so that noise injection actually
   # affects the first move of the game.
@@ -65,32 +121,221 @@ def play(board_size, network, readouts, resign_threshold, simultaneous_leaves,
     while player.root.N < current_readouts + readouts:
       player.tree_search()
 
-    if verbosity >= 3:
-      print(player.root.position)
-      print(player.root.describe())
-
-    if player.should_resign():
-      player.set_result(-1 * player.root.position.to_play, was_resign=True)
-      break
-    move = player.pick_move()
-    player.play_move(move)
-    if player.root.is_done():
-      player.set_result(player.root.position.result(), was_resign=False)
+    if _play_searched_move(player, readouts, start, verbosity):
       break
 
-    if (verbosity >= 2) or (
-        verbosity >= 1 and player.root.position.n % 10 == 9):
-      print("Q: {:.5f}".format(player.root.Q))
-      dur = time.time() - start
-      print("%d: %d readouts, %.3f s/100. (%.2f sec)" % (
-          player.root.position.n, readouts, dur / readouts * 100.0, dur))
-    if verbosity >= 3:
-      print("Played >>",
-            coords.to_kgs(coords.from_flat(player.root.fmove)))
+  _print_result(player, verbosity)
+  return player
 
-  if verbosity >= 2:
-    print("%s: %.3f" % (player.result_string, player.root.Q), file=sys.stderr)
-    print(player.root.position,
-          player.root.position.score(), file=sys.stderr)
 
-  return player
+class ConcurrentGames(object):
+  """Plays games concurrently, batching network evaluations across games.
+
+  Each step selects simultaneous leaves in the tree of the player to move of
+  every active game, and evaluates the leaves of each network with a single
+  run_many call. Subclasses create the games, which have a player_to_move()
+  method and readouts_target and start attributes, and play their moves.
+  """
+
+  def __init__(self, readouts, num_parallel_games):
+    """Initializes the games.
+
+    Args:
+      readouts: the number of readouts of the search of each move
+      num_parallel_games: the number of games played concurrently
+    """
+    self.readouts = readouts
+    self.num_parallel_games = num_parallel_games
+    self.num_batches = 0
+    self.num_evaluated_positions = 0
+    self.elapsed_time = 0.0
+
+  def _new_game(self, index):
+    """Returns the state of the game of the given index."""
+    raise NotImplementedError
+
+  def _start_search(self, game):
+    """Called when the search of a move starts, with an expanded root."""
+    pass
+
+  def _play_searched_move(self, game):
+    """Plays the move of the player to move, returns True if the game is over.
+    """
+    raise NotImplementedError
+
+  def _run_many(self, network, positions):
+    """Evaluates positions with a network, returns move_probs and values."""
+    return network.run_many(positions)
+
+  def _play_games(self, num_games):
+    """Plays games.
+
+    Stopping the iteration early abandons the games in progress.
+
+    Args:
+      num_games: the number of games to play.
+
+    Yields:
+      The state of each game, once it is over.
+    """
+    games = []
+    num_started = 0
+    while games or num_started < num_games:
+      start = time.time()
+      while (len(games) < self.num_parallel_games and
+             num_started < num_games):
+        games.append(self._new_game(num_started))
+        num_started += 1
+
+      # Select the leaves of all games, grouped by network.
+      game_leaves = []
+      network_positions = {}
+      for game in games:
+        player = game.player_to_move()
+        # The root of a new move is evaluated alone, as in play().
+        num_parallel = None if game.readouts_target is not None else 1
+        leaves = player.select_leaves(num_parallel)
+        game_leaves.append(leaves)
+        network_positions.setdefault(player.network, []).extend(
+            leaf.position for leaf in leaves)
+      network_results = {}
+      for network, positions in network_positions.items():
+        if positions:
+          move_probs, values = self._run_many(network, positions)
+          network_results[network] = (list(move_probs), list(values), 0)
+          self.num_batches += 1
+          self.num_evaluated_positions += len(positions)
+      for game, leaves in zip(games, game_leaves):
+        if not leaves:
+          continue
+        player = game.player_to_move()
+        move_probs, values, offset = network_results[player.network]
+        player.incorporate_leaves(
+            leaves, move_probs[offset:offset + len(leaves)],
+            values[offset:offset + len(leaves)])
+        network_results[player.network] = (
+            move_probs, values, offset + len(leaves))
+
+      # Play the moves of the games done with their search.
+      finished_games = []
+      for game in games:
+        player = game.player_to_move()
+        if (game.readouts_target is not None and
+            player.root.N >= game.readouts_target):
+          game.readouts_target = None
+          if self._play_searched_move(game):
+            finished_games.append(game)
+            continue
+          player = game.player_to_move()
+        if game.readouts_target is None and player.root.is_expanded:
+          game.start = time.time()
+          self._start_search(game)
+          # we want to do "X additional readouts", rather than "up to X
+          # readouts".
+          game.readouts_target = player.root.N + self.readouts
+      self.elapsed_time += time.time() - start
+
+      for game in finished_games:
+        games.remove(game)
+        yield game
+
+
+class _Game(object):
+  """The state of a game of MultiGameSelfplay."""
+
+  def __init__(self, player):
+    self.player = player
+    # The root is expanded before the noise of the first move is injected.
+    self.readouts_target = None
+    self.start = None
+
+  def player_to_move(self):
+    return self.player
+
+
+class MultiGameSelfplay(ConcurrentGames):
+  """Plays self-play games concurrently, batching evaluations across games.
+
+  Each step selects simultaneous_leaves leaves in every active game, and
+  evaluates the leaves of all games with a single network.run_many call, so
+  the network runs on batches of up to
+  num_parallel_games * simultaneous_leaves positions. Games are searched and
+  played as with play().
+  """
+
+  def __init__(self, board_size, network, readouts, resign_threshold,
+               simultaneous_leaves, num_parallel_games, verbosity=0,
+               transposition_table_size=0):
+    """Initializes the self-play.
+
+    Args:
+      board_size: the go board size
+      network: the DualNet model
+      readouts: the number of readouts in MCTS
+      resign_threshold: the threshold to resign at in the match
+      simultaneous_leaves: the number of simultaneous leaves in MCTS of each
+        game
+      num_parallel_games: the number of games played concurrently
+      verbosity: the verbosity of the self-play matches
+      transposition_table_size: the number of network evaluations shared by
+        transpositions across the games, see strategies.TranspositionTable.
+        0 disables the sharing.
+    """
+    super(MultiGameSelfplay, self).__init__(readouts, num_parallel_games)
+    self.board_size = board_size
+    self.network = network
+    self.resign_threshold = resign_threshold
+    self.simultaneous_leaves = simultaneous_leaves
+    self.verbosity = verbosity
+    self.transposition_table = (TranspositionTable(transposition_table_size)
+                                if transposition_table_size else None)
+    self.num_games = 0
+
+  def _new_game(self, index):
+    return _Game(_new_player(
+        self.board_size, self.network, self.resign_threshold,
+        self.simultaneous_leaves, self.verbosity))
+
+  def _start_search(self, game):
+    game.player.root.inject_noise()
+
+  def _play_searched_move(self, game):
+    return _play_searched_move(game.player, self.readouts, game.start,
+                               self.verbosity)
+
+  def _run_many(self, network, positions):
+    if self.transposition_table is not None:
+      return self.transposition_table.run_many(network, positions)
+    return network.run_many(positions)
+
+  def play(self, num_games):
+    """Plays self-play games.
+
+    Args:
+      num_games: the number of games to play.
+
+    Yields:
+      The MCTSPlayer of each game, once the game is over.
+    """
+    for game in self._play_games(num_games):
+      self.num_games += 1
+      _print_result(game.player, self.verbosity)
+      yield game.player
+
+  def stats(self):
+    """Returns the throughput of the self-play so far.
+
+    Returns:
+      A dict with the number of finished games, the games per hour, the
+      average number of positions per network batch and the average batch
+      fill, the fraction of num_parallel_games * simultaneous_leaves.
+    """
+    average_batch_size = (self.num_evaluated_positions /
+                          max(self.num_batches, 1))
+    return {
+        'num_games': self.num_games,
+        'games_per_hour': 3600 * self.num_games / max(self.elapsed_time, 1e-9),
+        'average_batch_size': average_batch_size,
+        'average_batch_fill': average_batch_size / (
+            self.num_parallel_games * self.simultaneous_leaves),
+    }
@@ -0,0 +1,64 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for selfplay_mcts."""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import tensorflow as tf  # pylint: disable=g-bad-import-order
+
+import selfplay_mcts
+from strategies_test import DummyNet
+import utils_test
+
+tf.logging.set_verbosity(tf.logging.ERROR)
+
+
+class TestMultiGameSelfplay(utils_test.MiniGoUnitTest):
+
+  def test_play(self):
+    network = DummyNet()
+    multi_game_selfplay = selfplay_mcts.MultiGameSelfplay(
+        utils_test.BOARD_SIZE, network, readouts=4, resign_threshold=0.95,
+        simultaneous_leaves=2, num_parallel_games=2)
+    players = list(multi_game_selfplay.play(3))
+
+    self.assertEqual(len(players), 3)
+    for player in players:
+      self.assertTrue(player.result_string)
+      self.assertEqual(len(player.searches_pi), player.root.position.n)
+    stats = multi_game_selfplay.stats()
+    self.assertEqual(stats['num_games'], 3)
+    self.assertGreater(stats['games_per_hour'], 0)
+    # The leaves of both games are evaluated together.
+    self.assertGreater(stats['average_batch_size'], 2)
+    self.assertLessEqual(stats['average_batch_fill'], 1)
+    self.assertEqual(network.num_evaluations,
+                     multi_game_selfplay.num_evaluated_positions)
+
+  def test_play_with_transposition_table(self):
+    network = DummyNet()
+    multi_game_selfplay = selfplay_mcts.MultiGameSelfplay(
+        utils_test.BOARD_SIZE, network, readouts=4, resign_threshold=0.95,
+        simultaneous_leaves=2, num_parallel_games=2,
+        transposition_table_size=1000)
+    self.assertEqual(len(list(multi_game_selfplay.play(2))), 2)
+    # The empty boards of both games share their evaluation.
+    self.assertLess(network.num_evaluations,
+                    multi_game_selfplay.num_evaluated_positions)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -17,6 +17,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
 import os
 import random
 import sys
@@ -68,13 +69,63 @@ def _get_temperature_cutoff(board_size):
   return int((board_size * board_size) / 12)
 
 
+class TranspositionTable(object):
+  """A LRU cache of network evaluations, by go.Position.transposition_key.
+
+  Positions reached by different move orders share their evaluation, when the
+  network features of the positions are equal.
+  """
+
+  def __init__(self, max_size):
+    self.max_size = max_size
+    self.hits = 0
+    self.misses = 0
+    self._evaluations = collections.OrderedDict()
+
+  def __len__(self):
+    return len(self._evaluations)
+
+  def run_many(self, network, positions):
+    """Evaluates positions, running the network on the unknown ones only.
+
+    Args:
+      network: the DualNet model.
+      positions: a list of go.Position.
+
+    Returns:
+      The move probabilities and the values of the positions, as
+      network.run_many.
+    """
+    keys = [position.transposition_key() for position in positions]
+    unknown = collections.OrderedDict()
+    for key, position in zip(keys, positions):
+      if key in self._evaluations:
+        self._evaluations.move_to_end(key)
+        self.hits += 1
+      elif key in unknown:
+        self.hits += 1
+      else:
+        unknown[key] = position
+        self.misses += 1
+    if unknown:
+      move_probs, values = network.run_many(list(unknown.values()))
+      for key, move_prob, value in zip(unknown, move_probs, values):
+        self._evaluations[key] = (move_prob, value)
+    evaluations = [self._evaluations[key] for key in keys]
+    while len(self._evaluations) > self.max_size:
+      self._evaluations.popitem(last=False)
+    return ([move_prob for move_prob, _ in evaluations],
+            [value for _, value in evaluations])
+
+
 class MCTSPlayerMixin(object):
 
   # If 'simulations_per_move' is nonzero, it will perform that many reads
   # before playing. Otherwise, it uses 'seconds_per_move' of wall time'
   def __init__(self, board_size, network, seconds_per_move=5,
                simulations_per_move=0, resign_threshold=-0.90,
-               verbosity=0, two_player_mode=False, num_parallel=8):
+               verbosity=0, two_player_mode=False, num_parallel=8,
+               transposition_table_size=0):
     self.board_size = board_size
     self.network = network
     self.seconds_per_move = seconds_per_move
@@ -93,6 +144,9 @@ class MCTSPlayerMixin(object):
     self.result = 0
     self.result_string = None
     self.resign_threshold = -abs(resign_threshold)
+    # Network evaluations shared by transpositions, across moves and games.
+    self.transposition_table = (TranspositionTable(transposition_table_size)
+                                if transposition_table_size else None)
 
   def initialize_game(self, position=None):
     if position is None:
@@ -167,6 +221,30 @@ class MCTSPlayerMixin(object):
     return coords.from_flat(self.board_size, fcoord)
 
   def tree_search(self, num_parallel=None):
+    leaves = self.select_leaves(num_parallel)
+    if leaves:
+      positions = [leaf.position for leaf in leaves]
+      if self.transposition_table is not None:
+        move_probs, values = self.transposition_table.run_many(
+            self.network, positions)
+      else:
+        move_probs, values = self.network.run_many(positions)
+      self.incorporate_leaves(leaves, move_probs, values)
+
+  def select_leaves(self, num_parallel=None):
+    """Selects leaves to evaluate, with virtual losses on their paths.
+
+    Leaves at the end of the game are not evaluated: their true score is
+    backed up instead.
+
+    Args:
+      num_parallel: the number of leaves to select. Defaults to the
+        num_parallel of the player.
+
+    Returns:
+      A list of leaves, which must be passed to incorporate_leaves with their
+      evaluations.
+    """
     if num_parallel is None:
       num_parallel = self.num_parallel
     leaves = []
@@ -183,12 +261,13 @@ class MCTSPlayerMixin(object):
         continue
       leaf.add_virtual_loss(up_to=self.root)
       leaves.append(leaf)
-    if leaves:
-      move_probs, values = self.network.run_many(
-          [leaf.position for leaf in leaves])
-      for leaf, move_prob, value in zip(leaves, move_probs, values):
-        leaf.revert_virtual_loss(up_to=self.root)
-        leaf.incorporate_results(move_prob, value, up_to=self.root)
+    return leaves
+
+  def incorporate_leaves(self, leaves, move_probs, values):
+    """Reverts the virtual losses of leaves and backs up their evaluations."""
+    for leaf, move_prob, value in zip(leaves, move_probs, values):
+      leaf.revert_virtual_loss(up_to=self.root)
+      leaf.incorporate_results(move_prob, value, up_to=self.root)
 
   def show_path_to_root(self, node):
     max_depth = (self.board_size ** 2) * 1.4  # 505 moves for 19x19, 113 for 9x9
@@ -25,6 +25,7 @@ import coords
 import go
 import numpy as np
 from strategies import MCTSPlayerMixin, time_recommendation
+from strategies import TranspositionTable
 import utils_test
 
 ALMOST_DONE_BOARD = utils_test.load_board('''
@@ -76,6 +77,7 @@ class DummyNet():
           (utils_test.BOARD_SIZE ** 2) + 1) / (utils_test.BOARD_SIZE ** 2 + 1)
     self.fake_priors = fake_priors
     self.fake_value = fake_value
+    self.num_evaluations = 0
 
   def run(self, position):
     return self.fake_priors, self.fake_value
@@ -84,6 +86,7 @@ class DummyNet():
     if not positions:
       raise ValueError(
           "No positions passed! (Tensorflow would have failed here.")
+    self.num_evaluations += len(positions)
     return [self.fake_priors] * len(positions), [
         self.fake_value] * len(positions)
 
@@ -318,6 +321,33 @@ class TestMCTSPlayerMixin(utils_test.MiniGoUnitTest):
     self.assertEqual(player.result_string, 'W+{}'.format(
         player.root.position.komi))
 
+  def test_transposition_table(self):
+    net = DummyNet()
+    table = TranspositionTable(max_size=2)
+    empty = go.Position(utils_test.BOARD_SIZE)
+    a1 = empty.play_move((8, 0))
+    _, values = table.run_many(net, [empty, a1, empty])
+    self.assertEqual(values, [0, 0, 0])
+    self.assertEqual(net.num_evaluations, 2)
+    table.run_many(net, [go.Position(utils_test.BOARD_SIZE)])
+    self.assertEqual(net.num_evaluations, 2)
+    self.assertEqual((table.hits, table.misses), (2, 2))
+    # The least recently used evaluation, of a1, is evicted.
+    table.run_many(net, [empty.play_move((8, 1))])
+    self.assertEqual(len(table), 2)
+    table.run_many(net, [a1])
+    self.assertEqual(net.num_evaluations, 4)
+
+  def test_tree_search_with_transposition_table(self):
+    player = MCTSPlayerMixin(utils_test.BOARD_SIZE, DummyNet(),
+                             transposition_table_size=1000)
+    player.initialize_game()
+    for _ in range(20):
+      player.tree_search()
+    self.assertEqual(player.network.num_evaluations,
+                     player.transposition_table.misses)
+    self.assertGreater(player.root.N, 20)
+
   def test_extract_data_resign_end(self):
     player = MCTSPlayerMixin(utils_test.BOARD_SIZE, DummyNet())
     player.initialize_game()
@@ -84,3 +84,84 @@ def randomize_symmetries_feat(features):
 def invert_symmetries_pi(board_size, symmetries, pis):
   return [apply_symmetry_pi(board_size, invert_symmetry(s), pi)
           for s, pi in zip(symmetries, pis)]
+
+
+# Cache of _symmetry_permutations, by board size.
+_PERMUTATIONS = {}
+
+
+def _symmetry_permutations(board_size):
+  """Returns the symmetries as permutations of flattened coordinates.
+
+  Args:
+    board_size: the go board size.
+
+  Returns:
+    An int np.array of shape [len(SYMMETRIES), board_size * board_size], such
+    that row i gathers the flattened board transformed by SYMMETRIES[i].
+  """
+  if board_size not in _PERMUTATIONS:
+    flat_coords = np.arange(board_size * board_size).reshape(
+        [board_size, board_size])
+    _PERMUTATIONS[board_size] = np.stack(
+        [IMPLS[s](flat_coords).ravel() for s in SYMMETRIES])
+  return _PERMUTATIONS[board_size]
+
+
+def apply_symmetries_feat_batch(symmetries, features):
+  """Applies a symmetry to each of a batch of features.
+
+  Args:
+    symmetries: a list of symmetries, one per example.
+    features: a np.array of shape [batch_size, N, N, num_planes].
+
+  Returns:
+    The transformed features, of the shape of features.
+  """
+  batch_size, board_size, _, num_planes = features.shape
+  permutations = _symmetry_permutations(board_size)[
+      [SYMMETRIES.index(s) for s in symmetries]]
+  flat_features = features.reshape(
+      [batch_size, board_size * board_size, num_planes])
+  return flat_features[
+      np.arange(batch_size)[:, np.newaxis], permutations].reshape(
+          features.shape)
+
+
+def apply_symmetries_pi_batch(board_size, symmetries, pis):
+  """Applies a symmetry to each of a batch of move probabilities.
+
+  Args:
+    board_size: the go board size.
+    symmetries: a list of symmetries, one per example.
+    pis: a np.array of shape [batch_size, N * N + 1].
+
+  Returns:
+    The transformed move probabilities. The pass move is unchanged.
+  """
+  pis = np.asarray(pis)
+  permutations = _symmetry_permutations(board_size)[
+      [SYMMETRIES.index(s) for s in symmetries]]
+  transformed = np.copy(pis)
+  transformed[:, :-1] = pis[np.arange(len(pis))[:, np.newaxis], permutations]
+  return transformed
+
+
+def randomize_symmetries_feat_batch(features):
+  """Applies a random symmetry to each of a batch of features.
+
+  Args:
+    features: a np.array of shape [batch_size, N, N, num_planes].
+
+  Returns:
+    The list of symmetries used and the transformed features.
+  """
+  symmetries_used = [random.choice(SYMMETRIES) for _ in range(len(features))]
+  return symmetries_used, apply_symmetries_feat_batch(symmetries_used,
+                                                      features)
+
+
+def invert_symmetries_pi_batch(board_size, symmetries, pis):
+  """Inverts the symmetries of a batch of move probabilities."""
+  return apply_symmetries_pi_batch(
+      board_size, [invert_symmetry(s) for s in symmetries], pis)
@@ -114,6 +114,30 @@ class TestSymmetryOperations(utils_test.MiniGoUnitTest):
               transformed_board[
                   coords.from_flat(utils_test.BOARD_SIZE, new_coord)])
 
+  def test_batch_operations(self):
+    feats = np.random.random(
+        [len(symmetries.SYMMETRIES), utils_test.BOARD_SIZE,
+         utils_test.BOARD_SIZE, 3])
+    pis = np.random.random(
+        [len(symmetries.SYMMETRIES), utils_test.BOARD_SIZE ** 2 + 1])
+    syms = symmetries.SYMMETRIES[::-1]
+    self.assertEqualNPArray(
+        symmetries.apply_symmetries_feat_batch(syms, feats),
+        np.stack([symmetries.apply_symmetry_feat(s, f)
+                  for s, f in zip(syms, feats)]))
+    self.assertEqualNPArray(
+        symmetries.apply_symmetries_pi_batch(utils_test.BOARD_SIZE, syms, pis),
+        np.stack([symmetries.apply_symmetry_pi(utils_test.BOARD_SIZE, s, pi)
+                  for s, pi in zip(syms, pis)]))
+    self.assertEqualNPArray(
+        symmetries.invert_symmetries_pi_batch(utils_test.BOARD_SIZE, syms, pis),
+        np.stack(symmetries.invert_symmetries_pi(
+            utils_test.BOARD_SIZE, syms, pis)))
+
+    used, randomized = symmetries.randomize_symmetries_feat_batch(feats)
+    self.assertEqualNPArray(
+        randomized, symmetries.apply_symmetries_feat_batch(used, feats))
+
 
 if __name__ == '__main__':
   tf.test.main()
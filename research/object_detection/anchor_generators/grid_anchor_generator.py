@@ -18,8 +18,15 @@
 Generates grid anchors on the fly as described in:
 "Faster R-CNN: Towards Real-Time Object Detection with Region Proposal Networks"
 Shaoqing Ren, Kaiming He, Ross Girshick, and Jian Sun.
+
+When the feature map shapes and the anchor parameters are known at graph
+construction time, anchors can be precomputed in NumPy and embedded in the
+graph as constants, so that they are not recomputed at every step.
 """
 
+import numbers
+
+import numpy as np
 import tensorflow as tf
 
 from object_detection.core import anchor_generator
@@ -35,7 +42,8 @@ class GridAnchorGenerator(anchor_generator.AnchorGenerator):
                aspect_ratios=(0.5, 1.0, 2.0),
                base_anchor_size=None,
                anchor_stride=None,
-               anchor_offset=None):
+               anchor_offset=None,
+               precompute_static_anchors=False):
     """Constructs a GridAnchorGenerator.
 
     Args:
@@ -52,6 +60,9 @@ class GridAnchorGenerator(anchor_generator.AnchorGenerator):
                      field size, but may need additional calculation if other
                      padding is used (length-2 float32 list or tensor,
                      default=[0, 0])
+      precompute_static_anchors: whether to compute the anchors in NumPy and
+        embed them in the graph as constants when the feature map shape and the
+        anchor parameters are static. Anchors are cached by feature map shape.
     """
     # Handle argument defaults
     if base_anchor_size is None:
@@ -69,6 +80,8 @@ class GridAnchorGenerator(anchor_generator.AnchorGenerator):
     self._base_anchor_size = base_anchor_size
     self._anchor_stride = anchor_stride
     self._anchor_offset = anchor_offset
+    self._precompute_static_anchors = precompute_static_anchors
+    self._static_anchors_cache = {}
 
   def name_scope(self):
     return 'GridAnchorGenerator'
@@ -102,12 +115,11 @@ class GridAnchorGenerator(anchor_generator.AnchorGenerator):
       ValueError: if feature_map_shape_list does not consist of pairs of
         integers
     """
-    if not (isinstance(feature_map_shape_list, list)
-            and len(feature_map_shape_list) == 1):
-      raise ValueError('feature_map_shape_list must be a list of length 1.')
-    if not all([isinstance(list_item, tuple) and len(list_item) == 2
-                for list_item in feature_map_shape_list]):
-      raise ValueError('feature_map_shape_list must be a list of pairs.')
+    self._check_feature_map_shape_list(feature_map_shape_list)
+    if self._precompute_static_anchors:
+      static_anchors = self._get_static_anchors(feature_map_shape_list)
+      if static_anchors is not None:
+        return constant_anchors(static_anchors)
     grid_height, grid_width = feature_map_shape_list[0]
     scales_grid, aspect_ratios_grid = ops.meshgrid(self._scales,
                                                    self._aspect_ratios)
@@ -128,6 +140,105 @@ class GridAnchorGenerator(anchor_generator.AnchorGenerator):
     anchors.add_field('feature_map_index', anchor_indices)
     return [anchors]
 
+  def _check_feature_map_shape_list(self, feature_map_shape_list):
+    if not (isinstance(feature_map_shape_list, list)
+            and len(feature_map_shape_list) == 1):
+      raise ValueError('feature_map_shape_list must be a list of length 1.')
+    if not all([isinstance(list_item, tuple) and len(list_item) == 2
+                for list_item in feature_map_shape_list]):
+      raise ValueError('feature_map_shape_list must be a list of pairs.')
+
+  def _get_static_anchors(self, feature_map_shape_list):
+    """Computes anchors in NumPy, or returns None if they are not static."""
+    if not is_static_shape_list(feature_map_shape_list):
+      return None
+    anchor_parameters = [get_static_value(value) for value in [
+        self._scales, self._aspect_ratios, self._base_anchor_size,
+        self._anchor_stride, self._anchor_offset]]
+    if any(value is None for value in anchor_parameters):
+      return None
+    key = tuple(feature_map_shape_list)
+    if key not in self._static_anchors_cache:
+      scales, aspect_ratios, base_anchor_size, anchor_stride, anchor_offset = (
+          anchor_parameters)
+      scales_grid, aspect_ratios_grid = np.meshgrid(scales, aspect_ratios)
+      grid_height, grid_width = feature_map_shape_list[0]
+      self._static_anchors_cache[key] = [tile_anchors_np(
+          grid_height, grid_width, scales_grid.ravel(),
+          aspect_ratios_grid.ravel(), base_anchor_size, anchor_stride,
+          anchor_offset)]
+    return self._static_anchors_cache[key]
+
+  def generate_np(self, feature_map_shape_list):
+    """Generates anchors as NumPy arrays, e.g. for post-processing.
+
+    Args:
+      feature_map_shape_list: list of pairs of integer convnet layer
+        resolutions in the format [(height_0, width_0)].
+
+    Returns:
+      A list with a float32 numpy array of shape [num_anchors, 4] holding the
+      same anchors as the `generate` function.
+
+    Raises:
+      ValueError: if feature_map_shape_list is not a list of one pair of
+        integers, or if the anchor parameters are only known at run time.
+    """
+    self._check_feature_map_shape_list(feature_map_shape_list)
+    static_anchors = self._get_static_anchors(feature_map_shape_list)
+    if static_anchors is None:
+      raise ValueError('Anchors can only be generated in NumPy when the '
+                       'feature map shapes and anchor parameters are static.')
+    return static_anchors
+
+
+def get_static_value(value):
+  """Returns the value of a constant tensor or of a nested list of numbers.
+
+  Args:
+    value: a tensor, a number or a (nested) list or tuple of numbers or
+      tensors.
+
+  Returns:
+    A float32 numpy array, or None if value depends on tensors whose values are
+    only known at run time.
+  """
+  if isinstance(value, tf.Tensor):
+    value = tf.contrib.util.constant_value(value)
+    if value is None:
+      return None
+  elif isinstance(value, (list, tuple)):
+    values = [get_static_value(item) for item in value]
+    if any(item is None for item in values):
+      return None
+    value = values
+  return np.asarray(value, dtype=np.float32)
+
+
+def is_static_shape_list(feature_map_shape_list):
+  """Returns whether all feature map shapes are pairs of python integers."""
+  return all(isinstance(dim, numbers.Integral)
+             for shape in feature_map_shape_list for dim in shape)
+
+
+def constant_anchors(anchors_list):
+  """Converts NumPy anchors to BoxLists of constants.
+
+  Args:
+    anchors_list: a list of float32 numpy arrays of shape [num_anchors_i, 4],
+      one for each feature map.
+
+  Returns:
+    a list of BoxLists holding the anchors, with a `feature_map_index` field.
+  """
+  boxes_list = []
+  for feature_map_index, anchors in enumerate(anchors_list):
+    boxes = box_list.BoxList(tf.constant(anchors, dtype=tf.float32))
+    boxes.add_field('feature_map_index', tf.constant(
+        feature_map_index, dtype=tf.float32, shape=[anchors.shape[0]]))
+    boxes_list.append(boxes)
+  return boxes_list
+
 
 def tile_anchors(grid_height,
                  grid_width,
@@ -191,6 +302,59 @@ def tile_anchors(grid_height,
   return box_list.BoxList(bbox_corners)
 
 
+def tile_anchors_np(grid_height,
+                    grid_width,
+                    scales,
+                    aspect_ratios,
+                    base_anchor_size,
+                    anchor_stride,
+                    anchor_offset):
+  """NumPy version of tile_anchors.
+
+  Args:
+    grid_height: size of the grid in the y direction (int)
+    grid_width: size of the grid in the x direction (int)
+    scales: a 1-d float32 numpy array representing the scale of each box in the
+      basis set.
+    aspect_ratios: a 1-d float32 numpy array representing the aspect ratio of
+      each box in the basis set.
+    base_anchor_size: base anchor size as [height, width]
+      (float32 numpy array of shape [2])
+    anchor_stride: difference in centers between base anchors for adjacent grid
+                   positions (float32 numpy array of shape [2])
+    anchor_offset: center of the anchor with scale and aspect ratio 1 for the
+                   upper left element of the grid (float32 numpy array of
+                   shape [2])
+  Returns:
+    a float32 numpy array of shape [N, 4] holding the same anchors, in the same
+    order, as tile_anchors.
+  """
+  scales = np.asarray(scales, dtype=np.float32)
+  aspect_ratios = np.asarray(aspect_ratios, dtype=np.float32)
+  base_anchor_size = np.asarray(base_anchor_size, dtype=np.float32)
+  anchor_stride = np.asarray(anchor_stride, dtype=np.float32)
+  anchor_offset = np.asarray(anchor_offset, dtype=np.float32)
+  ratio_sqrts = np.sqrt(aspect_ratios)
+  heights = scales / ratio_sqrts * base_anchor_size[0]
+  widths = scales * ratio_sqrts * base_anchor_size[1]
+
+  # Anchors are ordered by y center, then x center, then basis box.
+  y_centers = np.arange(grid_height, dtype=np.float32)
+  y_centers = y_centers * anchor_stride[0] + anchor_offset[0]
+  x_centers = np.arange(grid_width, dtype=np.float32)
+  x_centers = x_centers * anchor_stride[1] + anchor_offset[1]
+  grid_shape = [grid_height, grid_width, len(scales)]
+  bbox_centers = np.stack([
+      np.broadcast_to(y_centers[:, np.newaxis, np.newaxis], grid_shape),
+      np.broadcast_to(x_centers[np.newaxis, :, np.newaxis], grid_shape)
+  ], axis=3).reshape([-1, 2])
+  bbox_sizes = np.stack([np.broadcast_to(heights, grid_shape),
+                         np.broadcast_to(widths, grid_shape)],
+                        axis=3).reshape([-1, 2])
+  return np.concatenate([bbox_centers - .5 * bbox_sizes,
+                         bbox_centers + .5 * bbox_sizes], axis=1)
+
+
 def _center_size_bbox_to_corners_bbox(centers, sizes):
   """Converts bbox center-size representation to corners representation.
 
@@ -99,6 +99,42 @@ class GridAnchorGeneratorTest(test_case.TestCase):
                                            np.array(2, dtype=np.int32)])
     self.assertAllClose(anchor_corners_out, exp_anchor_corners)
 
+  def test_precomputed_anchors_match_generated_anchors(self):
+    def graph_fn():
+      anchors_list = []
+      for precompute_static_anchors in [False, True]:
+        anchor_generator = grid_anchor_generator.GridAnchorGenerator(
+            scales=[0.5, 1.0, 2.0],
+            aspect_ratios=[0.5, 1.0, 2.0],
+            base_anchor_size=[10, 12],
+            anchor_stride=[19, 17],
+            anchor_offset=[3, -2],
+            precompute_static_anchors=precompute_static_anchors)
+        anchors_list.append(anchor_generator.generate(
+            feature_map_shape_list=[(3, 5)])[0].get())
+      return anchors_list
+    anchor_corners_out, precomputed_anchor_corners_out = self.execute(
+        graph_fn, [])
+    self.assertEqual((135, 4), precomputed_anchor_corners_out.shape)
+    self.assertAllClose(anchor_corners_out, precomputed_anchor_corners_out)
+
+  def test_generate_np(self):
+    anchor_generator = grid_anchor_generator.GridAnchorGenerator(
+        [0.5, 1.0, 2.0], [1.0], base_anchor_size=[10, 10],
+        anchor_stride=[19, 19], anchor_offset=[0, 0])
+    anchor_corners = anchor_generator.generate_np(
+        feature_map_shape_list=[(2, 2)])[0]
+    exp_anchor_corners = [[-2.5, -2.5, 2.5, 2.5], [-5., -5., 5., 5.],
+                          [-10., -10., 10., 10.], [-2.5, 16.5, 2.5, 21.5],
+                          [-5., 14., 5, 24], [-10., 9., 10, 29],
+                          [16.5, -2.5, 21.5, 2.5], [14., -5., 24, 5],
+                          [9., -10., 29, 10], [16.5, 16.5, 21.5, 21.5],
+                          [14., 14., 24, 24], [9., 9., 29, 29]]
+    self.assertAllClose(anchor_corners, exp_anchor_corners)
+    with self.assertRaises(ValueError):
+      anchor_generator.generate_np(
+          feature_map_shape_list=[(tf.placeholder(tf.int32), 2)])
+
 
 if __name__ == '__main__':
   tf.test.main()
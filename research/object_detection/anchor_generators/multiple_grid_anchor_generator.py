@@ -21,6 +21,9 @@ described in:
 Wei Liu, Dragomir Anguelov, Dumitru Erhan, Christian Szegedy, Scott Reed,
 Cheng-Yang Fu, Alexander C. Berg
 (see Section 2.2: Choosing scales and aspect ratios for default boxes)
+
+For fixed-size inputs, anchors can be precomputed in NumPy and embedded in the
+graph as constants, see `precompute_static_anchors`.
 """
 
 import numpy as np
@@ -40,7 +43,8 @@ class MultipleGridAnchorGenerator(anchor_generator.AnchorGenerator):
                base_anchor_size=None,
                anchor_strides=None,
                anchor_offsets=None,
-               clip_window=None):
+               clip_window=None,
+               precompute_static_anchors=False):
     """Constructs a MultipleGridAnchorGenerator.
 
     To construct anchors, at multiple grid resolutions, one must provide a
@@ -83,6 +87,10 @@ class MultipleGridAnchorGenerator(anchor_generator.AnchorGenerator):
       clip_window: a tensor of shape [4] specifying a window to which all
         anchors should be clipped. If clip_window is None, then no clipping
         is performed.
+      precompute_static_anchors: whether to compute the anchors in NumPy and
+        embed them in the graph as constants when the feature map shapes, the
+        image size and the anchor parameters are static. Anchors are cached by
+        feature map shapes and image size.
 
     Raises:
       ValueError: if box_specs_list is not a list of list of pairs
@@ -102,6 +110,8 @@ class MultipleGridAnchorGenerator(anchor_generator.AnchorGenerator):
     if clip_window is not None and clip_window.get_shape().as_list() != [4]:
       raise ValueError('clip_window must either be None or a shape [4] tensor')
     self._clip_window = clip_window
+    self._precompute_static_anchors = precompute_static_anchors
+    self._static_anchors_cache = {}
     self._scales = []
     self._aspect_ratios = []
     for box_spec in self._box_specs:
@@ -172,13 +182,12 @@ class MultipleGridAnchorGenerator(anchor_generator.AnchorGenerator):
       ValueError: if feature_map_shape_list does not consist of pairs of
         integers
     """
-    if not (isinstance(feature_map_shape_list, list)
-            and len(feature_map_shape_list) == len(self._box_specs)):
-      raise ValueError('feature_map_shape_list must be a list with the same '
-                       'length as self._box_specs')
-    if not all([isinstance(list_item, tuple) and len(list_item) == 2
-                for list_item in feature_map_shape_list]):
-      raise ValueError('feature_map_shape_list must be a list of pairs.')
+    self._check_feature_map_shape_list(feature_map_shape_list)
+    if self._precompute_static_anchors:
+      static_anchors = self._get_static_anchors(feature_map_shape_list,
+                                                im_height, im_width)
+      if static_anchors is not None:
+        return grid_anchor_generator.constant_anchors(static_anchors)
 
     im_height = tf.to_float(im_height)
     im_width = tf.to_float(im_width)
@@ -240,6 +249,102 @@ class MultipleGridAnchorGenerator(anchor_generator.AnchorGenerator):
 
     return anchor_grid_list
 
+  def _check_feature_map_shape_list(self, feature_map_shape_list):
+    if not (isinstance(feature_map_shape_list, list)
+            and len(feature_map_shape_list) == len(self._box_specs)):
+      raise ValueError('feature_map_shape_list must be a list with the same '
+                       'length as self._box_specs')
+    if not all([isinstance(list_item, tuple) and len(list_item) == 2
+                for list_item in feature_map_shape_list]):
+      raise ValueError('feature_map_shape_list must be a list of pairs.')
+
+  def _get_static_anchors(self, feature_map_shape_list, im_height, im_width):
+    """Computes anchors in NumPy, or returns None if they are not static.
+
+    Mirrors the computations of `_generate` in float32.
+    """
+    if not grid_anchor_generator.is_static_shape_list(feature_map_shape_list):
+      return None
+    static_values = [grid_anchor_generator.get_static_value(value) for value in
+                     [im_height, im_width, self._base_anchor_size,
+                      self._anchor_strides or [], self._anchor_offsets or []]]
+    clip_window = None
+    if self._clip_window is not None:
+      clip_window = grid_anchor_generator.get_static_value(self._clip_window)
+      static_values.append(clip_window)
+    if any(value is None for value in static_values):
+      return None
+    im_height, im_width, base_anchor_size = static_values[:3]
+    key = (tuple(feature_map_shape_list), float(im_height), float(im_width))
+    if key in self._static_anchors_cache:
+      return self._static_anchors_cache[key]
+
+    one = np.float32(1.0)
+    if not self._anchor_strides:
+      anchor_strides = [(one / np.float32(pair[0]), one / np.float32(pair[1]))
+                        for pair in feature_map_shape_list]
+    else:
+      anchor_strides = [(stride[0] / im_height, stride[1] / im_width)
+                        for stride in static_values[3]]
+    if not self._anchor_offsets:
+      anchor_offsets = [(np.float32(0.5) * stride[0],
+                         np.float32(0.5) * stride[1])
+                        for stride in anchor_strides]
+    else:
+      anchor_offsets = [(offset[0] / im_height, offset[1] / im_width)
+                        for offset in static_values[4]]
+    min_im_shape = np.minimum(im_height, im_width)
+    base_anchor_size = [min_im_shape / im_height * base_anchor_size[0],
+                        min_im_shape / im_width * base_anchor_size[1]]
+    anchors_list = []
+    for grid_size, scales, aspect_ratios, stride, offset in zip(
+        feature_map_shape_list, self._scales, self._aspect_ratios,
+        anchor_strides, anchor_offsets):
+      anchors = grid_anchor_generator.tile_anchors_np(
+          grid_height=grid_size[0],
+          grid_width=grid_size[1],
+          scales=scales,
+          aspect_ratios=aspect_ratios,
+          base_anchor_size=base_anchor_size,
+          anchor_stride=stride,
+          anchor_offset=offset)
+      if clip_window is not None:
+        anchors = np.maximum(np.minimum(anchors, clip_window[[2, 3, 2, 3]]),
+                             clip_window[[0, 1, 0, 1]])
+      anchors_list.append(anchors)
+    self._static_anchors_cache[key] = anchors_list
+    return anchors_list
+
+  def generate_np(self, feature_map_shape_list, im_height=1, im_width=1):
+    """Generates anchors as NumPy arrays, e.g. for post-processing.
+
+    Args:
+      feature_map_shape_list: list of pairs of integer convnet layer
+        resolutions in the format [(height_0, width_0), (height_1, width_1),
+        ...].
+      im_height: the height of the image to generate the grid for, see
+        `_generate`.
+      im_width: the width of the image to generate the grid for, see
+        `_generate`.
+
+    Returns:
+      A list of float32 numpy arrays of shape [num_anchors_i, 4] holding the
+      same anchors as the `generate` function, one for each feature map.
+
+    Raises:
+      ValueError: if feature_map_shape_list is not a list of pairs of integers
+        with the same length as box_specs_list, or if the image size or the
+        anchor parameters are only known at run time.
+    """
+    self._check_feature_map_shape_list(feature_map_shape_list)
+    static_anchors = self._get_static_anchors(feature_map_shape_list,
+                                              im_height, im_width)
+    if static_anchors is None:
+      raise ValueError('Anchors can only be generated in NumPy when the '
+                       'feature map shapes, image size and anchor parameters '
+                       'are static.')
+    return static_anchors
+
 
 def create_ssd_anchors(num_layers=6,
                        min_scale=0.2,
@@ -250,7 +355,8 @@ def create_ssd_anchors(num_layers=6,
                        base_anchor_size=None,
                        anchor_strides=None,
                        anchor_offsets=None,
-                       reduce_boxes_in_lowest_layer=True):
+                       reduce_boxes_in_lowest_layer=True,
+                       precompute_static_anchors=False):
   """Creates MultipleGridAnchorGenerator for SSD anchors.
 
   This function instantiates a MultipleGridAnchorGenerator that reproduces
@@ -298,6 +404,8 @@ def create_ssd_anchors(num_layers=6,
       be half of the corresponding anchor stride.
     reduce_boxes_in_lowest_layer: a boolean to indicate whether the fixed 3
       boxes per location is used in the lowest layer.
+    precompute_static_anchors: whether to embed anchors in the graph as
+      constants computed in NumPy when their shapes are static.
 
   Returns:
     a MultipleGridAnchorGenerator
@@ -330,5 +438,6 @@ def create_ssd_anchors(num_layers=6,
                                 interpolated_scale_aspect_ratio))
     box_specs_list.append(layer_box_specs)
 
-  return MultipleGridAnchorGenerator(box_specs_list, base_anchor_size,
-                                     anchor_strides, anchor_offsets)
+  return MultipleGridAnchorGenerator(
+      box_specs_list, base_anchor_size, anchor_strides, anchor_offsets,
+      precompute_static_anchors=precompute_static_anchors)
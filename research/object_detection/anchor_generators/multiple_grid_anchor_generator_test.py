@@ -187,6 +187,63 @@ class MultipleGridAnchorGeneratorTest(test_case.TestCase):
     small_grid_corners = anchor_corners_out[48:, :]
     self.assertAllClose(small_grid_corners, exp_small_grid_corners)
 
+  def test_precomputed_anchors_match_generated_anchors(self):
+
+    def graph_fn():
+      box_specs_list = [[(1.0, 1.0), (2.0, 1.0), (1.0, 0.5)],
+                        [(1.0, 1.0), (1.0, 0.5)]]
+      anchors_list = []
+      for precompute_static_anchors in [False, True]:
+        for anchor_strides, anchor_offsets, clip_window in [
+            (None, None, None),
+            ([(25, 25), (50, 40)], [(10, 10), (20, 15)],
+             tf.constant([0, 0, 1, 1], dtype=tf.float32))]:
+          anchor_generator = ag.MultipleGridAnchorGenerator(
+              box_specs_list,
+              base_anchor_size=tf.constant([1.0, 1.0], dtype=tf.float32),
+              anchor_strides=anchor_strides,
+              anchor_offsets=anchor_offsets,
+              clip_window=clip_window,
+              precompute_static_anchors=precompute_static_anchors)
+          anchors_list.append(tf.concat(
+              [anchors.get() for anchors in anchor_generator.generate(
+                  feature_map_shape_list=[(4, 5), (2, 3)], im_height=240,
+                  im_width=320)], axis=0))
+      return anchors_list
+
+    anchor_corners_out = self.execute(graph_fn, [])
+    self.assertAllClose(anchor_corners_out[0], anchor_corners_out[2])
+    self.assertAllClose(anchor_corners_out[1], anchor_corners_out[3])
+
+  def test_precomputed_anchors_are_constant(self):
+    anchor_generator = ag.create_ssd_anchors(precompute_static_anchors=True)
+    feature_map_shape_list = [(19, 19), (10, 10), (5, 5),
+                              (3, 3), (2, 2), (1, 1)]
+    anchors_list = anchor_generator.generate(
+        feature_map_shape_list=feature_map_shape_list)
+    self.assertEqual('Const', anchors_list[0].get().op.inputs[0].op.type)
+    anchors_np_list = anchor_generator.generate_np(feature_map_shape_list)
+    with self.test_session() as sess:
+      anchors_out_list = sess.run([anchors.get() for anchors in anchors_list])
+    for anchors_np, anchors_out in zip(anchors_np_list, anchors_out_list):
+      self.assertAllClose(anchors_np, anchors_out)
+
+  def test_precomputed_anchors_with_dynamic_shapes(self):
+
+    def graph_fn(feature_map_height, feature_map_width):
+      anchor_generator = ag.MultipleGridAnchorGenerator(
+          [[(1.0, 1.0), (2.0, 1.0)]],
+          base_anchor_size=tf.constant([1.0, 1.0], dtype=tf.float32),
+          precompute_static_anchors=True)
+      anchors_list = anchor_generator.generate(
+          feature_map_shape_list=[(feature_map_height, feature_map_width)])
+      return anchors_list[0].get()
+
+    anchor_corners_out = self.execute_cpu(graph_fn,
+                                          [np.array(2, dtype=np.int32),
+                                           np.array(3, dtype=np.int32)])
+    self.assertEqual((12, 4), anchor_corners_out.shape)
+
   def test_invalid_box_specs(self):
     # not all box specs are pairs
     box_specs_list = [[(1.0, 1.0), (2.0, 1.0), (1.0, 0.5)],
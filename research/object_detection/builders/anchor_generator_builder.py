@@ -51,7 +51,9 @@ def build(anchor_generator_config):
         anchor_stride=[grid_anchor_generator_config.height_stride,
                        grid_anchor_generator_config.width_stride],
         anchor_offset=[grid_anchor_generator_config.height_offset,
-                       grid_anchor_generator_config.width_offset])
+                       grid_anchor_generator_config.width_offset],
+        precompute_static_anchors=(
+            grid_anchor_generator_config.precompute_static_anchors))
   elif anchor_generator_config.WhichOneof(
       'anchor_generator_oneof') == 'ssd_anchor_generator':
     ssd_anchor_generator_config = anchor_generator_config.ssd_anchor_generator
@@ -78,7 +80,9 @@ def build(anchor_generator_config):
         anchor_strides=anchor_strides,
         anchor_offsets=anchor_offsets,
         reduce_boxes_in_lowest_layer=(
-            ssd_anchor_generator_config.reduce_boxes_in_lowest_layer))
+            ssd_anchor_generator_config.reduce_boxes_in_lowest_layer),
+        precompute_static_anchors=(
+            ssd_anchor_generator_config.precompute_static_anchors))
   elif anchor_generator_config.WhichOneof(
       'anchor_generator_oneof') == 'multiscale_anchor_generator':
     cfg = anchor_generator_config.multiscale_anchor_generator
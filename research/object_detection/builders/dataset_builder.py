@@ -24,6 +24,7 @@ that wraps the build function.
 import functools
 import tensorflow as tf
 
+from object_detection.core import standard_fields as fields
 from object_detection.data_decoders import tf_example_decoder
 from object_detection.protos import input_reader_pb2
 
@@ -83,12 +84,105 @@ def read_dataset(file_read_func, input_files, config):
   return records_dataset
 
 
+def _downscale_decoded_tensors(tensor_dict, max_dimension):
+  """Downscales the image and instance masks to a maximum dimension.
+
+  Boxes and keypoints are in normalized coordinates and are not affected.
+
+  Args:
+    tensor_dict: A dictionary of decoded tensors.
+    max_dimension: Maximum size of the largest side of the image.
+
+  Returns:
+    The dictionary with the downscaled image and masks.
+  """
+  image = tensor_dict[fields.InputDataFields.image]
+  image_shape = tf.shape(image)
+  scale = tf.minimum(
+      1.0, float(max_dimension) / tf.to_float(tf.reduce_max(image_shape[:2])))
+  new_size = tf.maximum(
+      tf.to_int32(tf.round(tf.to_float(image_shape[:2]) * scale)), 1)
+  new_image = tf.image.resize_images(image, new_size)
+  tensor_dict[fields.InputDataFields.image] = tf.cast(
+      tf.round(new_image), image.dtype)
+  masks_key = fields.InputDataFields.groundtruth_instance_masks
+  if masks_key in tensor_dict:
+    masks = tensor_dict[masks_key]
+
+    def resize_masks_branch():
+      return tf.squeeze(tf.image.resize_nearest_neighbor(
+          tf.expand_dims(masks, 3), new_size), axis=3)
+
+    def reshape_masks_branch():
+      return tf.reshape(masks, [-1, new_size[0], new_size[1]])
+
+    tensor_dict[masks_key] = tf.cond(tf.shape(masks)[0] > 0,
+                                     resize_masks_branch, reshape_masks_branch)
+  return tensor_dict
+
+
+def _cache_decoded_dataset(records_dataset, decode_fn, input_reader_config):
+  """Decodes records and caches the decoded examples.
+
+  The first `max_in_memory_cached_examples` examples are cached in memory and
+  the others in `decoded_examples_cache_path`, if set. Instance masks are
+  cached as uint8 to reduce the memory footprint.
+
+  Args:
+    records_dataset: A tf.data.Dataset of serialized examples, covering one
+      epoch.
+    decode_fn: Function decoding a serialized example into a tensor dictionary.
+    input_reader_config: A input_reader_pb2.InputReader object.
+
+  Returns:
+    A tf.data.Dataset of decoded tensor dictionaries, covering one epoch. After
+    a first full iteration, the examples are read from the cache.
+  """
+  masks_key = fields.InputDataFields.groundtruth_instance_masks
+  max_dimension = input_reader_config.cached_image_max_dimension
+
+  def decode_for_cache_fn(value):
+    tensor_dict = decode_fn(value)
+    if max_dimension:
+      tensor_dict = _downscale_decoded_tensors(tensor_dict, max_dimension)
+    if masks_key in tensor_dict:
+      tensor_dict[masks_key] = tf.cast(tensor_dict[masks_key], tf.uint8)
+    return tensor_dict
+
+  def restore_masks_fn(tensor_dict):
+    if masks_key in tensor_dict:
+      tensor_dict[masks_key] = tf.to_float(tensor_dict[masks_key])
+    return tensor_dict
+
+  def decode_records(dataset):
+    return dataset.map(
+        decode_for_cache_fn,
+        num_parallel_calls=input_reader_config.num_parallel_map_calls)
+
+  max_in_memory = input_reader_config.max_in_memory_cached_examples
+  cache_path = input_reader_config.decoded_examples_cache_path
+  if max_in_memory:
+    in_memory_dataset = decode_records(
+        records_dataset.take(max_in_memory)).cache()
+    remaining_dataset = decode_records(records_dataset.skip(max_in_memory))
+    if cache_path:
+      remaining_dataset = remaining_dataset.cache(cache_path)
+    dataset = in_memory_dataset.concatenate(remaining_dataset)
+  else:
+    dataset = decode_records(records_dataset).cache(cache_path)
+  return dataset.map(restore_masks_fn)
+
+
 def build(input_reader_config, batch_size=None, transform_input_data_fn=None):
   """Builds a tf.data.Dataset.
 
   Builds a tf.data.Dataset by applying the `transform_input_data_fn` on all
   records. Applies a padded batch to the resulting dataset.
 
+  If `cache_decoded_examples` is set in the config, examples are decoded
+  during the first epoch only, and replayed from a cache in the following
+  epochs. `transform_input_data_fn` is still applied at every epoch.
+
   Args:
     input_reader_config: A input_reader_pb2.InputReader object.
     batch_size: Batch size. If batch size is None, no batching is performed.
@@ -122,18 +216,38 @@ def build(input_reader_config, batch_size=None, transform_input_data_fn=None):
         use_display_name=input_reader_config.use_display_name,
         num_additional_channels=input_reader_config.num_additional_channels)
 
+    cache_decoded_examples = input_reader_config.cache_decoded_examples
+
     def process_fn(value):
       """Sets up tf graph that decodes, transforms and pads input data."""
-      processed_tensors = decoder.decode(value)
+      if cache_decoded_examples:
+        # Examples have already been decoded before being cached.
+        processed_tensors = value
+      else:
+        processed_tensors = decoder.decode(value)
       if transform_input_data_fn is not None:
         processed_tensors = transform_input_data_fn(processed_tensors)
       return processed_tensors
 
+    read_config = input_reader_config
+    if cache_decoded_examples:
+      # The cache is filled from a single epoch of records. Shuffling and
+      # repetition are applied to the cached examples instead.
+      read_config = input_reader_pb2.InputReader()
+      read_config.CopyFrom(input_reader_config)
+      read_config.num_epochs = 1
+      read_config.shuffle = False
     dataset = read_dataset(
         functools.partial(tf.data.TFRecordDataset, buffer_size=8 * 1000 * 1000),
-        config.input_path[:], input_reader_config)
+        config.input_path[:], read_config)
     if input_reader_config.sample_1_of_n_examples > 1:
       dataset = dataset.shard(input_reader_config.sample_1_of_n_examples, 0)
+    if cache_decoded_examples:
+      dataset = _cache_decoded_dataset(dataset, decoder.decode,
+                                       input_reader_config)
+      if input_reader_config.shuffle:
+        dataset = dataset.shuffle(input_reader_config.shuffle_buffer_size)
+      dataset = dataset.repeat(input_reader_config.num_epochs or None)
     # TODO(rathodv): make batch size a required argument once the old binaries
     # are deleted.
     if batch_size:
@@ -240,6 +240,39 @@ class DatasetBuilderTest(tf.test.TestCase):
       output_dict = sess.run(tensor_dict)
       self.assertEquals(['2'], output_dict[fields.InputDataFields.source_id])
 
+  def test_cache_decoded_examples(self):
+    tf_record_path = self.create_tf_record(num_examples=2)
+    cache_path = os.path.join(self.get_temp_dir(), 'decoded_cache')
+
+    input_reader_text_proto = """
+      shuffle: false
+      num_readers: 1
+      num_epochs: 2
+      load_instance_masks: true
+      cache_decoded_examples: true
+      max_in_memory_cached_examples: 1
+      decoded_examples_cache_path: '{0}'
+      cached_image_max_dimension: 2
+      tf_record_input_reader {{
+        input_path: '{1}'
+      }}
+    """.format(cache_path, tf_record_path)
+    input_reader_proto = input_reader_pb2.InputReader()
+    text_format.Merge(input_reader_text_proto, input_reader_proto)
+    tensor_dict = dataset_builder.make_initializable_iterator(
+        dataset_builder.build(input_reader_proto, batch_size=1)).get_next()
+
+    with tf.train.MonitoredSession() as sess:
+      for expected_source_id in ['0', '1', '0', '1']:
+        output_dict = sess.run(tensor_dict)
+        self.assertAllEqual([expected_source_id],
+                            output_dict[fields.InputDataFields.source_id])
+        self.assertEquals((1, 2, 2, 3),
+                          output_dict[fields.InputDataFields.image].shape)
+        masks = output_dict[fields.InputDataFields.groundtruth_instance_masks]
+        self.assertEquals(np.float32, masks.dtype)
+        self.assertAllEqual(np.ones((1, 1, 2, 2)), masks)
+
 
 class ReadDatasetTest(tf.test.TestCase):
 
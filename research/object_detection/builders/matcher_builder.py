@@ -17,6 +17,7 @@
 
 from object_detection.matchers import argmax_matcher
 from object_detection.matchers import bipartite_matcher
+from object_detection.protos import bipartite_matcher_pb2
 from object_detection.protos import matcher_pb2
 
 
@@ -49,5 +50,8 @@ def build(matcher_config):
         use_matmul_gather=matcher.use_matmul_gather)
   if matcher_config.WhichOneof('matcher_oneof') == 'bipartite_matcher':
     matcher = matcher_config.bipartite_matcher
+    if matcher.algorithm == bipartite_matcher_pb2.BipartiteMatcher.HUNGARIAN:
+      return bipartite_matcher.HungarianBipartiteMatcher(
+          matcher.use_matmul_gather)
     return bipartite_matcher.GreedyBipartiteMatcher(matcher.use_matmul_gather)
   raise ValueError('Empty matcher.')
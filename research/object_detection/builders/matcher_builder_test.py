@@ -86,6 +86,19 @@ class MatcherBuilderTest(tf.test.TestCase):
     self.assertTrue(
         isinstance(matcher_object, bipartite_matcher.GreedyBipartiteMatcher))
 
+  def test_build_hungarian_bipartite_matcher(self):
+    matcher_text_proto = """
+      bipartite_matcher {
+        algorithm: HUNGARIAN
+      }
+    """
+    matcher_proto = matcher_pb2.Matcher()
+    text_format.Merge(matcher_text_proto, matcher_proto)
+    matcher_object = matcher_builder.build(matcher_proto)
+    self.assertTrue(
+        isinstance(matcher_object,
+                   bipartite_matcher.HungarianBipartiteMatcher))
+
   def test_raise_error_on_empty_matcher(self):
     matcher_text_proto = """
     """
@@ -21,6 +21,8 @@ from google.protobuf import text_format
 
 from object_detection.builders import preprocessor_builder
 from object_detection.core import preprocessor
+from object_detection.core import preprocessor_cache
+from object_detection.core import standard_fields as fields
 from object_detection.protos import preprocessor_pb2
 
 
@@ -593,6 +595,61 @@ class PreprocessorBuilderTest(tf.test.TestCase):
     self.assertEqual(function, preprocessor.convert_class_logits_to_softmax)
     self.assertEqual(args, {'temperature': 2})
 
+  def test_built_resize_image_is_fused(self):
+    preprocessor_text_protos = ["""
+    random_horizontal_flip {
+    }
+    """, """
+    random_vertical_flip {
+    }
+    """, """
+    resize_image {
+      new_height: 45
+      new_width: 70
+      method: BILINEAR
+    }
+    """]
+    preprocess_options = []
+    for preprocessor_text_proto in preprocessor_text_protos:
+      preprocessor_proto = preprocessor_pb2.PreprocessingStep()
+      text_format.Merge(preprocessor_text_proto, preprocessor_proto)
+      preprocess_options.append(preprocessor_builder.build(preprocessor_proto))
+    # Upsampling, so that coordinates are clamped past the last input pixel.
+    images = tf.random_uniform([1, 20, 30, 3])
+    boxes = tf.constant([[0.1, 0.2, 0.6, 0.9], [0.3, 0.0, 0.5, 0.4]])
+    outputs = []
+    for _ in range(4):
+      cache = preprocessor_cache.PreprocessorCache()
+      for fuse_geometric_ops in [False, True]:
+        with tf.name_scope('fused' if fuse_geometric_ops else 'unfused'):
+          tensor_dict = {fields.InputDataFields.image: images,
+                         fields.InputDataFields.groundtruth_boxes: boxes}
+          tensor_dict = preprocessor.preprocess(
+              tensor_dict, preprocess_options,
+              preprocess_vars_cache=cache,
+              fuse_geometric_ops=fuse_geometric_ops)
+          outputs.append(
+              (tensor_dict[fields.InputDataFields.image],
+               tensor_dict[fields.InputDataFields.groundtruth_boxes]))
+
+    # The resize step of the fused pipelines is applied by the fused op.
+    scopes = [op.name.split('/')[:2]
+              for op in tf.get_default_graph().get_operations()]
+    fused_scopes = set(scope[1] for scope in scopes
+                       if len(scope) > 1 and scope[0].startswith('fused'))
+    unfused_scopes = set(scope[1] for scope in scopes
+                         if len(scope) > 1 and scope[0].startswith('unfused'))
+    self.assertIn('FusedGeometricOp', fused_scopes)
+    self.assertNotIn('ResizeImage', fused_scopes)
+    self.assertIn('ResizeImage', unfused_scopes)
+    with self.test_session() as sess:
+      outputs_ = sess.run(outputs)
+      for i in range(0, len(outputs_), 2):
+        (images_, boxes_), (fused_images_, fused_boxes_) = outputs_[i:i + 2]
+        self.assertAllEqual([1, 45, 70, 3], fused_images_.shape)
+        self.assertAllClose(images_, fused_images_, atol=1e-5)
+        self.assertAllClose(boxes_, fused_boxes_)
+
 
 if __name__ == '__main__':
   tf.test.main()
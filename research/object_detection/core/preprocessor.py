@@ -3129,10 +3129,179 @@ def get_default_func_arg_map(include_label_scores=True,
   return prep_func_arg_map
 
 
+def _is_fusable_geometric_op(func, params, arg_names):
+  """Returns whether a preprocessing step can be applied by _fused_geometric_op.
+
+  Args:
+    func: The preprocessing function.
+    params: The arguments of the preprocessing function.
+    arg_names: The names of the tensor_dict fields passed to func.
+
+  Returns:
+    True if the step only transforms the image and boxes, and the
+    transformation can be expressed as a crop and resize of the image.
+  """
+  supported_arg_names = set([fields.InputDataFields.image,
+                             fields.InputDataFields.groundtruth_boxes])
+  if not set(a for a in arg_names if a is not None) <= supported_arg_names:
+    return False
+  if func in (random_horizontal_flip, random_vertical_flip,
+              random_image_scale):
+    return True
+  if func == resize_image:
+    return (params.get('method', tf.image.ResizeMethod.BILINEAR) ==
+            tf.image.ResizeMethod.BILINEAR)
+  return False
+
+
+def _flip_coordinates(size, do_a_flip, coordinates):
+  """Maps coordinates of a flipped axis to coordinates before the flip."""
+  return tf.where(do_a_flip, size - 1.0 - coordinates, coordinates)
+
+
+def _resize_coordinates(input_size, output_size, align_corners, coordinates):
+  """Maps coordinates of a resized axis to coordinates before the resize.
+
+  The mapping is the one of tf.image.resize_bilinear, including the clamping of
+  coordinates past the last input pixel when align_corners is False.
+  """
+  if align_corners:
+    return coordinates * ((input_size - 1.0) /
+                          tf.maximum(output_size - 1.0, 1.0))
+  return tf.minimum(coordinates * (input_size / output_size),
+                    input_size - 1.0)
+
+
+def _bilinear_sample(image, y, x):
+  """Bilinearly interpolates an image at the grid of coordinates y and x.
+
+  Args:
+    image: rank 3 float32 tensor with shape [height, width, channels].
+    y: rank 1 float32 tensor with the row coordinates of the output rows.
+    x: rank 1 float32 tensor with the column coordinates of the output columns.
+
+  Returns:
+    A float32 tensor with shape [len(y), len(x), channels].
+  """
+  def lerp_indices(coordinates, size):
+    coordinates = tf.clip_by_value(coordinates, 0.0, tf.to_float(size - 1))
+    lower = tf.floor(coordinates)
+    lower_indices = tf.to_int32(lower)
+    upper_indices = tf.minimum(lower_indices + 1, size - 1)
+    return lower_indices, upper_indices, coordinates - lower
+
+  image_shape = tf.shape(image)
+  top, bottom, y_lerp = lerp_indices(y, image_shape[0])
+  left, right, x_lerp = lerp_indices(x, image_shape[1])
+  # Rows are interpolated first, so that the columns are only interpolated in
+  # the output rows.
+  top_rows = tf.gather(image, top)
+  rows = top_rows + (tf.gather(image, bottom) - top_rows) * tf.reshape(
+      y_lerp, [-1, 1, 1])
+  left_columns = tf.gather(rows, left, axis=1)
+  return left_columns + (tf.gather(rows, right, axis=1) -
+                         left_columns) * tf.reshape(x_lerp, [1, -1, 1])
+
+
+def _fused_geometric_op(image, boxes, preprocess_options,
+                        preprocess_vars_cache=None):
+  """Applies a sequence of geometric preprocessing steps at once.
+
+  Applying the steps one at a time creates a full resolution copy of the image
+  per step. Instead, each step is expressed as a mapping from its output pixel
+  coordinates to its input pixel coordinates, separately for rows and columns.
+  The mappings are composed, and the image is resampled once by bilinear
+  interpolation at the composed coordinates. The random variables are drawn
+  like in the individual steps, so that the same seeds and
+  preprocess_vars_cache produce the same augmentations.
+
+  The result is identical, up to float rounding, to applying the steps one at
+  a time if at most one of them resizes the image. Otherwise the image is
+  interpolated once instead of once per resize.
+
+  Args:
+    image: rank 3 float32 tensor with shape [height, width, channels].
+    boxes: (optional) rank 2 float32 tensor with shape [N, 4] containing the
+      bounding boxes in normalized coordinates.
+    preprocess_options: A list of (function, params) tuples, for which
+      _is_fusable_geometric_op is true.
+    preprocess_vars_cache: PreprocessorCache object that records previously
+                           performed augmentations. Updated in-place.
+
+  Returns:
+    image: The transformed image.
+    boxes: The transformed boxes, if boxes is not None.
+  """
+  with tf.name_scope('FusedGeometricOp', values=[image, boxes]):
+    image_channels = image.get_shape()[2]
+    size = tf.to_float(tf.shape(image)[:2])
+    # Mappings from output to input coordinates of each step, for the rows
+    # (axis 0) and the columns (axis 1), in the order of the steps.
+    coordinate_maps = ([], [])
+    for func, params in preprocess_options:
+      if func in (random_horizontal_flip, random_vertical_flip):
+        if func == random_horizontal_flip:
+          function_id = preprocessor_cache.PreprocessorCache.HORIZONTAL_FLIP
+          flip_boxes_fn = _flip_boxes_left_right
+          axis = 1
+        else:
+          function_id = preprocessor_cache.PreprocessorCache.VERTICAL_FLIP
+          flip_boxes_fn = _flip_boxes_up_down
+          axis = 0
+        generator_func = functools.partial(
+            tf.random_uniform, [], seed=params.get('seed'))
+        do_a_flip_random = tf.greater(
+            _get_or_create_preprocess_rand_vars(
+                generator_func, function_id, preprocess_vars_cache), 0.5)
+        coordinate_maps[axis].append(functools.partial(
+            _flip_coordinates, size[axis], do_a_flip_random))
+        if boxes is not None:
+          boxes = tf.cond(do_a_flip_random,
+                          functools.partial(flip_boxes_fn, boxes),
+                          functools.partial(tf.identity, boxes))
+      else:
+        if func == random_image_scale:
+          generator_func = functools.partial(
+              tf.random_uniform, [],
+              minval=params.get('min_scale_ratio', 0.5),
+              maxval=params.get('max_scale_ratio', 2.0),
+              dtype=tf.float32, seed=params.get('seed'))
+          size_coef = _get_or_create_preprocess_rand_vars(
+              generator_func, preprocessor_cache.PreprocessorCache.IMAGE_SCALE,
+              preprocess_vars_cache)
+          new_size = tf.floor(size * size_coef)
+          align_corners = True
+        elif func == resize_image:
+          new_size = tf.to_float(tf.stack([params.get('new_height', 600),
+                                           params.get('new_width', 1024)]))
+          align_corners = params.get('align_corners', False)
+        else:
+          raise ValueError('The function %s can not be fused.' %
+                           func.__name__)
+        for axis in range(2):
+          coordinate_maps[axis].append(functools.partial(
+              _resize_coordinates, size[axis], new_size[axis], align_corners))
+        size = new_size
+
+    coordinates = []
+    for axis in range(2):
+      axis_coordinates = tf.range(size[axis])
+      for coordinate_map in reversed(coordinate_maps[axis]):
+        axis_coordinates = coordinate_map(axis_coordinates)
+      coordinates.append(axis_coordinates)
+    image = _bilinear_sample(image, *coordinates)
+    image.set_shape([None, None, image_channels])
+    if boxes is None:
+      return (image,)
+    return image, boxes
+
+
 def preprocess(tensor_dict,
                preprocess_options,
                func_arg_map=None,
-               preprocess_vars_cache=None):
+               preprocess_vars_cache=None,
+               fuse_geometric_ops=False,
+               profiler=None):
   """Preprocess images and bounding boxes.
 
   Various types of preprocessing (to be implemented) based on the
@@ -3161,6 +3330,12 @@ def preprocess(tensor_dict,
                            performed augmentations. Updated in-place. If this
                            function is called multiple times with the same
                            non-null cache, it will perform deterministically.
+    fuse_geometric_ops: If True, consecutive flips and resizes that only
+                        transform the image and boxes are applied at once, with
+                        a single resampling of the image. See
+                        _fused_geometric_op.
+    profiler: Optional PreprocessorProfiler measuring the time spent in each
+              preprocessing step.
 
   Returns:
     tensor_dict: which contains the preprocessed images, bounding boxes, etc.
@@ -3196,6 +3371,27 @@ def preprocess(tensor_dict,
         raise ValueError('The function %s requires argument %s' %
                          (func.__name__, a))
 
+  steps = []
+  for func, params in preprocess_options:
+    arg_names = func_arg_map[func]
+    if (fuse_geometric_ops and
+        _is_fusable_geometric_op(func, params, arg_names)):
+      if steps and steps[-1][0] == _fused_geometric_op:
+        steps[-1][1]['preprocess_options'].append((func, params))
+      else:
+        fused_arg_names = (
+            fields.InputDataFields.image,
+            fields.InputDataFields.groundtruth_boxes
+            if fields.InputDataFields.groundtruth_boxes in tensor_dict
+            else None)
+        steps.append((_fused_geometric_op,
+                      {'preprocess_options': [(func, params)]},
+                      fused_arg_names))
+    else:
+      steps.append((func, params, arg_names))
+
+  for step_index, (func, params, arg_names) in enumerate(steps):
+
     def get_arg(key):
       return tensor_dict[key] if key is not None else None
 
@@ -3203,7 +3399,12 @@ def preprocess(tensor_dict,
     if (preprocess_vars_cache is not None and
         'preprocess_vars_cache' in inspect.getargspec(func).args):
       params['preprocess_vars_cache'] = preprocess_vars_cache
-    results = func(*args, **params)
+    if profiler is not None:
+      step_name = '%02d_%s' % (step_index, func.__name__)
+      results = profiler.profile_step(
+          step_name, functools.partial(func, **params), args)
+    else:
+      results = func(*args, **params)
     if not isinstance(results, (list, tuple)):
       results = (results,)
     # Removes None args since the return values will not contain those.
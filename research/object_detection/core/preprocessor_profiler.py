@@ -0,0 +1,112 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Records the time spent in each preprocessing step.
+
+A PreprocessorProfiler can be passed to preprocessor.preprocess. Each
+preprocessing step is then surrounded by ops recording the wall time between
+the moment its inputs are available and the moment its outputs are computed.
+Steps are serialized by control dependencies, so the profiled graph may run
+slower than the original one, but the relative cost of the steps is preserved.
+
+E.g.
+profiler = preprocessor_profiler.PreprocessorProfiler()
+tensor_dict = preprocessor.preprocess(tensor_dict, preprocess_options,
+                                      profiler=profiler)
+for _ in range(100):
+  sess.run(tensor_dict)
+profiler.log_summary()
+"""
+
+import collections
+import threading
+import time
+
+import numpy as np
+import tensorflow as tf
+
+
+class PreprocessorProfiler(object):
+  """Measures the time spent in preprocessing steps."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._durations = collections.OrderedDict()
+
+  def clear(self):
+    """Clears the recorded durations."""
+    with self._lock:
+      self._durations.clear()
+
+  def _record(self, step_name, start_time):
+    duration = time.time() - start_time
+    with self._lock:
+      self._durations.setdefault(step_name, []).append(duration)
+    return np.float64(duration)
+
+  def profile_step(self, step_name, step_fn, args):
+    """Applies a preprocessing step and records its duration when run.
+
+    Args:
+      step_name: Name under which the duration of the step is recorded.
+      step_fn: Function applying the preprocessing step to args.
+      args: List of tensors or None, passed to step_fn.
+
+    Returns:
+      The results of step_fn, which only become available after the duration
+      of the step has been recorded.
+    """
+    input_tensors = [arg for arg in args if arg is not None]
+    with tf.control_dependencies(input_tensors):
+      start_time = tf.py_func(time.time, [], tf.float64, stateful=True)
+    with tf.control_dependencies([start_time]):
+      args = [tf.identity(arg) if arg is not None else None for arg in args]
+    results = step_fn(*args)
+    is_sequence = isinstance(results, (list, tuple))
+    if not is_sequence:
+      results = [results]
+    with tf.control_dependencies(results):
+      duration = tf.py_func(
+          lambda start: self._record(step_name, start), [start_time],
+          tf.float64, stateful=True)
+    with tf.control_dependencies([duration]):
+      results = [tf.identity(result) for result in results]
+    if not is_sequence:
+      return results[0]
+    return results
+
+  def summary(self):
+    """Returns statistics of the recorded durations.
+
+    Returns:
+      An OrderedDict mapping the name of each step to a (count, mean, total)
+      tuple, where count is the number of times the step ran, and mean and
+      total are durations in seconds. Steps are sorted by decreasing total
+      duration.
+    """
+    with self._lock:
+      stats = [(step_name, (len(durations), np.mean(durations),
+                            np.sum(durations)))
+               for step_name, durations in self._durations.items()]
+    stats.sort(key=lambda item: -item[1][2])
+    return collections.OrderedDict(stats)
+
+  def log_summary(self):
+    """Logs the statistics of the recorded durations."""
+    summary = self.summary()
+    total_duration = sum(stats[2] for stats in summary.values())
+    for step_name, (count, mean, total) in summary.items():
+      tf.logging.info('%s: %d runs, %.3f ms per run, %.1f%% of total time.',
+                      step_name, count, 1000 * mean,
+                      100 * total / max(total_duration, 1e-12))
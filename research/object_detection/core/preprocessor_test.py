@@ -22,6 +22,7 @@ import tensorflow as tf
 
 from object_detection.core import preprocessor
 from object_detection.core import preprocessor_cache
+from object_detection.core import preprocessor_profiler
 from object_detection.core import standard_fields as fields
 
 if six.PY2:
@@ -530,6 +531,61 @@ class PreprocessorTest(tf.test.TestCase):
       self.assertAllClose(boxes_diff_, boxes_diff_expected_)
       self.assertAllClose(images_diff_, images_diff_expected_)
 
+  def testFusedGeometricOpsMatchUnfusedOps(self):
+    preprocess_options = [
+        (preprocessor.random_horizontal_flip, {}),
+        (preprocessor.random_image_scale, {'min_scale_ratio': 1.5,
+                                           'max_scale_ratio': 3.0}),
+        (preprocessor.random_vertical_flip, {}),
+        (preprocessor.random_adjust_brightness, {}),
+        (preprocessor.random_vertical_flip, {}),
+    ]
+    images = tf.to_float(self.createTestImages())
+    boxes = self.createTestBoxes()
+    outputs = []
+    for _ in range(4):
+      cache = preprocessor_cache.PreprocessorCache()
+      for fuse_geometric_ops in [False, True]:
+        tensor_dict = {fields.InputDataFields.image: images,
+                       fields.InputDataFields.groundtruth_boxes: boxes}
+        tensor_dict = preprocessor.preprocess(
+            tensor_dict, preprocess_options,
+            preprocess_vars_cache=cache,
+            fuse_geometric_ops=fuse_geometric_ops)
+        outputs.append((tensor_dict[fields.InputDataFields.image],
+                        tensor_dict[fields.InputDataFields.groundtruth_boxes]))
+
+    with self.test_session() as sess:
+      outputs_ = sess.run(outputs)
+      for i in range(0, len(outputs_), 2):
+        (images_, boxes_), (fused_images_, fused_boxes_) = outputs_[i:i + 2]
+        self.assertAllEqual(images_.shape, fused_images_.shape)
+        self.assertAllClose(images_, fused_images_, atol=1e-3)
+        self.assertAllClose(boxes_, fused_boxes_)
+
+  def testProfiledPreprocessing(self):
+    preprocess_options = [(preprocessor.random_horizontal_flip, {}),
+                          (preprocessor.random_adjust_brightness, {})]
+    images = self.expectedImagesAfterNormalization()
+    boxes = self.createTestBoxes()
+    tensor_dict = {fields.InputDataFields.image: images,
+                   fields.InputDataFields.groundtruth_boxes: boxes}
+    profiler = preprocessor_profiler.PreprocessorProfiler()
+    tensor_dict = preprocessor.preprocess(tensor_dict, preprocess_options,
+                                          profiler=profiler)
+
+    with self.test_session() as sess:
+      for _ in range(3):
+        sess.run(tensor_dict)
+    summary = profiler.summary()
+    self.assertItemsEqual(
+        ['00_random_horizontal_flip', '01_random_adjust_brightness'],
+        summary.keys())
+    for count, mean, total in summary.values():
+      self.assertEqual(3, count)
+      self.assertGreaterEqual(mean, 0.0)
+      self.assertAllClose(3 * mean, total)
+
   def testRandomHorizontalFlipWithEmptyBoxes(self):
     preprocess_options = [(preprocessor.random_horizontal_flip, {})]
     images = self.expectedImagesAfterNormalization()
@@ -0,0 +1,385 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Reports how well the anchors of a model cover the boxes of a dataset.
+
+Example usage:
+  python object_detection/dataset_tools/anchor_coverage_report.py \
+    --pipeline_config_path=/path/to/pipeline.config \
+    --feature_map_shapes=19x19,10x10,5x5,3x3,2x2,1x1 \
+    --output_path=/path/to/anchor_coverage.json
+
+The anchors, matcher and box coder are read from the model config of the
+pipeline. SSD models with an argmax matcher and a Faster R-CNN box coder, and
+the first stage of Faster R-CNN models, are supported. The groundtruth boxes
+are read from the first input path of the train input reader, or from
+--input_path, and are matched to the anchors with the NumPy target assigner in
+batches of --batch_size images, without building a graph.
+
+The report holds, among others, the distribution of the best anchor IOU of the
+groundtruth boxes, the fraction of boxes left without a matched anchor, the
+number of positive and ignored anchors per image and the mean and standard
+deviation of the regression targets, overall and by COCO box size.
+"""
+from __future__ import division
+
+import itertools
+import json
+
+import numpy as np
+import tensorflow as tf
+
+from object_detection.anchor_generators import grid_anchor_generator
+from object_detection.anchor_generators import multiple_grid_anchor_generator
+from object_detection.builders import anchor_generator_builder
+from object_detection.core import standard_fields as fields
+from object_detection.utils import config_util
+from object_detection.utils import np_argmax_matcher
+from object_detection.utils import np_box_coder
+from object_detection.utils import np_box_list
+from object_detection.utils import np_target_assigner
+
+flags = tf.app.flags
+flags.DEFINE_string('pipeline_config_path', None,
+                    'Path to a pipeline_pb2.TrainEvalPipelineConfig config '
+                    'file.')
+flags.DEFINE_string('input_path', None,
+                    'Optional path to the input TFRecord. Defaults to the '
+                    'first input path of the train_input_reader.')
+flags.DEFINE_string('feature_map_shapes', None,
+                    'Comma separated list of the heightxwidth of the feature '
+                    'maps on which anchors are generated, e.g. 19x19,10x10.')
+flags.DEFINE_string('image_size', None,
+                    'Optional comma separated height and width of the '
+                    'preprocessed images. Defaults to the size of the '
+                    'fixed_shape_resizer of the model.')
+flags.DEFINE_integer('num_examples', 0,
+                     'Number of examples to read. 0 reads all examples.')
+flags.DEFINE_integer('batch_size', 64,
+                     'Number of images whose boxes are matched at once.')
+flags.DEFINE_string('output_path', None,
+                    'Optional path to the output JSON file. The report is '
+                    'logged in any case.')
+FLAGS = flags.FLAGS
+
+# Box sizes in pixels of the preprocessed image, as in the COCO evaluation.
+_SIZE_RANGES = (('small', 0, 32 ** 2),
+                ('medium', 32 ** 2, 96 ** 2),
+                ('large', 96 ** 2, np.inf))
+
+
+def parse_groundtruth_boxes(serialized_example):
+  """Reads the normalized groundtruth boxes of a serialized tf.train.Example.
+
+  Args:
+    serialized_example: a serialized tf.train.Example.
+
+  Returns:
+    a float32 numpy array of shape [num_boxes, 4] with the boxes in the format
+    [y_min, x_min, y_max, x_max].
+  """
+  feature = tf.train.Example.FromString(serialized_example).features.feature
+  coordinates = [
+      feature[key].float_list.value
+      for key in (fields.TfExampleFields.object_bbox_ymin,
+                  fields.TfExampleFields.object_bbox_xmin,
+                  fields.TfExampleFields.object_bbox_ymax,
+                  fields.TfExampleFields.object_bbox_xmax)]
+  return np.array(coordinates, dtype=np.float32).reshape([4, -1]).T
+
+
+def create_target_assigner(model_config):
+  """Creates the NumPy target assigner of the anchors of a model.
+
+  Args:
+    model_config: a model_pb2.DetectionModel config of an SSD or Faster R-CNN
+      model.
+
+  Returns:
+    an np_target_assigner.TargetAssigner.
+
+  Raises:
+    ValueError: if the model is neither an SSD model with an argmax matcher and
+      a Faster R-CNN box coder nor a Faster R-CNN model.
+  """
+  meta_architecture = model_config.WhichOneof('model')
+  if meta_architecture == 'faster_rcnn':
+    # The first stage target assigner, see target_assigner.
+    # create_target_assigner('FasterRCNN', 'proposal').
+    matcher = np_argmax_matcher.ArgMaxMatcher(matched_threshold=0.7,
+                                              unmatched_threshold=0.3,
+                                              force_match_for_each_row=True)
+    box_coder = np_box_coder.FasterRcnnBoxCoder(
+        scale_factors=[10.0, 10.0, 5.0, 5.0])
+    return np_target_assigner.TargetAssigner(matcher, box_coder)
+  if meta_architecture != 'ssd':
+    raise ValueError('Unknown meta architecture: {}'.format(meta_architecture))
+
+  ssd_config = model_config.ssd
+  if ssd_config.matcher.WhichOneof('matcher_oneof') != 'argmax_matcher':
+    raise ValueError('Only the argmax matcher is supported.')
+  matcher_config = ssd_config.matcher.argmax_matcher
+  matched_threshold = unmatched_threshold = None
+  if not matcher_config.ignore_thresholds:
+    matched_threshold = matcher_config.matched_threshold
+    unmatched_threshold = matcher_config.unmatched_threshold
+  matcher = np_argmax_matcher.ArgMaxMatcher(
+      matched_threshold=matched_threshold,
+      unmatched_threshold=unmatched_threshold,
+      negatives_lower_than_unmatched=(
+          matcher_config.negatives_lower_than_unmatched),
+      force_match_for_each_row=matcher_config.force_match_for_each_row)
+  if (ssd_config.box_coder.WhichOneof('box_coder_oneof') !=
+      'faster_rcnn_box_coder'):
+    raise ValueError('Only the Faster R-CNN box coder is supported.')
+  box_coder_config = ssd_config.box_coder.faster_rcnn_box_coder
+  box_coder = np_box_coder.FasterRcnnBoxCoder(scale_factors=[
+      box_coder_config.y_scale,
+      box_coder_config.x_scale,
+      box_coder_config.height_scale,
+      box_coder_config.width_scale
+  ])
+  return np_target_assigner.TargetAssigner(matcher, box_coder)
+
+
+def generate_anchors(anchor_generator_config, feature_map_shapes, image_size):
+  """Generates the anchors of a model in normalized coordinates.
+
+  Args:
+    anchor_generator_config: an anchor_generator_pb2.AnchorGenerator config of
+      a grid or SSD anchor generator.
+    feature_map_shapes: list of (height, width) pairs of the feature maps.
+    image_size: (height, width) of the preprocessed images.
+
+  Returns:
+    a float32 numpy array of shape [num_anchors, 4] with the anchors.
+
+  Raises:
+    ValueError: if the anchor generator is neither a grid nor an SSD anchor
+      generator.
+  """
+  anchor_generator = anchor_generator_builder.build(anchor_generator_config)
+  image_height, image_width = image_size
+  if isinstance(anchor_generator, grid_anchor_generator.GridAnchorGenerator):
+    # Grid anchors are in absolute coordinates.
+    anchors = [
+        anchors / np.array([image_height, image_width, image_height,
+                            image_width], dtype=np.float32)
+        for anchors in anchor_generator.generate_np(feature_map_shapes)]
+  elif isinstance(anchor_generator,
+                  multiple_grid_anchor_generator.MultipleGridAnchorGenerator):
+    anchors = anchor_generator.generate_np(feature_map_shapes, image_height,
+                                           image_width)
+  else:
+    raise ValueError('Only grid and SSD anchor generators are supported.')
+  return np.concatenate(anchors)
+
+
+class AnchorCoverageStats(object):
+  """Accumulates anchor coverage statistics over batches of images."""
+
+  def __init__(self,
+               target_assigner,
+               anchors,
+               image_size,
+               iou_thresholds=(0.3, 0.5, 0.7),
+               num_histogram_bins=20):
+    """Constructor.
+
+    Args:
+      target_assigner: an np_target_assigner.TargetAssigner.
+      anchors: a float32 numpy array of shape [num_anchors, 4] with normalized
+        anchors.
+      image_size: (height, width) of the preprocessed images, used to bucket
+        the groundtruth boxes by size.
+      iou_thresholds: the best anchor IOU thresholds at which the fraction of
+        covered groundtruth boxes is reported.
+      num_histogram_bins: the number of bins of the histogram of the best
+        anchor IOU of the groundtruth boxes.
+    """
+    self._target_assigner = target_assigner
+    self._anchors = anchors
+    self._image_area = image_size[0] * image_size[1]
+    self._iou_thresholds = iou_thresholds
+    self._histogram_bin_edges = np.linspace(0., 1., num_histogram_bins + 1)
+    self._best_iou_histogram = np.zeros(num_histogram_bins, dtype=np.int64)
+    self._num_images = 0
+    self._num_positive_anchors = 0
+    self._num_ignored_anchors = 0
+    self._num_positive_anchors_by_size = np.zeros(len(_SIZE_RANGES),
+                                                  dtype=np.int64)
+    self._num_boxes_by_size = np.zeros(len(_SIZE_RANGES), dtype=np.int64)
+    self._num_boxes_without_anchor_by_size = np.zeros(len(_SIZE_RANGES),
+                                                      dtype=np.int64)
+    self._best_iou_sum_by_size = np.zeros(len(_SIZE_RANGES))
+    self._num_covered_boxes = np.zeros(len(iou_thresholds), dtype=np.int64)
+    self._reg_targets_sum = np.zeros(target_assigner.box_coder.code_size)
+    self._reg_targets_squared_sum = np.zeros(
+        target_assigner.box_coder.code_size)
+
+  def update(self, groundtruth_boxlists):
+    """Adds the groundtruth boxes of a batch of images to the statistics.
+
+    Args:
+      groundtruth_boxlists: a list of np_box_list.BoxList with the normalized
+        groundtruth boxes of each image.
+    """
+    boxes, num_boxes = np_target_assigner.pad_boxlists(groundtruth_boxlists)
+    similarity, match_results = self._target_assigner.match(
+        self._anchors, boxes, num_boxes)
+    batch_size, max_num_boxes = boxes.shape[:2]
+    valid_boxes = np.arange(max_num_boxes) < num_boxes[:, np.newaxis]
+    matched = match_results >= 0
+
+    best_ious = similarity.max(axis=-1)[valid_boxes]
+    matched_box_indices = (np.arange(batch_size)[:, np.newaxis] *
+                           max_num_boxes + match_results)[matched]
+    num_matched_anchors = np.bincount(
+        matched_box_indices, minlength=batch_size * max_num_boxes).reshape(
+            [batch_size, max_num_boxes])[valid_boxes]
+    box_areas = ((boxes[..., 2] - boxes[..., 0]) *
+                 (boxes[..., 3] - boxes[..., 1]))[valid_boxes] * self._image_area
+
+    self._num_images += batch_size
+    self._num_positive_anchors += int(matched.sum())
+    self._num_ignored_anchors += int((match_results == -2).sum())
+    self._best_iou_histogram += np.histogram(
+        np.clip(best_ious, 0., 1.), bins=self._histogram_bin_edges)[0]
+    for i, iou_threshold in enumerate(self._iou_thresholds):
+      self._num_covered_boxes[i] += int((best_ious >= iou_threshold).sum())
+    for i, (_, min_area, max_area) in enumerate(_SIZE_RANGES):
+      in_range = np.logical_and(box_areas >= min_area, box_areas < max_area)
+      self._num_boxes_by_size[i] += int(in_range.sum())
+      self._num_boxes_without_anchor_by_size[i] += int(
+          (num_matched_anchors[in_range] == 0).sum())
+      self._num_positive_anchors_by_size[i] += int(
+          num_matched_anchors[in_range].sum())
+      self._best_iou_sum_by_size[i] += float(best_ious[in_range].sum())
+
+    image_indices, anchor_indices = np.nonzero(matched)
+    reg_targets = self._target_assigner.box_coder.encode(
+        boxes[image_indices, match_results[matched]],
+        self._anchors[anchor_indices])
+    self._reg_targets_sum += reg_targets.sum(axis=0)
+    self._reg_targets_squared_sum += np.square(
+        reg_targets.astype(np.float64)).sum(axis=0)
+
+  def get_report(self):
+    """Returns the statistics as a JSON serializable dictionary."""
+    num_boxes = int(self._num_boxes_by_size.sum())
+    reg_targets_mean = self._reg_targets_sum / max(self._num_positive_anchors,
+                                                   1)
+    reg_targets_variance = (
+        self._reg_targets_squared_sum / max(self._num_positive_anchors, 1) -
+        np.square(reg_targets_mean))
+    report = {
+        'num_images': self._num_images,
+        'num_groundtruth_boxes': num_boxes,
+        'num_anchors': len(self._anchors),
+        'mean_best_anchor_iou': float(
+            self._best_iou_sum_by_size.sum() / max(num_boxes, 1)),
+        'best_anchor_iou_histogram': {
+            'bin_edges': self._histogram_bin_edges.tolist(),
+            'counts': self._best_iou_histogram.tolist(),
+        },
+        'fraction_covered_at_iou': {
+            str(iou_threshold): float(num_covered / max(num_boxes, 1))
+            for iou_threshold, num_covered in zip(self._iou_thresholds,
+                                                  self._num_covered_boxes)},
+        'fraction_boxes_without_matched_anchor': float(
+            self._num_boxes_without_anchor_by_size.sum() / max(num_boxes, 1)),
+        'mean_matched_anchors_per_box': float(
+            self._num_positive_anchors / max(num_boxes, 1)),
+        'mean_positive_anchors_per_image': float(
+            self._num_positive_anchors / max(self._num_images, 1)),
+        'mean_ignored_anchors_per_image': float(
+            self._num_ignored_anchors / max(self._num_images, 1)),
+        'regression_targets_mean': reg_targets_mean.tolist(),
+        'regression_targets_stddev': np.sqrt(
+            np.maximum(reg_targets_variance, 0.)).tolist(),
+        'by_size': {},
+    }
+    for i, (size_name, _, _) in enumerate(_SIZE_RANGES):
+      num_boxes_in_range = max(self._num_boxes_by_size[i], 1)
+      report['by_size'][size_name] = {
+          'num_groundtruth_boxes': int(self._num_boxes_by_size[i]),
+          'mean_best_anchor_iou': float(
+              self._best_iou_sum_by_size[i] / num_boxes_in_range),
+          'fraction_boxes_without_matched_anchor': float(
+              self._num_boxes_without_anchor_by_size[i] / num_boxes_in_range),
+          'mean_matched_anchors_per_box': float(
+              self._num_positive_anchors_by_size[i] / num_boxes_in_range),
+      }
+    return report
+
+
+def main(_):
+  tf.logging.set_verbosity(tf.logging.INFO)
+  configs = config_util.get_configs_from_pipeline_file(
+      FLAGS.pipeline_config_path)
+  model_config = configs['model']
+  meta_architecture_config = getattr(model_config,
+                                     model_config.WhichOneof('model'))
+  if model_config.WhichOneof('model') == 'faster_rcnn':
+    anchor_generator_config = (
+        meta_architecture_config.first_stage_anchor_generator)
+  else:
+    anchor_generator_config = meta_architecture_config.anchor_generator
+
+  if FLAGS.image_size:
+    image_size = [int(dim) for dim in FLAGS.image_size.split(',')]
+  else:
+    image_resizer_config = meta_architecture_config.image_resizer
+    if image_resizer_config.WhichOneof(
+        'image_resizer_oneof') != 'fixed_shape_resizer':
+      raise ValueError('--image_size is required without a '
+                       'fixed_shape_resizer.')
+    image_size = [image_resizer_config.fixed_shape_resizer.height,
+                  image_resizer_config.fixed_shape_resizer.width]
+  feature_map_shapes = [tuple(int(dim) for dim in shape.split('x'))
+                        for shape in FLAGS.feature_map_shapes.split(',')]
+  input_path = FLAGS.input_path
+  if not input_path:
+    input_path = configs['train_input_config'].tf_record_input_reader.input_path[
+        0]
+
+  anchors = generate_anchors(anchor_generator_config, feature_map_shapes,
+                             image_size)
+  stats = AnchorCoverageStats(create_target_assigner(model_config), anchors,
+                              image_size)
+  serialized_examples = tf.python_io.tf_record_iterator(input_path)
+  if FLAGS.num_examples:
+    serialized_examples = itertools.islice(serialized_examples,
+                                           FLAGS.num_examples)
+  num_images = 0
+  while True:
+    batch = list(itertools.islice(serialized_examples, FLAGS.batch_size))
+    if not batch:
+      break
+    stats.update([np_box_list.BoxList(parse_groundtruth_boxes(example))
+                  for example in batch])
+    num_images += len(batch)
+    tf.logging.info('Processed %d images.', num_images)
+
+  report_json = json.dumps(stats.get_report(), indent=2, sort_keys=True)
+  tf.logging.info('Anchor coverage report:\n%s', report_json)
+  if FLAGS.output_path:
+    with tf.gfile.GFile(FLAGS.output_path, 'w') as fid:
+      fid.write(report_json)
+
+
+if __name__ == '__main__':
+  flags.mark_flag_as_required('pipeline_config_path')
+  flags.mark_flag_as_required('feature_map_shapes')
+  tf.app.run()
@@ -0,0 +1,89 @@
+# Copyright 2017 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Tests for object_detection.dataset_tools.anchor_coverage_report."""
+
+import numpy as np
+import tensorflow as tf
+
+from object_detection.dataset_tools import anchor_coverage_report
+from object_detection.utils import dataset_util
+from object_detection.utils import np_argmax_matcher
+from object_detection.utils import np_box_coder
+from object_detection.utils import np_box_list
+from object_detection.utils import np_target_assigner
+
+
+class AnchorCoverageReportTest(tf.test.TestCase):
+
+  def test_parse_groundtruth_boxes(self):
+    example = tf.train.Example(features=tf.train.Features(feature={
+        'image/object/bbox/ymin': dataset_util.float_list_feature([0.1, 0.2]),
+        'image/object/bbox/xmin': dataset_util.float_list_feature([0.3, 0.4]),
+        'image/object/bbox/ymax': dataset_util.float_list_feature([0.5, 0.6]),
+        'image/object/bbox/xmax': dataset_util.float_list_feature([0.7, 0.8]),
+    }))
+    boxes = anchor_coverage_report.parse_groundtruth_boxes(
+        example.SerializeToString())
+    self.assertAllClose(boxes, [[0.1, 0.3, 0.5, 0.7], [0.2, 0.4, 0.6, 0.8]])
+    empty_example = tf.train.Example()
+    self.assertAllEqual(anchor_coverage_report.parse_groundtruth_boxes(
+        empty_example.SerializeToString()).shape, [0, 4])
+
+  def test_anchor_coverage_stats(self):
+    matcher = np_argmax_matcher.ArgMaxMatcher(matched_threshold=0.5,
+                                              unmatched_threshold=0.4)
+    target_assigner = np_target_assigner.TargetAssigner(
+        matcher, np_box_coder.FasterRcnnBoxCoder())
+    anchors = np.array([[0.0, 0.0, 0.5, 0.5],
+                        [0.5, 0.5, 1.0, 0.8],
+                        [0.0, 0.5, 0.5, 1.0]], dtype=np.float32)
+    stats = anchor_coverage_report.AnchorCoverageStats(
+        target_assigner, anchors, image_size=(300, 300),
+        iou_thresholds=(0.5,), num_histogram_bins=2)
+    stats.update([
+        np_box_list.BoxList(np.array([[0.0, 0.0, 0.5, 0.5],
+                                      [0.5, 0.5, 0.9, 0.9]],
+                                     dtype=np.float32)),
+        np_box_list.BoxList(np.zeros([0, 4], dtype=np.float32))])
+    stats.update([
+        np_box_list.BoxList(np.array([[0.0, 0.2, 0.5, 0.7],
+                                      [0.9, 0.0, 1.0, 0.1]],
+                                     dtype=np.float32))])
+    report = stats.get_report()
+
+    # The best anchor IOUs of the groundtruth boxes are 1, 0.63, 0.43 and 0.
+    self.assertEqual(report['num_images'], 3)
+    self.assertEqual(report['num_groundtruth_boxes'], 4)
+    self.assertEqual(report['num_anchors'], 3)
+    self.assertAllClose(report['mean_best_anchor_iou'],
+                        (1 + 0.12 / 0.19 + 0.15 / 0.35) / 4)
+    self.assertEqual(report['best_anchor_iou_histogram']['counts'], [2, 2])
+    self.assertAllClose(report['fraction_covered_at_iou']['0.5'], 0.5)
+    self.assertAllClose(report['fraction_boxes_without_matched_anchor'], 0.5)
+    self.assertAllClose(report['mean_matched_anchors_per_box'], 0.5)
+    self.assertAllClose(report['mean_positive_anchors_per_image'], 2 / 3.)
+    self.assertAllClose(report['mean_ignored_anchors_per_image'], 1 / 3.)
+    self.assertAllClose(report['regression_targets_mean'],
+                        [-0.05, 0.083333, -0.111572, 0.143841])
+    self.assertEqual(report['by_size']['small']['num_groundtruth_boxes'], 1)
+    self.assertEqual(report['by_size']['medium']['num_groundtruth_boxes'], 0)
+    self.assertEqual(report['by_size']['large']['num_groundtruth_boxes'], 3)
+    self.assertAllClose(
+        report['by_size']['small']['fraction_boxes_without_matched_anchor'], 1)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -15,7 +15,10 @@
 
 r"""Convert raw COCO dataset to TFRecord for object_detection.
 
-Please note that this tool creates sharded output files.
+Please note that this tool creates sharded output files. The examples are
+created by --num_workers processes, and the completed shards are recorded in a
+manifest next to the output files so that an interrupted conversion can be
+continued with --resume.
 
 Example usage:
     python create_coco_tf_record.py --logtostderr \
@@ -31,11 +34,11 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import functools
 import hashlib
 import io
 import json
 import os
-import contextlib2
 import numpy as np
 import PIL.Image
 
@@ -64,6 +67,12 @@ tf.flags.DEFINE_string('val_annotations_file', '',
 tf.flags.DEFINE_string('testdev_annotations_file', '',
                        'Test-dev annotations JSON file.')
 tf.flags.DEFINE_string('output_dir', '/tmp/', 'Output data directory.')
+tf.flags.DEFINE_integer('num_workers', None,
+                        'Number of worker processes used to create the '
+                        'examples. Defaults to the number of CPUs.')
+tf.flags.DEFINE_boolean('resume', False,
+                        'Whether to resume an interrupted conversion, keeping '
+                        'the shards that have already been written.')
 
 FLAGS = flags.FLAGS
 
@@ -191,8 +200,37 @@ def create_tf_example(image,
   return key, example, num_annotations_skipped
 
 
+def _create_tf_example_from_image_and_annotations(
+    image_and_annotations, image_dir, category_index, include_masks):
+  """Creates the tf.Example of an (image, annotations_list) pair.
+
+  This is the function run by the worker processes of
+  tf_record_creation_util.write_tfrecords_in_parallel.
+
+  Args:
+    image_and_annotations: tuple of the image dict and the list of its
+      annotations, see create_tf_example.
+    image_dir: directory containing the image files.
+    category_index: a dict containing COCO category information keyed
+      by the 'id' field of each category.
+    include_masks: Whether to include instance segmentations masks
+      (PNG encoded) in the result.
+
+  Returns:
+    example: The converted tf.Example
+  """
+  image, annotations_list = image_and_annotations
+  _, tf_example, num_annotations_skipped = create_tf_example(
+      image, annotations_list, image_dir, category_index, include_masks)
+  if num_annotations_skipped:
+    tf.logging.info('Skipped %d annotations of image %s.',
+                    num_annotations_skipped, image['id'])
+  return tf_example
+
+
 def _create_tf_record_from_coco_annotations(
-    annotations_file, image_dir, output_path, include_masks, num_shards):
+    annotations_file, image_dir, output_path, include_masks, num_shards,
+    num_workers=None, resume=False):
   """Loads COCO annotation json files and converts to tf.Record format.
 
   Args:
@@ -202,46 +240,47 @@ def _create_tf_record_from_coco_annotations(
     include_masks: Whether to include instance segmentations masks
       (PNG encoded) in the result. default: False.
     num_shards: number of output file shards.
+    num_workers: number of worker processes creating the examples. If None,
+      the number of CPUs is used.
+    resume: whether to keep the shards recorded as completed in the progress
+      manifest of a previous run.
   """
-  with contextlib2.ExitStack() as tf_record_close_stack, \
-      tf.gfile.GFile(annotations_file, 'r') as fid:
-    output_tfrecords = tf_record_creation_util.open_sharded_output_tfrecords(
-        tf_record_close_stack, output_path, num_shards)
+  with tf.gfile.GFile(annotations_file, 'r') as fid:
     groundtruth_data = json.load(fid)
-    images = groundtruth_data['images']
-    category_index = label_map_util.create_category_index(
-        groundtruth_data['categories'])
-
-    annotations_index = {}
-    if 'annotations' in groundtruth_data:
-      tf.logging.info(
-          'Found groundtruth annotations. Building annotations index.')
-      for annotation in groundtruth_data['annotations']:
-        image_id = annotation['image_id']
-        if image_id not in annotations_index:
-          annotations_index[image_id] = []
-        annotations_index[image_id].append(annotation)
-    missing_annotation_count = 0
-    for image in images:
-      image_id = image['id']
+  images = groundtruth_data['images']
+  category_index = label_map_util.create_category_index(
+      groundtruth_data['categories'])
+
+  annotations_index = {}
+  if 'annotations' in groundtruth_data:
+    tf.logging.info(
+        'Found groundtruth annotations. Building annotations index.')
+    for annotation in groundtruth_data['annotations']:
+      image_id = annotation['image_id']
       if image_id not in annotations_index:
-        missing_annotation_count += 1
         annotations_index[image_id] = []
-    tf.logging.info('%d images are missing annotations.',
-                    missing_annotation_count)
-
-    total_num_annotations_skipped = 0
-    for idx, image in enumerate(images):
-      if idx % 100 == 0:
-        tf.logging.info('On image %d of %d', idx, len(images))
-      annotations_list = annotations_index[image['id']]
-      _, tf_example, num_annotations_skipped = create_tf_example(
-          image, annotations_list, image_dir, category_index, include_masks)
-      total_num_annotations_skipped += num_annotations_skipped
-      shard_idx = idx % num_shards
-      output_tfrecords[shard_idx].write(tf_example.SerializeToString())
-    tf.logging.info('Finished writing, skipped %d annotations.',
-                    total_num_annotations_skipped)
+      annotations_index[image_id].append(annotation)
+  missing_annotation_count = 0
+  for image in images:
+    image_id = image['id']
+    if image_id not in annotations_index:
+      missing_annotation_count += 1
+      annotations_index[image_id] = []
+  tf.logging.info('%d images are missing annotations.',
+                  missing_annotation_count)
+
+  manifest_path = output_path + '-manifest.json'
+  tf_record_creation_util.write_tfrecords_in_parallel(
+      [(image, annotations_index[image['id']]) for image in images],
+      functools.partial(_create_tf_example_from_image_and_annotations,
+                        image_dir=image_dir,
+                        category_index=category_index,
+                        include_masks=include_masks),
+      tf_record_creation_util.get_sharded_output_paths(output_path,
+                                                       num_shards),
+      num_workers=num_workers,
+      manifest_path=manifest_path,
+      resume=resume)
 
 
 def main(_):
@@ -263,19 +302,25 @@ def main(_):
       FLAGS.train_image_dir,
       train_output_path,
       FLAGS.include_masks,
-      num_shards=100)
+      num_shards=100,
+      num_workers=FLAGS.num_workers,
+      resume=FLAGS.resume)
   _create_tf_record_from_coco_annotations(
       FLAGS.val_annotations_file,
       FLAGS.val_image_dir,
       val_output_path,
       FLAGS.include_masks,
-      num_shards=10)
+      num_shards=10,
+      num_workers=FLAGS.num_workers,
+      resume=FLAGS.resume)
   _create_tf_record_from_coco_annotations(
       FLAGS.testdev_annotations_file,
       FLAGS.test_image_dir,
       testdev_output_path,
       FLAGS.include_masks,
-      num_shards=100)
+      num_shards=100,
+      num_workers=FLAGS.num_workers,
+      resume=FLAGS.resume)
 
 
 if __name__ == '__main__':
@@ -35,7 +35,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-
+import functools
 import hashlib
 import io
 import os
@@ -44,6 +44,7 @@ import numpy as np
 import PIL.Image as pil
 import tensorflow as tf
 
+from object_detection.dataset_tools import tf_record_creation_util
 from object_detection.utils import dataset_util
 from object_detection.utils import label_map_util
 from object_detection.utils.np_box_ops import iou
@@ -66,11 +67,15 @@ tf.app.flags.DEFINE_string('label_map_path', 'data/kitti_label_map.pbtxt',
                            'Path to label map proto.')
 tf.app.flags.DEFINE_integer('validation_set_size', '500', 'Number of images to'
                             'be used as a validation set.')
+tf.app.flags.DEFINE_integer('num_workers', None, 'Number of worker processes '
+                            'used to create the examples. Defaults to the '
+                            'number of CPUs.')
 FLAGS = tf.app.flags.FLAGS
 
 
 def convert_kitti_to_tfrecords(data_dir, output_path, classes_to_use,
-                               label_map_path, validation_set_size):
+                               label_map_path, validation_set_size,
+                               num_workers=None):
   """Convert the KITTI detection dataset to TFRecords.
 
   Args:
@@ -90,10 +95,10 @@ def convert_kitti_to_tfrecords(data_dir, output_path, classes_to_use,
     validation_set_size: How many images should be left as the validation set.
       (Ffirst `validation_set_size` examples are selected to be in the
       validation set).
+    num_workers: Number of worker processes creating the examples. If None,
+      the number of CPUs is used.
   """
   label_map_dict = label_map_util.get_label_map_dict(label_map_path)
-  train_count = 0
-  val_count = 0
 
   annotation_dir = os.path.join(data_dir,
                                 'training',
@@ -104,35 +109,55 @@ def convert_kitti_to_tfrecords(data_dir, output_path, classes_to_use,
                            'training',
                            'image_2')
 
-  train_writer = tf.python_io.TFRecordWriter('%s_train.tfrecord'%
-                                             output_path)
-  val_writer = tf.python_io.TFRecordWriter('%s_val.tfrecord'%
-                                           output_path)
+  output_paths = ['%s_train.tfrecord' % output_path,
+                  '%s_val.tfrecord' % output_path]
+
+  def _is_validation_img(unused_idx, img_name):
+    return int(int(img_name.split('.')[0]) < validation_set_size)
 
   images = sorted(tf.gfile.ListDirectory(image_dir))
-  for img_name in images:
-    img_num = int(img_name.split('.')[0])
-    is_validation_img = img_num < validation_set_size
-    img_anno = read_annotation_file(os.path.join(annotation_dir,
-                                                 str(img_num).zfill(6)+'.txt'))
+  tf_record_creation_util.write_tfrecords_in_parallel(
+      images,
+      functools.partial(_image_to_tf_example,
+                        annotation_dir=annotation_dir,
+                        image_dir=image_dir,
+                        classes_to_use=classes_to_use,
+                        label_map_dict=label_map_dict),
+      output_paths,
+      shard_fn=_is_validation_img,
+      num_workers=num_workers)
+
 
-    image_path = os.path.join(image_dir, img_name)
+def _image_to_tf_example(img_name, annotation_dir, image_dir, classes_to_use,
+                         label_map_dict):
+  """Reads the annotations of a KITTI image and converts them to a tf.Example.
+
+  This is the function run by the worker processes of
+  tf_record_creation_util.write_tfrecords_in_parallel.
+
+  Args:
+    img_name: File name of the image.
+    annotation_dir: Directory containing the annotation files.
+    image_dir: Directory containing the image files.
+    classes_to_use: List of strings naming the classes for which data should be
+      converted.
+    label_map_dict: A map from string label names to integers ids.
+
+  Returns:
+    example: The converted tf.Example.
+  """
+  img_num = int(img_name.split('.')[0])
+  img_anno = read_annotation_file(os.path.join(annotation_dir,
+                                               str(img_num).zfill(6)+'.txt'))
 
-    # Filter all bounding boxes of this frame that are of a legal class, and
-    # don't overlap with a dontcare region.
-    # TODO(talremez) filter out targets that are truncated or heavily occluded.
-    annotation_for_image = filter_annotations(img_anno, classes_to_use)
+  image_path = os.path.join(image_dir, img_name)
 
-    example = prepare_example(image_path, annotation_for_image, label_map_dict)
-    if is_validation_img:
-      val_writer.write(example.SerializeToString())
-      val_count += 1
-    else:
-      train_writer.write(example.SerializeToString())
-      train_count += 1
+  # Filter all bounding boxes of this frame that are of a legal class, and
+  # don't overlap with a dontcare region.
+  # TODO(talremez) filter out targets that are truncated or heavily occluded.
+  annotation_for_image = filter_annotations(img_anno, classes_to_use)
 
-  train_writer.close()
-  val_writer.close()
+  return prepare_example(image_path, annotation_for_image, label_map_dict)
 
 
 def prepare_example(image_path, annotations, label_map_dict):
@@ -304,7 +329,8 @@ def main(_):
       output_path=FLAGS.output_path,
       classes_to_use=FLAGS.classes_to_use.split(','),
       label_map_path=FLAGS.label_map_path,
-      validation_set_size=FLAGS.validation_set_size)
+      validation_set_size=FLAGS.validation_set_size,
+      num_workers=FLAGS.num_workers)
 
 if __name__ == '__main__':
   tf.app.run()
@@ -36,9 +36,9 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import functools
 import os
 
-import contextlib2
 import pandas as pd
 import tensorflow as tf
 
@@ -59,10 +59,42 @@ tf.flags.DEFINE_string(
     'Path to the output TFRecord. The shard index and the number of shards '
     'will be appended for each output shard.')
 tf.flags.DEFINE_integer('num_shards', 100, 'Number of TFRecord shards')
+tf.flags.DEFINE_integer('num_workers', None,
+                        'Number of worker processes used to create the '
+                        'examples. Defaults to the number of CPUs.')
+tf.flags.DEFINE_boolean('resume', False,
+                        'Whether to resume an interrupted conversion, keeping '
+                        'the shards that have already been written.')
 
 FLAGS = tf.flags.FLAGS
 
 
+def _create_tf_example(image_data, label_map, images_directory):
+  """Reads an image and converts it with its annotations to a tf.Example.
+
+  This is the function run by the worker processes of
+  tf_record_creation_util.write_tfrecords_in_parallel.
+
+  Args:
+    image_data: Tuple of the image ID and the data frame containing the
+      annotations of the image.
+    label_map: String to integer label map.
+    images_directory: Directory containing the image pixels.
+
+  Returns:
+    The populated TF Example, or None if no label of the image is present in
+    label_map.
+  """
+  image_id, image_annotations = image_data
+  # In OID image file names are formed by appending ".jpg" to the image ID.
+  image_path = os.path.join(images_directory, image_id + '.jpg')
+  with tf.gfile.Open(image_path) as image_file:
+    encoded_image = image_file.read()
+
+  return oid_tfrecord_creation.tf_example_from_annotations_data_frame(
+      image_annotations, label_map, encoded_image)
+
+
 def main(_):
   tf.logging.set_verbosity(tf.logging.INFO)
 
@@ -91,26 +123,18 @@ def main(_):
 
   tf.logging.log(tf.logging.INFO, 'Found %d images...', len(all_image_ids))
 
-  with contextlib2.ExitStack() as tf_record_close_stack:
-    output_tfrecords = tf_record_creation_util.open_sharded_output_tfrecords(
-        tf_record_close_stack, FLAGS.output_tf_record_path_prefix,
-        FLAGS.num_shards)
-
-    for counter, image_data in enumerate(all_annotations.groupby('ImageID')):
-      tf.logging.log_every_n(tf.logging.INFO, 'Processed %d images...', 1000,
-                             counter)
-
-      image_id, image_annotations = image_data
-      # In OID image file names are formed by appending ".jpg" to the image ID.
-      image_path = os.path.join(FLAGS.input_images_directory, image_id + '.jpg')
-      with tf.gfile.Open(image_path) as image_file:
-        encoded_image = image_file.read()
-
-      tf_example = oid_tfrecord_creation.tf_example_from_annotations_data_frame(
-          image_annotations, label_map, encoded_image)
-      if tf_example:
-        shard_idx = int(image_id, 16) % FLAGS.num_shards
-        output_tfrecords[shard_idx].write(tf_example.SerializeToString())
+  manifest_path = FLAGS.output_tf_record_path_prefix + '-manifest.json'
+  tf_record_creation_util.write_tfrecords_in_parallel(
+      list(all_annotations.groupby('ImageID')),
+      functools.partial(_create_tf_example,
+                        label_map=label_map,
+                        images_directory=FLAGS.input_images_directory),
+      tf_record_creation_util.get_sharded_output_paths(
+          FLAGS.output_tf_record_path_prefix, FLAGS.num_shards),
+      shard_fn=lambda _, image_data: int(image_data[0], 16) % FLAGS.num_shards,
+      num_workers=FLAGS.num_workers,
+      manifest_path=manifest_path,
+      resume=FLAGS.resume)
 
 
 if __name__ == '__main__':
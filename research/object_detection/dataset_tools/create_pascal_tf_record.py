@@ -25,6 +25,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import functools
 import hashlib
 import io
 import logging
@@ -34,6 +35,7 @@ from lxml import etree
 import PIL.Image
 import tensorflow as tf
 
+from object_detection.dataset_tools import tf_record_creation_util
 from object_detection.utils import dataset_util
 from object_detection.utils import label_map_util
 
@@ -50,6 +52,8 @@ flags.DEFINE_string('label_map_path', 'data/pascal_label_map.pbtxt',
                     'Path to label map proto')
 flags.DEFINE_boolean('ignore_difficult_instances', False, 'Whether to ignore '
                      'difficult instances')
+flags.DEFINE_integer('num_workers', None, 'Number of worker processes used to '
+                     'create the examples. Defaults to the number of CPUs.')
 FLAGS = flags.FLAGS
 
 SETS = ['train', 'val', 'trainval', 'test']
@@ -144,6 +148,31 @@ def dict_to_tf_example(data,
   return example
 
 
+def _annotation_file_to_tf_example(annotation_path, dataset_directory,
+                                   label_map_dict, ignore_difficult_instances):
+  """Reads a PASCAL XML annotation file and converts it to a tf.Example.
+
+  This is the function run by the worker processes of
+  tf_record_creation_util.write_tfrecords_in_parallel.
+
+  Args:
+    annotation_path: Path to the XML annotation file of an image.
+    dataset_directory: Path to root directory holding PASCAL dataset
+    label_map_dict: A map from string label names to integers ids.
+    ignore_difficult_instances: Whether to skip difficult instances in the
+      dataset  (default: False).
+
+  Returns:
+    example: The converted tf.Example.
+  """
+  with tf.gfile.GFile(annotation_path, 'r') as fid:
+    xml_str = fid.read()
+  xml = etree.fromstring(xml_str)
+  data = dataset_util.recursive_parse_xml_to_dict(xml)['annotation']
+  return dict_to_tf_example(data, dataset_directory, label_map_dict,
+                            ignore_difficult_instances)
+
+
 def main(_):
   if FLAGS.set not in SETS:
     raise ValueError('set must be in : {}'.format(SETS))
@@ -155,30 +184,28 @@ def main(_):
   if FLAGS.year != 'merged':
     years = [FLAGS.year]
 
-  writer = tf.python_io.TFRecordWriter(FLAGS.output_path)
-
   label_map_dict = label_map_util.get_label_map_dict(FLAGS.label_map_path)
 
+  annotation_paths = []
   for year in years:
     logging.info('Reading from PASCAL %s dataset.', year)
     examples_path = os.path.join(data_dir, year, 'ImageSets', 'Main',
                                  'aeroplane_' + FLAGS.set + '.txt')
     annotations_dir = os.path.join(data_dir, year, FLAGS.annotations_dir)
     examples_list = dataset_util.read_examples_list(examples_path)
-    for idx, example in enumerate(examples_list):
-      if idx % 100 == 0:
-        logging.info('On image %d of %d', idx, len(examples_list))
-      path = os.path.join(annotations_dir, example + '.xml')
-      with tf.gfile.GFile(path, 'r') as fid:
-        xml_str = fid.read()
-      xml = etree.fromstring(xml_str)
-      data = dataset_util.recursive_parse_xml_to_dict(xml)['annotation']
-
-      tf_example = dict_to_tf_example(data, FLAGS.data_dir, label_map_dict,
-                                      FLAGS.ignore_difficult_instances)
-      writer.write(tf_example.SerializeToString())
-
-  writer.close()
+    annotation_paths.extend(
+        os.path.join(annotations_dir, example + '.xml')
+        for example in examples_list)
+
+  tf_record_creation_util.write_tfrecords_in_parallel(
+      annotation_paths,
+      functools.partial(
+          _annotation_file_to_tf_example,
+          dataset_directory=FLAGS.data_dir,
+          label_map_dict=label_map_dict,
+          ignore_difficult_instances=FLAGS.ignore_difficult_instances),
+      [FLAGS.output_path],
+      num_workers=FLAGS.num_workers)
 
 
 if __name__ == '__main__':
@@ -21,11 +21,14 @@ oid_hierarchical_labels_expansion.py \
 --input_annotations=<input csv file> \
 --output_annotations=<output csv file> \
 --annotation_type=<1 (for boxes) or 2 (for image-level labels)>
+
+Annotations are expanded and written in chunks of --chunk_size rows.
 """
 
 from __future__ import print_function
 
 import argparse
+import itertools
 import json
 
 
@@ -92,6 +95,38 @@ class OIDHierarchicalLabelsExpansion(object):
     self._hierarchy_keyed_parent, self._hierarchy_keyed_child, _ = (
         _build_plain_hierarchy(hierarchy, skip_root=True))
 
+  def expand_csv_lines(self, lines, labels_file):
+    """Expands CSV lines of boxes or image-level labels.
+
+    Equivalent to expand_boxes_from_csv or expand_labels_from_csv applied to
+    each line, but only splits lines around the LabelName column, which is
+    the only one that changes.
+
+    Args:
+      lines: iterable over CSV lines, without header.
+      labels_file: whether the lines are image-level labels rather than boxes.
+
+    Returns:
+      A list of the expanded lines.
+
+    Raises:
+      ValueError: if a label is not in the hierarchy.
+    """
+    expanded_lines = []
+    for line in lines:
+      image_id, source, label_name, remainder = line.split(',', 3)
+      if labels_file and int(remainder.split(',', 1)[0]) != 1:
+        expansions = self._hierarchy_keyed_parent.get(label_name)
+      else:
+        expansions = self._hierarchy_keyed_child.get(label_name)
+      if expansions is None:
+        raise ValueError('Label not in the hierarchy: {}'.format(label_name))
+      expanded_lines.append(line)
+      for expanded_label_name in expansions:
+        expanded_lines.append(
+            ','.join((image_id, source, expanded_label_name, remainder)))
+    return expanded_lines
+
   def expand_boxes_from_csv(self, csv_row):
     """Expands a row containing bounding boxes from CSV file.
 
@@ -147,6 +182,29 @@ class OIDHierarchicalLabelsExpansion(object):
     return result
 
 
+def expand_csv(expansion_generator, input_path, output_path, labels_file,
+               chunk_size=100000):
+  """Expands an annotations CSV file chunk by chunk.
+
+  Args:
+    expansion_generator: an OIDHierarchicalLabelsExpansion.
+    input_path: path to the input CSV file.
+    output_path: path to the output CSV file.
+    labels_file: whether the file contains image-level labels rather than
+      boxes.
+    chunk_size: number of input lines expanded at a time.
+  """
+  with open(input_path, 'r') as source:
+    with open(output_path, 'w') as target:
+      target.write(source.readline())
+      while True:
+        lines = list(itertools.islice(source, chunk_size))
+        if not lines:
+          break
+        target.writelines(
+            expansion_generator.expand_csv_lines(lines, labels_file))
+
+
 def main(parsed_args):
 
   with open(parsed_args.json_hierarchy_file) as f:
@@ -158,19 +216,9 @@ def main(parsed_args):
   elif parsed_args.annotation_type != 1:
     print('--annotation_type expected value is 1 or 2.')
     return -1
-  with open(parsed_args.input_annotations, 'r') as source:
-    with open(parsed_args.output_annotations, 'w') as target:
-      header = None
-      for line in source:
-        if not header:
-          header = line
-          target.writelines(header)
-          continue
-        if labels_file:
-          expanded_lines = expansion_generator.expand_labels_from_csv(line)
-        else:
-          expanded_lines = expansion_generator.expand_boxes_from_csv(line)
-        target.writelines(expanded_lines)
+  expand_csv(expansion_generator, parsed_args.input_annotations,
+             parsed_args.output_annotations, labels_file,
+             parsed_args.chunk_size)
 
 
 if __name__ == '__main__':
@@ -197,5 +245,10 @@ if __name__ == '__main__':
       help="""Type of the input annotations: 1 - boxes, 2 - image-level
       labels"""
   )
+  parser.add_argument(
+      '--chunk_size',
+      type=int,
+      default=100000,
+      help="""Number of annotations expanded at a time.""")
   args = parser.parse_args()
   main(args)
@@ -18,6 +18,8 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
+
 import tensorflow as tf
 
 from object_detection.dataset_tools import oid_hierarchical_labels_expansion
@@ -84,5 +86,45 @@ class HierarchicalLabelsExpansionTest(tf.test.TestCase):
         '124,verification,c,1'
     ], all_result_rows)
 
+  def test_bbox_expansion_csv_lines(self):
+    hierarchy, bbox_rows, _ = create_test_data()
+    expansion_generator = (
+        oid_hierarchical_labels_expansion.OIDHierarchicalLabelsExpansion(
+            hierarchy))
+    expanded_lines = expansion_generator.expand_csv_lines(
+        [row + '\n' for row in bbox_rows], labels_file=False)
+    expected_rows = []
+    for row in bbox_rows:
+      expected_rows.extend(expansion_generator.expand_boxes_from_csv(row))
+    self.assertEqual([row + '\n' for row in expected_rows], expanded_lines)
+
+  def test_unknown_label_raises_error(self):
+    hierarchy, _, _ = create_test_data()
+    expansion_generator = (
+        oid_hierarchical_labels_expansion.OIDHierarchicalLabelsExpansion(
+            hierarchy))
+    with self.assertRaises(ValueError):
+      expansion_generator.expand_csv_lines(['123,verification,z,1\n'],
+                                           labels_file=True)
+
+  def test_expand_csv_in_chunks(self):
+    hierarchy, _, label_rows = create_test_data()
+    expansion_generator = (
+        oid_hierarchical_labels_expansion.OIDHierarchicalLabelsExpansion(
+            hierarchy))
+    input_path = os.path.join(self.get_temp_dir(), 'labels.csv')
+    output_path = os.path.join(self.get_temp_dir(), 'expanded_labels.csv')
+    header = 'ImageID,Source,LabelName,Confidence'
+    with open(input_path, 'w') as f:
+      f.write('\n'.join([header] + label_rows) + '\n')
+    oid_hierarchical_labels_expansion.expand_csv(
+        expansion_generator, input_path, output_path, labels_file=True,
+        chunk_size=2)
+    expected_rows = [header]
+    for row in label_rows:
+      expected_rows.extend(expansion_generator.expand_labels_from_csv(row))
+    with open(output_path) as f:
+      self.assertEqual(expected_rows, f.read().splitlines())
+
 if __name__ == '__main__':
   tf.test.main()
@@ -18,9 +18,31 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
+import functools
+import json
+import multiprocessing
+
+import six
 import tensorflow as tf
 
 
+def get_sharded_output_paths(base_path, num_shards):
+  """Returns the paths of all TFRecord shards.
+
+  Args:
+    base_path: The base path for all shards
+    num_shards: The number of shards
+
+  Returns:
+    The list of shard paths. Position k in the list corresponds to shard k.
+  """
+  return [
+      '{}-{:05d}-of-{:05d}'.format(base_path, idx, num_shards)
+      for idx in range(num_shards)
+  ]
+
+
 def open_sharded_output_tfrecords(exit_stack, base_path, num_shards):
   """Opens all TFRecord shards for writing and adds them to an exit stack.
 
@@ -33,10 +55,7 @@ def open_sharded_output_tfrecords(exit_stack, base_path, num_shards):
   Returns:
     The list of opened TFRecords. Position k in the list corresponds to shard k.
   """
-  tf_record_output_filenames = [
-      '{}-{:05d}-of-{:05d}'.format(base_path, idx, num_shards)
-      for idx in range(num_shards)
-  ]
+  tf_record_output_filenames = get_sharded_output_paths(base_path, num_shards)
 
   tfrecords = [
       exit_stack.enter_context(tf.python_io.TFRecordWriter(file_name))
@@ -44,3 +63,195 @@ def open_sharded_output_tfrecords(exit_stack, base_path, num_shards):
   ]
 
   return tfrecords
+
+
+def _create_serialized_examples(create_example_fn, example_inputs):
+  """Creates and serializes the examples of a chunk of inputs.
+
+  Args:
+    create_example_fn: A function mapping an input to a tf.train.Example, or to
+      None if no example should be written for it.
+    example_inputs: A list of inputs.
+
+  Returns:
+    A list with the serialized examples.
+  """
+  serialized_examples = []
+  for example_input in example_inputs:
+    tf_example = create_example_fn(example_input)
+    if tf_example is not None:
+      serialized_examples.append(tf_example.SerializeToString())
+  return serialized_examples
+
+
+def _read_manifest(manifest_path, output_paths):
+  """Reads the completed shards from a progress manifest.
+
+  Args:
+    manifest_path: Path to the manifest, or None.
+    output_paths: The paths of all output shards.
+
+  Returns:
+    A dictionary mapping the index of each completed shard to its number of
+    records.
+
+  Raises:
+    ValueError: if the manifest was written for different output paths.
+  """
+  if not manifest_path or not tf.gfile.Exists(manifest_path):
+    return {}
+  with tf.gfile.GFile(manifest_path, 'r') as fid:
+    manifest = json.load(fid)
+  if manifest['output_paths'] != list(output_paths):
+    raise ValueError('Manifest {} was written for different output '
+                     'paths.'.format(manifest_path))
+  return {int(shard_idx): num_records for shard_idx, num_records
+          in manifest['completed_shards'].items()}
+
+
+def _write_manifest(manifest_path, output_paths, completed_shards):
+  """Atomically writes the progress manifest."""
+  temp_path = manifest_path + '.tmp'
+  with tf.gfile.GFile(temp_path, 'w') as fid:
+    json.dump({'output_paths': list(output_paths),
+               'completed_shards': completed_shards}, fid)
+  tf.gfile.Rename(temp_path, manifest_path, overwrite=True)
+
+
+def _map_with_backpressure(pool, fn, inputs, max_pending):
+  """Like pool.imap, but with at most max_pending results not yet consumed.
+
+  pool.imap keeps submitting inputs whatever the speed of the consumer, so all
+  the results would pile up in memory if they are consumed more slowly than
+  they are computed.
+  """
+  pending = collections.deque()
+  for fn_input in inputs:
+    if len(pending) >= max_pending:
+      yield pending.popleft().get()
+    pending.append(pool.apply_async(fn, (fn_input,)))
+  while pending:
+    yield pending.popleft().get()
+
+
+def write_tfrecords_in_parallel(example_inputs,
+                                create_example_fn,
+                                output_paths,
+                                shard_fn=None,
+                                num_workers=None,
+                                chunk_size=32,
+                                manifest_path=None,
+                                resume=False):
+  """Creates TF examples in worker processes and writes them to TFRecords.
+
+  Each input is assigned to an output shard by `shard_fn`. Shards are written
+  one after the other by the calling process, while worker processes create
+  and serialize the examples of the following chunks of inputs, at most
+  2 * `num_workers` chunks ahead of the writer. The examples of each shard are
+  written in the order of `example_inputs`, so the output does not depend on
+  the number of workers.
+
+  If `manifest_path` is given, the shards that have been completely written are
+  recorded in a JSON manifest. Running again with the same manifest and
+  `resume` set resumes the conversion, skipping the completed shards and
+  rewriting the others.
+
+  Args:
+    example_inputs: A list of picklable inputs, one per example.
+    create_example_fn: A picklable function (e.g. a module level function or a
+      functools.partial of one) mapping an input to a tf.train.Example, or to
+      None if no example should be written for it.
+    output_paths: The paths of the output TFRecords, one per shard.
+    shard_fn: A function mapping the index and the input of an example to the
+      index of its shard. Defaults to `index % len(output_paths)`.
+    num_workers: Number of worker processes. Defaults to the number of CPUs. If
+      1, examples are created in the calling process.
+    chunk_size: Number of inputs sent to a worker at a time.
+    manifest_path: Optional path to the progress manifest.
+    resume: Whether to skip the shards recorded as completed in the manifest.
+      If False, the conversion starts from scratch.
+
+  Returns:
+    The number of examples written.
+  """
+  num_shards = len(output_paths)
+  if shard_fn is None:
+    shard_fn = lambda idx, _: idx % num_shards
+  completed_shards = {}
+  if resume:
+    completed_shards = _read_manifest(manifest_path, output_paths)
+  if completed_shards:
+    tf.logging.info('Resuming, skipping %d of %d completed shards.',
+                    len(completed_shards), num_shards)
+
+  inputs_per_shard = [[] for _ in range(num_shards)]
+  for idx, example_input in enumerate(example_inputs):
+    inputs_per_shard[shard_fn(idx, example_input)].append(example_input)
+
+  # Chunks never span several shards, so that a shard can be closed as soon as
+  # its last chunk has been written.
+  chunks = []
+  chunk_shards = []
+  for shard_idx in range(num_shards):
+    if shard_idx in completed_shards:
+      continue
+    shard_inputs = inputs_per_shard[shard_idx]
+    for start in range(0, len(shard_inputs), chunk_size):
+      chunks.append(shard_inputs[start:start + chunk_size])
+      chunk_shards.append(shard_idx)
+  num_chunks_left = [0] * num_shards
+  for shard_idx in chunk_shards:
+    num_chunks_left[shard_idx] += 1
+
+  def _finish_shard(shard_idx, writer, num_records):
+    if writer is not None:
+      writer.close()
+    else:
+      # Create empty shards as well.
+      tf.python_io.TFRecordWriter(output_paths[shard_idx]).close()
+    completed_shards[shard_idx] = num_records
+    if manifest_path:
+      _write_manifest(manifest_path, output_paths, completed_shards)
+
+  num_inputs = sum(len(chunk) for chunk in chunks)
+  num_inputs_processed = 0
+  num_examples_written = 0
+  create_chunk_fn = functools.partial(_create_serialized_examples,
+                                      create_example_fn)
+  pool = None
+  if num_workers is None or num_workers > 1:
+    if num_workers is None:
+      num_workers = multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(num_workers)
+    results = _map_with_backpressure(pool, create_chunk_fn, chunks,
+                                     max_pending=2 * num_workers)
+  else:
+    results = six.moves.map(create_chunk_fn, chunks)
+  try:
+    for shard_idx in range(num_shards):
+      if shard_idx not in completed_shards and not num_chunks_left[shard_idx]:
+        _finish_shard(shard_idx, None, 0)
+    writer = None
+    num_records = 0
+    for chunk_idx, serialized_examples in enumerate(results):
+      shard_idx = chunk_shards[chunk_idx]
+      if writer is None:
+        writer = tf.python_io.TFRecordWriter(output_paths[shard_idx])
+        num_records = 0
+      for serialized_example in serialized_examples:
+        writer.write(serialized_example)
+      num_records += len(serialized_examples)
+      num_examples_written += len(serialized_examples)
+      num_inputs_processed += len(chunks[chunk_idx])
+      tf.logging.log_every_n(tf.logging.INFO, 'Processed %d of %d inputs.',
+                             100, num_inputs_processed, num_inputs)
+      num_chunks_left[shard_idx] -= 1
+      if not num_chunks_left[shard_idx]:
+        _finish_shard(shard_idx, writer, num_records)
+        writer = None
+  finally:
+    if pool is not None:
+      pool.terminate()
+  tf.logging.info('Wrote %d examples from %d inputs.', num_examples_written,
+                  num_inputs)
+  return num_examples_written
@@ -14,11 +14,32 @@
 # ==============================================================================
 """Tests for tf_record_creation_util.py."""
 
+import json
+import multiprocessing.pool
 import os
+import threading
+import time
+
 import contextlib2
 import tensorflow as tf
 
 from object_detection.dataset_tools import tf_record_creation_util
+from object_detection.utils import dataset_util
+
+
+def _create_example(value):
+  if value % 5 == 4:
+    return None
+  return tf.train.Example(features=tf.train.Features(feature={
+      'value': dataset_util.int64_feature(value)}))
+
+
+def _read_values(tf_record_path):
+  values = []
+  for record in tf.python_io.tf_record_iterator(tf_record_path):
+    example = tf.train.Example.FromString(record)
+    values.append(example.features.feature['value'].int64_list.value[0])
+  return values
 
 
 class OpenOutputTfrecordsTests(tf.test.TestCase):
@@ -38,5 +59,78 @@ class OpenOutputTfrecordsTests(tf.test.TestCase):
       self.assertAllEqual(records, ['test_{}'.format(idx)])
 
 
+class WriteTfrecordsInParallelTests(tf.test.TestCase):
+
+  def test_writes_examples_in_order(self):
+    output_paths = tf_record_creation_util.get_sharded_output_paths(
+        os.path.join(self.get_temp_dir(), 'parallel.tfrec'), 3)
+    num_written = tf_record_creation_util.write_tfrecords_in_parallel(
+        list(range(40)), _create_example, output_paths, num_workers=2,
+        chunk_size=4)
+
+    self.assertEqual(32, num_written)
+    for shard_idx, output_path in enumerate(output_paths):
+      self.assertAllEqual(
+          [value for value in range(shard_idx, 40, 3) if value % 5 != 4],
+          _read_values(output_path))
+
+  def test_writes_empty_shards_with_custom_shard_fn(self):
+    output_paths = [os.path.join(self.get_temp_dir(), 'custom_%d.tfrec' % idx)
+                    for idx in range(2)]
+    tf_record_creation_util.write_tfrecords_in_parallel(
+        [1, 2, 3], _create_example, output_paths,
+        shard_fn=lambda unused_idx, value: 0, num_workers=1)
+
+    self.assertAllEqual([1, 2, 3], _read_values(output_paths[0]))
+    self.assertAllEqual([], _read_values(output_paths[1]))
+
+  def test_resume_skips_completed_shards(self):
+    output_paths = tf_record_creation_util.get_sharded_output_paths(
+        os.path.join(self.get_temp_dir(), 'resume.tfrec'), 2)
+    manifest_path = os.path.join(self.get_temp_dir(), 'resume-manifest.json')
+    with tf.gfile.GFile(manifest_path, 'w') as fid:
+      json.dump({'output_paths': output_paths,
+                 'completed_shards': {'0': 1}}, fid)
+    with tf.python_io.TFRecordWriter(output_paths[0]) as writer:
+      writer.write(_create_example(100).SerializeToString())
+
+    num_written = tf_record_creation_util.write_tfrecords_in_parallel(
+        list(range(6)), _create_example, output_paths, num_workers=1,
+        manifest_path=manifest_path, resume=True)
+
+    self.assertEqual(3, num_written)
+    self.assertAllEqual([100], _read_values(output_paths[0]))
+    self.assertAllEqual([1, 3, 5], _read_values(output_paths[1]))
+    with tf.gfile.GFile(manifest_path, 'r') as fid:
+      self.assertEqual({'0': 1, '1': 3}, json.load(fid)['completed_shards'])
+
+  def test_map_with_backpressure_bounds_pending_results(self):
+    lock = threading.Lock()
+    counts = {'started': 0, 'consumed': 0, 'max_pending': 0}
+
+    def square(value):
+      with lock:
+        counts['started'] += 1
+        counts['max_pending'] = max(counts['max_pending'],
+                                    counts['started'] - counts['consumed'])
+      return value * value
+
+    pool = multiprocessing.pool.ThreadPool(2)
+    try:
+      results = []
+      for result in tf_record_creation_util._map_with_backpressure(
+          pool, square, range(100), max_pending=4):
+        time.sleep(0.001)
+        with lock:
+          counts['consumed'] += 1
+        results.append(result)
+    finally:
+      pool.terminate()
+
+    self.assertEqual([value * value for value in range(100)], results)
+    # The result being consumed, and at most 4 results ahead of it.
+    self.assertLessEqual(counts['max_pending'], 5)
+
+
 if __name__ == '__main__':
   tf.test.main()
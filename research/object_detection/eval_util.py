@@ -871,4 +871,7 @@ def evaluator_options_from_eval_config(eval_config):
           'include_metrics_per_category': (
               eval_config.include_metrics_per_category)
       }
+    if eval_metric_fn_key == 'coco_detection_metrics':
+      evaluator_options[eval_metric_fn_key]['use_vectorized_metrics'] = (
+          eval_config.use_vectorized_coco_metrics)
   return evaluator_options
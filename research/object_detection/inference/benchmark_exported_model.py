@@ -0,0 +1,144 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Measures the inference latency of an exported detection model.
+
+Example usage:
+  ./benchmark_exported_model \
+    --model_path=/path/to/exported_model_directory/frozen_inference_graph.pb \
+    --image_paths=/path/to/test_images/*.jpg \
+    --batch_sizes=1,4,8 \
+    --thread_settings=0:0,4:1 \
+    --output_path=/path/to/benchmark.json
+
+The model is a frozen graph or a SavedModel written by
+export_inference_graph.py, with any input type. For each thread setting and
+batch size, the model runs --num_warmup_runs times and is then timed over
+--num_timed_runs runs. Test images are resized to --image_size, or to the size
+of the first image, so that they can be batched.
+
+The output is a JSON list with one entry per thread setting and batch size,
+holding the p50/p90/p99 latency of a run, the throughput and the peak resident
+set size of the process. The peak resident set size never decreases, so it is
+only a bound on the memory used by later entries.
+"""
+
+import glob
+import json
+
+import tensorflow as tf
+from object_detection.inference import model_benchmark
+
+tf.flags.DEFINE_string('model_path', None,
+                       'Path to a frozen inference graph, or to a SavedModel '
+                       'directory.')
+tf.flags.DEFINE_string('image_paths', None,
+                       'A comma separated list of test image paths or glob '
+                       'patterns.')
+tf.flags.DEFINE_string('image_size', None,
+                       'Optional comma separated height and width to which '
+                       'test images are resized. Defaults to the size of the '
+                       'first image.')
+tf.flags.DEFINE_string('batch_sizes', '1',
+                       'A comma separated list of batch sizes to benchmark.')
+tf.flags.DEFINE_string('thread_settings', '0:0',
+                       'A comma separated list of '
+                       'intra_op_parallelism_threads:'
+                       'inter_op_parallelism_threads settings to benchmark. '
+                       '0 lets TensorFlow pick the number of threads.')
+tf.flags.DEFINE_integer('num_warmup_runs', 5,
+                        'Number of untimed runs before each benchmark.')
+tf.flags.DEFINE_integer('num_timed_runs', 50,
+                        'Number of timed runs of each benchmark.')
+tf.flags.DEFINE_string('output_path', None,
+                       'Optional path to the output JSON file. The results '
+                       'are logged in any case.')
+
+FLAGS = tf.flags.FLAGS
+
+
+def _is_valid_image_size(image_size):
+  """Returns whether an --image_size is unset or a positive height and width."""
+  if not image_size:
+    return True
+  dims = image_size.split(',')
+  return len(dims) == 2 and all(
+      dim.strip().isdigit() and int(dim) > 0 for dim in dims)
+
+
+tf.flags.register_validator(
+    'image_size', _is_valid_image_size,
+    message='--image_size must be a height and a width, as two comma separated '
+    'positive integers, e.g. 640,480.')
+
+
+def main(_):
+  tf.logging.set_verbosity(tf.logging.INFO)
+
+  required_flags = ['model_path', 'image_paths']
+  for flag_name in required_flags:
+    if not getattr(FLAGS, flag_name):
+      raise ValueError('Flag --{} is required'.format(flag_name))
+
+  image_paths = []
+  for pattern in FLAGS.image_paths.split(','):
+    image_paths.extend(sorted(glob.glob(pattern)) or [pattern])
+  image_size = None
+  if FLAGS.image_size:
+    image_size = [int(dim) for dim in FLAGS.image_size.split(',')]
+  batch_sizes = [int(batch_size) for batch_size in FLAGS.batch_sizes.split(',')]
+  thread_settings = [[int(num_threads) for num_threads in setting.split(':')]
+                     for setting in FLAGS.thread_settings.split(',')]
+
+  results = []
+  inputs = None
+  for intra_op_threads, inter_op_threads in thread_settings:
+    config = tf.ConfigProto(
+        intra_op_parallelism_threads=intra_op_threads,
+        inter_op_parallelism_threads=inter_op_threads)
+    with tf.Graph().as_default(), tf.Session(config=config) as sess:
+      input_type, input_tensor, output_tensors = model_benchmark.load_model(
+          sess, FLAGS.model_path)
+      if inputs is None:
+        tf.logging.info('Reading %d test images.', len(image_paths))
+        inputs = model_benchmark.load_inputs(image_paths, input_type,
+                                             image_size)
+      for batch_size in batch_sizes:
+        result = model_benchmark.benchmark_model(
+            sess, input_tensor, output_tensors, inputs, batch_size,
+            num_warmup_runs=FLAGS.num_warmup_runs,
+            num_timed_runs=FLAGS.num_timed_runs)
+        result.update({
+            'model_path': FLAGS.model_path,
+            'input_type': input_type,
+            'intra_op_parallelism_threads': intra_op_threads,
+            'inter_op_parallelism_threads': inter_op_threads,
+        })
+        tf.logging.info(
+            'Batch size %d, %d:%d threads: p50 %.1f ms, p90 %.1f ms, '
+            'p99 %.1f ms, %.2f images/sec, peak RSS %.0f MB.', batch_size,
+            intra_op_threads, inter_op_threads, result['p50_latency_ms'],
+            result['p90_latency_ms'], result['p99_latency_ms'],
+            result['images_per_second'], result['peak_rss_mb'])
+        results.append(result)
+
+  results_json = json.dumps(results, indent=2, sort_keys=True)
+  tf.logging.info('Benchmark results:\n%s', results_json)
+  if FLAGS.output_path:
+    with tf.gfile.GFile(FLAGS.output_path, 'w') as fid:
+      fid.write(results_json)
+
+
+if __name__ == '__main__':
+  tf.app.run()
@@ -0,0 +1,198 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Cache of detection results keyed by the content of the encoded images.
+
+Inference corpora often contain duplicate images. DetectionResultCache stores
+the detections of each image under a hash of its encoded bytes, so that
+duplicates are only inferred once. The cache is bounded in number of entries,
+evicts the least recently used entries, and can be persisted to disk to be
+reused across runs over overlapping corpora.
+"""
+from __future__ import division
+
+import collections
+import hashlib
+import pickle
+
+import tensorflow as tf
+
+from object_detection.core import standard_fields
+from object_detection.inference import detection_inference
+
+
+class DetectionResultCache(object):
+  """LRU cache of detection results keyed by encoded image content."""
+
+  def __init__(self, max_entries=100000, cache_path=None, model_key=''):
+    """Constructor.
+
+    Args:
+      max_entries: Maximum number of cached results. When exceeded, the least
+        recently used results are evicted.
+      cache_path: Optional path from which the cache is loaded, if it exists,
+        and to which it is saved.
+      model_key: String identifying the model producing the detections. A
+        persisted cache is discarded if it was written for another model.
+
+    Raises:
+      ValueError: if max_entries is not positive.
+    """
+    if max_entries <= 0:
+      raise ValueError('max_entries must be positive.')
+    self._max_entries = max_entries
+    self._cache_path = cache_path
+    self._model_key = model_key
+    self._entries = collections.OrderedDict()
+    self.num_hits = 0
+    self.num_misses = 0
+    self.num_evictions = 0
+    if cache_path and tf.gfile.Exists(cache_path):
+      self._load()
+
+  def __len__(self):
+    return len(self._entries)
+
+  @staticmethod
+  def get_key(encoded_image):
+    """Returns the cache key of an encoded image."""
+    return hashlib.sha1(encoded_image).hexdigest()
+
+  @property
+  def hit_rate(self):
+    """Fraction of lookups that were found in the cache."""
+    num_lookups = self.num_hits + self.num_misses
+    if not num_lookups:
+      return 0.0
+    return self.num_hits / num_lookups
+
+  def get(self, key):
+    """Looks up the detections of an image.
+
+    Args:
+      key: Cache key of the image, see get_key.
+
+    Returns:
+      A (detected_boxes, detected_scores, detected_classes) tuple of numpy
+      arrays, or None if the image is not cached.
+    """
+    detections = self._entries.pop(key, None)
+    if detections is None:
+      self.num_misses += 1
+      return None
+    self._entries[key] = detections
+    self.num_hits += 1
+    return detections
+
+  def put(self, key, detections):
+    """Caches the detections of an image.
+
+    Args:
+      key: Cache key of the image, see get_key.
+      detections: A (detected_boxes, detected_scores, detected_classes) tuple
+        of numpy arrays.
+    """
+    self._entries.pop(key, None)
+    self._entries[key] = detections
+    while len(self._entries) > self._max_entries:
+      self._entries.popitem(last=False)
+      self.num_evictions += 1
+
+  def save(self):
+    """Atomically writes the cache to `cache_path`, if set."""
+    if not self._cache_path:
+      return
+    temp_path = self._cache_path + '.tmp'
+    with tf.gfile.GFile(temp_path, 'wb') as fid:
+      pickle.dump({'model_key': self._model_key,
+                   'entries': list(self._entries.items())}, fid, protocol=2)
+    tf.gfile.Rename(temp_path, self._cache_path, overwrite=True)
+    tf.logging.info('Saved %d cached detection results to %s',
+                    len(self._entries), self._cache_path)
+
+  def _load(self):
+    with tf.gfile.GFile(self._cache_path, 'rb') as fid:
+      state = pickle.load(fid)
+    if state['model_key'] != self._model_key:
+      tf.logging.warning('Ignoring the detection cache %s, which was written '
+                         'for another model.', self._cache_path)
+      return
+    for key, detections in state['entries']:
+      self.put(key, detections)
+    tf.logging.info('Loaded %d cached detection results from %s',
+                    len(self._entries), self._cache_path)
+
+  def log_stats(self):
+    """Logs the hit rate of the cache."""
+    tf.logging.info('Detection cache: %d hits, %d misses (hit rate %.3f), '
+                    '%d evictions, %d entries.', self.num_hits,
+                    self.num_misses, self.hit_rate, self.num_evictions,
+                    len(self._entries))
+
+
+def build_encoded_image_input():
+  """Builds a graph input fed with an encoded image.
+
+  Returns:
+    encoded_image_placeholder: String placeholder for the encoded image.
+    image_tensor: The decoded image. Uint8 tensor, shape=[1, None, None, 3]
+  """
+  encoded_image_placeholder = tf.placeholder(tf.string, shape=[])
+  image_tensor = tf.image.decode_image(encoded_image_placeholder, channels=3)
+  image_tensor.set_shape([None, None, 3])
+  image_tensor = tf.expand_dims(image_tensor, 0)
+  return encoded_image_placeholder, image_tensor
+
+
+def infer_detections_with_cache(serialized_examples,
+                                encoded_image_placeholder,
+                                detected_boxes_tensor,
+                                detected_scores_tensor,
+                                detected_labels_tensor,
+                                cache,
+                                discard_image_pixels):
+  """Adds detections to examples, only running inference on uncached images.
+
+  Args:
+    serialized_examples: Iterable over serialized TF examples.
+    encoded_image_placeholder: String placeholder for the encoded image, fed to
+      the inference graph.
+    detected_boxes_tensor: Detected boxes. Float tensor,
+        shape=[num_detections, 4]
+    detected_scores_tensor: Detected scores. Float tensor,
+        shape=[num_detections]
+    detected_labels_tensor: Detected labels. Int64 tensor,
+        shape=[num_detections]
+    cache: A DetectionResultCache.
+    discard_image_pixels: If true, discards the images from the results
+
+  Yields:
+    The de-serialized TF examples augmented with the detections.
+  """
+  sess = tf.get_default_session()
+  for serialized_example in serialized_examples:
+    tf_example = tf.train.Example.FromString(serialized_example)
+    encoded_image = tf_example.features.feature[
+        standard_fields.TfExampleFields.image_encoded].bytes_list.value[0]
+    key = cache.get_key(encoded_image)
+    detections = cache.get(key)
+    if detections is None:
+      detections = tuple(sess.run(
+          [detected_boxes_tensor, detected_scores_tensor,
+           detected_labels_tensor],
+          feed_dict={encoded_image_placeholder: encoded_image}))
+      cache.put(key, detections)
+    yield detection_inference.add_detections_to_example(
+        serialized_example, detections[0], detections[1], detections[2],
+        discard_image_pixels)
@@ -0,0 +1,112 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for object_detection.inference.detection_cache."""
+import io
+import os
+
+import numpy as np
+from PIL import Image
+import tensorflow as tf
+
+from object_detection.core import standard_fields
+from object_detection.inference import detection_cache
+from object_detection.utils import dataset_util
+
+
+def _get_detections(value):
+  return (np.array([[0.1, 0.2, 0.3, 0.4]], dtype=np.float32),
+          np.array([value], dtype=np.float32), np.array([1], dtype=np.int64))
+
+
+def _create_serialized_example(pixel_value):
+  image = np.array([[[pixel_value, 0, 0]]], dtype=np.uint8)
+  image_output_stream = io.BytesIO()
+  Image.fromarray(image, 'RGB').save(image_output_stream, format='png')
+  feature_map = {
+      standard_fields.TfExampleFields.image_encoded:
+          dataset_util.bytes_feature(image_output_stream.getvalue()),
+  }
+  tf_example = tf.train.Example(features=tf.train.Features(feature=feature_map))
+  return tf_example.SerializeToString()
+
+
+class DetectionResultCacheTest(tf.test.TestCase):
+
+  def test_get_and_put(self):
+    cache = detection_cache.DetectionResultCache(max_entries=2)
+    key = cache.get_key(b'image')
+    self.assertIsNone(cache.get(key))
+    cache.put(key, _get_detections(0.5))
+    self.assertAllClose([0.5], cache.get(key)[1])
+    self.assertEqual(1, cache.num_hits)
+    self.assertEqual(1, cache.num_misses)
+    self.assertAlmostEqual(0.5, cache.hit_rate)
+
+  def test_evicts_least_recently_used(self):
+    cache = detection_cache.DetectionResultCache(max_entries=2)
+    cache.put('a', _get_detections(0.1))
+    cache.put('b', _get_detections(0.2))
+    cache.get('a')
+    cache.put('c', _get_detections(0.3))
+    self.assertEqual(2, len(cache))
+    self.assertEqual(1, cache.num_evictions)
+    self.assertIsNone(cache.get('b'))
+    self.assertIsNotNone(cache.get('a'))
+    self.assertIsNotNone(cache.get('c'))
+
+  def test_save_and_load(self):
+    cache_path = os.path.join(self.get_temp_dir(), 'detection_cache.pkl')
+    cache = detection_cache.DetectionResultCache(
+        max_entries=10, cache_path=cache_path, model_key='model')
+    cache.put('a', _get_detections(0.1))
+    cache.save()
+
+    loaded_cache = detection_cache.DetectionResultCache(
+        max_entries=10, cache_path=cache_path, model_key='model')
+    self.assertAllClose([0.1], loaded_cache.get('a')[1])
+    other_model_cache = detection_cache.DetectionResultCache(
+        max_entries=10, cache_path=cache_path, model_key='other_model')
+    self.assertEqual(0, len(other_model_cache))
+
+  def test_infer_detections_with_cache(self):
+    (encoded_image_placeholder,
+     image_tensor) = detection_cache.build_encoded_image_input()
+    image_sum = tf.reduce_sum(tf.cast(image_tensor, tf.float32))
+    detected_boxes_tensor = tf.constant([[0.1, 0.2, 0.3, 0.4]])
+    detected_scores_tensor = tf.reshape(image_sum, [1]) / 255.0
+    detected_labels_tensor = tf.constant([1], dtype=tf.int64)
+    serialized_examples = [_create_serialized_example(value)
+                           for value in [51, 102, 51]]
+    cache = detection_cache.DetectionResultCache()
+
+    with self.test_session(use_gpu=False):
+      tf_examples = list(detection_cache.infer_detections_with_cache(
+          serialized_examples, encoded_image_placeholder,
+          detected_boxes_tensor, detected_scores_tensor,
+          detected_labels_tensor, cache, True))
+
+    self.assertEqual(1, cache.num_hits)
+    self.assertEqual(2, cache.num_misses)
+    for tf_example, expected_score in zip(tf_examples, [0.2, 0.4, 0.2]):
+      feature = tf_example.features.feature
+      self.assertNotIn(standard_fields.TfExampleFields.image_encoded, feature)
+      self.assertAllClose(
+          [expected_score],
+          feature[standard_fields.TfExampleFields.
+                  detection_score].float_list.value)
+
+
+if __name__ == '__main__':
+  tf.test.main()
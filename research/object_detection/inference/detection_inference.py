@@ -15,6 +15,9 @@
 """Utility functions for detection inference."""
 from __future__ import division
 
+import threading
+
+import six
 import tensorflow as tf
 
 from object_detection.core import standard_fields
@@ -50,6 +53,61 @@ def build_input(tfrecord_paths):
   return serialized_example_tensor, image_tensor
 
 
+def build_batched_input(tfrecord_paths,
+                        batch_size,
+                        image_size=None,
+                        num_parallel_calls=4,
+                        num_prefetch_batches=2):
+  """Builds the graph's input for batched inference.
+
+  Examples are read and decoded in parallel by a tf.data pipeline, which
+  prefetches batches so that decoding overlaps with inference. Images are
+  either resized to a fixed size, or zero-padded at the bottom and right to the
+  size of the largest image in the batch.
+
+  Args:
+    tfrecord_paths: List of paths to the input TFRecords
+    batch_size: Maximum number of examples in a batch. The last batch may be
+      smaller.
+    image_size: Optional (height, width) tuple. If given, images are resized to
+      this size. Otherwise images are padded.
+    num_parallel_calls: Number of examples decoded in parallel.
+    num_prefetch_batches: Number of batches to prefetch.
+
+  Returns:
+    serialized_examples_tensor: The next serialized examples. String Tensor,
+        shape=[batch_size]
+    images_tensor: The decoded images of the examples. Uint8 tensor,
+        shape=[batch_size, None, None, 3]
+    true_image_shapes_tensor: The shapes of the images before padding or
+        resizing. Int32 tensor, shape=[batch_size, 3]
+  """
+  def _decode(serialized_example):
+    features = tf.parse_single_example(
+        serialized_example,
+        features={
+            standard_fields.TfExampleFields.image_encoded:
+                tf.FixedLenFeature([], tf.string),
+        })
+    encoded_image = features[standard_fields.TfExampleFields.image_encoded]
+    image = tf.image.decode_image(encoded_image, channels=3)
+    image.set_shape([None, None, 3])
+    true_image_shape = tf.shape(image)
+    if image_size is not None:
+      image = tf.cast(tf.image.resize_images(image, image_size), tf.uint8)
+    return serialized_example, image, true_image_shape
+
+  dataset = tf.data.TFRecordDataset(tfrecord_paths)
+  dataset = dataset.map(_decode, num_parallel_calls=num_parallel_calls)
+  if image_size is not None:
+    dataset = dataset.batch(batch_size)
+  else:
+    dataset = dataset.padded_batch(
+        batch_size, padded_shapes=([], [None, None, 3], [3]))
+  dataset = dataset.prefetch(num_prefetch_batches)
+  return dataset.make_one_shot_iterator().get_next()
+
+
 def build_inference_graph(image_tensor, inference_graph_path):
   """Loads the inference graph and connects it to the input image.
 
@@ -95,29 +153,74 @@ def build_inference_graph(image_tensor, inference_graph_path):
   return detected_boxes_tensor, detected_scores_tensor, detected_labels_tensor
 
 
-def infer_detections_and_add_to_example(
-    serialized_example_tensor, detected_boxes_tensor, detected_scores_tensor,
-    detected_labels_tensor, discard_image_pixels):
-  """Runs the supplied tensors and adds the inferred detections to the example.
+def build_batched_inference_graph(images_tensor, inference_graph_path,
+                                  true_image_shapes_tensor=None):
+  """Loads the inference graph and connects it to a batch of input images.
 
   Args:
-    serialized_example_tensor: Serialized TF example. Scalar string tensor
+    images_tensor: The input images. uint8 tensor,
+        shape=[batch_size, None, None, 3]
+    inference_graph_path: Path to the inference graph with embedded weights
+    true_image_shapes_tensor: Optional shapes of the images before padding.
+        Int32 tensor, shape=[batch_size, 3]. If given, the detected boxes are
+        normalized with respect to the unpadded images and clipped to them.
+
+  Returns:
+    num_detections_tensor: Number of valid detections per image. Int32 tensor,
+        shape=[batch_size]
     detected_boxes_tensor: Detected boxes. Float tensor,
-        shape=[num_detections, 4]
+        shape=[batch_size, max_detections, 4]
     detected_scores_tensor: Detected scores. Float tensor,
-        shape=[num_detections]
+        shape=[batch_size, max_detections]
     detected_labels_tensor: Detected labels. Int64 tensor,
+        shape=[batch_size, max_detections]
+  """
+  with tf.gfile.Open(inference_graph_path, 'r') as graph_def_file:
+    graph_content = graph_def_file.read()
+  graph_def = tf.GraphDef()
+  graph_def.MergeFromString(graph_content)
+
+  tf.import_graph_def(
+      graph_def, name='', input_map={'image_tensor': images_tensor})
+
+  g = tf.get_default_graph()
+
+  num_detections_tensor = tf.cast(
+      g.get_tensor_by_name('num_detections:0'), tf.int32)
+  detected_boxes_tensor = g.get_tensor_by_name('detection_boxes:0')
+  detected_scores_tensor = g.get_tensor_by_name('detection_scores:0')
+  detected_labels_tensor = tf.cast(
+      g.get_tensor_by_name('detection_classes:0'), tf.int64)
+
+  if true_image_shapes_tensor is not None:
+    padded_image_shape = tf.cast(tf.shape(images_tensor)[1:3], tf.float32)
+    true_image_shapes = tf.cast(true_image_shapes_tensor[:, :2], tf.float32)
+    scale = padded_image_shape / true_image_shapes
+    scale = tf.tile(scale, [1, 2])[:, tf.newaxis, :]
+    detected_boxes_tensor = tf.clip_by_value(
+        detected_boxes_tensor * scale, 0.0, 1.0)
+
+  return (num_detections_tensor, detected_boxes_tensor, detected_scores_tensor,
+          detected_labels_tensor)
+
+
+def add_detections_to_example(serialized_example, detected_boxes,
+                              detected_scores, detected_classes,
+                              discard_image_pixels):
+  """Adds detections to a serialized example.
+
+  Args:
+    serialized_example: Serialized TF example.
+    detected_boxes: Detected boxes. Float numpy array, shape=[num_detections, 4]
+    detected_scores: Detected scores. Float numpy array,
+        shape=[num_detections]
+    detected_classes: Detected labels. Int64 numpy array,
         shape=[num_detections]
     discard_image_pixels: If true, discards the image from the result
   Returns:
-    The de-serialized TF example augmented with the inferred detections.
+    The de-serialized TF example augmented with the detections.
   """
   tf_example = tf.train.Example()
-  (serialized_example, detected_boxes, detected_scores,
-   detected_classes) = tf.get_default_session().run([
-       serialized_example_tensor, detected_boxes_tensor, detected_scores_tensor,
-       detected_labels_tensor
-   ])
   detected_boxes = detected_boxes.T
 
   tf_example.ParseFromString(serialized_example)
@@ -139,3 +242,107 @@ def infer_detections_and_add_to_example(
     del feature[standard_fields.TfExampleFields.image_encoded]
 
   return tf_example
+
+
+def infer_detections_and_add_to_example(
+    serialized_example_tensor, detected_boxes_tensor, detected_scores_tensor,
+    detected_labels_tensor, discard_image_pixels):
+  """Runs the supplied tensors and adds the inferred detections to the example.
+
+  Args:
+    serialized_example_tensor: Serialized TF example. Scalar string tensor
+    detected_boxes_tensor: Detected boxes. Float tensor,
+        shape=[num_detections, 4]
+    detected_scores_tensor: Detected scores. Float tensor,
+        shape=[num_detections]
+    detected_labels_tensor: Detected labels. Int64 tensor,
+        shape=[num_detections]
+    discard_image_pixels: If true, discards the image from the result
+  Returns:
+    The de-serialized TF example augmented with the inferred detections.
+  """
+  (serialized_example, detected_boxes, detected_scores,
+   detected_classes) = tf.get_default_session().run([
+       serialized_example_tensor, detected_boxes_tensor, detected_scores_tensor,
+       detected_labels_tensor
+   ])
+  return add_detections_to_example(serialized_example, detected_boxes,
+                                   detected_scores, detected_classes,
+                                   discard_image_pixels)
+
+
+def infer_detections_in_batches(serialized_examples_tensor,
+                                num_detections_tensor,
+                                detected_boxes_tensor,
+                                detected_scores_tensor,
+                                detected_labels_tensor,
+                                discard_image_pixels,
+                                queue_capacity=4):
+  """Runs batched inference and yields the examples augmented with detections.
+
+  Inference runs in a background thread, which feeds a bounded queue of
+  results, so that the next batch is inferred while the examples of the
+  previous batch are augmented and consumed (e.g. written to disk). Examples
+  are yielded in input order.
+
+  Args:
+    serialized_examples_tensor: Serialized TF examples. String tensor,
+        shape=[batch_size]
+    num_detections_tensor: Number of valid detections per example. Int32
+        tensor, shape=[batch_size]
+    detected_boxes_tensor: Detected boxes. Float tensor,
+        shape=[batch_size, max_detections, 4]
+    detected_scores_tensor: Detected scores. Float tensor,
+        shape=[batch_size, max_detections]
+    detected_labels_tensor: Detected labels. Int64 tensor,
+        shape=[batch_size, max_detections]
+    discard_image_pixels: If true, discards the images from the results
+    queue_capacity: Maximum number of inferred batches waiting to be consumed.
+
+  Yields:
+    The de-serialized TF examples augmented with the inferred detections.
+  """
+  sess = tf.get_default_session()
+  fetches = [serialized_examples_tensor, num_detections_tensor,
+             detected_boxes_tensor, detected_scores_tensor,
+             detected_labels_tensor]
+  results_queue = six.moves.queue.Queue(maxsize=queue_capacity)
+  stop_event = threading.Event()
+
+  def _put(item):
+    while not stop_event.is_set():
+      try:
+        results_queue.put(item, timeout=0.1)
+        return
+      except six.moves.queue.Full:
+        pass
+
+  def _infer():
+    try:
+      while not stop_event.is_set():
+        _put((sess.run(fetches), None))
+    except tf.errors.OutOfRangeError:
+      _put((None, None))
+    except Exception as e:  # pylint: disable=broad-except
+      _put((None, e))
+
+  inference_thread = threading.Thread(target=_infer)
+  inference_thread.daemon = True
+  inference_thread.start()
+  try:
+    while True:
+      results, error = results_queue.get()
+      if error is not None:
+        raise error
+      if results is None:
+        break
+      (serialized_examples, num_detections, detected_boxes, detected_scores,
+       detected_classes) = results
+      for i, serialized_example in enumerate(serialized_examples):
+        yield add_detections_to_example(
+            serialized_example, detected_boxes[i][:num_detections[i]],
+            detected_scores[i][:num_detections[i]],
+            detected_classes[i][:num_detections[i]], discard_image_pixels)
+  finally:
+    stop_event.set()
+    inference_thread.join()
@@ -72,6 +72,54 @@ def create_mock_graph():
     fl.write(graph_def.SerializeToString())
 
 
+def get_mock_batched_tfrecord_path():
+  return os.path.join(tf.test.get_temp_dir(), 'mock_batched.tfrec')
+
+
+def create_mock_batched_tfrecord():
+  images = [np.array([[[123, 0, 0]]], dtype=np.uint8),
+            np.array([[[10, 0, 0]], [[20, 0, 0]]], dtype=np.uint8)]
+  with tf.python_io.TFRecordWriter(get_mock_batched_tfrecord_path()) as writer:
+    for image in images:
+      image_output_stream = StringIO.StringIO()
+      Image.fromarray(image, 'RGB').save(image_output_stream, format='png')
+      feature_map = {
+          standard_fields.TfExampleFields.image_encoded:
+              dataset_util.bytes_feature(image_output_stream.getvalue()),
+      }
+      tf_example = tf.train.Example(
+          features=tf.train.Features(feature=feature_map))
+      writer.write(tf_example.SerializeToString())
+
+
+def get_mock_batched_graph_path():
+  return os.path.join(tf.test.get_temp_dir(), 'mock_batched_graph.pb')
+
+
+def create_mock_batched_graph():
+  g = tf.Graph()
+  with g.as_default():
+    in_image_tensor = tf.placeholder(
+        tf.uint8, shape=[None, None, None, 3], name='image_tensor')
+    batch_size = tf.shape(in_image_tensor)[0]
+    tf.fill([batch_size], 2.0, name='num_detections')
+    tf.tile(
+        tf.constant(
+            [[[0, 0.8, 0.7, 1], [0.1, 0.2, 0.8, 0.9], [0.2, 0.3, 0.4, 0.5]]]),
+        [batch_size, 1, 1], name='detection_boxes')
+    tf.tile(tf.constant([[0.1, 0.2, 0.3]]), [batch_size, 1],
+            name='detection_scores')
+    tf.identity(
+        tf.constant([[1.0, 2.0, 3.0]]) * tf.reduce_sum(
+            tf.cast(in_image_tensor, dtype=tf.float32), axis=[1, 2, 3],
+            keep_dims=True)[:, :, 0, 0],
+        name='detection_classes')
+    graph_def = g.as_graph_def()
+
+  with tf.gfile.Open(get_mock_batched_graph_path(), 'w') as fl:
+    fl.write(graph_def.SerializeToString())
+
+
 class InferDetectionsTests(tf.test.TestCase):
 
   def test_simple(self):
@@ -171,6 +219,80 @@ class InferDetectionsTests(tf.test.TestCase):
             value { float_list { value: [1.0, 2.0, 3.0, 4.0] } } } }
     """, tf_example)
 
+  def test_batched_with_padding(self):
+    create_mock_batched_graph()
+    create_mock_batched_tfrecord()
+
+    (serialized_examples_tensor, images_tensor,
+     true_image_shapes_tensor) = detection_inference.build_batched_input(
+         [get_mock_batched_tfrecord_path()], batch_size=2)
+    self.assertAllEqual(images_tensor.get_shape().as_list(),
+                        [None, None, None, 3])
+    (num_detections_tensor, detected_boxes_tensor, detected_scores_tensor,
+     detected_labels_tensor) = detection_inference.build_batched_inference_graph(
+         images_tensor, get_mock_batched_graph_path(),
+         true_image_shapes_tensor)
+
+    with self.test_session(use_gpu=False):
+      tf_examples = list(detection_inference.infer_detections_in_batches(
+          serialized_examples_tensor, num_detections_tensor,
+          detected_boxes_tensor, detected_scores_tensor,
+          detected_labels_tensor, True))
+
+    self.assertEqual(2, len(tf_examples))
+    expected_ymax = [[1.0, 1.0], [0.7, 0.8]]
+    expected_ymin = [[0.0, 0.2], [0.0, 0.1]]
+    expected_labels = [[123, 246], [30, 60]]
+    for i, tf_example in enumerate(tf_examples):
+      feature = tf_example.features.feature
+      self.assertNotIn(standard_fields.TfExampleFields.image_encoded, feature)
+      self.assertAllClose(
+          expected_ymin[i],
+          feature[standard_fields.TfExampleFields.
+                  detection_bbox_ymin].float_list.value)
+      self.assertAllClose(
+          expected_ymax[i],
+          feature[standard_fields.TfExampleFields.
+                  detection_bbox_ymax].float_list.value)
+      self.assertAllClose(
+          [0.8, 0.2],
+          feature[standard_fields.TfExampleFields.
+                  detection_bbox_xmin].float_list.value)
+      self.assertAllClose(
+          [0.1, 0.2],
+          feature[standard_fields.TfExampleFields.
+                  detection_score].float_list.value)
+      self.assertAllEqual(
+          expected_labels[i],
+          feature[standard_fields.TfExampleFields.
+                  detection_class_label].int64_list.value)
+
+  def test_batched_with_resizing(self):
+    create_mock_batched_graph()
+    create_mock_batched_tfrecord()
+
+    (serialized_examples_tensor, images_tensor,
+     _) = detection_inference.build_batched_input(
+         [get_mock_batched_tfrecord_path()], batch_size=3, image_size=(4, 4))
+    (num_detections_tensor, detected_boxes_tensor, detected_scores_tensor,
+     detected_labels_tensor) = detection_inference.build_batched_inference_graph(
+         images_tensor, get_mock_batched_graph_path())
+
+    with self.test_session(use_gpu=False):
+      tf_examples = list(detection_inference.infer_detections_in_batches(
+          serialized_examples_tensor, num_detections_tensor,
+          detected_boxes_tensor, detected_scores_tensor,
+          detected_labels_tensor, False))
+
+    self.assertEqual(2, len(tf_examples))
+    for tf_example in tf_examples:
+      feature = tf_example.features.feature
+      self.assertIn(standard_fields.TfExampleFields.image_encoded, feature)
+      self.assertAllClose(
+          [0.7, 0.8],
+          feature[standard_fields.TfExampleFields.
+                  detection_bbox_ymax].float_list.value)
+
 
 if __name__ == '__main__':
   tf.test.main()
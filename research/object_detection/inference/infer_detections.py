@@ -32,10 +32,25 @@ The script can also discard the image pixels in the output. This greatly
 reduces the output size and can potentially accelerate reading data in
 subsequent processing steps that don't require the images (e.g. computing
 metrics).
+
+With --batch_size > 1, examples are decoded in parallel and inferred in
+batches, and inference overlaps with decoding and writing. Images in a batch are
+either resized to --image_size or zero-padded to the largest image in the
+batch. Note that padding or resizing changes the input of the model, so the
+detections may slightly differ from unbatched inference.
+
+With --cache_size > 0, the detections of each image are cached under a hash of
+the encoded image, so that duplicate images are only inferred once. With
+--cache_path, the cache is persisted across runs, so reprocessing overlapping
+corpora only runs inference on new images. Cached inference is not batched, so
+--cache_size can not be combined with --batch_size > 1.
 """
 
+import hashlib
 import itertools
+import time
 import tensorflow as tf
+from object_detection.inference import detection_cache
 from object_detection.inference import detection_inference
 
 tf.flags.DEFINE_string('input_tfrecord_paths', None,
@@ -50,9 +65,102 @@ tf.flags.DEFINE_boolean('discard_image_pixels', False,
                         ' if the subsequent tools don\'t need access to the'
                         ' images (e.g. when computing evaluation measures).')
 
+tf.flags.DEFINE_integer('batch_size', 1,
+                        'Number of images inferred at a time. If larger than '
+                        '1, images are decoded in parallel and inferred in '
+                        'batches.')
+tf.flags.DEFINE_string('image_size', None,
+                       'Optional comma separated height and width to which '
+                       'images are resized in batched inference. If not set, '
+                       'images are zero-padded to the largest image in the '
+                       'batch.')
+tf.flags.DEFINE_integer('num_parallel_calls', 4,
+                        'Number of images decoded in parallel in batched '
+                        'inference.')
+tf.flags.DEFINE_integer('queue_capacity', 4,
+                        'Maximum number of inferred batches waiting to be '
+                        'written in batched inference.')
+tf.flags.DEFINE_integer('intra_op_parallelism_threads', 0,
+                        'Number of threads used within an op. 0 lets the '
+                        'system pick an appropriate number.')
+tf.flags.DEFINE_integer('inter_op_parallelism_threads', 0,
+                        'Number of ops run in parallel. 0 lets the system pick '
+                        'an appropriate number.')
+tf.flags.DEFINE_integer('cache_size', 0,
+                        'Maximum number of images whose detections are cached. '
+                        'If 0, detections are not cached.')
+tf.flags.DEFINE_string('cache_path', None,
+                       'Optional path where the detection cache is persisted.')
+
 FLAGS = tf.flags.FLAGS
 
 
+def _infer_detections(input_tfrecord_paths):
+  """Builds the inference graph and returns an iterator over the results."""
+  serialized_example_tensor, image_tensor = detection_inference.build_input(
+      input_tfrecord_paths)
+  tf.logging.info('Reading graph and building model...')
+  (detected_boxes_tensor, detected_scores_tensor,
+   detected_labels_tensor) = detection_inference.build_inference_graph(
+       image_tensor, FLAGS.inference_graph)
+
+  def _generate():
+    try:
+      while True:
+        yield detection_inference.infer_detections_and_add_to_example(
+            serialized_example_tensor, detected_boxes_tensor,
+            detected_scores_tensor, detected_labels_tensor,
+            FLAGS.discard_image_pixels)
+    except tf.errors.OutOfRangeError:
+      pass
+
+  sess = tf.get_default_session()
+  sess.run(tf.local_variables_initializer())
+  tf.train.start_queue_runners()
+  return _generate()
+
+
+def _infer_detections_with_cache(input_tfrecord_paths, cache):
+  """Builds the inference graph and returns an iterator over the results."""
+  (encoded_image_placeholder,
+   image_tensor) = detection_cache.build_encoded_image_input()
+  tf.logging.info('Reading graph and building model...')
+  (detected_boxes_tensor, detected_scores_tensor,
+   detected_labels_tensor) = detection_inference.build_inference_graph(
+       image_tensor, FLAGS.inference_graph)
+  serialized_examples = itertools.chain.from_iterable(
+      tf.python_io.tf_record_iterator(path) for path in input_tfrecord_paths)
+  return detection_cache.infer_detections_with_cache(
+      serialized_examples, encoded_image_placeholder, detected_boxes_tensor,
+      detected_scores_tensor, detected_labels_tensor, cache,
+      FLAGS.discard_image_pixels)
+
+
+def _infer_detections_in_batches(input_tfrecord_paths):
+  """Builds the batched inference graph and returns an iterator over results."""
+  image_size = None
+  if FLAGS.image_size:
+    image_size = [int(v) for v in FLAGS.image_size.split(',')]
+    if len(image_size) != 2:
+      raise ValueError('--image_size must be a height and a width.')
+  (serialized_examples_tensor, images_tensor,
+   true_image_shapes_tensor) = detection_inference.build_batched_input(
+       input_tfrecord_paths, FLAGS.batch_size, image_size=image_size,
+       num_parallel_calls=FLAGS.num_parallel_calls)
+  if image_size is not None:
+    # Normalized coordinates are not affected by resizing.
+    true_image_shapes_tensor = None
+  tf.logging.info('Reading graph and building model...')
+  (num_detections_tensor, detected_boxes_tensor, detected_scores_tensor,
+   detected_labels_tensor) = detection_inference.build_batched_inference_graph(
+       images_tensor, FLAGS.inference_graph, true_image_shapes_tensor)
+
+  return detection_inference.infer_detections_in_batches(
+      serialized_examples_tensor, num_detections_tensor, detected_boxes_tensor,
+      detected_scores_tensor, detected_labels_tensor,
+      FLAGS.discard_image_pixels, queue_capacity=FLAGS.queue_capacity)
+
+
 def main(_):
   tf.logging.set_verbosity(tf.logging.INFO)
 
@@ -61,35 +169,47 @@ def main(_):
   for flag_name in required_flags:
     if not getattr(FLAGS, flag_name):
       raise ValueError('Flag --{} is required'.format(flag_name))
+  if FLAGS.cache_size > 0 and FLAGS.batch_size > 1:
+    raise ValueError('Cached inference is not batched: --cache_size and '
+                     '--batch_size > 1 can not be used together.')
 
-  with tf.Session() as sess:
+  session_config = tf.ConfigProto(
+      intra_op_parallelism_threads=FLAGS.intra_op_parallelism_threads,
+      inter_op_parallelism_threads=FLAGS.inter_op_parallelism_threads)
+  with tf.Session(config=session_config):
     input_tfrecord_paths = [
         v for v in FLAGS.input_tfrecord_paths.split(',') if v]
     tf.logging.info('Reading input from %d files', len(input_tfrecord_paths))
-    serialized_example_tensor, image_tensor = detection_inference.build_input(
-        input_tfrecord_paths)
-    tf.logging.info('Reading graph and building model...')
-    (detected_boxes_tensor, detected_scores_tensor,
-     detected_labels_tensor) = detection_inference.build_inference_graph(
-         image_tensor, FLAGS.inference_graph)
+    cache = None
+    if FLAGS.cache_size > 0:
+      with tf.gfile.GFile(FLAGS.inference_graph, 'rb') as graph_def_file:
+        model_key = hashlib.sha1(graph_def_file.read()).hexdigest()
+      cache = detection_cache.DetectionResultCache(
+          FLAGS.cache_size, FLAGS.cache_path, model_key)
+      tf_examples = _infer_detections_with_cache(input_tfrecord_paths, cache)
+    elif FLAGS.batch_size > 1:
+      tf_examples = _infer_detections_in_batches(input_tfrecord_paths)
+    else:
+      tf_examples = _infer_detections(input_tfrecord_paths)
 
     tf.logging.info('Running inference and writing output to {}'.format(
         FLAGS.output_tfrecord_path))
-    sess.run(tf.local_variables_initializer())
-    tf.train.start_queue_runners()
+    start_time = time.time()
+    counter = 0
     with tf.python_io.TFRecordWriter(
         FLAGS.output_tfrecord_path) as tf_record_writer:
-      try:
-        for counter in itertools.count():
-          tf.logging.log_every_n(tf.logging.INFO, 'Processed %d images...', 10,
-                                 counter)
-          tf_example = detection_inference.infer_detections_and_add_to_example(
-              serialized_example_tensor, detected_boxes_tensor,
-              detected_scores_tensor, detected_labels_tensor,
-              FLAGS.discard_image_pixels)
-          tf_record_writer.write(tf_example.SerializeToString())
-      except tf.errors.OutOfRangeError:
-        tf.logging.info('Finished processing records')
+      for counter, tf_example in enumerate(tf_examples, 1):
+        tf_record_writer.write(tf_example.SerializeToString())
+        tf.logging.log_every_n(
+            tf.logging.INFO, 'Processed %d images (%.1f images/sec)...', 100,
+            counter, counter / (time.time() - start_time))
+    elapsed_time = time.time() - start_time
+    tf.logging.info('Finished processing %d records in %.1f sec '
+                    '(%.1f images/sec)', counter, elapsed_time,
+                    counter / max(elapsed_time, 1e-6))
+    if cache is not None:
+      cache.log_stats()
+      cache.save()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,201 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Utility functions to measure the latency of exported detection models.
+
+Models are loaded from the frozen graph or the SavedModel written by
+export_inference_graph.py, with any of its input types.
+"""
+from __future__ import division
+
+import io
+import resource
+import time
+
+import numpy as np
+from PIL import Image
+import tensorflow as tf
+
+from object_detection.core import standard_fields
+from object_detection.utils import dataset_util
+
+_INPUT_TYPES = ('image_tensor', 'encoded_image_string_tensor', 'tf_example')
+_OUTPUT_NAMES = ('num_detections', 'detection_boxes', 'detection_scores',
+                 'detection_classes', 'detection_keypoints', 'detection_masks')
+
+
+def load_model(sess, model_path):
+  """Loads an exported model into the graph of a session.
+
+  Args:
+    sess: A tf.Session with an empty graph.
+    model_path: Path to a frozen inference graph, or to a SavedModel directory.
+
+  Returns:
+    input_type: One of 'image_tensor', 'encoded_image_string_tensor' or
+      'tf_example'.
+    input_tensor: The input placeholder of the model.
+    output_tensors: A dictionary from output names to tensors.
+
+  Raises:
+    ValueError: if the model has no input node of a known type.
+  """
+  with sess.graph.as_default():
+    if tf.gfile.IsDirectory(model_path):
+      meta_graph_def = tf.saved_model.loader.load(
+          sess, [tf.saved_model.tag_constants.SERVING], model_path)
+      signature = meta_graph_def.signature_def[
+          tf.saved_model.signature_constants.DEFAULT_SERVING_SIGNATURE_DEF_KEY]
+      input_tensor = sess.graph.get_tensor_by_name(
+          signature.inputs['inputs'].name)
+      output_tensors = {
+          name: sess.graph.get_tensor_by_name(tensor_info.name)
+          for name, tensor_info in signature.outputs.items()}
+    else:
+      graph_def = tf.GraphDef()
+      with tf.gfile.GFile(model_path, 'rb') as fid:
+        graph_def.ParseFromString(fid.read())
+      tf.import_graph_def(graph_def, name='')
+      input_tensor = None
+      for input_type in _INPUT_TYPES:
+        try:
+          input_tensor = sess.graph.get_tensor_by_name(input_type + ':0')
+          break
+        except KeyError:
+          pass
+      if input_tensor is None:
+        raise ValueError('The model has none of the input nodes {}.'.format(
+            _INPUT_TYPES))
+      output_tensors = {}
+      for name in _OUTPUT_NAMES:
+        try:
+          output_tensors[name] = sess.graph.get_tensor_by_name(name + ':0')
+        except KeyError:
+          pass
+  input_type = input_tensor.op.name
+  if input_type not in _INPUT_TYPES:
+    raise ValueError('Unknown input node {}.'.format(input_type))
+  return input_type, input_tensor, output_tensors
+
+
+def _resize_image(image, image_size):
+  if image.size != (image_size[1], image_size[0]):
+    image = image.resize((image_size[1], image_size[0]), Image.BILINEAR)
+  return image
+
+
+def load_inputs(image_paths, input_type, image_size=None):
+  """Reads test images and converts them to inputs of a model.
+
+  All images are resized to the same size, so that they can be batched.
+
+  Args:
+    image_paths: List of paths to PNG or JPEG images.
+    input_type: The input type of the model, see load_model.
+    image_size: Optional (height, width) of the inputs. Defaults to the size of
+      the first image.
+
+  Returns:
+    A list with, for each image, a uint8 numpy array of shape
+    [height, width, 3] if input_type is 'image_tensor', a JPEG encoded image if
+    it is 'encoded_image_string_tensor', or a serialized tf.train.Example with
+    the JPEG encoded image if it is 'tf_example'.
+  """
+  inputs = []
+  for image_path in image_paths:
+    with tf.gfile.GFile(image_path, 'rb') as fid:
+      image = Image.open(io.BytesIO(fid.read())).convert('RGB')
+    if image_size is None:
+      image_size = (image.size[1], image.size[0])
+    image = _resize_image(image, image_size)
+    if input_type == 'image_tensor':
+      inputs.append(np.array(image))
+      continue
+    image_output_stream = io.BytesIO()
+    image.save(image_output_stream, format='jpeg')
+    encoded_image = image_output_stream.getvalue()
+    if input_type == 'encoded_image_string_tensor':
+      inputs.append(encoded_image)
+      continue
+    feature_map = {
+        standard_fields.TfExampleFields.image_encoded:
+            dataset_util.bytes_feature(encoded_image),
+        standard_fields.TfExampleFields.image_format:
+            dataset_util.bytes_feature(b'jpeg'),
+    }
+    tf_example = tf.train.Example(
+        features=tf.train.Features(feature=feature_map))
+    inputs.append(tf_example.SerializeToString())
+  return inputs
+
+
+def get_peak_rss_mb():
+  """Returns the peak resident set size of the process, in megabytes."""
+  # ru_maxrss is in kilobytes on Linux.
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark_model(sess, input_tensor, output_tensors, inputs, batch_size,
+                    num_warmup_runs=5, num_timed_runs=50):
+  """Measures the inference latency of a model.
+
+  Batches are formed by cycling through the inputs, so that each input is used
+  about as often.
+
+  Args:
+    sess: A tf.Session in which the model is loaded.
+    input_tensor: The input placeholder of the model.
+    output_tensors: A dictionary from output names to tensors, all fetched at
+      each run.
+    inputs: List of inputs of the model for a single image, see load_inputs.
+    batch_size: Number of images per run.
+    num_warmup_runs: Number of untimed runs, done first.
+    num_timed_runs: Number of timed runs.
+
+  Returns:
+    A dictionary with the batch size, the number of timed runs, the mean and
+    the 50th, 90th and 99th percentiles of the latency of a run in
+    milliseconds, the throughput in images per second, and the peak resident
+    set size of the process in megabytes.
+  """
+  num_inputs = len(inputs)
+  num_batches = max(1, -(-num_inputs // batch_size))
+  batches = []
+  for start in range(0, num_batches * batch_size, batch_size):
+    batch = [inputs[index % num_inputs]
+             for index in range(start, start + batch_size)]
+    if isinstance(batch[0], np.ndarray):
+      batch = np.stack(batch)
+    batches.append(batch)
+  for run in range(num_warmup_runs):
+    sess.run(output_tensors,
+             feed_dict={input_tensor: batches[run % len(batches)]})
+  latencies = []
+  for run in range(num_timed_runs):
+    batch = batches[run % len(batches)]
+    start_time = time.time()
+    sess.run(output_tensors, feed_dict={input_tensor: batch})
+    latencies.append(time.time() - start_time)
+  latencies_ms = 1000 * np.array(latencies)
+  return {
+      'batch_size': batch_size,
+      'num_runs': num_timed_runs,
+      'mean_latency_ms': float(np.mean(latencies_ms)),
+      'p50_latency_ms': float(np.percentile(latencies_ms, 50)),
+      'p90_latency_ms': float(np.percentile(latencies_ms, 90)),
+      'p99_latency_ms': float(np.percentile(latencies_ms, 99)),
+      'images_per_second': float(batch_size * num_timed_runs /
+                                 np.sum(latencies)),
+      'peak_rss_mb': get_peak_rss_mb(),
+  }
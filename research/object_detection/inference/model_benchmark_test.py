@@ -0,0 +1,94 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for object_detection.inference.model_benchmark."""
+import os
+
+import numpy as np
+from PIL import Image
+import tensorflow as tf
+
+from object_detection.core import standard_fields
+from object_detection.inference import model_benchmark
+
+
+class ModelBenchmarkTest(tf.test.TestCase):
+
+  def _create_mock_graph(self):
+    graph_path = os.path.join(self.get_temp_dir(), 'mock_graph.pb')
+    g = tf.Graph()
+    with g.as_default():
+      image_tensor = tf.placeholder(
+          tf.uint8, shape=[None, None, None, 3], name='image_tensor')
+      batch_size = tf.shape(image_tensor)[0]
+      tf.identity(tf.fill([batch_size], 1.0), name='num_detections')
+      tf.identity(tf.fill([batch_size, 1, 4], 0.5), name='detection_boxes')
+      tf.identity(
+          tf.reduce_mean(tf.cast(image_tensor, tf.float32), axis=[1, 2]),
+          name='detection_scores')
+      tf.identity(tf.fill([batch_size, 1], 1.0), name='detection_classes')
+    with tf.gfile.GFile(graph_path, 'wb') as fid:
+      fid.write(g.as_graph_def().SerializeToString())
+    return graph_path
+
+  def _create_test_images(self):
+    image_paths = []
+    for i, size in enumerate([(4, 6), (8, 12)]):
+      image_path = os.path.join(self.get_temp_dir(), 'image{}.png'.format(i))
+      Image.fromarray(np.full(size + (3,), 10 * i, dtype=np.uint8)).save(
+          image_path)
+      image_paths.append(image_path)
+    return image_paths
+
+  def test_load_inputs(self):
+    image_paths = self._create_test_images()
+    images = model_benchmark.load_inputs(image_paths, 'image_tensor')
+    self.assertEqual([(4, 6, 3), (4, 6, 3)], [image.shape for image in images])
+    images = model_benchmark.load_inputs(
+        image_paths, 'image_tensor', image_size=(5, 7))
+    self.assertEqual([(5, 7, 3), (5, 7, 3)], [image.shape for image in images])
+
+    serialized_examples = model_benchmark.load_inputs(image_paths,
+                                                      'tf_example')
+    tf_example = tf.train.Example.FromString(serialized_examples[0])
+    encoded_image = tf_example.features.feature[
+        standard_fields.TfExampleFields.image_encoded].bytes_list.value[0]
+    self.assertEqual(encoded_image, model_benchmark.load_inputs(
+        image_paths, 'encoded_image_string_tensor')[0])
+
+  def test_benchmark_model(self):
+    graph_path = self._create_mock_graph()
+    image_paths = self._create_test_images()
+    with tf.Graph().as_default(), self.test_session() as sess:
+      input_type, input_tensor, output_tensors = model_benchmark.load_model(
+          sess, graph_path)
+      self.assertEqual('image_tensor', input_type)
+      self.assertItemsEqual(['num_detections', 'detection_boxes',
+                             'detection_scores', 'detection_classes'],
+                            output_tensors.keys())
+      inputs = model_benchmark.load_inputs(image_paths, input_type)
+      result = model_benchmark.benchmark_model(
+          sess, input_tensor, output_tensors, inputs, batch_size=3,
+          num_warmup_runs=1, num_timed_runs=4)
+
+    self.assertEqual(3, result['batch_size'])
+    self.assertEqual(4, result['num_runs'])
+    self.assertLessEqual(result['p50_latency_ms'], result['p90_latency_ms'])
+    self.assertLessEqual(result['p90_latency_ms'], result['p99_latency_ms'])
+    self.assertGreater(result['images_per_second'], 0)
+    self.assertGreater(result['peak_rss_mb'], 0)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,192 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Functions to measure the throughput of the training input pipeline.
+
+The pipeline built by inputs.create_train_input_fn is benchmarked in stages,
+each stage running the pipeline up to a step:
+  read: reading the serialized examples, with shuffling and interleaving.
+  decode: decoding the examples.
+  augment: data augmentation, image resizing and model preprocessing.
+  pad_batch: the full pipeline, padding examples to static shapes and batching
+    them.
+The time spent in a step is estimated as the difference of the time per
+example of its stage and of the previous stage.
+"""
+from __future__ import division
+
+import functools
+import multiprocessing
+import os
+import time
+
+import tensorflow as tf
+
+from object_detection import inputs
+from object_detection.builders import dataset_builder
+from object_detection.protos import input_reader_pb2
+
+STAGES = ('read', 'decode', 'augment', 'pad_batch')
+
+
+def _flatten(structure):
+  if isinstance(structure, dict):
+    return [tensor for key in sorted(structure)
+            for tensor in _flatten(structure[key])]
+  if isinstance(structure, (list, tuple)):
+    return [tensor for element in structure for tensor in _flatten(element)]
+  return [structure]
+
+
+def _summarize_element(element):
+  """Reduces an element of a dataset to a scalar depending on all tensors."""
+  return tf.add_n([tf.to_float(tf.size(tensor))
+                   for tensor in _flatten(element)])
+
+
+def build_stage_dataset(stage, train_config, train_input_config, model_config,
+                        batch_size):
+  """Builds the training input pipeline up to a stage.
+
+  Elements of the dataset are reduced to scalars once the stage is done, and
+  batched, so that the cost of fetching elements does not depend on the
+  stage.
+
+  Args:
+    stage: One of STAGES.
+    train_config: A train_pb2.TrainConfig.
+    train_input_config: An input_reader_pb2.InputReader.
+    model_config: A model_pb2.DetectionModel.
+    batch_size: Number of examples per batch.
+
+  Returns:
+    A tf.data.Dataset of float32 tensors of shape [batch_size].
+
+  Raises:
+    ValueError: if stage is unknown.
+  """
+  if stage == 'read':
+    config = train_input_config.tf_record_input_reader
+    dataset = dataset_builder.read_dataset(
+        functools.partial(tf.data.TFRecordDataset, buffer_size=8 * 1000 * 1000),
+        config.input_path[:], train_input_config)
+    if train_input_config.sample_1_of_n_examples > 1:
+      dataset = dataset.shard(train_input_config.sample_1_of_n_examples, 0)
+  elif stage in ('decode', 'augment'):
+    # Unbatched examples are mapped with the parallelism of the batched
+    # pipeline.
+    stage_input_config = input_reader_pb2.InputReader()
+    stage_input_config.CopyFrom(train_input_config)
+    stage_input_config.num_parallel_map_calls = (
+        batch_size * train_input_config.num_parallel_batches)
+    transform_input_data_fn = None
+    if stage == 'augment':
+      def transform_input_data_fn(tensor_dict):
+        return inputs.create_train_transform_input_data_fn(
+            train_config, model_config)(tensor_dict)
+    dataset = dataset_builder.build(
+        stage_input_config, transform_input_data_fn=transform_input_data_fn)
+  elif stage == 'pad_batch':
+    dataset = inputs.create_train_input_fn(
+        train_config, train_input_config, model_config)(
+            params={'batch_size': batch_size})
+    return dataset.map(
+        lambda features, labels: tf.fill(  # pylint: disable=g-long-lambda
+            [batch_size], _summarize_element((features, labels))))
+  else:
+    raise ValueError('Unknown stage {}, expected one of {}.'.format(
+        stage, STAGES))
+  return dataset.map(_summarize_element).batch(batch_size)
+
+
+def benchmark_dataset(dataset_fn, num_batches, num_warmup_batches=10):
+  """Measures the throughput of a dataset.
+
+  Args:
+    dataset_fn: A function building a tf.data.Dataset of tensors of shape
+      [batch_size] in the default graph, see build_stage_dataset.
+    num_batches: Number of timed batches.
+    num_warmup_batches: Number of untimed batches, read first so that buffers
+      are filled.
+
+  Returns:
+    A dictionary with the number of timed examples, the throughput in examples
+    per second, the time per example in milliseconds and the CPU utilization
+    in cores and in percent of the cores of the machine. Fewer examples are
+    timed if the dataset ends early.
+  """
+  with tf.Graph().as_default():
+    next_batch = dataset_builder.make_initializable_iterator(
+        dataset_fn()).get_next()
+    with tf.Session() as sess:
+      sess.run(tf.tables_initializer())
+      num_examples = 0
+      try:
+        for _ in range(num_warmup_batches):
+          sess.run(next_batch)
+        start_times = os.times()
+        start_time = time.time()
+        for _ in range(num_batches):
+          num_examples += len(sess.run(next_batch))
+      except tf.errors.OutOfRangeError:
+        tf.logging.warning('The dataset ended after %d timed examples.',
+                           num_examples)
+        if not num_examples:
+          raise
+      elapsed_time = time.time() - start_time
+      end_times = os.times()
+  cpu_time = ((end_times[0] - start_times[0]) +
+              (end_times[1] - start_times[1]))
+  cpu_cores = cpu_time / elapsed_time
+  return {
+      'num_examples': num_examples,
+      'examples_per_second': num_examples / elapsed_time,
+      'ms_per_example': 1000 * elapsed_time / num_examples,
+      'cpu_cores': cpu_cores,
+      'cpu_utilization_percent': 100 * cpu_cores / multiprocessing.cpu_count(),
+  }
+
+
+def benchmark_input_pipeline(train_config, train_input_config, model_config,
+                             batch_size, num_batches, num_warmup_batches=10,
+                             stages=STAGES):
+  """Measures the throughput of the stages of the training input pipeline.
+
+  Args:
+    train_config: A train_pb2.TrainConfig.
+    train_input_config: An input_reader_pb2.InputReader.
+    model_config: A model_pb2.DetectionModel.
+    batch_size: Number of examples per batch.
+    num_batches: Number of timed batches of each stage.
+    num_warmup_batches: Number of untimed batches of each stage.
+    stages: Sequence of stages to benchmark, in the order of STAGES.
+
+  Returns:
+    A list with, for each stage, the result of benchmark_dataset with the
+    'stage' name and the 'step_ms_per_example' time per example spent in the
+    step of the stage, relative to the previous benchmarked stage.
+  """
+  results = []
+  previous_ms_per_example = 0.0
+  for stage in stages:
+    dataset_fn = functools.partial(build_stage_dataset, stage, train_config,
+                                   train_input_config, model_config,
+                                   batch_size)
+    result = benchmark_dataset(dataset_fn, num_batches, num_warmup_batches)
+    result['stage'] = stage
+    result['step_ms_per_example'] = (result['ms_per_example'] -
+                                     previous_ms_per_example)
+    previous_ms_per_example = result['ms_per_example']
+    results.append(result)
+  return results
@@ -0,0 +1,69 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for object_detection.input_benchmark_lib."""
+import os
+
+import tensorflow as tf
+
+from object_detection import input_benchmark_lib
+from object_detection.utils import config_util
+
+
+def _get_configs_for_model(model_name):
+  """Returns configurations for model."""
+  fname = os.path.join(tf.resource_loader.get_data_files_path(),
+                       'samples/configs/' + model_name + '.config')
+  label_map_path = os.path.join(tf.resource_loader.get_data_files_path(),
+                                'data/pet_label_map.pbtxt')
+  data_path = os.path.join(tf.resource_loader.get_data_files_path(),
+                           'test_data/pets_examples.record')
+  configs = config_util.get_configs_from_pipeline_file(fname)
+  override_dict = {
+      'train_input_path': data_path,
+      'label_map_path': label_map_path
+  }
+  return config_util.merge_external_params_with_configs(
+      configs, kwargs_dict=override_dict)
+
+
+class InputBenchmarkLibTest(tf.test.TestCase):
+
+  def test_benchmark_input_pipeline(self):
+    configs = _get_configs_for_model('ssd_inception_v2_pets')
+    configs['model'].ssd.num_classes = 37
+    results = input_benchmark_lib.benchmark_input_pipeline(
+        configs['train_config'], configs['train_input_config'],
+        configs['model'], batch_size=2, num_batches=3, num_warmup_batches=1)
+
+    self.assertEqual(list(input_benchmark_lib.STAGES),
+                     [result['stage'] for result in results])
+    for result in results:
+      self.assertEqual(6, result['num_examples'])
+      self.assertGreater(result['examples_per_second'], 0)
+      self.assertGreaterEqual(result['cpu_cores'], 0)
+    self.assertAlmostEqual(
+        results[-1]['ms_per_example'],
+        sum(result['step_ms_per_example'] for result in results))
+
+  def test_build_stage_dataset_with_unknown_stage(self):
+    configs = _get_configs_for_model('ssd_inception_v2_pets')
+    with self.assertRaises(ValueError):
+      input_benchmark_lib.build_stage_dataset(
+          'train', configs['train_config'], configs['train_input_config'],
+          configs['model'], batch_size=2)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,81 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Measures the throughput of the training input pipeline.
+
+Runs the input pipeline of inputs.create_train_input_fn without the model, up
+to each of its read, decode, augment and pad_batch steps, and logs the
+examples per second, the time spent in each step and the CPU utilization.
+
+Example usage:
+  python object_detection/input_benchmark_main.py \
+    --pipeline_config_path=/path/to/pipeline.config \
+    --num_batches=100 \
+    --output_path=/path/to/input_benchmark.json
+
+Use profile_preprocessor.py to break the augment step down into individual
+data augmentation options.
+"""
+import json
+
+import tensorflow as tf
+
+from object_detection import input_benchmark_lib
+from object_detection.utils import config_util
+
+flags = tf.app.flags
+flags.DEFINE_string('pipeline_config_path', None,
+                    'Path to a pipeline_pb2.TrainEvalPipelineConfig config '
+                    'file.')
+flags.DEFINE_integer('batch_size', None,
+                     'Optional batch size. Defaults to the batch size of the '
+                     'train_config.')
+flags.DEFINE_integer('num_batches', 100, 'Number of timed batches per stage.')
+flags.DEFINE_integer('num_warmup_batches', 10,
+                     'Number of untimed batches per stage, read before the '
+                     'timed batches.')
+flags.DEFINE_string('stages', ','.join(input_benchmark_lib.STAGES),
+                    'Comma separated list of stages to benchmark.')
+flags.DEFINE_string('output_path', None,
+                    'Optional path to the output JSON file. The results are '
+                    'logged in any case.')
+FLAGS = flags.FLAGS
+
+
+def main(_):
+  tf.logging.set_verbosity(tf.logging.INFO)
+  configs = config_util.get_configs_from_pipeline_file(
+      FLAGS.pipeline_config_path)
+  batch_size = FLAGS.batch_size or configs['train_config'].batch_size
+  results = input_benchmark_lib.benchmark_input_pipeline(
+      configs['train_config'], configs['train_input_config'], configs['model'],
+      batch_size=batch_size,
+      num_batches=FLAGS.num_batches,
+      num_warmup_batches=FLAGS.num_warmup_batches,
+      stages=FLAGS.stages.split(','))
+  for result in results:
+    tf.logging.info(
+        '%s: %.1f examples/sec, %.2f ms per example (%.2f ms in this step), '
+        '%.1f CPU cores (%.0f%%).', result['stage'],
+        result['examples_per_second'], result['ms_per_example'],
+        result['step_ms_per_example'], result['cpu_cores'],
+        result['cpu_utilization_percent'])
+  if FLAGS.output_path:
+    with tf.gfile.GFile(FLAGS.output_path, 'w') as fid:
+      json.dump(results, fid, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+  flags.mark_flag_as_required('pipeline_config_path')
+  tf.app.run()
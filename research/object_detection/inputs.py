@@ -267,7 +267,8 @@ def pad_input_data_to_static_shapes(tensor_dict, max_num_boxes, num_classes,
   return padded_tensor_dict
 
 
-def augment_input_data(tensor_dict, data_augmentation_options):
+def augment_input_data(tensor_dict, data_augmentation_options,
+                       fuse_geometric_ops=False):
   """Applies data augmentation ops to input tensors.
 
   Args:
@@ -275,6 +276,8 @@ def augment_input_data(tensor_dict, data_augmentation_options):
     data_augmentation_options: A list of tuples, where each tuple contains a
       function and a dictionary that contains arguments and their values.
       Usually, this is the output of core/preprocessor.build.
+    fuse_geometric_ops: Whether to apply consecutive geometric ops at once. See
+      preprocessor.preprocess.
 
   Returns:
     A dictionary of tensors obtained by applying data augmentation ops to the
@@ -291,7 +294,8 @@ def augment_input_data(tensor_dict, data_augmentation_options):
       tensor_dict, data_augmentation_options,
       func_arg_map=preprocessor.get_default_func_arg_map(
           include_instance_masks=include_instance_masks,
-          include_keypoints=include_keypoints))
+          include_keypoints=include_keypoints),
+      fuse_geometric_ops=fuse_geometric_ops)
   tensor_dict[fields.InputDataFields.image] = tf.squeeze(
       tensor_dict[fields.InputDataFields.image], axis=0)
   return tensor_dict
@@ -378,6 +382,39 @@ def _get_features_dict(input_dict):
   return features
 
 
+def create_train_transform_input_data_fn(train_config, model_config):
+  """Creates the function augmenting and preprocessing training examples.
+
+  Args:
+    train_config: A train_pb2.TrainConfig.
+    model_config: A model_pb2.DetectionModel.
+
+  Returns:
+    A function applying transform_input_data, with the data augmentation of
+    train_config and the image resizer and preprocessing of the model, to a
+    decoded tensor dictionary.
+  """
+  data_augmentation_options = [
+      preprocessor_builder.build(step)
+      for step in train_config.data_augmentation_options
+  ]
+  data_augmentation_fn = functools.partial(
+      augment_input_data,
+      data_augmentation_options=data_augmentation_options,
+      fuse_geometric_ops=train_config.fuse_geometric_augmentations)
+  model = model_builder.build(model_config, is_training=True)
+  image_resizer_config = config_util.get_image_resizer_config(model_config)
+  image_resizer_fn = image_resizer_builder.build(image_resizer_config)
+  return functools.partial(
+      transform_input_data, model_preprocess_fn=model.preprocess,
+      image_resizer_fn=image_resizer_fn,
+      num_classes=config_util.get_number_of_classes(model_config),
+      data_augmentation_fn=data_augmentation_fn,
+      merge_multiple_boxes=train_config.merge_multiple_label_boxes,
+      retain_original_image=train_config.retain_original_images,
+      use_bfloat16=train_config.use_bfloat16)
+
+
 def create_train_input_fn(train_config, train_input_config,
                           model_config):
   """Creates a train `input` function for `Estimator`.
@@ -446,25 +483,9 @@ def create_train_input_fn(train_config, train_input_config,
 
     def transform_and_pad_input_data_fn(tensor_dict):
       """Combines transform and pad operation."""
-      data_augmentation_options = [
-          preprocessor_builder.build(step)
-          for step in train_config.data_augmentation_options
-      ]
-      data_augmentation_fn = functools.partial(
-          augment_input_data,
-          data_augmentation_options=data_augmentation_options)
-      model = model_builder.build(model_config, is_training=True)
+      transform_data_fn = create_train_transform_input_data_fn(
+          train_config, model_config)
       image_resizer_config = config_util.get_image_resizer_config(model_config)
-      image_resizer_fn = image_resizer_builder.build(image_resizer_config)
-      transform_data_fn = functools.partial(
-          transform_input_data, model_preprocess_fn=model.preprocess,
-          image_resizer_fn=image_resizer_fn,
-          num_classes=config_util.get_number_of_classes(model_config),
-          data_augmentation_fn=data_augmentation_fn,
-          merge_multiple_boxes=train_config.merge_multiple_label_boxes,
-          retain_original_image=train_config.retain_original_images,
-          use_bfloat16=train_config.use_bfloat16)
-
       tensor_dict = pad_input_data_to_static_shapes(
           tensor_dict=transform_data_fn(tensor_dict),
           max_num_boxes=train_input_config.max_number_of_boxes,
@@ -13,12 +13,13 @@
 # limitations under the License.
 # ==============================================================================
 
-"""Bipartite matcher implementation."""
+"""Bipartite matcher implementations."""
 
 import tensorflow as tf
 
 from tensorflow.contrib.image.python.ops import image_ops
 from object_detection.core import matcher
+from object_detection.utils import np_bipartite_matcher
 
 
 class GreedyBipartiteMatcher(matcher.Matcher):
@@ -68,3 +69,43 @@ class GreedyBipartiteMatcher(matcher.Matcher):
     match_results = tf.reshape(match_results, [-1])
     match_results = tf.cast(match_results, tf.int32)
     return match_results
+
+
+class HungarianBipartiteMatcher(matcher.Matcher):
+  """Optimal bipartite matcher based on the Hungarian algorithm.
+
+  Matches every valid row to a distinct column so that the total similarity of
+  the matches is maximal, with np_bipartite_matcher run on CPU in a py_func.
+  """
+
+  def __init__(self, use_matmul_gather=False):
+    """Constructs a Matcher.
+
+    Args:
+      use_matmul_gather: Force constructed match objects to use matrix
+        multiplication based gather instead of standard tf.gather.
+        (Default: False).
+    """
+    super(HungarianBipartiteMatcher, self).__init__(
+        use_matmul_gather=use_matmul_gather)
+    self._np_matcher = np_bipartite_matcher.HungarianBipartiteMatcher()
+
+  def _match(self, similarity_matrix, valid_rows):
+    """Optimally matches the valid rows and the columns.
+
+    Args:
+      similarity_matrix: Float tensor of shape [N, M] with pairwise similarity
+        where higher values mean more similar.
+      valid_rows: A boolean tensor of shape [N] indicating the rows that are
+        valid.
+
+    Returns:
+      match_results: int32 tensor of shape [M] with match_results[i]=-1
+        meaning that column i is not matched and otherwise that it is matched to
+        row match_results[i].
+    """
+    match_results = tf.py_func(self._np_matcher.match,
+                               [similarity_matrix, valid_rows], tf.int32,
+                               stateful=False)
+    match_results.set_shape(similarity_matrix.shape[1:2])
+    return match_results
@@ -0,0 +1,148 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Compares the greedy and Hungarian bipartite matchers.
+
+Example usage:
+  python object_detection/matchers/bipartite_matcher_benchmark.py \
+    --problem_sizes=20:1917,100:1917,100:8732 \
+    --num_runs=20
+
+For each num_groundtruth_boxes:num_anchors problem size, random groundtruth
+boxes and anchors are drawn, and their IOU matrix is matched by the greedy
+bipartite matcher, by the Hungarian bipartite matcher in a session and by the
+NumPy Hungarian matcher. The mean latency of a match and the mean total IOU of
+the matched pairs are logged for each matcher.
+"""
+from __future__ import division
+
+import json
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from object_detection.matchers import bipartite_matcher
+from object_detection.utils import np_bipartite_matcher
+from object_detection.utils import np_target_assigner
+
+tf.flags.DEFINE_string('problem_sizes', '20:1917,100:1917,100:8732',
+                       'Comma separated list of '
+                       'num_groundtruth_boxes:num_anchors problem sizes.')
+tf.flags.DEFINE_integer('num_runs', 20,
+                        'Number of random problems of each size.')
+tf.flags.DEFINE_string('output_path', None,
+                       'Optional path to the output JSON file. The results '
+                       'are logged in any case.')
+
+FLAGS = tf.flags.FLAGS
+
+
+def _random_boxes(random_state, num_boxes):
+  centers = random_state.uniform(0.05, 0.95, size=(num_boxes, 2))
+  sizes = random_state.uniform(0.02, 0.4, size=(num_boxes, 2))
+  return np.concatenate([centers - sizes / 2, centers + sizes / 2],
+                        axis=1).astype(np.float32)
+
+
+def _total_similarity(similarity_matrix, match_results):
+  matched_columns = np.nonzero(match_results >= 0)[0]
+  return float(similarity_matrix[match_results[matched_columns],
+                                 matched_columns].sum())
+
+
+def benchmark_matchers(num_rows, num_columns, num_runs, seed=0):
+  """Measures the latency and match quality of the bipartite matchers.
+
+  Args:
+    num_rows: number of groundtruth boxes.
+    num_columns: number of anchors.
+    num_runs: number of random problems.
+    seed: seed of the random problems.
+
+  Returns:
+    A dictionary from matcher names to dictionaries with the mean latency of a
+    match in milliseconds and the mean total IOU of the matched pairs.
+  """
+  random_state = np.random.RandomState(seed)
+  similarity_matrices = [
+      np_target_assigner.batch_iou(
+          _random_boxes(random_state, num_rows)[np.newaxis],
+          _random_boxes(random_state, num_columns))[0]
+      for _ in range(num_runs)]
+
+  results = {}
+  with tf.Graph().as_default(), tf.Session() as sess:
+    similarity_matrix = tf.placeholder(tf.float32,
+                                       shape=[num_rows, num_columns])
+    matchers = {
+        'greedy': bipartite_matcher.GreedyBipartiteMatcher(),
+        'hungarian': bipartite_matcher.HungarianBipartiteMatcher(),
+    }
+    for name, matcher in matchers.items():
+      match_results = matcher.match(similarity_matrix).match_results
+      # Warm up.
+      sess.run(match_results,
+               feed_dict={similarity_matrix: similarity_matrices[0]})
+      latencies = []
+      total_similarities = []
+      for matrix in similarity_matrices:
+        start_time = time.time()
+        match_results_out = sess.run(match_results,
+                                     feed_dict={similarity_matrix: matrix})
+        latencies.append(time.time() - start_time)
+        total_similarities.append(_total_similarity(matrix,
+                                                    match_results_out))
+      results[name] = {
+          'mean_latency_ms': 1000 * float(np.mean(latencies)),
+          'mean_total_iou': float(np.mean(total_similarities)),
+      }
+
+  np_matcher = np_bipartite_matcher.HungarianBipartiteMatcher()
+  latencies = []
+  total_similarities = []
+  for matrix in similarity_matrices:
+    start_time = time.time()
+    match_results_out = np_matcher.match(matrix)
+    latencies.append(time.time() - start_time)
+    total_similarities.append(_total_similarity(matrix, match_results_out))
+  results['numpy_hungarian'] = {
+      'mean_latency_ms': 1000 * float(np.mean(latencies)),
+      'mean_total_iou': float(np.mean(total_similarities)),
+  }
+  return results
+
+
+def main(_):
+  tf.logging.set_verbosity(tf.logging.INFO)
+  all_results = []
+  for problem_size in FLAGS.problem_sizes.split(','):
+    num_rows, num_columns = [int(size) for size in problem_size.split(':')]
+    results = benchmark_matchers(num_rows, num_columns, FLAGS.num_runs)
+    for name, result in sorted(results.items()):
+      tf.logging.info('%d boxes, %d anchors, %s matcher: %.2f ms, total IOU '
+                      '%.3f.', num_rows, num_columns, name,
+                      result['mean_latency_ms'], result['mean_total_iou'])
+    all_results.append({'num_groundtruth_boxes': num_rows,
+                        'num_anchors': num_columns,
+                        'matchers': results})
+
+  results_json = json.dumps(all_results, indent=2, sort_keys=True)
+  if FLAGS.output_path:
+    with tf.gfile.GFile(FLAGS.output_path, 'w') as fid:
+      fid.write(results_json)
+
+
+if __name__ == '__main__':
+  tf.app.run()
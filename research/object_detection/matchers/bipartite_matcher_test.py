@@ -77,5 +77,44 @@ class GreedyBipartiteMatcherTest(tf.test.TestCase):
       self.assertAllEqual(match_results_out, expected_match_results)
 
 
+class HungarianBipartiteMatcherTest(tf.test.TestCase):
+
+  def test_get_optimal_matches(self):
+    # The greedy matcher matches row 0 to column 2 and row 1 to column 1, with
+    # a total similarity of 1.0.
+    similarity_matrix = tf.constant([[0.50, 0.1, 0.8], [0.15, 0.2, 0.75]])
+    expected_match_results = [0, -1, 1]
+
+    matcher = bipartite_matcher.HungarianBipartiteMatcher()
+    match = matcher.match(similarity_matrix)
+    self.assertEqual(match._match_results.shape.as_list(), [3])
+    with self.test_session() as sess:
+      match_results_out = sess.run(match._match_results)
+      self.assertAllEqual(match_results_out, expected_match_results)
+
+  def test_get_expected_matches_with_only_one_valid_row_at_bottom(self):
+    similarity_matrix = tf.constant([[0.15, 0.2, 0.3], [0.50, 0.1, 0.8]])
+    valid_rows = tf.constant([False, True], dtype=tf.bool)
+    expected_match_results = [-1, -1, 1]
+
+    matcher = bipartite_matcher.HungarianBipartiteMatcher()
+    match = matcher.match(similarity_matrix, valid_rows)
+    with self.test_session() as sess:
+      match_results_out = sess.run(match._match_results)
+      self.assertAllEqual(match_results_out, expected_match_results)
+
+  def test_get_expected_matches_with_more_rows_than_columns(self):
+    similarity_matrix = tf.placeholder(tf.float32, shape=[None, None])
+    expected_match_results = [2, 0]
+
+    matcher = bipartite_matcher.HungarianBipartiteMatcher()
+    match = matcher.match(similarity_matrix)
+    with self.test_session() as sess:
+      match_results_out = sess.run(
+          match._match_results,
+          feed_dict={similarity_matrix: [[0.1, 0.9], [0.2, 0.3], [0.8, 0.7]]})
+      self.assertAllEqual(match_results_out, expected_match_results)
+
+
 if __name__ == '__main__':
   tf.test.main()
@@ -18,6 +18,7 @@ import tensorflow as tf
 
 from object_detection.core import standard_fields
 from object_detection.metrics import coco_tools
+from object_detection.metrics import vectorized_coco_eval
 from object_detection.utils import json_utils
 from object_detection.utils import object_detection_evaluation
 
@@ -28,7 +29,8 @@ class CocoDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
   def __init__(self,
                categories,
                include_metrics_per_category=False,
-               all_metrics_per_category=False):
+               all_metrics_per_category=False,
+               use_vectorized_metrics=False):
     """Constructor.
 
     Args:
@@ -40,6 +42,9 @@ class CocoDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
         each category in per_category_ap. Be careful with setting it to true if
         you have more than handful of categories, because it will pollute
         your mldash.
+      use_vectorized_metrics: If True, compute the metrics with
+        vectorized_coco_eval directly on numpy arrays instead of converting
+        groundtruth and detections to COCO dictionaries for pycocotools.
     """
     super(CocoDetectionEvaluator, self).__init__(categories)
     # _image_ids is a dictionary that maps unique image ids to Booleans which
@@ -52,12 +57,18 @@ class CocoDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
     self._metrics = None
     self._include_metrics_per_category = include_metrics_per_category
     self._all_metrics_per_category = all_metrics_per_category
+    self._vectorized_eval = None
+    if use_vectorized_metrics:
+      self._vectorized_eval = vectorized_coco_eval.VectorizedCOCOEval(
+          self._categories)
 
   def clear(self):
     """Clears the state to prepare for a fresh evaluation."""
     self._image_ids.clear()
     self._groundtruth_list = []
     self._detection_boxes_list = []
+    if self._vectorized_eval is not None:
+      self._vectorized_eval.Clear()
 
   def add_single_ground_truth_image_info(self,
                                          image_id,
@@ -89,6 +100,15 @@ class CocoDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
     if groundtruth_is_crowd is not None and not groundtruth_is_crowd.shape[0]:
       groundtruth_is_crowd = None
 
+    if self._vectorized_eval is not None:
+      self._vectorized_eval.AddSingleImageGroundtruth(
+          image_id,
+          groundtruth_dict[standard_fields.InputDataFields.groundtruth_boxes],
+          groundtruth_dict[standard_fields.InputDataFields.groundtruth_classes],
+          groundtruth_is_crowd)
+      self._image_ids[image_id] = False
+      return
+
     self._groundtruth_list.extend(
         coco_tools.ExportSingleImageGroundtruthToCoco(
             image_id=image_id,
@@ -134,6 +154,17 @@ class CocoDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
                          'previously added', image_id)
       return
 
+    if self._vectorized_eval is not None:
+      self._vectorized_eval.AddSingleImageDetections(
+          image_id,
+          detections_dict[standard_fields.DetectionResultFields.detection_boxes],
+          detections_dict[
+              standard_fields.DetectionResultFields.detection_scores],
+          detections_dict[
+              standard_fields.DetectionResultFields.detection_classes])
+      self._image_ids[image_id] = True
+      return
+
     self._detection_boxes_list.extend(
         coco_tools.ExportSingleImageDetectionBoxesToCoco(
             image_id=image_id,
@@ -157,10 +188,13 @@ class CocoDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
         None. In that case nothing will be written to the output file.
     """
     if json_output_path and json_output_path is not None:
+      detection_boxes_list = self._detection_boxes_list
+      if self._vectorized_eval is not None:
+        detection_boxes_list = self._vectorized_eval.ExportDetections()
       with tf.gfile.GFile(json_output_path, 'w') as fid:
         tf.logging.info('Dumping detections to output json file.')
         json_utils.Dump(
-            obj=self._detection_boxes_list, fid=fid, float_digits=4, indent=2)
+            obj=detection_boxes_list, fid=fid, float_digits=4, indent=2)
 
   def evaluate(self):
     """Evaluates the detection boxes and returns a dictionary of coco metrics.
@@ -197,16 +231,20 @@ class CocoDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
       'PerformanceByCategory' is included in the output regardless of
       all_metrics_per_category.
     """
-    groundtruth_dict = {
-        'annotations': self._groundtruth_list,
-        'images': [{'id': image_id} for image_id in self._image_ids],
-        'categories': self._categories
-    }
-    coco_wrapped_groundtruth = coco_tools.COCOWrapper(groundtruth_dict)
-    coco_wrapped_detections = coco_wrapped_groundtruth.LoadAnnotations(
-        self._detection_boxes_list)
-    box_evaluator = coco_tools.COCOEvalWrapper(
-        coco_wrapped_groundtruth, coco_wrapped_detections, agnostic_mode=False)
+    if self._vectorized_eval is not None:
+      box_evaluator = self._vectorized_eval
+    else:
+      groundtruth_dict = {
+          'annotations': self._groundtruth_list,
+          'images': [{'id': image_id} for image_id in self._image_ids],
+          'categories': self._categories
+      }
+      coco_wrapped_groundtruth = coco_tools.COCOWrapper(groundtruth_dict)
+      coco_wrapped_detections = coco_wrapped_groundtruth.LoadAnnotations(
+          self._detection_boxes_list)
+      box_evaluator = coco_tools.COCOEvalWrapper(
+          coco_wrapped_groundtruth, coco_wrapped_detections,
+          agnostic_mode=False)
     box_metrics, box_per_category_ap = box_evaluator.ComputeMetrics(
         include_metrics_per_category=self._include_metrics_per_category,
         all_metrics_per_category=self._all_metrics_per_category)
@@ -97,6 +97,57 @@ class CocoDetectionEvaluationTest(tf.test.TestCase):
     metrics = coco_evaluator.evaluate()
     self.assertAlmostEqual(metrics['DetectionBoxes_Precision/mAP'], 1.0)
 
+  def testVectorizedMetricsMatchPycocotools(self):
+    """Tests that the vectorized metrics are the same as pycocotools ones."""
+    all_metrics = []
+    for use_vectorized_metrics in [False, True]:
+      coco_evaluator = coco_evaluation.CocoDetectionEvaluator(
+          _get_categories_list(),
+          use_vectorized_metrics=use_vectorized_metrics)
+      coco_evaluator.add_single_ground_truth_image_info(
+          image_id='image1',
+          groundtruth_dict={
+              standard_fields.InputDataFields.groundtruth_boxes:
+                  np.array([[100., 100., 200., 200.], [10., 10., 30., 30.]]),
+              standard_fields.InputDataFields.groundtruth_classes:
+                  np.array([1, 2]),
+              standard_fields.InputDataFields.groundtruth_is_crowd:
+                  np.array([0, 0])
+          })
+      coco_evaluator.add_single_detected_image_info(
+          image_id='image1',
+          detections_dict={
+              standard_fields.DetectionResultFields.detection_boxes:
+                  np.array([[100., 100., 200., 200.], [105., 95., 205., 190.],
+                            [10., 10., 25., 30.]]),
+              standard_fields.DetectionResultFields.detection_scores:
+                  np.array([.8, .9, .7]),
+              standard_fields.DetectionResultFields.detection_classes:
+                  np.array([1, 1, 2])
+          })
+      coco_evaluator.add_single_ground_truth_image_info(
+          image_id='image2',
+          groundtruth_dict={
+              standard_fields.InputDataFields.groundtruth_boxes:
+                  np.array([[50., 50., 100., 100.]]),
+              standard_fields.InputDataFields.groundtruth_classes:
+                  np.array([3])
+          })
+      coco_evaluator.add_single_detected_image_info(
+          image_id='image2',
+          detections_dict={
+              standard_fields.DetectionResultFields.detection_boxes:
+                  np.array([[50., 40., 100., 100.]]),
+              standard_fields.DetectionResultFields.detection_scores:
+                  np.array([.6]),
+              standard_fields.DetectionResultFields.detection_classes:
+                  np.array([3])
+          })
+      all_metrics.append(coco_evaluator.evaluate())
+    self.assertItemsEqual(all_metrics[0].keys(), all_metrics[1].keys())
+    for key in all_metrics[0]:
+      self.assertAlmostEqual(all_metrics[0][key], all_metrics[1][key])
+
   def testGetOneMAPWithMatchingGroundtruthAndDetectionsSkipCrowd(self):
     """Tests computing mAP with is_crowd GT boxes skipped."""
     coco_evaluator = coco_evaluation.CocoDetectionEvaluator(
@@ -30,8 +30,15 @@ Example usage:
         --eval_dir=path/to/eval_dir \
         --eval_config_path=path/to/evaluation/configuration/file \
         --input_config_path=path/to/input/configuration/file
+
+With --num_parse_workers, the tf.Examples are parsed in worker processes, in
+batches of --parse_batch_size records, while the evaluator consumes previously
+parsed batches.
 """
+import collections
 import csv
+import itertools
+import multiprocessing
 import os
 import re
 import tensorflow as tf
@@ -50,6 +57,11 @@ flags.DEFINE_string('eval_config_path', None,
                     'Path to an eval_pb2.EvalConfig config file.')
 flags.DEFINE_string('input_config_path', None,
                     'Path to an eval_pb2.InputConfig config file.')
+flags.DEFINE_integer('num_parse_workers', 0,
+                     'Number of processes parsing the tf.Examples. 0 parses '
+                     'them in the main process.')
+flags.DEFINE_integer('parse_batch_size', 64,
+                     'Number of records parsed at once by a worker process.')
 
 FLAGS = flags.FLAGS
 
@@ -73,7 +85,86 @@ def _generate_filenames(filenames):
   return result
 
 
-def read_data_and_evaluate(input_config, eval_config):
+def _parse_serialized_examples(serialized_examples):
+  """Parses a batch of serialized tf.Examples with detections and groundtruth.
+
+  Args:
+    serialized_examples: list of serialized tf.Examples.
+
+  Returns:
+    A list with, for each example, the dictionary of numpy arrays returned by
+    TfExampleDetectionAndGTParser, or None if the example was not parsed.
+  """
+  data_parser = tf_example_parser.TfExampleDetectionAndGTParser()
+  decoded_dicts = []
+  for string_record in serialized_examples:
+    example = tf.train.Example()
+    example.ParseFromString(string_record)
+    decoded_dicts.append(data_parser.parse(example))
+  return decoded_dicts
+
+
+def _read_serialized_example_batches(input_paths, batch_size):
+  for input_path in _generate_filenames(input_paths):
+    tf.logging.info('Processing file: {0}'.format(input_path))
+    record_iterator = tf.python_io.tf_record_iterator(path=input_path)
+    while True:
+      serialized_examples = list(itertools.islice(record_iterator, batch_size))
+      if not serialized_examples:
+        break
+      yield serialized_examples
+
+
+def read_decoded_examples(input_paths, num_parse_workers=0,
+                          parse_batch_size=64, num_prefetch_batches=None):
+  """Reads and parses tf.Examples with detections and groundtruth.
+
+  When num_parse_workers is positive, batches of records are parsed by a pool
+  of worker processes. At most num_prefetch_batches batches are read ahead of
+  the consumer, so that parsing overlaps with the evaluation of previously
+  parsed examples with a bounded memory footprint. Examples are yielded in the
+  order of the input files.
+
+  Args:
+    input_paths: list of paths to TFRecords, possibly sharded as in
+      path/to/file@num_shards.
+    num_parse_workers: number of worker processes. 0 parses the examples in
+      the calling process.
+    parse_batch_size: number of records parsed at once by a worker.
+    num_prefetch_batches: maximum number of batches being parsed or waiting to
+      be consumed. Defaults to twice the number of workers.
+
+  Yields:
+    For each example, the dictionary of numpy arrays returned by
+    TfExampleDetectionAndGTParser, or None if the example was not parsed.
+  """
+  batches = _read_serialized_example_batches(input_paths, parse_batch_size)
+  if not num_parse_workers:
+    for serialized_examples in batches:
+      for decoded_dict in _parse_serialized_examples(serialized_examples):
+        yield decoded_dict
+    return
+
+  num_prefetch_batches = max(num_prefetch_batches or 2 * num_parse_workers, 1)
+  pool = multiprocessing.Pool(num_parse_workers)
+  try:
+    pending_batches = collections.deque()
+    for serialized_examples in batches:
+      pending_batches.append(
+          pool.apply_async(_parse_serialized_examples, (serialized_examples,)))
+      if len(pending_batches) >= num_prefetch_batches:
+        for decoded_dict in pending_batches.popleft().get():
+          yield decoded_dict
+    while pending_batches:
+      for decoded_dict in pending_batches.popleft().get():
+        yield decoded_dict
+  finally:
+    pool.terminate()
+    pool.join()
+
+
+def read_data_and_evaluate(input_config, eval_config, num_parse_workers=0,
+                           parse_batch_size=64):
   """Reads pre-computed object detections and groundtruth from tf_record.
 
   Args:
@@ -81,6 +172,9 @@ def read_data_and_evaluate(input_config, eval_config):
       object_detection.protos.InputReader.
     eval_config: evaluation config proto of type
       object_detection.protos.EvalConfig.
+    num_parse_workers: number of processes parsing the tf.Examples, see
+      read_decoded_examples.
+    parse_batch_size: number of records parsed at once by a worker.
 
   Returns:
     Evaluated detections metrics.
@@ -101,31 +195,23 @@ def read_data_and_evaluate(input_config, eval_config):
 
     skipped_images = 0
     processed_images = 0
-    for input_path in _generate_filenames(input_paths):
-      tf.logging.info('Processing file: {0}'.format(input_path))
-
-      record_iterator = tf.python_io.tf_record_iterator(path=input_path)
-      data_parser = tf_example_parser.TfExampleDetectionAndGTParser()
-
-      for string_record in record_iterator:
-        tf.logging.log_every_n(tf.logging.INFO, 'Processed %d images...', 1000,
-                               processed_images)
-        processed_images += 1
-
-        example = tf.train.Example()
-        example.ParseFromString(string_record)
-        decoded_dict = data_parser.parse(example)
-
-        if decoded_dict:
-          object_detection_evaluator.add_single_ground_truth_image_info(
-              decoded_dict[standard_fields.DetectionResultFields.key],
-              decoded_dict)
-          object_detection_evaluator.add_single_detected_image_info(
-              decoded_dict[standard_fields.DetectionResultFields.key],
-              decoded_dict)
-        else:
-          skipped_images += 1
-          tf.logging.info('Skipped images: {0}'.format(skipped_images))
+    for decoded_dict in read_decoded_examples(
+        input_paths, num_parse_workers=num_parse_workers,
+        parse_batch_size=parse_batch_size):
+      tf.logging.log_every_n(tf.logging.INFO, 'Processed %d images...', 1000,
+                             processed_images)
+      processed_images += 1
+
+      if decoded_dict:
+        object_detection_evaluator.add_single_ground_truth_image_info(
+            decoded_dict[standard_fields.DetectionResultFields.key],
+            decoded_dict)
+        object_detection_evaluator.add_single_detected_image_info(
+            decoded_dict[standard_fields.DetectionResultFields.key],
+            decoded_dict)
+      else:
+        skipped_images += 1
+        tf.logging.info('Skipped images: {0}'.format(skipped_images))
 
     return object_detection_evaluator.evaluate()
 
@@ -161,7 +247,9 @@ def main(argv):
   eval_config = configs['eval_config']
   input_config = configs['eval_input_config']
 
-  metrics = read_data_and_evaluate(input_config, eval_config)
+  metrics = read_data_and_evaluate(
+      input_config, eval_config, num_parse_workers=FLAGS.num_parse_workers,
+      parse_batch_size=FLAGS.parse_batch_size)
 
   # Save metrics
   write_metrics(metrics, FLAGS.eval_dir)
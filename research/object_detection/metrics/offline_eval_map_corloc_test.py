@@ -13,10 +13,13 @@
 # limitations under the License.
 # ==============================================================================
 """Tests for utilities in offline_eval_map_corloc binary."""
+import os
 
 import tensorflow as tf
 
+from object_detection.core import standard_fields as fields
 from object_detection.metrics import offline_eval_map_corloc as offline_eval
+from object_detection.utils import dataset_util
 
 
 class OfflineEvalMapCorlocTest(tf.test.TestCase):
@@ -53,6 +56,76 @@ class OfflineEvalMapCorlocTest(tf.test.TestCase):
         '/path/to/-00001-of-00003.record', '/path/to/-00002-of-00003.record'
     ])
 
+  def _write_examples(self, num_shards, num_examples_per_shard):
+    path = os.path.join(self.get_temp_dir(), 'detections@{}'.format(num_shards))
+    for shard, shard_path in enumerate(
+        offline_eval._generate_sharded_filenames(path)):
+      with tf.python_io.TFRecordWriter(shard_path) as writer:
+        for i in range(num_examples_per_shard):
+          image_id = '{}_{}'.format(shard, i)
+          feature = {
+              fields.TfExampleFields.source_id:
+                  dataset_util.bytes_feature(image_id.encode('utf8')),
+              fields.TfExampleFields.object_bbox_ymin:
+                  dataset_util.float_list_feature([0.1]),
+              fields.TfExampleFields.object_bbox_xmin:
+                  dataset_util.float_list_feature([0.2]),
+              fields.TfExampleFields.object_bbox_ymax:
+                  dataset_util.float_list_feature([0.3]),
+              fields.TfExampleFields.object_bbox_xmax:
+                  dataset_util.float_list_feature([0.4]),
+              fields.TfExampleFields.object_class_label:
+                  dataset_util.int64_list_feature([i]),
+          }
+          # Every third example has no detections and is not parsed.
+          if i % 3:
+            feature.update({
+                fields.TfExampleFields.detection_bbox_ymin:
+                    dataset_util.float_list_feature([0.1, 0.5]),
+                fields.TfExampleFields.detection_bbox_xmin:
+                    dataset_util.float_list_feature([0.2, 0.6]),
+                fields.TfExampleFields.detection_bbox_ymax:
+                    dataset_util.float_list_feature([0.3, 0.7]),
+                fields.TfExampleFields.detection_bbox_xmax:
+                    dataset_util.float_list_feature([0.4, 0.8]),
+                fields.TfExampleFields.detection_class_label:
+                    dataset_util.int64_list_feature([i, i + 1]),
+                fields.TfExampleFields.detection_score:
+                    dataset_util.float_list_feature([0.9, 0.2]),
+            })
+          example = tf.train.Example(
+              features=tf.train.Features(feature=feature))
+          writer.write(example.SerializeToString())
+    return path
+
+  def test_readDecodedExamples(self):
+    path = self._write_examples(num_shards=2, num_examples_per_shard=5)
+    decoded_dicts = list(offline_eval.read_decoded_examples([path]))
+    self.assertEqual(len(decoded_dicts), 10)
+    self.assertEqual([decoded_dict is None for decoded_dict in decoded_dicts],
+                     [True, False, False, True, False] * 2)
+    self.assertEqual(decoded_dicts[6][fields.DetectionResultFields.key],
+                     '1_1')
+    self.assertAllClose(
+        decoded_dicts[6][fields.DetectionResultFields.detection_boxes],
+        [[0.1, 0.2, 0.3, 0.4], [0.5, 0.6, 0.7, 0.8]])
+
+    parallel_decoded_dicts = list(offline_eval.read_decoded_examples(
+        [path], num_parse_workers=2, parse_batch_size=2,
+        num_prefetch_batches=3))
+    self.assertEqual(len(parallel_decoded_dicts), 10)
+    for decoded_dict, parallel_decoded_dict in zip(decoded_dicts,
+                                                   parallel_decoded_dicts):
+      if decoded_dict is None:
+        self.assertIsNone(parallel_decoded_dict)
+        continue
+      self.assertItemsEqual(decoded_dict.keys(), parallel_decoded_dict.keys())
+      for key, value in decoded_dict.items():
+        if value is None:
+          self.assertIsNone(parallel_decoded_dict[key])
+        else:
+          self.assertAllEqual(value, parallel_decoded_dict[key])
+
 
 if __name__ == '__main__':
   tf.test.main()
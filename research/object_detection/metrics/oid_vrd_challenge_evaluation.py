@@ -23,6 +23,7 @@ models/research/object_detection/metrics/oid_vrd_challenge_evaluation.py \
     --input_relationship_labelmap=/path/to/input/relationship_labelmap.pbtxt \
     --input_predictions=/path/to/input/predictions.csv \
     --output_metrics=/path/to/output/metric.csv \
+    --num_workers=8
 
 CSVs with bounding box annotations and image label (including the image URLs)
 can be downloaded from the Open Images Challenge website:
@@ -100,15 +101,15 @@ def main(parsed_args):
                                                         groundtruth_dictionary)
 
   all_predictions = pd.read_csv(parsed_args.input_predictions)
-  for _, prediction_data in enumerate(all_predictions.groupby('ImageID')):
-    image_id, image_predictions = prediction_data
-    prediction_dictionary = utils.build_predictions_vrd_dictionary(
-        image_predictions, class_label_map, relationship_label_map)
+  image_ids_and_predictions = [
+      (image_id, utils.build_predictions_vrd_dictionary(
+          image_predictions, class_label_map, relationship_label_map))
+      for image_id, image_predictions in all_predictions.groupby('ImageID')]
 
-    relation_evaluator.add_single_detected_image_info(image_id,
-                                                      prediction_dictionary)
-    phrase_evaluator.add_single_detected_image_info(image_id,
-                                                    prediction_dictionary)
+  relation_evaluator.add_detected_image_infos(
+      image_ids_and_predictions, num_workers=parsed_args.num_workers)
+  phrase_evaluator.add_detected_image_infos(
+      image_ids_and_predictions, num_workers=parsed_args.num_workers)
 
   relation_metrics = relation_evaluator.evaluate(
       relationships=_swap_labelmap_dict(relationship_label_map))
@@ -149,6 +150,13 @@ if __name__ == '__main__':
       help="""OpenImages Challenge relationship labelmap.""")
   parser.add_argument(
       '--output_metrics', required=True, help='Output file with csv metrics')
+  parser.add_argument(
+      '--num_workers',
+      type=int,
+      default=0,
+      help="""Number of worker processes matching the predictions of the images
+      to the groundtruth; if 0, the predictions are matched in the main
+      process.""")
 
   args = parser.parse_args()
   main(args)
@@ -0,0 +1,552 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Vectorized numpy implementation of the COCO box detection metrics.
+
+This module computes the same metrics as coco_tools.COCOEvalWrapper for
+`bbox` evaluation, but operates directly on per-image numpy arrays instead of
+converting groundtruth and detections to lists of COCO dictionaries and running
+the python loops of pycocotools. Matching of detections to groundtruth is done
+for all IOU thresholds and area ranges at once, and accumulation of the
+precision/recall curves is vectorized over IOU thresholds and area ranges.
+
+The results are identical to pycocotools up to floating point round-off,
+including its tie-breaking behavior. Note that nothing in this file is
+tensorflow related, nor does it depend on pycocotools.
+
+Usage example:
+
+  evaluator = vectorized_coco_eval.VectorizedCOCOEval(categories)
+  for image_id in image_ids:
+    evaluator.AddSingleImageGroundtruth(
+        image_id, groundtruth_boxes[image_id], groundtruth_classes[image_id])
+    evaluator.AddSingleImageDetections(
+        image_id, detection_boxes[image_id], detection_scores[image_id],
+        detection_classes[image_id])
+  summary_metrics, per_category_ap = evaluator.ComputeMetrics()
+"""
+from collections import OrderedDict
+import numpy as np
+
+# Evaluation parameters, identical to the default bbox parameters of
+# pycocotools.
+IOU_THRESHOLDS = np.linspace(.5, 0.95, 10, endpoint=True)
+RECALL_THRESHOLDS = np.linspace(.0, 1.00, 101, endpoint=True)
+MAX_DETECTIONS = [1, 10, 100]
+AREA_RANGES = np.array([[0 ** 2, 1e5 ** 2], [0 ** 2, 32 ** 2],
+                        [32 ** 2, 96 ** 2], [96 ** 2, 1e5 ** 2]])
+AREA_RANGE_LABELS = ['all', 'small', 'medium', 'large']
+
+# Summary metrics as (name, is_precision, iou_threshold_index, area_label,
+# max_detections), in the order of COCOeval.stats.
+_SUMMARY_METRICS = [
+    ('Precision/mAP', True, None, 'all', 100),
+    ('Precision/mAP@.50IOU', True, 0, 'all', 100),
+    ('Precision/mAP@.75IOU', True, 5, 'all', 100),
+    ('Precision/mAP (small)', True, None, 'small', 100),
+    ('Precision/mAP (medium)', True, None, 'medium', 100),
+    ('Precision/mAP (large)', True, None, 'large', 100),
+    ('Recall/AR@1', False, None, 'all', 1),
+    ('Recall/AR@10', False, None, 'all', 10),
+    ('Recall/AR@100', False, None, 'all', 100),
+    ('Recall/AR@100 (small)', False, None, 'small', 100),
+    ('Recall/AR@100 (medium)', False, None, 'medium', 100),
+    ('Recall/AR@100 (large)', False, None, 'large', 100),
+]
+
+# Per-category metric names used by COCOEvalWrapper, in the same order as
+# _SUMMARY_METRICS.
+_PER_CATEGORY_METRICS = [
+    'Precision mAP ByCategory/{}',
+    'Precision mAP@.50IOU ByCategory/{}',
+    'Precision mAP@.75IOU ByCategory/{}',
+    'Precision mAP (small) ByCategory/{}',
+    'Precision mAP (medium) ByCategory/{}',
+    'Precision mAP (large) ByCategory/{}',
+    'Recall AR@1 ByCategory/{}',
+    'Recall AR@10 ByCategory/{}',
+    'Recall AR@100 ByCategory/{}',
+    'Recall AR@100 (small) ByCategory/{}',
+    'Recall AR@100 (medium) ByCategory/{}',
+    'Recall AR@100 (large) ByCategory/{}',
+]
+
+
+def _ConvertBoxesToCOCOFormat(boxes):
+  """Converts [N, 4] boxes in [ymin, xmin, ymax, xmax] format to COCO format.
+
+  Widths and heights are computed in the precision of the input boxes before
+  being cast to float64, exactly like coco_tools._ConvertBoxToCOCOFormat.
+
+  Args:
+    boxes: a [N, 4] numpy array of boxes.
+
+  Returns:
+    a [N, 4] float64 numpy array of [xmin, ymin, width, height] boxes.
+  """
+  boxes = np.asarray(boxes)
+  return np.stack([
+      boxes[:, 1].astype(np.float64), boxes[:, 0].astype(np.float64),
+      (boxes[:, 3] - boxes[:, 1]).astype(np.float64),
+      (boxes[:, 2] - boxes[:, 0]).astype(np.float64)
+  ], axis=1)
+
+
+def ComputeIou(detection_boxes, groundtruth_boxes, groundtruth_is_crowd):
+  """Computes the COCO IOU between detection and groundtruth boxes.
+
+  For crowd groundtruth boxes the intersection is divided by the area of the
+  detection box instead of the area of the union, as done by pycocotools.
+
+  Args:
+    detection_boxes: a [D, 4] float64 array of [x, y, width, height] boxes.
+    groundtruth_boxes: a [G, 4] float64 array of [x, y, width, height] boxes.
+    groundtruth_is_crowd: a [G] boolean array.
+
+  Returns:
+    a [D, G] float64 array of IOUs.
+  """
+  dx, dy, dw, dh = [detection_boxes[:, i:i + 1] for i in range(4)]
+  gx, gy, gw, gh = [groundtruth_boxes[:, i] for i in range(4)]
+  intersection_width = np.minimum(dx + dw, gx + gw) - np.maximum(dx, gx)
+  intersection_height = np.minimum(dy + dh, gy + gh) - np.maximum(dy, gy)
+  intersection = np.where(
+      (intersection_width > 0) & (intersection_height > 0),
+      intersection_width * intersection_height, 0.0)
+  detection_area = dw * dh
+  union = np.where(groundtruth_is_crowd, detection_area,
+                   detection_area + gw * gh - intersection)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    iou = np.where(intersection > 0, intersection / union, 0.0)
+  return iou
+
+
+def _LastArgmax(values):
+  """Returns the index of the last maximum along the last axis."""
+  return values.shape[-1] - 1 - np.argmax(values[..., ::-1], axis=-1)
+
+
+def EvaluateSingleImageCategory(detection_boxes, detection_scores,
+                                detection_areas, groundtruth_boxes,
+                                groundtruth_areas, groundtruth_is_crowd):
+  """Matches detections to groundtruth of a single image and category.
+
+  This is the equivalent of COCOeval.evaluateImg, but computed for all area
+  ranges and IOU thresholds at once. Detections are matched greedily in order
+  of decreasing score.
+
+  Args:
+    detection_boxes: a [D, 4] float64 array of [x, y, width, height] boxes,
+      sorted by decreasing score and truncated to max(MAX_DETECTIONS).
+    detection_scores: a [D] float array of scores of the detections.
+    detection_areas: a [D] float array of areas of the detections.
+    groundtruth_boxes: a [G, 4] float64 array of [x, y, width, height] boxes.
+    groundtruth_areas: a [G] float array of areas of the groundtruth boxes.
+    groundtruth_is_crowd: a [G] boolean array.
+
+  Returns:
+    detection_matched: a [A, T, D] boolean array indicating whether a detection
+      is matched at each area range and IOU threshold.
+    detection_ignored: a [A, T, D] boolean array indicating whether a detection
+      is ignored at each area range and IOU threshold.
+    groundtruth_ignored: a [A, G] boolean array indicating whether a
+      groundtruth box is ignored for each area range.
+  """
+  num_areas = AREA_RANGES.shape[0]
+  num_thresholds = IOU_THRESHOLDS.shape[0]
+  num_detections = detection_scores.shape[0]
+  num_groundtruth = groundtruth_areas.shape[0]
+  groundtruth_ignored = (
+      groundtruth_is_crowd[np.newaxis, :] |
+      (groundtruth_areas[np.newaxis, :] < AREA_RANGES[:, 0:1]) |
+      (groundtruth_areas[np.newaxis, :] > AREA_RANGES[:, 1:2]))
+  detection_matched = np.zeros((num_areas, num_thresholds, num_detections),
+                               dtype=bool)
+  detection_ignored = np.zeros((num_areas, num_thresholds, num_detections),
+                               dtype=bool)
+  if num_detections and num_groundtruth:
+    ious = ComputeIou(detection_boxes, groundtruth_boxes, groundtruth_is_crowd)
+    thresholds = np.minimum(IOU_THRESHOLDS, 1 - 1e-10)[:, np.newaxis]
+    groundtruth_matched = np.zeros(
+        (num_areas, num_thresholds, num_groundtruth), dtype=bool)
+    area_index, threshold_index = np.indices((num_areas, num_thresholds))
+    for detection_index in range(num_detections):
+      detection_ious = ious[detection_index]
+      if detection_ious.max() < thresholds[0, 0]:
+        continue
+      # [A, T, G] groundtruth boxes this detection may be matched to.
+      candidates = ((detection_ious >= thresholds) &
+                    (~groundtruth_matched | groundtruth_is_crowd))
+      regular_candidates = candidates & ~groundtruth_ignored[:, np.newaxis, :]
+      ignored_candidates = candidates & groundtruth_ignored[:, np.newaxis, :]
+      # Prefer the best regular groundtruth box and fall back to the best
+      # ignored one. Ties go to the last box, as in pycocotools.
+      match = np.where(
+          regular_candidates.any(axis=-1),
+          _LastArgmax(np.where(regular_candidates, detection_ious, -1.0)),
+          _LastArgmax(np.where(ignored_candidates, detection_ious, -1.0)))
+      matched = candidates.any(axis=-1)
+      detection_matched[:, :, detection_index] = matched
+      detection_ignored[:, :, detection_index] = (
+          matched & groundtruth_ignored[area_index, match])
+      groundtruth_matched[area_index[matched], threshold_index[matched],
+                          match[matched]] = True
+  # Unmatched detections outside of the area range are ignored.
+  detection_out_of_range = (
+      (detection_areas[np.newaxis, :] < AREA_RANGES[:, 0:1]) |
+      (detection_areas[np.newaxis, :] > AREA_RANGES[:, 1:2]))
+  detection_ignored |= ~detection_matched & detection_out_of_range[:, None, :]
+  return detection_matched, detection_ignored, groundtruth_ignored
+
+
+def AccumulateCategory(detection_scores, detection_ranks, detection_matched,
+                       detection_ignored, num_positives):
+  """Computes precision and recall of a single category.
+
+  This is the equivalent of COCOeval.accumulate for a single category.
+
+  Args:
+    detection_scores: a [N] float array with the scores of all detections of
+      the category, concatenated over images.
+    detection_ranks: a [N] int array with the rank of each detection within
+      its image.
+    detection_matched: a [A, T, N] boolean array.
+    detection_ignored: a [A, T, N] boolean array.
+    num_positives: a [A] int array with the number of groundtruth boxes that
+      are not ignored for each area range.
+
+  Returns:
+    precision: a [T, R, A, M] float array of interpolated precisions at the
+      recall thresholds, or -1 where undefined.
+    recall: a [T, A, M] float array of recalls, or -1 where undefined.
+  """
+  num_areas = AREA_RANGES.shape[0]
+  num_thresholds = IOU_THRESHOLDS.shape[0]
+  num_recall_thresholds = RECALL_THRESHOLDS.shape[0]
+  precision = -np.ones((num_thresholds, num_recall_thresholds, num_areas,
+                        len(MAX_DETECTIONS)))
+  recall = -np.ones((num_thresholds, num_areas, len(MAX_DETECTIONS)))
+  for max_detections_index, max_detections in enumerate(MAX_DETECTIONS):
+    selected = detection_ranks < max_detections
+    order = np.argsort(-detection_scores[selected], kind='mergesort')
+    matched = detection_matched[:, :, selected][:, :, order]
+    ignored = detection_ignored[:, :, selected][:, :, order]
+    true_positives = np.cumsum(matched & ~ignored, axis=-1).astype(float)
+    false_positives = np.cumsum(~matched & ~ignored, axis=-1).astype(float)
+    num_selected = order.shape[0]
+    for area_index in range(num_areas):
+      if not num_positives[area_index]:
+        continue
+      area_recall = true_positives[area_index] / num_positives[area_index]
+      area_precision = true_positives[area_index] / (
+          true_positives[area_index] + false_positives[area_index] +
+          np.spacing(1))
+      if not num_selected:
+        recall[:, area_index, max_detections_index] = 0
+        precision[:, :, area_index, max_detections_index] = 0
+        continue
+      recall[:, area_index, max_detections_index] = area_recall[:, -1]
+      # Make precision monotonically decreasing.
+      area_precision = np.maximum.accumulate(
+          area_precision[:, ::-1], axis=-1)[:, ::-1]
+      for threshold_index in range(num_thresholds):
+        indices = np.searchsorted(area_recall[threshold_index],
+                                  RECALL_THRESHOLDS, side='left')
+        valid = indices < num_selected
+        interpolated = np.zeros(num_recall_thresholds)
+        interpolated[valid] = area_precision[threshold_index, indices[valid]]
+        precision[threshold_index, :, area_index,
+                  max_detections_index] = interpolated
+  return precision, recall
+
+
+def _Summarize(values, iou_threshold_index, area_label, max_detections):
+  """Averages precisions or recalls like COCOeval.summarize.
+
+  Args:
+    values: a [T, ..., A, M] array of precisions or recalls.
+    iou_threshold_index: index of the IOU threshold, or None for all.
+    area_label: one of AREA_RANGE_LABELS.
+    max_detections: one of MAX_DETECTIONS.
+
+  Returns:
+    the mean of the defined values, or -1 if there are none.
+  """
+  if iou_threshold_index is not None:
+    values = values[iou_threshold_index:iou_threshold_index + 1]
+  values = values[..., AREA_RANGE_LABELS.index(area_label),
+                  MAX_DETECTIONS.index(max_detections)]
+  values = values[values > -1]
+  if not values.size:
+    return -1.0
+  return np.mean(values)
+
+
+class VectorizedCOCOEval(object):
+  """Computes COCO box detection metrics on per-image numpy arrays.
+
+  Groundtruth and detections are added one image at a time, and metrics are
+  computed by `ComputeMetrics`, which returns the same metrics as
+  coco_tools.COCOEvalWrapper.ComputeMetrics.
+  """
+
+  def __init__(self, categories, agnostic_mode=False):
+    """Constructor.
+
+    Args:
+      categories: A list of dicts, each of which has the following keys -
+        'id': (required) an integer id uniquely identifying this category.
+        'name': (required) string representing category name e.g., 'cat', 'dog'.
+      agnostic_mode: boolean (default: False). If True, evaluation ignores
+        class labels, treating all detections as proposals.
+    """
+    self._categories = {cat['id']: cat for cat in categories}
+    self._category_ids = sorted(self._categories)
+    self._agnostic_mode = agnostic_mode
+    self._groundtruth = {}
+    self._detections = {}
+
+  def Clear(self):
+    """Clears all groundtruth and detections."""
+    self._groundtruth.clear()
+    self._detections.clear()
+
+  def AddSingleImageGroundtruth(self, image_id, groundtruth_boxes,
+                                groundtruth_classes, groundtruth_is_crowd=None):
+    """Adds groundtruth of a single image.
+
+    Groundtruth boxes with classes that are not in the categories are dropped.
+
+    Args:
+      image_id: a unique image identifier either of type integer or string.
+      groundtruth_boxes: numpy array with shape [num_gt_boxes, 4] of boxes in
+        [ymin, xmin, ymax, xmax] format, in absolute image coordinates.
+      groundtruth_classes: numpy array (int) with shape [num_gt_boxes].
+      groundtruth_is_crowd: optional numpy array (int) with shape [num_gt_boxes]
+        indicating whether groundtruth boxes are crowd.
+
+    Raises:
+      ValueError: if the inputs do not have the right shapes.
+    """
+    groundtruth_boxes = np.asarray(groundtruth_boxes)
+    groundtruth_classes = np.asarray(groundtruth_classes)
+    if len(groundtruth_classes.shape) != 1:
+      raise ValueError('groundtruth_classes is expected to be of rank 1.')
+    if (len(groundtruth_boxes.shape) != 2 or
+        groundtruth_boxes.shape[1] != 4 or
+        groundtruth_boxes.shape[0] != groundtruth_classes.shape[0]):
+      raise ValueError('groundtruth_boxes should have shape [%d, 4], got %s.' %
+                       (groundtruth_classes.shape[0],
+                        groundtruth_boxes.shape))
+    if groundtruth_is_crowd is None:
+      groundtruth_is_crowd = np.zeros(groundtruth_classes.shape, dtype=bool)
+    groundtruth_is_crowd = np.asarray(groundtruth_is_crowd).astype(bool)
+    if groundtruth_is_crowd.shape != groundtruth_classes.shape:
+      raise ValueError('groundtruth_is_crowd should have shape %s, got %s.' %
+                       (groundtruth_classes.shape, groundtruth_is_crowd.shape))
+    valid = np.isin(groundtruth_classes, self._category_ids)
+    groundtruth_boxes = groundtruth_boxes[valid]
+    # The areas are computed in the precision of the input boxes, like
+    # coco_tools.ExportSingleImageGroundtruthToCoco.
+    areas = ((groundtruth_boxes[:, 2] - groundtruth_boxes[:, 0]) *
+             (groundtruth_boxes[:, 3] - groundtruth_boxes[:, 1]))
+    self._groundtruth[image_id] = {
+        'boxes': _ConvertBoxesToCOCOFormat(groundtruth_boxes),
+        'areas': areas.astype(np.float64),
+        'classes': groundtruth_classes[valid].astype(np.int64),
+        'is_crowd': groundtruth_is_crowd[valid],
+    }
+
+  def AddSingleImageDetections(self, image_id, detection_boxes,
+                               detection_scores, detection_classes):
+    """Adds detections of a single image.
+
+    Detections with classes that are not in the categories are dropped.
+
+    Args:
+      image_id: a unique image identifier either of type integer or string.
+      detection_boxes: float numpy array of shape [num_detections, 4] of boxes
+        in [ymin, xmin, ymax, xmax] format, in absolute image coordinates.
+      detection_scores: float numpy array of shape [num_detections].
+      detection_classes: integer numpy array of shape [num_detections].
+
+    Raises:
+      ValueError: if the inputs do not have the right shapes or groundtruth
+        for the image has not been added.
+    """
+    if image_id not in self._groundtruth:
+      raise ValueError('Missing groundtruth for image id: {}'.format(image_id))
+    detection_boxes = np.asarray(detection_boxes)
+    detection_scores = np.asarray(detection_scores)
+    detection_classes = np.asarray(detection_classes)
+    if len(detection_classes.shape) != 1 or len(detection_scores.shape) != 1:
+      raise ValueError('All entries in detection_classes and detection_scores'
+                       'expected to be of rank 1.')
+    num_boxes = detection_classes.shape[0]
+    if (len(detection_boxes.shape) != 2 or detection_boxes.shape[1] != 4 or
+        not num_boxes == detection_boxes.shape[0] == detection_scores.shape[0]):
+      raise ValueError('Corresponding entries in detection_classes, '
+                       'detection_scores and detection_boxes should have '
+                       'compatible shapes.')
+    valid = np.isin(detection_classes, self._category_ids)
+    boxes = _ConvertBoxesToCOCOFormat(detection_boxes[valid])
+    self._detections[image_id] = {
+        'boxes': boxes,
+        'areas': boxes[:, 2] * boxes[:, 3],
+        'scores': detection_scores[valid].astype(np.float64),
+        'classes': detection_classes[valid].astype(np.int64),
+    }
+
+  def ExportDetections(self):
+    """Returns the detections as a list of dicts in the COCO format."""
+    detections_list = []
+    for image_id in self._detections:
+      detections = self._detections[image_id]
+      for box, score, category_id in zip(detections['boxes'],
+                                         detections['scores'],
+                                         detections['classes']):
+        detections_list.append({
+            'image_id': image_id,
+            'category_id': int(category_id),
+            'bbox': [float(coordinate) for coordinate in box],
+            'score': float(score)
+        })
+    return detections_list
+
+  def _EvaluateImages(self):
+    """Matches detections to groundtruth in all images.
+
+    Returns:
+      A list with, for each category, a list of per-image tuples (scores,
+      ranks, detection_matched, detection_ignored, groundtruth_ignored).
+    """
+    num_categories = 1 if self._agnostic_mode else len(self._category_ids)
+    category_index_by_id = {
+        category_id: index
+        for index, category_id in enumerate(self._category_ids)}
+    results = [[] for _ in range(num_categories)]
+    empty_detections = {
+        'boxes': np.zeros((0, 4)), 'areas': np.zeros(0),
+        'scores': np.zeros(0), 'classes': np.zeros(0, dtype=np.int64)}
+    for image_id in sorted(self._groundtruth):
+      groundtruth = self._groundtruth[image_id]
+      detections = self._detections.get(image_id, empty_detections)
+      if self._agnostic_mode:
+        # pycocotools concatenates the boxes of all categories in order of
+        # category id, which determines how ties are broken.
+        groundtruth_order = np.argsort(groundtruth['classes'], kind='mergesort')
+        detection_order = np.argsort(detections['classes'], kind='mergesort')
+        groups = [(0, groundtruth_order, detection_order)]
+      else:
+        groups = []
+        for category_id in np.union1d(groundtruth['classes'],
+                                      detections['classes']):
+          groups.append((category_index_by_id[category_id],
+                         np.nonzero(groundtruth['classes'] == category_id)[0],
+                         np.nonzero(detections['classes'] == category_id)[0]))
+      for category_index, groundtruth_indices, detection_indices in groups:
+        scores = detections['scores'][detection_indices]
+        order = np.argsort(-scores, kind='mergesort')[:MAX_DETECTIONS[-1]]
+        detection_indices = detection_indices[order]
+        detection_matched, detection_ignored, groundtruth_ignored = (
+            EvaluateSingleImageCategory(
+                detections['boxes'][detection_indices],
+                detections['scores'][detection_indices],
+                detections['areas'][detection_indices],
+                groundtruth['boxes'][groundtruth_indices],
+                groundtruth['areas'][groundtruth_indices],
+                groundtruth['is_crowd'][groundtruth_indices]))
+        results[category_index].append(
+            (detections['scores'][detection_indices],
+             np.arange(detection_indices.shape[0]), detection_matched,
+             detection_ignored, groundtruth_ignored))
+    return results
+
+  def Evaluate(self):
+    """Computes precision and recall of all categories.
+
+    Returns:
+      precision: a [T, R, K, A, M] float array of interpolated precisions,
+        with -1 for absent categories, as in COCOeval.eval['precision'].
+      recall: a [T, K, A, M] float array of recalls, with -1 for absent
+        categories, as in COCOeval.eval['recall'].
+    """
+    results = self._EvaluateImages()
+    num_areas = AREA_RANGES.shape[0]
+    num_thresholds = IOU_THRESHOLDS.shape[0]
+    precision = -np.ones((num_thresholds, RECALL_THRESHOLDS.shape[0],
+                          len(results), num_areas, len(MAX_DETECTIONS)))
+    recall = -np.ones((num_thresholds, len(results), num_areas,
+                       len(MAX_DETECTIONS)))
+    for category_index, category_results in enumerate(results):
+      if not category_results:
+        continue
+      scores, ranks, detection_matched, detection_ignored, gt_ignored = zip(
+          *category_results)
+      num_positives = np.sum(
+          [np.sum(~ignored, axis=-1) for ignored in gt_ignored], axis=0)
+      (precision[:, :, category_index, :, :],
+       recall[:, category_index, :, :]) = AccumulateCategory(
+           np.concatenate(scores), np.concatenate(ranks),
+           np.concatenate(detection_matched, axis=-1),
+           np.concatenate(detection_ignored, axis=-1), num_positives)
+    return precision, recall
+
+  def ComputeMetrics(self,
+                     include_metrics_per_category=False,
+                     all_metrics_per_category=False):
+    """Computes detection metrics.
+
+    Args:
+      include_metrics_per_category: If True, will include metrics per category.
+      all_metrics_per_category: If true, include all the summery metrics for
+        each category in per_category_ap. Be careful with setting it to true if
+        you have more than handful of categories, because it will pollute
+        your mldash.
+
+    Returns:
+      1. summary_metrics: a dictionary holding the same metrics as
+        coco_tools.COCOEvalWrapper.ComputeMetrics.
+      2. per_category_ap: a dictionary holding category specific results with
+        keys of the form: 'Precision mAP ByCategory/category'.
+        For backward compatibility 'PerformanceByCategory' is included in the
+        output regardless of all_metrics_per_category.
+        If evaluating class-agnostic mode, per_category_ap is an empty
+        dictionary.
+    """
+    precision, recall = self.Evaluate()
+    summary_metrics = OrderedDict()
+    for name, is_precision, iou_index, area_label, max_dets in _SUMMARY_METRICS:
+      summary_metrics[name] = _Summarize(
+          precision if is_precision else recall, iou_index, area_label,
+          max_dets)
+    per_category_ap = OrderedDict()
+    if not include_metrics_per_category or self._agnostic_mode:
+      return summary_metrics, per_category_ap
+    for category_index, category_id in enumerate(self._category_ids):
+      category = self._categories[category_id]['name']
+      category_stats = [
+          _Summarize(
+              precision[:, :, category_index:category_index + 1]
+              if is_precision else recall[:, category_index:category_index + 1],
+              iou_index, area_label, max_dets)
+          for _, is_precision, iou_index, area_label, max_dets
+          in _SUMMARY_METRICS]
+      # Kept for backward compatilbility
+      per_category_ap['PerformanceByCategory/mAP/{}'.format(
+          category)] = category_stats[0]
+      if all_metrics_per_category:
+        for name, value in zip(_PER_CATEGORY_METRICS, category_stats):
+          per_category_ap[name.format(category)] = value
+    return summary_metrics, per_category_ap
@@ -0,0 +1,144 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for object_detection.metrics.vectorized_coco_eval."""
+import numpy as np
+import tensorflow as tf
+
+from object_detection.metrics import coco_tools
+from object_detection.metrics import vectorized_coco_eval
+
+
+def _get_categories_list():
+  return [{'id': 1, 'name': 'person'},
+          {'id': 2, 'name': 'dog'},
+          {'id': 4, 'name': 'cat'}]
+
+
+class VectorizedCocoEvalTest(tf.test.TestCase):
+
+  def _generate_image(self, random_state, num_groundtruth, num_detections):
+    """Generates groundtruth and noisy detections around it for an image."""
+    corners = random_state.uniform(0, 300, size=(num_groundtruth, 2))
+    sizes = random_state.uniform(1, 150, size=(num_groundtruth, 2))
+    groundtruth_boxes = np.concatenate(
+        [corners, corners + sizes], axis=1).astype(np.float32)
+    # Class 3 is not a valid category and must be dropped.
+    groundtruth_classes = random_state.choice([1, 2, 3, 4], num_groundtruth)
+    groundtruth_is_crowd = (
+        random_state.uniform(size=num_groundtruth) < .1).astype(np.int32)
+    matched_boxes = groundtruth_boxes[random_state.randint(
+        0, num_groundtruth, num_detections)]
+    detection_boxes = (matched_boxes + random_state.normal(
+        scale=5., size=(num_detections, 4))).astype(np.float32)
+    detection_boxes[:, 2:] = np.maximum(detection_boxes[:, 2:],
+                                        detection_boxes[:, :2] + 1.)
+    # Rounded scores produce ties, which need to be broken like pycocotools.
+    detection_scores = np.round(
+        random_state.uniform(size=num_detections), 1).astype(np.float32)
+    detection_classes = random_state.choice([1, 2, 3, 4], num_detections)
+    return (groundtruth_boxes, groundtruth_classes, groundtruth_is_crowd,
+            detection_boxes, detection_scores, detection_classes)
+
+  def _check_matches_pycocotools(self, agnostic_mode):
+    random_state = np.random.RandomState(42)
+    categories = _get_categories_list()
+    category_id_set = set([cat['id'] for cat in categories])
+    vectorized_eval = vectorized_coco_eval.VectorizedCOCOEval(
+        categories, agnostic_mode=agnostic_mode)
+    groundtruth_list = []
+    detections_list = []
+    image_ids = ['image%d' % i for i in range(20)]
+    annotation_id = 1
+    for image_id in image_ids:
+      (groundtruth_boxes, groundtruth_classes, groundtruth_is_crowd,
+       detection_boxes, detection_scores, detection_classes) = (
+           self._generate_image(random_state, random_state.randint(1, 8),
+                                random_state.randint(0, 120)))
+      groundtruth_list.extend(coco_tools.ExportSingleImageGroundtruthToCoco(
+          image_id, annotation_id, category_id_set, groundtruth_boxes,
+          groundtruth_classes, groundtruth_is_crowd=groundtruth_is_crowd))
+      annotation_id += groundtruth_boxes.shape[0]
+      detections_list.extend(coco_tools.ExportSingleImageDetectionBoxesToCoco(
+          image_id, category_id_set, detection_boxes, detection_scores,
+          detection_classes))
+      vectorized_eval.AddSingleImageGroundtruth(
+          image_id, groundtruth_boxes, groundtruth_classes,
+          groundtruth_is_crowd)
+      vectorized_eval.AddSingleImageDetections(
+          image_id, detection_boxes, detection_scores, detection_classes)
+
+    groundtruth = coco_tools.COCOWrapper({
+        'annotations': groundtruth_list,
+        'images': [{'id': image_id} for image_id in image_ids],
+        'categories': categories
+    })
+    detections = groundtruth.LoadAnnotations(detections_list)
+    coco_eval = coco_tools.COCOEvalWrapper(groundtruth, detections,
+                                           agnostic_mode=agnostic_mode)
+    expected_metrics, _ = coco_eval.ComputeMetrics()
+
+    precision, recall = vectorized_eval.Evaluate()
+    metrics, _ = vectorized_eval.ComputeMetrics()
+    self.assertAllClose(coco_eval.eval['precision'], precision)
+    self.assertAllClose(coco_eval.eval['recall'], recall)
+    self.assertEqual(list(expected_metrics.keys()), list(metrics.keys()))
+    for key in expected_metrics:
+      self.assertAlmostEqual(expected_metrics[key], metrics[key])
+
+  def testMatchesPycocotools(self):
+    self._check_matches_pycocotools(agnostic_mode=False)
+
+  def testMatchesPycocotoolsInAgnosticMode(self):
+    self._check_matches_pycocotools(agnostic_mode=True)
+
+  def testComputeIouWithCrowd(self):
+    detection_boxes = np.array([[0., 0., 10., 10.]])
+    groundtruth_boxes = np.array([[5., 0., 10., 10.], [5., 0., 10., 10.],
+                                  [20., 20., 5., 5.]])
+    iou = vectorized_coco_eval.ComputeIou(
+        detection_boxes, groundtruth_boxes, np.array([False, True, False]))
+    self.assertAllClose([[50. / 150., 50. / 100., 0.]], iou)
+
+  def testPerCategoryMetrics(self):
+    vectorized_eval = vectorized_coco_eval.VectorizedCOCOEval(
+        _get_categories_list())
+    vectorized_eval.AddSingleImageGroundtruth(
+        'image1', np.array([[100., 100., 200., 200.], [0., 0., 50., 50.]]),
+        np.array([1, 2]))
+    vectorized_eval.AddSingleImageDetections(
+        'image1', np.array([[100., 100., 200., 200.]]), np.array([.8]),
+        np.array([1]))
+    metrics, per_category_ap = vectorized_eval.ComputeMetrics(
+        include_metrics_per_category=True, all_metrics_per_category=True)
+    self.assertAlmostEqual(0.5, metrics['Precision/mAP'])
+    self.assertAlmostEqual(
+        1.0, per_category_ap['PerformanceByCategory/mAP/person'])
+    self.assertAlmostEqual(0.0, per_category_ap['Precision mAP ByCategory/dog'])
+    self.assertAlmostEqual(-1.0,
+                           per_category_ap['Precision mAP ByCategory/cat'])
+    self.assertAlmostEqual(1.0,
+                           per_category_ap['Recall AR@1 ByCategory/person'])
+
+  def testMissingGroundtruthRaisesError(self):
+    vectorized_eval = vectorized_coco_eval.VectorizedCOCOEval(
+        _get_categories_list())
+    with self.assertRaises(ValueError):
+      vectorized_eval.AddSingleImageDetections(
+          'image1', np.array([[100., 100., 200., 200.]]), np.array([.8]),
+          np.array([1]))
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,101 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Profiles the data augmentation steps of a training pipeline.
+
+Applies the data_augmentation_options of the train_config to examples of the
+training input, and logs the time spent in each augmentation step.
+
+Example usage:
+  python object_detection/profile_preprocessor.py \
+    --pipeline_config_path=/path/to/pipeline.config \
+    --num_examples=200
+
+Use --fuse_geometric_ops to measure the effect of applying consecutive
+geometric augmentations with a single resampling of the image.
+"""
+import itertools
+import time
+
+import tensorflow as tf
+
+from object_detection.builders import preprocessor_builder
+from object_detection.core import preprocessor
+from object_detection.core import preprocessor_profiler
+from object_detection.core import standard_fields as fields
+from object_detection.data_decoders import tf_example_decoder
+from object_detection.utils import config_util
+
+flags = tf.app.flags
+flags.DEFINE_string('pipeline_config_path', None,
+                    'Path to a pipeline_pb2.TrainEvalPipelineConfig config '
+                    'file.')
+flags.DEFINE_string('input_path', None,
+                    'Optional path to the input TFRecord. Defaults to the '
+                    'first input path of the train_input_reader.')
+flags.DEFINE_integer('num_examples', 100, 'Number of examples to preprocess.')
+flags.DEFINE_boolean('fuse_geometric_ops', False,
+                     'Whether to fuse consecutive geometric augmentations.')
+FLAGS = flags.FLAGS
+
+
+def main(_):
+  tf.logging.set_verbosity(tf.logging.INFO)
+  configs = config_util.get_configs_from_pipeline_file(
+      FLAGS.pipeline_config_path)
+  input_path = FLAGS.input_path
+  if not input_path:
+    input_reader_config = configs['train_input_config']
+    input_path = input_reader_config.tf_record_input_reader.input_path[0]
+  data_augmentation_options = [
+      preprocessor_builder.build(step)
+      for step in configs['train_config'].data_augmentation_options
+  ]
+
+  serialized_example = tf.placeholder(tf.string, shape=[])
+  tensor_dict = tf_example_decoder.TfExampleDecoder().decode(
+      serialized_example)
+  include_instance_masks = (fields.InputDataFields.groundtruth_instance_masks
+                            in tensor_dict)
+  include_keypoints = (fields.InputDataFields.groundtruth_keypoints
+                       in tensor_dict)
+  tensor_dict[fields.InputDataFields.image] = tf.expand_dims(
+      tf.to_float(tensor_dict[fields.InputDataFields.image]), 0)
+  profiler = preprocessor_profiler.PreprocessorProfiler()
+  tensor_dict = preprocessor.preprocess(
+      tensor_dict, data_augmentation_options,
+      func_arg_map=preprocessor.get_default_func_arg_map(
+          include_instance_masks=include_instance_masks,
+          include_keypoints=include_keypoints),
+      fuse_geometric_ops=FLAGS.fuse_geometric_ops,
+      profiler=profiler)
+
+  serialized_examples = itertools.islice(
+      tf.python_io.tf_record_iterator(input_path), FLAGS.num_examples)
+  num_examples = 0
+  total_time = 0.0
+  with tf.Session() as sess:
+    for example in serialized_examples:
+      start_time = time.time()
+      sess.run(tensor_dict, feed_dict={serialized_example: example})
+      total_time += time.time() - start_time
+      num_examples += 1
+  tf.logging.info('Preprocessed %d examples in %.3f ms per example.',
+                  num_examples, 1000 * total_time / max(num_examples, 1))
+  profiler.log_summary()
+
+
+if __name__ == '__main__':
+  flags.mark_flag_as_required('pipeline_config_path')
+  tf.app.run()
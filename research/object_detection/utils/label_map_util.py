@@ -12,9 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
-"""Label map utility functions."""
+"""Label map utility functions.
 
+Parsing the text format of large label maps, e.g. the Open Images hierarchies,
+takes seconds. Label maps are therefore parsed once per process and kept as
+serialized binary protos, keyed by the digest of the label map file. With a
+cache_dir, the binary protos are also written to disk, so that other processes,
+e.g. inference workers, skip the text format parsing.
+"""
+
+import hashlib
 import logging
+import os
 
 import tensorflow as tf
 from google.protobuf import text_format
@@ -96,7 +105,7 @@ def convert_label_map_to_categories(label_map,
     categories: a list of dictionaries representing all possible categories.
   """
   categories = []
-  list_of_ids_already_added = []
+  list_of_ids_already_added = set()
   if not label_map:
     label_id_offset = 1
     for class_id in range(max_num_classes):
@@ -116,33 +125,79 @@ def convert_label_map_to_categories(label_map,
     else:
       name = item.name
     if item.id not in list_of_ids_already_added:
-      list_of_ids_already_added.append(item.id)
+      list_of_ids_already_added.add(item.id)
       categories.append({'id': item.id, 'name': name})
   return categories
 
 
-def load_labelmap(path):
+# Serialized label maps, keyed by the SHA1 digest of the label map files.
+_serialized_label_maps = {}
+
+
+def _parse_labelmap_string(label_map_string):
+  label_map = string_int_label_map_pb2.StringIntLabelMap()
+  try:
+    text_format.Merge(label_map_string, label_map)
+  except text_format.ParseError:
+    label_map.ParseFromString(label_map_string)
+  return label_map
+
+
+def _write_labelmap_cache(serialized_label_map, cache_dir, cache_path):
+  """Atomically writes a serialized label map, logging failures."""
+  # Workers starting together may write the same cache file.
+  temp_path = '{}.tmp{}'.format(cache_path, os.getpid())
+  try:
+    tf.gfile.MakeDirs(cache_dir)
+    with tf.gfile.GFile(temp_path, 'wb') as fid:
+      fid.write(serialized_label_map)
+    tf.gfile.Rename(temp_path, cache_path, overwrite=True)
+  except tf.errors.OpError as e:
+    logging.warning('Could not write label map cache %s: %s', cache_path, e)
+
+
+def load_labelmap(path, cache_dir=None):
   """Loads label map proto.
 
+  The text format of a label map is parsed at most once per process, and at
+  most once overall with a cache_dir, as long as the label map file does not
+  change.
+
   Args:
     path: path to StringIntLabelMap proto text file.
+    cache_dir: optional directory holding binary copies of parsed label maps,
+      keyed by the SHA1 digest of the label map files.
   Returns:
     a StringIntLabelMapProto
   """
-  with tf.gfile.GFile(path, 'r') as fid:
+  with tf.gfile.GFile(path, 'rb') as fid:
     label_map_string = fid.read()
-    label_map = string_int_label_map_pb2.StringIntLabelMap()
-    try:
-      text_format.Merge(label_map_string, label_map)
-    except text_format.ParseError:
-      label_map.ParseFromString(label_map_string)
-  _validate_label_map(label_map)
+  digest = hashlib.sha1(label_map_string).hexdigest()
+  serialized_label_map = _serialized_label_maps.get(digest)
+  cache_path = None
+  if cache_dir:
+    cache_path = '{}/{}.binarypb'.format(cache_dir.rstrip('/'), digest)
+    if serialized_label_map is None and tf.gfile.Exists(cache_path):
+      with tf.gfile.GFile(cache_path, 'rb') as fid:
+        serialized_label_map = fid.read()
+
+  label_map = string_int_label_map_pb2.StringIntLabelMap()
+  if serialized_label_map is not None:
+    label_map.ParseFromString(serialized_label_map)
+  else:
+    label_map = _parse_labelmap_string(label_map_string)
+    _validate_label_map(label_map)
+    serialized_label_map = label_map.SerializeToString()
+    if cache_path:
+      _write_labelmap_cache(serialized_label_map, cache_dir, cache_path)
+  _serialized_label_maps[digest] = serialized_label_map
   return label_map
 
 
 def get_label_map_dict(label_map_path,
                        use_display_name=False,
-                       fill_in_gaps_and_background=False):
+                       fill_in_gaps_and_background=False,
+                       cache_dir=None):
   """Reads a label map and returns a dictionary of label names to id.
 
   Args:
@@ -153,6 +208,7 @@ def get_label_map_dict(label_map_path,
     'background' class and will be added if it is missing. All other missing
     ids in range(1, max(id)) will be added with a dummy class name
     ("class_<id>") if they are missing.
+    cache_dir: optional directory of cached label maps, see load_labelmap.
 
   Returns:
     A dictionary mapping label names to id.
@@ -161,7 +217,7 @@ def get_label_map_dict(label_map_path,
     ValueError: if fill_in_gaps_and_background and label_map has non-integer or
     negative values.
   """
-  label_map = load_labelmap(label_map_path)
+  label_map = load_labelmap(label_map_path, cache_dir)
   label_map_dict = {}
   for item in label_map.item:
     if use_display_name:
@@ -189,7 +245,8 @@ def get_label_map_dict(label_map_path,
   return label_map_dict
 
 
-def create_categories_from_labelmap(label_map_path, use_display_name=True):
+def create_categories_from_labelmap(label_map_path, use_display_name=True,
+                                    cache_dir=None):
   """Reads a label map and returns categories list compatible with eval.
 
   This function converts label map proto and returns a list of dicts, each of
@@ -202,17 +259,19 @@ def create_categories_from_labelmap(label_map_path, use_display_name=True):
     use_display_name: (boolean) choose whether to load 'display_name' field
       as category name.  If False or if the display_name field does not exist,
       uses 'name' field as category names instead.
+    cache_dir: optional directory of cached label maps, see load_labelmap.
 
   Returns:
     categories: a list of dictionaries representing all possible categories.
   """
-  label_map = load_labelmap(label_map_path)
+  label_map = load_labelmap(label_map_path, cache_dir)
   max_num_classes = max(item.id for item in label_map.item)
   return convert_label_map_to_categories(label_map, max_num_classes,
                                          use_display_name)
 
 
-def create_category_index_from_labelmap(label_map_path, use_display_name=True):
+def create_category_index_from_labelmap(label_map_path, use_display_name=True,
+                                        cache_dir=None):
   """Reads a label map and returns a category index.
 
   Args:
@@ -220,13 +279,15 @@ def create_category_index_from_labelmap(label_map_path, use_display_name=True):
     use_display_name: (boolean) choose whether to load 'display_name' field
       as category name.  If False or if the display_name field does not exist,
       uses 'name' field as category names instead.
+    cache_dir: optional directory of cached label maps, see load_labelmap.
 
   Returns:
     A category index, which is a dictionary that maps integer ids to dicts
     containing categories, e.g.
     {1: {'id': 1, 'name': 'dog'}, 2: {'id': 2, 'name': 'cat'}, ...}
   """
-  categories = create_categories_from_labelmap(label_map_path, use_display_name)
+  categories = create_categories_from_labelmap(label_map_path, use_display_name,
+                                               cache_dir)
   return create_category_index(categories)
 
 
@@ -142,6 +142,35 @@ class LabelMapUtilTest(tf.test.TestCase):
     self.assertEqual(label_map_dict['cat'], 3)
     self.assertEqual(len(label_map_dict), max(label_map_dict.values()) + 1)
 
+  def test_load_label_map_with_cache_dir(self):
+    label_map_path = os.path.join(self.get_temp_dir(), 'cached_label_map.pbtxt')
+    cache_dir = os.path.join(self.get_temp_dir(), 'label_map_cache')
+    label_map_proto = self._generate_label_map(num_classes=3)
+    with tf.gfile.Open(label_map_path, 'wb') as f:
+      f.write(text_format.MessageToString(label_map_proto))
+
+    label_map = label_map_util.load_labelmap(label_map_path,
+                                             cache_dir=cache_dir)
+    self.assertEqual(label_map, label_map_proto)
+    self.assertEqual(len(tf.gfile.ListDirectory(cache_dir)), 1)
+    # Loads the binary label map of the cache directory.
+    label_map_util._serialized_label_maps.clear()
+    cached_label_map = label_map_util.load_labelmap(label_map_path,
+                                                    cache_dir=cache_dir)
+    self.assertEqual(cached_label_map, label_map_proto)
+    self.assertEqual(
+        label_map_util.create_category_index_from_labelmap(
+            label_map_path, use_display_name=False, cache_dir=cache_dir)[3],
+        {'id': 3, 'name': 'label_3'})
+
+    label_map_proto = self._generate_label_map(num_classes=4)
+    with tf.gfile.Open(label_map_path, 'wb') as f:
+      f.write(text_format.MessageToString(label_map_proto))
+    label_map = label_map_util.load_labelmap(label_map_path,
+                                             cache_dir=cache_dir)
+    self.assertEqual(label_map, label_map_proto)
+    self.assertEqual(len(tf.gfile.ListDirectory(cache_dir)), 2)
+
   def test_keep_categories_with_unique_id(self):
     label_map_proto = string_int_label_map_pb2.StringIntLabelMap()
     label_map_string = """
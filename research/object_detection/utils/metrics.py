@@ -18,13 +18,16 @@ from __future__ import division
 import numpy as np
 
 
-def compute_precision_recall(scores, labels, num_gt):
+def compute_precision_recall(scores, labels, num_gt, presorted=False):
   """Compute precision and recall.
 
   Args:
     scores: A float numpy array representing detection score
     labels: A float numpy array representing weighted true/false positive labels
     num_gt: Number of ground truth instances
+    presorted: (optional) boolean indicating that `scores` and `labels` are
+      already sorted by descending score, in which case they are not sorted
+      again.
 
   Raises:
     ValueError: if the input is not of the correct format
@@ -54,9 +57,12 @@ def compute_precision_recall(scores, labels, num_gt):
   if num_gt == 0:
     return None, None
 
-  sorted_indices = np.argsort(scores)
-  sorted_indices = sorted_indices[::-1]
-  true_positive_labels = labels[sorted_indices]
+  if presorted:
+    true_positive_labels = labels
+  else:
+    sorted_indices = np.argsort(scores)
+    sorted_indices = sorted_indices[::-1]
+    true_positive_labels = labels[sorted_indices]
   false_positive_labels = (true_positive_labels <= 0).astype(float)
   cum_true_positives = np.cumsum(true_positive_labels)
   cum_false_positives = np.cumsum(false_positive_labels)
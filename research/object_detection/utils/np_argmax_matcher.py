@@ -0,0 +1,127 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Numpy argmax matcher.
+
+Numpy counterpart of object_detection.matchers.argmax_matcher. Similarity
+matrices can have leading batch dimensions, so that the groundtruth boxes of
+many images are matched to anchors at once.
+"""
+import numpy as np
+
+
+class ArgMaxMatcher(object):
+  """Numpy matcher based on highest value.
+
+  Each column of the similarity matrix is matched to a single row, with the
+  same thresholds as object_detection.matchers.argmax_matcher.ArgMaxMatcher.
+  Match results are -1 for unmatched columns and -2 for ignored columns.
+  """
+
+  def __init__(self,
+               matched_threshold,
+               unmatched_threshold=None,
+               negatives_lower_than_unmatched=True,
+               force_match_for_each_row=False):
+    """Construct ArgMaxMatcher.
+
+    Args:
+      matched_threshold: Threshold for positive matches. Positive if
+        sim >= matched_threshold, where sim is the maximum value of the
+        similarity matrix for a given column. Set to None for no threshold.
+      unmatched_threshold: Threshold for negative matches. Negative if
+        sim < unmatched_threshold. Defaults to matched_threshold
+        when set to None.
+      negatives_lower_than_unmatched: Boolean which defaults to True. If True
+        then negative matches are the ones below the unmatched_threshold,
+        whereas ignored matches are in between the matched and umatched
+        threshold. If False, then negative matches are in between the matched
+        and unmatched threshold, and everything lower than unmatched is ignored.
+      force_match_for_each_row: If True, ensures that each row is matched to
+        at least one column.
+
+    Raises:
+      ValueError: if unmatched_threshold is set but matched_threshold is not set
+        or if unmatched_threshold > matched_threshold.
+    """
+    if (matched_threshold is None) and (unmatched_threshold is not None):
+      raise ValueError('Need to also define matched_threshold when '
+                       'unmatched_threshold is defined')
+    self._matched_threshold = matched_threshold
+    if unmatched_threshold is None:
+      self._unmatched_threshold = matched_threshold
+    else:
+      if unmatched_threshold > matched_threshold:
+        raise ValueError('unmatched_threshold needs to be smaller or equal '
+                         'to matched_threshold')
+      self._unmatched_threshold = unmatched_threshold
+    if not negatives_lower_than_unmatched:
+      if self._unmatched_threshold == self._matched_threshold:
+        raise ValueError('When negatives are in between matched and '
+                         'unmatched thresholds, these cannot be of equal '
+                         'value. matched: {}, unmatched: {}'.format(
+                             self._matched_threshold,
+                             self._unmatched_threshold))
+    self._force_match_for_each_row = force_match_for_each_row
+    self._negatives_lower_than_unmatched = negatives_lower_than_unmatched
+
+  def match(self, similarity_matrix, valid_rows=None):
+    """Tries to match each column of the similarity matrix to a row.
+
+    Args:
+      similarity_matrix: numpy array of shape [..., N, M] representing any
+        similarity metric.
+      valid_rows: optional boolean numpy array of shape [..., N] indicating
+        valid rows. Invalid rows are only excluded from the forced matches,
+        as in the TensorFlow matcher. Defaults to all rows being valid.
+
+    Returns:
+      an int32 numpy array of shape [..., M] holding, for each column, the
+      index of the matched row, -1 if the column is unmatched or -2 if it is
+      ignored.
+    """
+    similarity_matrix = np.asarray(similarity_matrix)
+    num_rows, num_columns = similarity_matrix.shape[-2:]
+    if num_rows == 0:
+      return -np.ones(similarity_matrix.shape[:-2] + (num_columns,),
+                      dtype=np.int32)
+
+    matches = np.argmax(similarity_matrix, axis=-2).astype(np.int32)
+    if self._matched_threshold is not None:
+      matched_vals = np.max(similarity_matrix, axis=-2)
+      below_unmatched_threshold = matched_vals < self._unmatched_threshold
+      between_thresholds = np.logical_and(
+          matched_vals >= self._unmatched_threshold,
+          matched_vals < self._matched_threshold)
+      if self._negatives_lower_than_unmatched:
+        matches[below_unmatched_threshold] = -1
+        matches[between_thresholds] = -2
+      else:
+        matches[below_unmatched_threshold] = -2
+        matches[between_thresholds] = -1
+
+    if self._force_match_for_each_row:
+      force_match_column_ids = np.argmax(similarity_matrix, axis=-1)
+      force_match_column_indicators = np.equal(
+          np.arange(num_columns), force_match_column_ids[..., np.newaxis])
+      if valid_rows is not None:
+        force_match_column_indicators &= np.asarray(
+            valid_rows, dtype=bool)[..., np.newaxis]
+      # The lowest row index wins when several rows force the same column.
+      force_match_row_ids = np.argmax(force_match_column_indicators, axis=-2)
+      force_match_column_mask = np.any(force_match_column_indicators, axis=-2)
+      matches = np.where(force_match_column_mask,
+                         force_match_row_ids, matches).astype(np.int32)
+    return matches
@@ -0,0 +1,94 @@
+# Copyright 2017 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Tests for object_detection.utils.np_argmax_matcher."""
+
+import numpy as np
+import tensorflow as tf
+
+from object_detection.utils import np_argmax_matcher
+
+
+class ArgMaxMatcherTest(tf.test.TestCase):
+
+  def test_return_correct_matches_with_default_thresholds(self):
+    matcher = np_argmax_matcher.ArgMaxMatcher(matched_threshold=None)
+    similarity = np.array([[1., 1, 1, 3, 1],
+                           [2, -1, 2, 0, 4],
+                           [3, 0, -1, 0, 0]], dtype=np.float32)
+    match_results = matcher.match(similarity)
+    self.assertAllEqual(match_results, [2, 0, 1, 0, 1])
+    self.assertEqual(match_results.dtype, np.int32)
+
+  def test_return_correct_matches_with_empty_rows(self):
+    matcher = np_argmax_matcher.ArgMaxMatcher(matched_threshold=None)
+    match_results = matcher.match(0.2 * np.ones([0, 5], dtype=np.float32))
+    self.assertAllEqual(match_results, -np.ones(5))
+
+  def test_return_correct_matches_with_matched_and_unmatched_threshold(self):
+    matcher = np_argmax_matcher.ArgMaxMatcher(matched_threshold=3.,
+                                              unmatched_threshold=2.)
+    similarity = np.array([[1, 1, 1, 3, 1],
+                           [2, -1, 2, 0, 4],
+                           [3, 0, -1, 0, 0]], dtype=np.float32)
+    self.assertAllEqual(matcher.match(similarity), [2, -1, -2, 0, 1])
+
+  def test_return_correct_matches_negatives_lower_than_unmatched_false(self):
+    matcher = np_argmax_matcher.ArgMaxMatcher(
+        matched_threshold=3., unmatched_threshold=2.,
+        negatives_lower_than_unmatched=False)
+    similarity = np.array([[1, 1, 1, 3, 1],
+                           [2, -1, 2, 0, 4],
+                           [3, 0, -1, 0, 0]], dtype=np.float32)
+    self.assertAllEqual(matcher.match(similarity), [2, -2, -1, 0, 1])
+
+  def test_return_correct_matches_using_force_match_padded_groundtruth(self):
+    matcher = np_argmax_matcher.ArgMaxMatcher(matched_threshold=3.,
+                                              unmatched_threshold=2.,
+                                              force_match_for_each_row=True)
+    similarity = np.array([[1, 1, 1, 3, 1],
+                           [-1, 0, -2, -2, -1],
+                           [0, 0, 0, 0, 0],
+                           [3, 0, -1, 2, 0],
+                           [0, 0, 0, 0, 0]], dtype=np.float32)
+    valid_rows = np.array([True, True, False, True, False])
+    self.assertAllEqual(matcher.match(similarity, valid_rows),
+                        [3, 1, -1, 0, -1])
+
+  def test_match_batch(self):
+    matcher = np_argmax_matcher.ArgMaxMatcher(matched_threshold=3.,
+                                              unmatched_threshold=2.,
+                                              force_match_for_each_row=True)
+    similarity = np.array([[[1, 1, 1, 3, 1],
+                            [-1, 0, -2, -2, -1],
+                            [3, 0, -1, 2, 0]],
+                           [[3, 0, -1, 2, 0],
+                            [1, 1, 1, 3, 1],
+                            [-1, 0, -2, -2, -1]]], dtype=np.float32)
+    match_results = matcher.match(similarity)
+    self.assertAllEqual(match_results.shape, [2, 5])
+    for similarity_matrix, image_match_results in zip(similarity,
+                                                      match_results):
+      self.assertAllEqual(image_match_results,
+                          matcher.match(similarity_matrix))
+
+  def test_invalid_arguments_unmatched_thres_larger_than_matched_thres(self):
+    with self.assertRaises(ValueError):
+      np_argmax_matcher.ArgMaxMatcher(matched_threshold=1,
+                                      unmatched_threshold=2)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,158 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Numpy optimal bipartite matcher.
+
+Solves the linear assignment problem exactly with the shortest augmenting path
+variant of the Hungarian algorithm (Jonker-Volgenant), as described in
+D.F. Crouse, "On implementing 2D rectangular assignment algorithms", IEEE
+Transactions on Aerospace and Electronic Systems, 2016. The inner loop over
+columns is vectorized, so that a problem with n rows and m >= n columns takes
+O(n^2) vectorized operations of size m.
+"""
+import numpy as np
+
+
+def linear_sum_assignment(cost_matrix):
+  """Solves the rectangular linear assignment problem.
+
+  Finds the assignment of rows to columns, each column being assigned at most
+  once, with the minimum total cost. All rows are assigned if there are no
+  more rows than columns, and all columns otherwise.
+
+  Args:
+    cost_matrix: a numpy array of shape [N, M] with finite costs.
+
+  Returns:
+    row_indices: an int numpy array of shape [min(N, M)] with the assigned rows,
+      in increasing order.
+    column_indices: an int numpy array of shape [min(N, M)] with the columns
+      assigned to row_indices.
+
+  Raises:
+    ValueError: if cost_matrix is not a matrix or has non-finite values.
+  """
+  cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+  if cost_matrix.ndim != 2:
+    raise ValueError('cost_matrix must be a matrix.')
+  if not np.all(np.isfinite(cost_matrix)):
+    raise ValueError('cost_matrix must only have finite values.')
+  transposed = cost_matrix.shape[0] > cost_matrix.shape[1]
+  if transposed:
+    cost_matrix = cost_matrix.T
+  num_rows, num_columns = cost_matrix.shape
+
+  row_duals = np.zeros(num_rows)
+  column_duals = np.zeros(num_columns)
+  column_for_row = -np.ones(num_rows, dtype=np.int64)
+  row_for_column = -np.ones(num_columns, dtype=np.int64)
+  for current_row in range(num_rows):
+    # Dijkstra search of the shortest augmenting path from current_row to an
+    # unassigned column, with reduced costs.
+    shortest_path_costs = np.full(num_columns, np.inf)
+    path = -np.ones(num_columns, dtype=np.int64)
+    visited_rows = np.zeros(num_rows, dtype=bool)
+    visited_columns = np.zeros(num_columns, dtype=bool)
+    min_cost = 0.
+    row = current_row
+    sink = -1
+    while sink < 0:
+      visited_rows[row] = True
+      reduced_costs = (min_cost + cost_matrix[row] - row_duals[row] -
+                       column_duals)
+      shorter = np.logical_and(~visited_columns,
+                               reduced_costs < shortest_path_costs)
+      path[shorter] = row
+      shortest_path_costs[shorter] = reduced_costs[shorter]
+      candidate_costs = np.where(visited_columns, np.inf, shortest_path_costs)
+      column = int(np.argmin(candidate_costs))
+      min_cost = candidate_costs[column]
+      visited_columns[column] = True
+      if row_for_column[column] < 0:
+        sink = column
+      else:
+        row = row_for_column[column]
+
+    # Update the dual variables.
+    row_duals[current_row] += min_cost
+    other_rows = visited_rows.copy()
+    other_rows[current_row] = False
+    row_duals[other_rows] += (
+        min_cost - shortest_path_costs[column_for_row[other_rows]])
+    column_duals[visited_columns] -= (
+        min_cost - shortest_path_costs[visited_columns])
+
+    # Augment the assignment along the path.
+    column = sink
+    while True:
+      row = path[column]
+      row_for_column[column] = row
+      column_for_row[row], column = column, column_for_row[row]
+      if row == current_row:
+        break
+
+  if transposed:
+    column_indices = np.argsort(column_for_row)
+    return column_for_row[column_indices], column_indices
+  return np.arange(num_rows), column_for_row
+
+
+class HungarianBipartiteMatcher(object):
+  """Numpy matcher maximizing the total similarity of matched pairs.
+
+  Every valid row is matched to a distinct column, unlike the greedy bipartite
+  matcher which matches the most similar pairs first.
+  """
+
+  def match(self, similarity_matrix, valid_rows=None):
+    """Optimally matches rows and columns of a similarity matrix.
+
+    Args:
+      similarity_matrix: numpy array of shape [..., N, M] with pairwise
+        similarity where higher values mean more similar.
+      valid_rows: optional boolean numpy array of shape [..., N] indicating the
+        rows that can be matched. Defaults to all rows being valid.
+
+    Returns:
+      an int32 numpy array of shape [..., M] holding, for each column, the
+      index of the matched row, or -1 if the column is unmatched.
+    """
+    similarity_matrix = np.asarray(similarity_matrix)
+    num_rows, num_columns = similarity_matrix.shape[-2:]
+    batch_shape = similarity_matrix.shape[:-2]
+    if valid_rows is None:
+      valid_rows = np.ones(batch_shape + (num_rows,), dtype=bool)
+    valid_rows = np.broadcast_to(np.asarray(valid_rows, dtype=bool),
+                                 batch_shape + (num_rows,))
+    match_results = -np.ones(batch_shape + (num_columns,), dtype=np.int32)
+    for index in np.ndindex(*batch_shape):
+      row_indices = np.nonzero(valid_rows[index])[0]
+      if not row_indices.size or not num_columns:
+        continue
+      sub_similarity_matrix = similarity_matrix[index][row_indices]
+      column_indices = np.arange(num_columns)
+      if row_indices.size ** 2 < num_columns:
+        # Among the n most similar columns of a row, at least one is not
+        # matched to one of the n - 1 other rows, so optimal matches are
+        # among the n most similar columns of each row.
+        column_indices = np.unique(np.argpartition(
+            -sub_similarity_matrix, row_indices.size - 1,
+            axis=1)[:, :row_indices.size])
+        sub_similarity_matrix = sub_similarity_matrix[:, column_indices]
+      matched_rows, matched_columns = linear_sum_assignment(
+          -sub_similarity_matrix)
+      match_results[index][column_indices[matched_columns]] = (
+          row_indices[matched_rows])
+    return match_results
@@ -0,0 +1,100 @@
+# Copyright 2017 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Tests for object_detection.utils.np_bipartite_matcher."""
+import itertools
+
+import numpy as np
+import tensorflow as tf
+
+from object_detection.utils import np_bipartite_matcher
+
+
+class LinearSumAssignmentTest(tf.test.TestCase):
+
+  def _brute_force_min_cost(self, cost_matrix):
+    num_rows, num_columns = cost_matrix.shape
+    if num_rows > num_columns:
+      return self._brute_force_min_cost(cost_matrix.T)
+    return min(
+        sum(cost_matrix[row, column] for row, column in enumerate(columns))
+        for columns in itertools.permutations(range(num_columns), num_rows))
+
+  def test_linear_sum_assignment(self):
+    cost_matrix = np.array([[4, 1, 3], [2, 0, 5], [3, 2, 2]])
+    row_indices, column_indices = np_bipartite_matcher.linear_sum_assignment(
+        cost_matrix)
+    self.assertAllEqual(row_indices, [0, 1, 2])
+    self.assertAllEqual(column_indices, [1, 0, 2])
+
+  def test_linear_sum_assignment_is_optimal(self):
+    random_state = np.random.RandomState(0)
+    for shape in [(1, 1), (1, 5), (3, 5), (5, 3), (4, 4), (6, 2)]:
+      for cost_matrix in [random_state.rand(*shape),
+                          random_state.randint(0, 3, size=shape)]:
+        row_indices, column_indices = (
+            np_bipartite_matcher.linear_sum_assignment(cost_matrix))
+        self.assertEqual(len(row_indices), min(shape))
+        self.assertAllEqual(row_indices, np.sort(row_indices))
+        self.assertEqual(len(set(column_indices)), min(shape))
+        self.assertAllClose(cost_matrix[row_indices, column_indices].sum(),
+                            self._brute_force_min_cost(cost_matrix))
+
+  def test_raise_error_on_non_finite_costs(self):
+    with self.assertRaises(ValueError):
+      np_bipartite_matcher.linear_sum_assignment([[0., np.inf]])
+
+
+class HungarianBipartiteMatcherTest(tf.test.TestCase):
+
+  def test_get_optimal_matches(self):
+    matcher = np_bipartite_matcher.HungarianBipartiteMatcher()
+    match_results = matcher.match([[0.50, 0.1, 0.8], [0.15, 0.2, 0.75]])
+    self.assertAllEqual(match_results, [0, -1, 1])
+    self.assertEqual(match_results.dtype, np.int32)
+
+  def test_get_no_matches_with_zero_valid_rows(self):
+    matcher = np_bipartite_matcher.HungarianBipartiteMatcher()
+    match_results = matcher.match([[0.50, 0.1, 0.8], [0.15, 0.2, 0.3]],
+                                  valid_rows=[False, False])
+    self.assertAllEqual(match_results, [-1, -1, -1])
+
+  def test_get_optimal_matches_with_many_columns(self):
+    # With more than num_rows**2 columns, only the most similar columns of
+    # each row are searched.
+    random_state = np.random.RandomState(0)
+    similarity_matrix = random_state.randint(0, 4, size=(3, 12))
+    match_results = np_bipartite_matcher.HungarianBipartiteMatcher().match(
+        similarity_matrix)
+    matched_columns = np.nonzero(match_results >= 0)[0]
+    self.assertEqual(len(matched_columns), 3)
+    self.assertEqual(
+        similarity_matrix[match_results[matched_columns],
+                          matched_columns].sum(),
+        max(sum(similarity_matrix[row, column]
+                for row, column in enumerate(columns))
+            for columns in itertools.permutations(range(12), 3)))
+
+  def test_match_batch(self):
+    similarity_matrix = np.array([[[0.50, 0.1, 0.8], [0.15, 0.2, 0.75]],
+                                  [[0.15, 0.2, 0.3], [0.50, 0.1, 0.8]]])
+    valid_rows = np.array([[True, True], [False, True]])
+    match_results = np_bipartite_matcher.HungarianBipartiteMatcher().match(
+        similarity_matrix, valid_rows)
+    self.assertAllEqual(match_results, [[0, -1, 1], [-1, -1, 1]])
+
+
+if __name__ == '__main__':
+  tf.test.main()
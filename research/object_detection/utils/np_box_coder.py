@@ -0,0 +1,136 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Numpy box coders.
+
+Numpy counterparts of the box coders in object_detection/box_coders, used to
+analyze target assignment offline without building a graph. Boxes can have any
+leading batch dimensions, so that the boxes of many images are encoded at once.
+"""
+import numpy as np
+
+from object_detection.utils import np_box_list
+
+EPSILON = 1e-8
+
+
+def _get_boxes(boxes):
+  if isinstance(boxes, np_box_list.BoxList):
+    return boxes.get()
+  return np.asarray(boxes)
+
+
+def _get_center_coordinates_and_sizes(boxes):
+  """Returns the center coordinates, heights and widths of boxes.
+
+  Args:
+    boxes: a numpy array of shape [..., 4] holding boxes in the format
+      [y_min, x_min, y_max, x_max].
+
+  Returns:
+    a tuple of numpy arrays of shape [...] with the y and x center coordinates,
+    the heights and the widths of the boxes.
+  """
+  y_min, x_min, y_max, x_max = np.moveaxis(boxes, -1, 0)
+  height = y_max - y_min
+  width = x_max - x_min
+  return y_min + height / 2., x_min + width / 2., height, width
+
+
+class FasterRcnnBoxCoder(object):
+  """Numpy Faster RCNN box coder.
+
+  See object_detection.box_coders.faster_rcnn_box_coder for the coding schema.
+  """
+
+  def __init__(self, scale_factors=None):
+    """Constructor for FasterRcnnBoxCoder.
+
+    Args:
+      scale_factors: List of 4 positive scalars to scale ty, tx, th and tw.
+        If set to None, does not perform scaling.
+    """
+    if scale_factors:
+      assert len(scale_factors) == 4
+      for scalar in scale_factors:
+        assert scalar > 0
+    self._scale_factors = scale_factors
+
+  @property
+  def code_size(self):
+    return 4
+
+  def encode(self, boxes, anchors):
+    """Encodes boxes with respect to anchors.
+
+    Args:
+      boxes: a numpy array of shape [..., N, 4] or a BoxList holding N boxes to
+        be encoded.
+      anchors: a numpy array of shape [N, 4] or a BoxList of anchors, or a
+        numpy array that broadcasts against boxes.
+
+    Returns:
+      a numpy array of shape [..., N, 4] representing the anchor-encoded boxes
+      in the format [ty, tx, th, tw].
+    """
+    ycenter_a, xcenter_a, ha, wa = _get_center_coordinates_and_sizes(
+        _get_boxes(anchors))
+    ycenter, xcenter, h, w = _get_center_coordinates_and_sizes(
+        _get_boxes(boxes))
+    # Avoid NaN in division and log below.
+    ha = ha + EPSILON
+    wa = wa + EPSILON
+    h = h + EPSILON
+    w = w + EPSILON
+
+    ty = (ycenter - ycenter_a) / ha
+    tx = (xcenter - xcenter_a) / wa
+    th = np.log(h / ha)
+    tw = np.log(w / wa)
+    if self._scale_factors:
+      ty *= self._scale_factors[0]
+      tx *= self._scale_factors[1]
+      th *= self._scale_factors[2]
+      tw *= self._scale_factors[3]
+    return np.stack([ty, tx, th, tw], axis=-1)
+
+  def decode(self, rel_codes, anchors):
+    """Decodes relative codes to boxes.
+
+    Args:
+      rel_codes: a numpy array of shape [..., N, 4] representing anchor-encoded
+        boxes.
+      anchors: a numpy array of shape [N, 4] or a BoxList of anchors, or a
+        numpy array that broadcasts against rel_codes.
+
+    Returns:
+      a numpy array of shape [..., N, 4] holding the decoded boxes in the
+      format [y_min, x_min, y_max, x_max].
+    """
+    ycenter_a, xcenter_a, ha, wa = _get_center_coordinates_and_sizes(
+        _get_boxes(anchors))
+
+    ty, tx, th, tw = np.moveaxis(np.asarray(rel_codes), -1, 0)
+    if self._scale_factors:
+      ty = ty / self._scale_factors[0]
+      tx = tx / self._scale_factors[1]
+      th = th / self._scale_factors[2]
+      tw = tw / self._scale_factors[3]
+    w = np.exp(tw) * wa
+    h = np.exp(th) * ha
+    ycenter = ty * ha + ycenter_a
+    xcenter = tx * wa + xcenter_a
+    return np.stack([ycenter - h / 2., xcenter - w / 2.,
+                     ycenter + h / 2., xcenter + w / 2.], axis=-1)
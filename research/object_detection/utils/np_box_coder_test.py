@@ -0,0 +1,65 @@
+# Copyright 2017 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Tests for object_detection.utils.np_box_coder."""
+
+import numpy as np
+import tensorflow as tf
+
+from object_detection.utils import np_box_coder
+from object_detection.utils import np_box_list
+
+
+class FasterRcnnBoxCoderTest(tf.test.TestCase):
+
+  def setUp(self):
+    self.boxes = np.array([[10.0, 10.0, 20.0, 15.0], [0.2, 0.1, 0.5, 0.4]],
+                          dtype=np.float32)
+    self.anchors = np.array([[15.0, 12.0, 30.0, 18.0], [0.1, 0.0, 0.7, 0.9]],
+                            dtype=np.float32)
+    self.rel_codes = np.array([[-0.5, -0.416666, -0.405465, -0.182321],
+                               [-0.083333, -0.222222, -0.693147, -1.098612]],
+                              dtype=np.float32)
+
+  def test_get_correct_relative_codes_after_encoding(self):
+    coder = np_box_coder.FasterRcnnBoxCoder()
+    rel_codes = coder.encode(np_box_list.BoxList(self.boxes),
+                             np_box_list.BoxList(self.anchors))
+    self.assertAllClose(rel_codes, self.rel_codes)
+
+  def test_get_correct_relative_codes_after_encoding_with_scaling(self):
+    coder = np_box_coder.FasterRcnnBoxCoder(scale_factors=[2, 3, 4, 5])
+    rel_codes = coder.encode(self.boxes, self.anchors)
+    expected_rel_codes = [[-1., -1.25, -1.62186, -0.911608],
+                          [-0.166667, -0.666667, -2.772588, -5.493062]]
+    self.assertAllClose(rel_codes, expected_rel_codes)
+
+  def test_get_correct_boxes_after_decoding(self):
+    coder = np_box_coder.FasterRcnnBoxCoder()
+    boxes = coder.decode(self.rel_codes, np_box_list.BoxList(self.anchors))
+    self.assertAllClose(boxes, self.boxes, rtol=1e-5, atol=1e-5)
+
+  def test_encode_and_decode_batch(self):
+    coder = np_box_coder.FasterRcnnBoxCoder(scale_factors=[10., 10., 5., 5.])
+    boxes = np.stack([self.boxes, self.boxes[::-1]])
+    rel_codes = coder.encode(boxes, self.anchors)
+    self.assertAllEqual(rel_codes.shape, [2, 2, 4])
+    self.assertAllClose(rel_codes[0], coder.encode(self.boxes, self.anchors))
+    self.assertAllClose(coder.decode(rel_codes, self.anchors), boxes,
+                        rtol=1e-5, atol=1e-5)
+
+
+if __name__ == '__main__':
+  tf.test.main()
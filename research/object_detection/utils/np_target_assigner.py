@@ -0,0 +1,213 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Numpy target assigner.
+
+Numpy counterpart of object_detection.core.target_assigner with an IOU
+similarity, used to analyze target assignment offline (anchor coverage, matched
+anchor statistics) without building a graph per image.
+
+Unlike the TensorFlow target assigner, which handles a single image, the
+groundtruth boxes of a batch of images are padded to the same number of boxes
+and assigned to the anchors at once.
+"""
+import numpy as np
+
+from object_detection.utils import np_box_list
+
+
+def pad_boxlists(boxlists):
+  """Pads the boxes of a list of BoxLists to the same number of boxes.
+
+  Args:
+    boxlists: list of np_box_list.BoxList with length batch_size.
+
+  Returns:
+    boxes: float32 numpy array of shape [batch_size, max_num_boxes, 4] with
+      zero padding. max_num_boxes is at least 1, so that boxes can be gathered
+      even when all BoxLists are empty.
+    num_boxes: int32 numpy array of shape [batch_size] with the number of
+      boxes of each BoxList.
+  """
+  num_boxes = np.array([boxlist.num_boxes() for boxlist in boxlists],
+                       dtype=np.int32)
+  max_num_boxes = max(int(num_boxes.max()) if len(boxlists) else 0, 1)
+  boxes = np.zeros([len(boxlists), max_num_boxes, 4], dtype=np.float32)
+  for i, boxlist in enumerate(boxlists):
+    boxes[i, :num_boxes[i]] = boxlist.get()
+  return boxes, num_boxes
+
+
+def batch_iou(boxes, anchors):
+  """Computes the pairwise IOU between batched boxes and anchors.
+
+  Args:
+    boxes: a numpy array of shape [batch_size, M, 4] holding boxes.
+    anchors: a numpy array of shape [N, 4] holding anchors.
+
+  Returns:
+    a float32 numpy array of shape [batch_size, M, N] with pairwise IOU scores.
+  """
+  boxes = np.asarray(boxes, dtype=np.float32)
+  anchors = np.asarray(anchors, dtype=np.float32)
+  y_min, x_min, y_max, x_max = [
+      coordinate[..., np.newaxis] for coordinate in np.moveaxis(boxes, -1, 0)]
+  a_y_min, a_x_min, a_y_max, a_x_max = anchors.T
+  intersect_heights = np.maximum(
+      np.minimum(y_max, a_y_max) - np.maximum(y_min, a_y_min), 0.)
+  intersect_widths = np.maximum(
+      np.minimum(x_max, a_x_max) - np.maximum(x_min, a_x_min), 0.)
+  intersections = intersect_heights * intersect_widths
+  areas = (y_max - y_min) * (x_max - x_min)
+  anchor_areas = (a_y_max - a_y_min) * (a_x_max - a_x_min)
+  unions = areas + anchor_areas - intersections
+  with np.errstate(divide='ignore', invalid='ignore'):
+    return np.where(unions > 0, intersections / unions, 0.).astype(np.float32)
+
+
+class TargetAssigner(object):
+  """Numpy target assigner with an IOU similarity."""
+
+  def __init__(self, matcher, box_coder, negative_class_weight=1.0):
+    """Construct a Numpy target assigner.
+
+    Args:
+      matcher: an np_argmax_matcher.ArgMaxMatcher used to match groundtruth to
+        anchors.
+      box_coder: an np_box_coder.FasterRcnnBoxCoder used to encode matching
+        groundtruth boxes with respect to anchors.
+      negative_class_weight: classification weight to be associated to negative
+        anchors (default: 1.0). The weight must be in [0., 1.].
+    """
+    self._matcher = matcher
+    self._box_coder = box_coder
+    self._negative_class_weight = negative_class_weight
+
+  @property
+  def box_coder(self):
+    return self._box_coder
+
+  def match(self, anchors, groundtruth_boxes, num_groundtruth_boxes,
+            groundtruth_weights=None):
+    """Matches padded groundtruth boxes of a batch of images to anchors.
+
+    Args:
+      anchors: a numpy array of shape [N, 4] or a BoxList holding N anchors.
+      groundtruth_boxes: a numpy array of shape [batch_size, M, 4] holding
+        padded groundtruth boxes, see pad_boxlists.
+      num_groundtruth_boxes: an int numpy array of shape [batch_size] with the
+        number of groundtruth boxes of each image.
+      groundtruth_weights: optional float numpy array of shape [batch_size, M]
+        with the weights of the groundtruth boxes. Boxes with zero weight are
+        not force matched.
+
+    Returns:
+      similarity: a float32 numpy array of shape [batch_size, M, N] with the
+        IOU of the groundtruth boxes and anchors, and -1 for padding boxes.
+      match_results: an int32 numpy array of shape [batch_size, N] with, for
+        each anchor, the index of the matched groundtruth box, -1 if the anchor
+        is unmatched or -2 if it is ignored.
+    """
+    if isinstance(anchors, np_box_list.BoxList):
+      anchors = anchors.get()
+    num_groundtruth_boxes = np.asarray(num_groundtruth_boxes)
+    valid_rows = (np.arange(np.shape(groundtruth_boxes)[1]) <
+                  num_groundtruth_boxes[:, np.newaxis])
+    similarity = batch_iou(groundtruth_boxes, anchors)
+    # Padding boxes never win the argmax over the groundtruth boxes.
+    similarity[~valid_rows] = -1.
+    if groundtruth_weights is not None:
+      valid_rows &= np.asarray(groundtruth_weights) > 0
+    match_results = self._matcher.match(similarity, valid_rows=valid_rows)
+    match_results[num_groundtruth_boxes == 0] = -1
+    return similarity, match_results
+
+  def assign(self,
+             anchors,
+             groundtruth_boxlists,
+             groundtruth_labels_list=None,
+             unmatched_class_label=None,
+             groundtruth_weights_list=None):
+    """Assigns classification and regression targets to the anchors.
+
+    Args:
+      anchors: a numpy array of shape [N, 4] or a BoxList holding N anchors,
+        shared by all images.
+      groundtruth_boxlists: a list of np_box_list.BoxList with length
+        batch_size holding the groundtruth boxes of each image.
+      groundtruth_labels_list: optional list with length batch_size of numpy
+        arrays of shape [num_gt_boxes_i, d_1, ... d_k] with labels for each of
+        the groundtruth boxes. When set to None, all groundtruth boxes get a
+        label of [1].
+      unmatched_class_label: optional numpy array with shape [d_1, ..., d_k],
+        the classification target of unmatched anchors. Defaults to [0].
+      groundtruth_weights_list: optional list with length batch_size of float
+        numpy arrays of shape [num_gt_boxes_i] with the weights of the
+        groundtruth boxes. Defaults to weights of 1.
+
+    Returns:
+      cls_targets: a float32 numpy array with shape
+        [batch_size, N, d_1, ... d_k].
+      cls_weights: a float32 numpy array with shape
+        [batch_size, N, d_1, ... d_k].
+      reg_targets: a float32 numpy array with shape
+        [batch_size, N, box_code_dimension].
+      reg_weights: a float32 numpy array with shape [batch_size, N].
+      match_results: an int32 numpy array of shape [batch_size, N], see match.
+    """
+    if isinstance(anchors, np_box_list.BoxList):
+      anchors = anchors.get()
+    if unmatched_class_label is None:
+      unmatched_class_label = np.array([0], dtype=np.float32)
+    unmatched_class_label = np.asarray(unmatched_class_label, dtype=np.float32)
+    groundtruth_boxes, num_groundtruth_boxes = pad_boxlists(
+        groundtruth_boxlists)
+    batch_size, max_num_boxes = groundtruth_boxes.shape[:2]
+
+    labels = np.zeros((batch_size, max_num_boxes) + unmatched_class_label.shape,
+                      dtype=np.float32)
+    weights = np.zeros([batch_size, max_num_boxes], dtype=np.float32)
+    for i, num_boxes in enumerate(num_groundtruth_boxes):
+      labels[i, :num_boxes] = (1. if groundtruth_labels_list is None
+                               else groundtruth_labels_list[i])
+      weights[i, :num_boxes] = (1. if groundtruth_weights_list is None
+                                else groundtruth_weights_list[i])
+
+    _, match_results = self.match(anchors, groundtruth_boxes,
+                                  num_groundtruth_boxes, weights)
+    matched = match_results >= 0
+    matched_rows = np.maximum(match_results, 0)
+    batch_indices = np.arange(batch_size)[:, np.newaxis]
+
+    matched_boxes = groundtruth_boxes[batch_indices, matched_rows]
+    with np.errstate(divide='ignore', invalid='ignore'):
+      matched_reg_targets = self._box_coder.encode(matched_boxes, anchors)
+    reg_targets = np.where(matched[..., np.newaxis], matched_reg_targets,
+                           0.).astype(np.float32)
+
+    class_mask = matched.reshape(
+        matched.shape + (1,) * unmatched_class_label.ndim)
+    cls_targets = np.where(class_mask, labels[batch_indices, matched_rows],
+                           unmatched_class_label).astype(np.float32)
+
+    matched_weights = weights[batch_indices, matched_rows]
+    reg_weights = np.where(matched, matched_weights, 0.).astype(np.float32)
+    cls_weights = np.where(
+        matched, matched_weights,
+        np.where(match_results == -1, self._negative_class_weight, 0.))
+    cls_weights = np.broadcast_to(
+        cls_weights.reshape(class_mask.shape),
+        cls_targets.shape).astype(np.float32)
+    return cls_targets, cls_weights, reg_targets, reg_weights, match_results
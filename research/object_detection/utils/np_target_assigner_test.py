@@ -0,0 +1,113 @@
+# Copyright 2017 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Tests for object_detection.utils.np_target_assigner."""
+
+import numpy as np
+import tensorflow as tf
+
+from object_detection.utils import np_argmax_matcher
+from object_detection.utils import np_box_coder
+from object_detection.utils import np_box_list
+from object_detection.utils import np_target_assigner
+
+
+class BatchIouTest(tf.test.TestCase):
+
+  def test_batch_iou(self):
+    boxes = np.array([[[4.0, 3.0, 7.0, 5.0], [5.0, 6.0, 10.0, 7.0]],
+                      [[0.0, 0.0, 0.0, 0.0], [4.0, 3.0, 7.0, 5.0]]],
+                     dtype=np.float32)
+    anchors = np.array([[3.0, 4.0, 6.0, 8.0], [14.0, 14.0, 15.0, 15.0],
+                        [0.0, 0.0, 20.0, 20.0]], dtype=np.float32)
+    expected_iou = [[[2.0 / 16.0, 0, 6.0 / 400.0],
+                     [1.0 / 16.0, 0.0, 5.0 / 400.0]],
+                    [[0.0, 0.0, 0.0],
+                     [2.0 / 16.0, 0, 6.0 / 400.0]]]
+    self.assertAllClose(np_target_assigner.batch_iou(boxes, anchors),
+                        expected_iou)
+
+
+class TargetAssignerTest(tf.test.TestCase):
+
+  def setUp(self):
+    matcher = np_argmax_matcher.ArgMaxMatcher(matched_threshold=0.5,
+                                              unmatched_threshold=0.4)
+    self.target_assigner = np_target_assigner.TargetAssigner(
+        matcher, np_box_coder.FasterRcnnBoxCoder())
+    self.anchors = np_box_list.BoxList(
+        np.array([[0.0, 0.0, 0.5, 0.5],
+                  [0.5, 0.5, 1.0, 0.8],
+                  [0.0, 0.5, 0.5, 1.0]], dtype=np.float32))
+
+  def test_assign_batch(self):
+    groundtruth_boxlists = [
+        np_box_list.BoxList(np.array([[0.0, 0.0, 0.5, 0.5],
+                                      [0.5, 0.5, 0.9, 0.9]],
+                                     dtype=np.float32)),
+        np_box_list.BoxList(np.array([[0.0, 0.6, 0.5, 1.0]],
+                                     dtype=np.float32)),
+        np_box_list.BoxList(np.zeros([0, 4], dtype=np.float32))]
+    (cls_targets, cls_weights, reg_targets, reg_weights,
+     match_results) = self.target_assigner.assign(self.anchors,
+                                                  groundtruth_boxlists)
+
+    # The IOU of the third anchor and the groundtruth box of the second image
+    # is 0.8.
+    self.assertAllEqual(match_results, [[0, 1, -1], [-1, -1, 0],
+                                        [-1, -1, -1]])
+    self.assertAllClose(cls_targets, [[[1], [1], [0]], [[0], [0], [1]],
+                                      [[0], [0], [0]]])
+    self.assertAllClose(cls_weights, np.ones([3, 3, 1]))
+    self.assertAllClose(reg_targets,
+                        [[[0, 0, 0, 0],
+                          [-0.1, 0.166667, -0.223144, 0.287682],
+                          [0, 0, 0, 0]],
+                         [[0, 0, 0, 0],
+                          [0, 0, 0, 0],
+                          [0, 0.1, 0, -0.223144]],
+                         np.zeros([3, 4])])
+    self.assertAllClose(reg_weights, [[1, 1, 0], [0, 0, 1], [0, 0, 0]])
+    self.assertEqual(cls_targets.dtype, np.float32)
+    self.assertEqual(reg_targets.dtype, np.float32)
+
+  def test_assign_with_labels_and_weights(self):
+    groundtruth_boxlists = [
+        np_box_list.BoxList(np.array([[0.0, 0.0, 0.5, 0.5],
+                                      [0.5, 0.5, 0.9, 0.9]],
+                                     dtype=np.float32)),
+        np_box_list.BoxList(np.array([[0.0, 0.2, 0.5, 0.7]],
+                                     dtype=np.float32))]
+    groundtruth_labels_list = [np.array([[0, 1, 0], [0, 0, 1]], np.float32),
+                               np.array([[0, 1, 0]], np.float32)]
+    groundtruth_weights_list = [np.array([1.0, 0.5]), np.array([1.0])]
+    (cls_targets, cls_weights, _, reg_weights,
+     match_results) = self.target_assigner.assign(
+         self.anchors, groundtruth_boxlists, groundtruth_labels_list,
+         unmatched_class_label=np.array([1, 0, 0], np.float32),
+         groundtruth_weights_list=groundtruth_weights_list)
+
+    # The IOU of the first anchor and the groundtruth box of the second image
+    # is 0.43, between the unmatched and matched thresholds.
+    self.assertAllEqual(match_results, [[0, 1, -1], [-2, -1, -1]])
+    self.assertAllClose(cls_targets, [[[0, 1, 0], [0, 0, 1], [1, 0, 0]],
+                                      [[1, 0, 0], [1, 0, 0], [1, 0, 0]]])
+    self.assertAllClose(cls_weights, [[[1, 1, 1], [.5, .5, .5], [1, 1, 1]],
+                                      [[0, 0, 0], [1, 1, 1], [1, 1, 1]]])
+    self.assertAllClose(reg_weights, [[1, 0.5, 0], [0, 0, 0]])
+
+
+if __name__ == '__main__':
+  tf.test.main()
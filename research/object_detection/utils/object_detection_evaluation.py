@@ -23,6 +23,8 @@ It supports the following operations:
 3) Evaluate detection metrics on already inserted detection results.
 4) Write evaluation result into a pickle file for future processing or
    visualization.
+5) Merge the accumulated state of several evaluations, e.g. computed by
+   separate workers on disjoint shards of a dataset.
 
 Note: This module operates on numpy boxes and box lists.
 """
@@ -31,6 +33,7 @@ from abc import ABCMeta
 from abc import abstractmethod
 import collections
 import logging
+import pickle
 import unicodedata
 import numpy as np
 
@@ -616,6 +619,156 @@ class OpenImagesDetectionChallengeEvaluator(OpenImagesDetectionEvaluator):
     self._evaluatable_labels.clear()
 
 
+class PerClassDetectionAccumulator(object):
+  """Accumulates detection scores and tp/fp labels for each class.
+
+  Scores and labels are stored in preallocated numpy buffers that grow
+  geometrically, instead of lists of small per-image arrays. The entries of
+  each class are split into a prefix that is already sorted by descending score
+  and a tail of entries added since the last sort. Retrieving the sorted
+  entries only sorts the tail and merges it into the prefix, so evaluating
+  repeatedly while detections keep arriving does not re-sort everything.
+  """
+
+  def __init__(self, num_class, initial_capacity=256):
+    """Constructor.
+
+    Args:
+      num_class: Number of classes.
+      initial_capacity: Initial number of entries allocated for each class.
+
+    Raises:
+      ValueError: if initial_capacity is smaller than 1.
+    """
+    if initial_capacity < 1:
+      raise ValueError('initial_capacity must be positive.')
+    self.num_class = num_class
+    self._scores = [np.empty(initial_capacity, dtype=float)
+                    for _ in range(num_class)]
+    self._tp_fp_labels = [np.empty(initial_capacity, dtype=float)
+                          for _ in range(num_class)]
+    self._num_entries = np.zeros(num_class, dtype=np.int64)
+    self._num_sorted = np.zeros(num_class, dtype=np.int64)
+
+  def num_entries(self, class_index):
+    """Returns the number of entries accumulated for a class."""
+    return int(self._num_entries[class_index])
+
+  def _reserve(self, class_index, num_new_entries):
+    """Grows the buffers of a class to hold num_new_entries more entries."""
+    required = self._num_entries[class_index] + num_new_entries
+    capacity = self._scores[class_index].shape[0]
+    if required <= capacity:
+      return
+    while capacity < required:
+      capacity *= 2
+    num_entries = self._num_entries[class_index]
+    for buffers in (self._scores, self._tp_fp_labels):
+      resized = np.empty(capacity, dtype=float)
+      resized[:num_entries] = buffers[class_index][:num_entries]
+      buffers[class_index] = resized
+
+  def add(self, class_index, scores, tp_fp_labels):
+    """Appends scores and tp/fp labels for a class.
+
+    Args:
+      class_index: 0-indexed class of the entries.
+      scores: A float numpy array of detection scores.
+      tp_fp_labels: A boolean or float numpy array of the same length as scores
+        holding the (weighted) true/false positive labels.
+
+    Raises:
+      ValueError: if scores and tp_fp_labels differ in length.
+    """
+    if len(scores) != len(tp_fp_labels):
+      raise ValueError('scores and tp_fp_labels must be of the same size.')
+    num_new_entries = len(scores)
+    if not num_new_entries:
+      return
+    self._reserve(class_index, num_new_entries)
+    start = self._num_entries[class_index]
+    end = start + num_new_entries
+    self._scores[class_index][start:end] = scores
+    self._tp_fp_labels[class_index][start:end] = tp_fp_labels
+    self._num_entries[class_index] = end
+
+  def _sort(self, class_index):
+    """Merges the unsorted tail of a class into its sorted prefix."""
+    num_sorted = self._num_sorted[class_index]
+    num_entries = self._num_entries[class_index]
+    if num_sorted == num_entries:
+      return
+    scores = self._scores[class_index]
+    tp_fp_labels = self._tp_fp_labels[class_index]
+    tail_order = np.argsort(-scores[num_sorted:num_entries], kind='mergesort')
+    tail_scores = scores[num_sorted:num_entries][tail_order]
+    tail_tp_fp_labels = tp_fp_labels[num_sorted:num_entries][tail_order]
+    # Entries of the tail are placed after sorted entries with the same score,
+    # which keeps ties in insertion order.
+    insert_indices = np.searchsorted(
+        -scores[:num_sorted], -tail_scores, side='right')
+    scores[:num_entries] = np.insert(
+        scores[:num_sorted], insert_indices, tail_scores)
+    tp_fp_labels[:num_entries] = np.insert(
+        tp_fp_labels[:num_sorted], insert_indices, tail_tp_fp_labels)
+    self._num_sorted[class_index] = num_entries
+
+  def get(self, class_index):
+    """Returns the entries of a class sorted by descending score.
+
+    Args:
+      class_index: 0-indexed class.
+
+    Returns:
+      scores: A read-only float numpy array of scores.
+      tp_fp_labels: A read-only float numpy array of tp/fp labels aligned with
+        scores.
+    """
+    self._sort(class_index)
+    num_entries = self._num_entries[class_index]
+    scores = self._scores[class_index][:num_entries]
+    tp_fp_labels = self._tp_fp_labels[class_index][:num_entries]
+    scores.flags.writeable = False
+    tp_fp_labels.flags.writeable = False
+    return scores, tp_fp_labels
+
+  def merge(self, other):
+    """Adds all entries accumulated by another accumulator.
+
+    Args:
+      other: A PerClassDetectionAccumulator with the same number of classes.
+
+    Raises:
+      ValueError: if the number of classes differs.
+    """
+    if other.num_class != self.num_class:
+      raise ValueError('Cannot merge accumulators with different number of '
+                       'classes: %d vs %d' % (self.num_class, other.num_class))
+    for class_index in range(self.num_class):
+      scores, tp_fp_labels = other.get(class_index)
+      self.add(class_index, scores, tp_fp_labels)
+
+  def state(self):
+    """Returns the sorted entries of all classes as a picklable dict."""
+    state = {'num_class': self.num_class, 'scores': [], 'tp_fp_labels': []}
+    for class_index in range(self.num_class):
+      scores, tp_fp_labels = self.get(class_index)
+      state['scores'].append(np.array(scores))
+      state['tp_fp_labels'].append(np.array(tp_fp_labels))
+    return state
+
+  @classmethod
+  def from_state(cls, state):
+    """Creates an accumulator from a dict returned by `state`."""
+    accumulator = cls(state['num_class'])
+    for class_index in range(accumulator.num_class):
+      accumulator.add(class_index, state['scores'][class_index],
+                      state['tp_fp_labels'][class_index])
+    # The serialized entries are already sorted.
+    accumulator._num_sorted[:] = accumulator._num_entries
+    return accumulator
+
+
 ObjectDetectionEvalMetrics = collections.namedtuple(
     'ObjectDetectionEvalMetrics', [
         'average_precisions', 'mean_ap', 'precisions', 'recalls', 'corlocs',
@@ -687,8 +840,7 @@ class ObjectDetectionEvaluation(object):
   def _initialize_detections(self):
     """Initializes internal data structures."""
     self.detection_keys = set()
-    self.scores_per_class = [[] for _ in range(self.num_class)]
-    self.tp_fp_labels_per_class = [[] for _ in range(self.num_class)]
+    self.detection_accumulator = PerClassDetectionAccumulator(self.num_class)
     self.num_images_correctly_detected_per_class = np.zeros(self.num_class)
     self.average_precision_per_class = np.empty(self.num_class, dtype=float)
     self.average_precision_per_class.fill(np.nan)
@@ -697,6 +849,24 @@ class ObjectDetectionEvaluation(object):
 
     self.corloc_per_class = np.ones(self.num_class, dtype=float)
 
+  @property
+  def scores_per_class(self):
+    """List with the accumulated detection scores of each class.
+
+    Each element is a list holding a single array of scores sorted by
+    descending score, or an empty list if the class has no detections.
+    """
+    return [[self.detection_accumulator.get(class_index)[0]]
+            if self.detection_accumulator.num_entries(class_index) else []
+            for class_index in range(self.num_class)]
+
+  @property
+  def tp_fp_labels_per_class(self):
+    """List with the accumulated tp/fp labels, aligned with scores_per_class."""
+    return [[self.detection_accumulator.get(class_index)[1]]
+            if self.detection_accumulator.num_entries(class_index) else []
+            for class_index in range(self.num_class)]
+
   def clear_detections(self):
     self._initialize_detections()
 
@@ -821,8 +991,7 @@ class ObjectDetectionEvaluation(object):
 
     for i in range(self.num_class):
       if scores[i].shape[0] > 0:
-        self.scores_per_class[i].append(scores[i])
-        self.tp_fp_labels_per_class[i].append(tp_fp_labels[i])
+        self.detection_accumulator.add(i, scores[i], tp_fp_labels[i])
     (self.num_images_correctly_detected_per_class
     ) += is_class_correctly_detected_in_image
 
@@ -876,25 +1045,19 @@ class ObjectDetectionEvaluation(object):
           self.label_id_offset)
 
     if self.use_weighted_mean_ap:
-      all_scores = np.array([], dtype=float)
-      all_tp_fp_labels = np.array([], dtype=bool)
+      all_detections = PerClassDetectionAccumulator(1)
     for class_index in range(self.num_class):
       if self.num_gt_instances_per_class[class_index] == 0:
         continue
-      if not self.scores_per_class[class_index]:
-        scores = np.array([], dtype=float)
-        tp_fp_labels = np.array([], dtype=float)
-      else:
-        scores = np.concatenate(self.scores_per_class[class_index])
-        tp_fp_labels = np.concatenate(self.tp_fp_labels_per_class[class_index])
+      scores, tp_fp_labels = self.detection_accumulator.get(class_index)
       if self.use_weighted_mean_ap:
-        all_scores = np.append(all_scores, scores)
-        all_tp_fp_labels = np.append(all_tp_fp_labels, tp_fp_labels)
+        all_detections.add(0, scores, tp_fp_labels)
       logging.info('Scores and tpfp per class label: %d', class_index)
       logging.info(tp_fp_labels)
       logging.info(scores)
       precision, recall = metrics.compute_precision_recall(
-          scores, tp_fp_labels, self.num_gt_instances_per_class[class_index])
+          scores, tp_fp_labels, self.num_gt_instances_per_class[class_index],
+          presorted=True)
       self.precisions_per_class[class_index] = precision
       self.recalls_per_class[class_index] = recall
       average_precision = metrics.compute_average_precision(precision, recall)
@@ -906,8 +1069,9 @@ class ObjectDetectionEvaluation(object):
 
     if self.use_weighted_mean_ap:
       num_gt_instances = np.sum(self.num_gt_instances_per_class)
+      all_scores, all_tp_fp_labels = all_detections.get(0)
       precision, recall = metrics.compute_precision_recall(
-          all_scores, all_tp_fp_labels, num_gt_instances)
+          all_scores, all_tp_fp_labels, num_gt_instances, presorted=True)
       mean_ap = metrics.compute_average_precision(precision, recall)
     else:
       mean_ap = np.nanmean(self.average_precision_per_class)
@@ -915,3 +1079,91 @@ class ObjectDetectionEvaluation(object):
     return ObjectDetectionEvalMetrics(
         self.average_precision_per_class, mean_ap, self.precisions_per_class,
         self.recalls_per_class, self.corloc_per_class, mean_corloc)
+
+  def merge(self, other):
+    """Merges the state of another evaluation into this one.
+
+    This allows evaluating disjoint shards of a dataset separately (e.g. in
+    different worker processes) and computing metrics over all of them. The
+    images of both evaluations are expected to be disjoint.
+
+    Args:
+      other: An ObjectDetectionEvaluation with the same number of classes.
+
+    Raises:
+      ValueError: if the number of classes differs.
+    """
+    if other.num_class != self.num_class:
+      raise ValueError('Cannot merge evaluations with different number of '
+                       'classes: %d vs %d' % (self.num_class, other.num_class))
+    overlapping_keys = self.detection_keys & other.detection_keys
+    if overlapping_keys:
+      logging.warn('%d images have detections in both evaluations.',
+                   len(overlapping_keys))
+    for image_key in other.groundtruth_boxes:
+      if image_key in self.groundtruth_boxes:
+        logging.warn(
+            'image %s has already been added to the ground truth database.',
+            image_key)
+        continue
+      self.groundtruth_boxes[image_key] = other.groundtruth_boxes[image_key]
+      self.groundtruth_class_labels[image_key] = (
+          other.groundtruth_class_labels[image_key])
+      self.groundtruth_is_difficult_list[image_key] = (
+          other.groundtruth_is_difficult_list[image_key])
+      self.groundtruth_is_group_of_list[image_key] = (
+          other.groundtruth_is_group_of_list[image_key])
+      if image_key in other.groundtruth_masks:
+        self.groundtruth_masks[image_key] = other.groundtruth_masks[image_key]
+    self.num_gt_instances_per_class += other.num_gt_instances_per_class
+    self.num_gt_imgs_per_class += other.num_gt_imgs_per_class
+    self.num_images_correctly_detected_per_class += (
+        other.num_images_correctly_detected_per_class)
+    self.detection_keys |= other.detection_keys
+    self.detection_accumulator.merge(other.detection_accumulator)
+
+  def serialize(self):
+    """Serializes the state needed to compute metrics.
+
+    Groundtruth boxes of images are not serialized: only the per-class
+    groundtruth statistics and the detections that have already been matched
+    against groundtruth are. The result can be restored with `deserialize`.
+
+    Returns:
+      A string with the serialized state.
+    """
+    return pickle.dumps({
+        'num_gt_instances_per_class': self.num_gt_instances_per_class,
+        'num_gt_imgs_per_class': self.num_gt_imgs_per_class,
+        'num_images_correctly_detected_per_class':
+            self.num_images_correctly_detected_per_class,
+        'detection_keys': self.detection_keys,
+        'detections': self.detection_accumulator.state(),
+    }, protocol=2)
+
+  def deserialize(self, serialized):
+    """Replaces the accumulated state with a serialized one.
+
+    Args:
+      serialized: A string returned by `serialize`.
+
+    Raises:
+      ValueError: if the serialized state has a different number of classes.
+    """
+    state = pickle.loads(serialized)
+    if state['detections']['num_class'] != self.num_class:
+      raise ValueError('Serialized evaluation has %d classes, expected %d.' %
+                       (state['detections']['num_class'], self.num_class))
+    self.groundtruth_boxes = {}
+    self.groundtruth_class_labels = {}
+    self.groundtruth_masks = {}
+    self.groundtruth_is_difficult_list = {}
+    self.groundtruth_is_group_of_list = {}
+    self.num_gt_instances_per_class = state['num_gt_instances_per_class']
+    self.num_gt_imgs_per_class = state['num_gt_imgs_per_class']
+    self._initialize_detections()
+    self.num_images_correctly_detected_per_class = (
+        state['num_images_correctly_detected_per_class'])
+    self.detection_keys = state['detection_keys']
+    self.detection_accumulator = PerClassDetectionAccumulator.from_state(
+        state['detections'])
@@ -682,6 +682,66 @@ class ObjectDetectionEvaluationTest(tf.test.TestCase):
     self.assertAlmostEqual(expected_mean_ap, mean_ap)
     self.assertAlmostEqual(expected_mean_corloc, mean_corloc)
 
+  def test_merge_matches_single_evaluation(self):
+    other_eval = object_detection_evaluation.ObjectDetectionEvaluation(3)
+    other_eval.add_single_ground_truth_image_info(
+        'img4', np.array([[0, 0, 1, 1]], dtype=float), np.array([1], dtype=int))
+    other_eval.add_single_detected_image_info(
+        'img4', np.array([[0, 0, 1, 1]], dtype=float),
+        np.array([0.6], dtype=float), np.array([1], dtype=int))
+    restored_eval = object_detection_evaluation.ObjectDetectionEvaluation(3)
+    restored_eval.deserialize(other_eval.serialize())
+    self.od_eval.merge(restored_eval)
+
+    (average_precision_per_class, mean_ap, _, recalls_per_class, _,
+     _) = self.od_eval.evaluate()
+    expected_average_precision_per_class = np.array([1. / 6., 0.5, 0],
+                                                    dtype=float)
+    self.assertTrue(np.allclose(expected_average_precision_per_class,
+                                average_precision_per_class))
+    self.assertTrue(np.allclose(np.array([0.5], dtype=float),
+                                recalls_per_class[1]))
+    self.assertAlmostEqual(2. / 9., mean_ap)
+    self.assertEqual(set(['img2', 'img4']), self.od_eval.detection_keys)
+
+  def test_merge_raises_on_different_number_of_classes(self):
+    other_eval = object_detection_evaluation.ObjectDetectionEvaluation(2)
+    with self.assertRaises(ValueError):
+      self.od_eval.merge(other_eval)
+
+
+class PerClassDetectionAccumulatorTest(tf.test.TestCase):
+
+  def test_get_returns_entries_sorted_by_descending_score(self):
+    accumulator = object_detection_evaluation.PerClassDetectionAccumulator(
+        2, initial_capacity=1)
+    accumulator.add(0, np.array([0.5, 0.9]), np.array([True, False]))
+    scores, tp_fp_labels = accumulator.get(0)
+    self.assertAllClose([0.9, 0.5], scores)
+    self.assertAllClose([0, 1], tp_fp_labels)
+    accumulator.add(0, np.array([0.7, 0.1, 0.95]), np.array([1., 0., 1.]))
+    scores, tp_fp_labels = accumulator.get(0)
+    self.assertAllClose([0.95, 0.9, 0.7, 0.5, 0.1], scores)
+    self.assertAllClose([1, 0, 1, 1, 0], tp_fp_labels)
+    self.assertEqual(5, accumulator.num_entries(0))
+    self.assertEqual(0, accumulator.num_entries(1))
+
+  def test_merge_and_state_round_trip(self):
+    accumulator = object_detection_evaluation.PerClassDetectionAccumulator(2)
+    accumulator.add(1, np.array([0.2, 0.8]), np.array([0., 1.]))
+    other = object_detection_evaluation.PerClassDetectionAccumulator(2)
+    other.add(1, np.array([0.4]), np.array([1.]))
+    other.add(0, np.array([0.3]), np.array([0.]))
+    accumulator.merge(other)
+    restored = (
+        object_detection_evaluation.PerClassDetectionAccumulator.from_state(
+            accumulator.state()))
+    scores, tp_fp_labels = restored.get(1)
+    self.assertAllClose([0.8, 0.4, 0.2], scores)
+    self.assertAllClose([1, 1, 0], tp_fp_labels)
+    scores, _ = restored.get(0)
+    self.assertAllClose([0.3], scores)
+
 
 if __name__ == '__main__':
   tf.test.main()
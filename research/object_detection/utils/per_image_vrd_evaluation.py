@@ -112,45 +112,30 @@ class PerImageVRDEvaluation(object):
       result_mapping: A numpy array with shape [N,] with original index of each
           entry.
     """
-    unique_gt_tuples = np.unique(
-        np.concatenate((groundtruth_class_tuples, detected_class_tuples)))
-    result_scores = []
-    result_tp_fp_labels = []
-    result_mapping = []
-
-    for unique_tuple in unique_gt_tuples:
-      detections_selector = (detected_class_tuples == unique_tuple)
-      gt_selector = (groundtruth_class_tuples == unique_tuple)
-
-      selector_mapping = np.where(detections_selector)[0]
-
-      detection_scores_per_tuple = detected_scores[detections_selector]
-      detection_box_per_tuple = detected_box_tuples[detections_selector]
-
-      sorted_indices = np.argsort(detection_scores_per_tuple)
-      sorted_indices = sorted_indices[::-1]
-
-      tp_fp_labels = self._compute_tp_fp_for_single_class(
-          detected_box_tuples=detection_box_per_tuple[sorted_indices],
-          groundtruth_box_tuples=groundtruth_box_tuples[gt_selector])
-      result_scores.append(detection_scores_per_tuple[sorted_indices])
-      result_tp_fp_labels.append(tp_fp_labels)
-      result_mapping.append(selector_mapping[sorted_indices])
-
-    if result_scores:
-      result_scores = np.concatenate(result_scores)
-      result_tp_fp_labels = np.concatenate(result_tp_fp_labels)
-      result_mapping = np.concatenate(result_mapping)
-    else:
-      result_scores = np.array([], dtype=float)
-      result_tp_fp_labels = np.array([], dtype=bool)
-      result_mapping = np.array([], dtype=int)
-
-    sorted_indices = np.argsort(result_scores)
-    sorted_indices = sorted_indices[::-1]
-
-    return result_scores[sorted_indices], result_tp_fp_labels[
-        sorted_indices], result_mapping[sorted_indices]
+    num_detections = detected_box_tuples.shape[0]
+    # A stable sort keeps the detections with equal scores in a deterministic
+    # order.
+    sorted_indices = np.argsort(detected_scores, kind='mergesort')[::-1]
+    tp_fp_labels = np.zeros(num_detections, dtype=bool)
+    num_groundtruth_tuples = groundtruth_box_tuples.shape[0]
+    if num_detections and num_groundtruth_tuples:
+      # Class tuples are replaced by integer ids, so that all detections are
+      # matched at once against the groundtruth tuples of the same class tuple
+      # instead of looping over the class tuples.
+      _, class_tuple_ids = np.unique(
+          np.concatenate((groundtruth_class_tuples, detected_class_tuples)),
+          return_inverse=True)
+      groundtruth_class_tuple_ids = class_tuple_ids[:num_groundtruth_tuples]
+      detected_class_tuple_ids = class_tuple_ids[num_groundtruth_tuples:][
+          sorted_indices]
+      min_iou = self._get_overlaps_and_scores_relation_tuples(
+          detected_box_tuples[sorted_indices], groundtruth_box_tuples)
+      min_iou[detected_class_tuple_ids[:, np.newaxis] !=
+              groundtruth_class_tuple_ids] = -1.
+      tp_fp_labels = self._match_sorted_tuples(min_iou)
+
+    return (detected_scores[sorted_indices], tp_fp_labels,
+            sorted_indices.astype(int))
 
   def _get_overlaps_and_scores_relation_tuples(self, detected_box_tuples,
                                                groundtruth_box_tuples):
@@ -208,17 +193,32 @@ class PerImageVRDEvaluation(object):
     min_iou = self._get_overlaps_and_scores_relation_tuples(
         detected_box_tuples, groundtruth_box_tuples)
 
-    num_detected_tuples = detected_box_tuples.shape[0]
-    tp_fp_labels = np.zeros(num_detected_tuples, dtype=bool)
+    return self._match_sorted_tuples(min_iou)
+
+  def _match_sorted_tuples(self, min_iou):
+    """Matches detection tuples sorted by score to groundtruth tuples.
+
+    A detection tuple is a true positive if the groundtruth tuple it overlaps
+    most has an IOU above the matching threshold and is not matched by a
+    detection tuple with a higher score.
+
+    Args:
+      min_iou: A float numpy array of shape [N, M] with the IOU of the detected
+          and groundtruth tuples, the detected tuples being sorted by score.
 
+    Returns:
+      tp_fp_labels: a boolean numpy array indicating whether a detection is a
+          true positive.
+    """
+    num_detected_tuples = min_iou.shape[0]
+    tp_fp_labels = np.zeros(num_detected_tuples, dtype=bool)
     if min_iou.shape[1] > 0:
       max_overlap_gt_ids = np.argmax(min_iou, axis=1)
-      is_gt_tuple_detected = np.zeros(min_iou.shape[1], dtype=bool)
-      for i in range(num_detected_tuples):
-        gt_id = max_overlap_gt_ids[i]
-        if min_iou[i, gt_id] >= self.matching_iou_threshold:
-          if not is_gt_tuple_detected[gt_id]:
-            tp_fp_labels[i] = True
-            is_gt_tuple_detected[gt_id] = True
+      max_overlaps = min_iou[np.arange(num_detected_tuples), max_overlap_gt_ids]
+      candidate_ids = np.where(max_overlaps >= self.matching_iou_threshold)[0]
+      # Only the first candidate of each groundtruth tuple is a true positive.
+      _, first_candidate_ids = np.unique(max_overlap_gt_ids[candidate_ids],
+                                         return_index=True)
+      tp_fp_labels[candidate_ids[first_candidate_ids]] = True
 
     return tp_fp_labels
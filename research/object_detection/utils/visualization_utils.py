@@ -39,6 +39,8 @@ from object_detection.core import standard_fields as fields
 
 _TITLE_LEFT_MARGIN = 10
 _TITLE_TOP_MARGIN = 10
+# Maximum number of rendered display strings kept by the fast renderer.
+_MAX_CACHED_TEXT_BITMAPS = 10000
 STANDARD_COLORS = [
     'AliceBlue', 'Chartreuse', 'Aqua', 'Aquamarine', 'Azure', 'Beige', 'Bisque',
     'BlanchedAlmond', 'BlueViolet', 'BurlyWood', 'CadetBlue', 'AntiqueWhite',
@@ -130,6 +132,55 @@ def draw_bounding_box_on_image_array(image,
   np.copyto(image, np.array(image_pil))
 
 
+_font = None
+_text_bitmaps = {}
+_rgb_colors = {}
+
+
+def _get_font():
+  """Returns the font used for display strings, loading it on first use."""
+  global _font
+  if _font is None:
+    try:
+      _font = ImageFont.truetype('arial.ttf', 24)
+    except IOError:
+      _font = ImageFont.load_default()
+  return _font
+
+
+def _get_rgb(color):
+  """Returns the RGB tuple of a color name, caching the conversion."""
+  rgb = _rgb_colors.get(color)
+  if rgb is None:
+    rgb = _rgb_colors[color] = ImageColor.getrgb(color)
+  return rgb
+
+
+def _get_text_bitmap(display_str):
+  """Returns the coverage of a rendered display string.
+
+  The string is rendered with the display font once, and later calls reuse the
+  bitmap.
+
+  Args:
+    display_str: a string.
+
+  Returns:
+    uint8 numpy array with shape [text_height, text_width], the coverage of
+    each pixel by the glyphs of the string.
+  """
+  bitmap = _text_bitmaps.get(display_str)
+  if bitmap is None:
+    font = _get_font()
+    text_image = Image.new('L', font.getsize(display_str), 0)
+    ImageDraw.Draw(text_image).text((0, 0), display_str, fill=255, font=font)
+    bitmap = np.array(text_image)
+    if len(_text_bitmaps) >= _MAX_CACHED_TEXT_BITMAPS:
+      _text_bitmaps.clear()
+    _text_bitmaps[display_str] = bitmap
+  return bitmap
+
+
 def draw_bounding_box_on_image(image,
                                ymin,
                                xmin,
@@ -172,10 +223,7 @@ def draw_bounding_box_on_image(image,
     (left, right, top, bottom) = (xmin, xmax, ymin, ymax)
   draw.line([(left, top), (left, bottom), (right, bottom),
              (right, top), (left, top)], width=thickness, fill=color)
-  try:
-    font = ImageFont.truetype('arial.ttf', 24)
-  except IOError:
-    font = ImageFont.load_default()
+  font = _get_font()
 
   # If the total height of the display strings added to the top of the bounding
   # box exceeds the top of the image, stack the strings below the bounding box
@@ -267,14 +315,22 @@ def draw_bounding_boxes_on_image(image,
                                boxes[i, 3], color, thickness, display_str_list)
 
 
-def _visualize_boxes(image, boxes, classes, scores, category_index, **kwargs):
-  return visualize_boxes_and_labels_on_image_array(
+def _get_visualize_fn(use_fast_renderer):
+  if use_fast_renderer:
+    return render_boxes_and_labels_on_image_array
+  return visualize_boxes_and_labels_on_image_array
+
+
+def _visualize_boxes(image, boxes, classes, scores, category_index,
+                     use_fast_renderer=False, **kwargs):
+  return _get_visualize_fn(use_fast_renderer)(
       image, boxes, classes, scores, category_index=category_index, **kwargs)
 
 
 def _visualize_boxes_and_masks(image, boxes, classes, scores, masks,
-                               category_index, **kwargs):
-  return visualize_boxes_and_labels_on_image_array(
+                               category_index, use_fast_renderer=False,
+                               **kwargs):
+  return _get_visualize_fn(use_fast_renderer)(
       image,
       boxes,
       classes,
@@ -285,8 +341,9 @@ def _visualize_boxes_and_masks(image, boxes, classes, scores, masks,
 
 
 def _visualize_boxes_and_keypoints(image, boxes, classes, scores, keypoints,
-                                   category_index, **kwargs):
-  return visualize_boxes_and_labels_on_image_array(
+                                   category_index, use_fast_renderer=False,
+                                   **kwargs):
+  return _get_visualize_fn(use_fast_renderer)(
       image,
       boxes,
       classes,
@@ -297,8 +354,9 @@ def _visualize_boxes_and_keypoints(image, boxes, classes, scores, keypoints,
 
 
 def _visualize_boxes_and_masks_and_keypoints(
-    image, boxes, classes, scores, masks, keypoints, category_index, **kwargs):
-  return visualize_boxes_and_labels_on_image_array(
+    image, boxes, classes, scores, masks, keypoints, category_index,
+    use_fast_renderer=False, **kwargs):
+  return _get_visualize_fn(use_fast_renderer)(
       image,
       boxes,
       classes,
@@ -318,7 +376,8 @@ def draw_bounding_boxes_on_image_tensors(images,
                                          keypoints=None,
                                          max_boxes_to_draw=20,
                                          min_score_thresh=0.2,
-                                         use_normalized_coordinates=True):
+                                         use_normalized_coordinates=True,
+                                         use_fast_renderer=False):
   """Draws bounding boxes, masks, and keypoints on batch of image tensors.
 
   Args:
@@ -339,6 +398,9 @@ def draw_bounding_boxes_on_image_tensors(images,
     use_normalized_coordinates: Whether to assume boxes and kepoints are in
       normalized coordinates (as opposed to absolute coordiantes).
       Default is True.
+    use_fast_renderer: Whether to draw with
+      render_boxes_and_labels_on_image_array instead of
+      visualize_boxes_and_labels_on_image_array. Default is False.
 
   Returns:
     4D image tensor of type uint8, with boxes drawn on top.
@@ -350,7 +412,8 @@ def draw_bounding_boxes_on_image_tensors(images,
       'max_boxes_to_draw': max_boxes_to_draw,
       'min_score_thresh': min_score_thresh,
       'agnostic_mode': False,
-      'line_thickness': 4
+      'line_thickness': 4,
+      'use_fast_renderer': use_fast_renderer
   }
 
   if instance_masks is not None and keypoints is None:
@@ -392,7 +455,8 @@ def draw_side_by_side_evaluation_image(eval_dict,
                                        category_index,
                                        max_boxes_to_draw=20,
                                        min_score_thresh=0.2,
-                                       use_normalized_coordinates=True):
+                                       use_normalized_coordinates=True,
+                                       use_fast_renderer=False):
   """Creates a side-by-side image with detections and groundtruth.
 
   Bounding boxes (and instance masks, if available) are visualized on both
@@ -407,6 +471,8 @@ def draw_side_by_side_evaluation_image(eval_dict,
     use_normalized_coordinates: Whether to assume boxes and kepoints are in
       normalized coordinates (as opposed to absolute coordiantes).
       Default is True.
+    use_fast_renderer: Whether to draw with
+      render_boxes_and_labels_on_image_array. Default is False.
 
   Returns:
     A [1, H, 2 * W, C] uint8 tensor. The subimage on the left corresponds to
@@ -439,7 +505,8 @@ def draw_side_by_side_evaluation_image(eval_dict,
       keypoints=keypoints,
       max_boxes_to_draw=max_boxes_to_draw,
       min_score_thresh=min_score_thresh,
-      use_normalized_coordinates=use_normalized_coordinates)
+      use_normalized_coordinates=use_normalized_coordinates,
+      use_fast_renderer=use_fast_renderer)
   images_with_groundtruth = draw_bounding_boxes_on_image_tensors(
       eval_dict[input_data_fields.original_image],
       tf.expand_dims(eval_dict[input_data_fields.groundtruth_boxes], axis=0),
@@ -454,7 +521,8 @@ def draw_side_by_side_evaluation_image(eval_dict,
       keypoints=None,
       max_boxes_to_draw=None,
       min_score_thresh=0.0,
-      use_normalized_coordinates=use_normalized_coordinates)
+      use_normalized_coordinates=use_normalized_coordinates,
+      use_fast_renderer=use_fast_renderer)
   return tf.concat([images_with_detections, images_with_groundtruth], axis=2)
 
 
@@ -540,6 +608,68 @@ def draw_mask_on_image_array(image, mask, color='red', alpha=0.4):
   np.copyto(image, np.array(pil_image.convert('RGB')))
 
 
+def _group_boxes_to_draw(boxes, classes, scores, category_index,
+                         instance_masks, instance_boundaries, keypoints,
+                         max_boxes_to_draw, min_score_thresh, agnostic_mode,
+                         groundtruth_box_visualization_color, skip_scores,
+                         skip_labels):
+  """Groups the boxes to draw by location.
+
+  See visualize_boxes_and_labels_on_image_array for a description of the
+  arguments.
+
+  Returns:
+    box_to_display_str_map: dict from box to its list of display strings.
+    box_to_color_map: dict from box to its color. Its keys are the boxes to
+      draw.
+    box_to_instance_masks_map: dict from box to its instance mask.
+    box_to_instance_boundaries_map: dict from box to its instance boundary.
+    box_to_keypoints_map: dict from box to its list of keypoints.
+  """
+  # Create a display string (and color) for every box location, group any boxes
+  # that correspond to the same location.
+  box_to_display_str_map = collections.defaultdict(list)
+  box_to_color_map = collections.defaultdict(str)
+  box_to_instance_masks_map = {}
+  box_to_instance_boundaries_map = {}
+  box_to_keypoints_map = collections.defaultdict(list)
+  if not max_boxes_to_draw:
+    max_boxes_to_draw = boxes.shape[0]
+  for i in range(min(max_boxes_to_draw, boxes.shape[0])):
+    if scores is None or scores[i] > min_score_thresh:
+      box = tuple(boxes[i].tolist())
+      if instance_masks is not None:
+        box_to_instance_masks_map[box] = instance_masks[i]
+      if instance_boundaries is not None:
+        box_to_instance_boundaries_map[box] = instance_boundaries[i]
+      if keypoints is not None:
+        box_to_keypoints_map[box].extend(keypoints[i])
+      if scores is None:
+        box_to_color_map[box] = groundtruth_box_visualization_color
+      else:
+        display_str = ''
+        if not skip_labels:
+          if not agnostic_mode:
+            if classes[i] in category_index.keys():
+              class_name = category_index[classes[i]]['name']
+            else:
+              class_name = 'N/A'
+            display_str = str(class_name)
+        if not skip_scores:
+          if not display_str:
+            display_str = '{}%'.format(int(100*scores[i]))
+          else:
+            display_str = '{}: {}%'.format(display_str, int(100*scores[i]))
+        box_to_display_str_map[box].append(display_str)
+        if agnostic_mode:
+          box_to_color_map[box] = 'DarkOrange'
+        else:
+          box_to_color_map[box] = STANDARD_COLORS[
+              classes[i] % len(STANDARD_COLORS)]
+  return (box_to_display_str_map, box_to_color_map, box_to_instance_masks_map,
+          box_to_instance_boundaries_map, box_to_keypoints_map)
+
+
 def visualize_boxes_and_labels_on_image_array(
     image,
     boxes,
@@ -597,46 +727,12 @@ def visualize_boxes_and_labels_on_image_array(
   Returns:
     uint8 numpy array with shape (img_height, img_width, 3) with overlaid boxes.
   """
-  # Create a display string (and color) for every box location, group any boxes
-  # that correspond to the same location.
-  box_to_display_str_map = collections.defaultdict(list)
-  box_to_color_map = collections.defaultdict(str)
-  box_to_instance_masks_map = {}
-  box_to_instance_boundaries_map = {}
-  box_to_keypoints_map = collections.defaultdict(list)
-  if not max_boxes_to_draw:
-    max_boxes_to_draw = boxes.shape[0]
-  for i in range(min(max_boxes_to_draw, boxes.shape[0])):
-    if scores is None or scores[i] > min_score_thresh:
-      box = tuple(boxes[i].tolist())
-      if instance_masks is not None:
-        box_to_instance_masks_map[box] = instance_masks[i]
-      if instance_boundaries is not None:
-        box_to_instance_boundaries_map[box] = instance_boundaries[i]
-      if keypoints is not None:
-        box_to_keypoints_map[box].extend(keypoints[i])
-      if scores is None:
-        box_to_color_map[box] = groundtruth_box_visualization_color
-      else:
-        display_str = ''
-        if not skip_labels:
-          if not agnostic_mode:
-            if classes[i] in category_index.keys():
-              class_name = category_index[classes[i]]['name']
-            else:
-              class_name = 'N/A'
-            display_str = str(class_name)
-        if not skip_scores:
-          if not display_str:
-            display_str = '{}%'.format(int(100*scores[i]))
-          else:
-            display_str = '{}: {}%'.format(display_str, int(100*scores[i]))
-        box_to_display_str_map[box].append(display_str)
-        if agnostic_mode:
-          box_to_color_map[box] = 'DarkOrange'
-        else:
-          box_to_color_map[box] = STANDARD_COLORS[
-              classes[i] % len(STANDARD_COLORS)]
+  (box_to_display_str_map, box_to_color_map, box_to_instance_masks_map,
+   box_to_instance_boundaries_map, box_to_keypoints_map) = _group_boxes_to_draw(
+       boxes, classes, scores, category_index, instance_masks,
+       instance_boundaries, keypoints, max_boxes_to_draw, min_score_thresh,
+       agnostic_mode, groundtruth_box_visualization_color, skip_scores,
+       skip_labels)
 
   # Draw all boxes onto image.
   for box, color in box_to_color_map.items():
@@ -675,6 +771,181 @@ def visualize_boxes_and_labels_on_image_array(
   return image
 
 
+def _fill_rectangle(image, top, left, bottom, right, rgb):
+  """Fills the pixels of image in [top, bottom) x [left, right) with rgb."""
+  height, width = image.shape[:2]
+  top, bottom = max(int(top), 0), min(int(bottom), height)
+  left, right = max(int(left), 0), min(int(right), width)
+  if top < bottom and left < right:
+    image[top:bottom, left:right] = rgb
+
+
+def _blend_bitmap(image, bitmap, top, left, rgb):
+  """Blends rgb into image with the coverage of bitmap at (top, left)."""
+  height, width = image.shape[:2]
+  top, left = int(top), int(left)
+  bitmap_top, bitmap_left = max(-top, 0), max(-left, 0)
+  bottom = min(top + bitmap.shape[0], height)
+  right = min(left + bitmap.shape[1], width)
+  top, left = max(top, 0), max(left, 0)
+  if top >= bottom or left >= right:
+    return
+  alpha = bitmap[bitmap_top:bitmap_top + bottom - top,
+                 bitmap_left:bitmap_left + right - left, np.newaxis]
+  alpha = alpha.astype(np.int32)
+  region = image[top:bottom, left:right].astype(np.int32)
+  image[top:bottom, left:right] = (
+      (np.array(rgb) * alpha + region * (255 - alpha) + 127) // 255)
+
+
+def render_boxes_and_labels_on_image_array(
+    image,
+    boxes,
+    classes,
+    scores,
+    category_index,
+    instance_masks=None,
+    instance_boundaries=None,
+    keypoints=None,
+    use_normalized_coordinates=False,
+    max_boxes_to_draw=20,
+    min_score_thresh=.5,
+    agnostic_mode=False,
+    line_thickness=4,
+    groundtruth_box_visualization_color='black',
+    skip_scores=False,
+    skip_labels=False):
+  """Draws labeled boxes on an image directly in its numpy buffer.
+
+  Produces the same visualization as visualize_boxes_and_labels_on_image_array,
+  up to a few pixels at box corners and keypoints, but much faster: nothing is
+  converted to a PIL image. All masks, then all boxes and display strings, then
+  all keypoints are written into the image in place, so overlapping boxes may
+  be stacked differently. Display strings are rendered once and cached.
+
+  Args:
+    image: uint8 numpy array with shape (img_height, img_width, 3)
+    boxes: a numpy array of shape [N, 4]
+    classes: a numpy array of shape [N]. Note that class indices are 1-based,
+      and match the keys in the label map.
+    scores: a numpy array of shape [N] or None.  If scores=None, then
+      this function assumes that the boxes to be plotted are groundtruth
+      boxes and plot all boxes as black with no classes or scores.
+    category_index: a dict containing category dictionaries (each holding
+      category index `id` and category name `name`) keyed by category indices.
+    instance_masks: a numpy array of shape [N, image_height, image_width] with
+      values ranging between 0 and 1, can be None.
+    instance_boundaries: a numpy array of shape [N, image_height, image_width]
+      with values ranging between 0 and 1, can be None.
+    keypoints: a numpy array of shape [N, num_keypoints, 2], can
+      be None
+    use_normalized_coordinates: whether boxes is to be interpreted as
+      normalized coordinates or not.
+    max_boxes_to_draw: maximum number of boxes to visualize.  If None, draw
+      all boxes.
+    min_score_thresh: minimum score threshold for a box to be visualized
+    agnostic_mode: boolean (default: False) controlling whether to evaluate in
+      class-agnostic mode or not.  This mode will display scores but ignore
+      classes.
+    line_thickness: integer (default: 4) controlling line width of the boxes.
+    groundtruth_box_visualization_color: box color for visualizing groundtruth
+      boxes
+    skip_scores: whether to skip score when drawing a single detection
+    skip_labels: whether to skip label when drawing a single detection
+
+  Returns:
+    uint8 numpy array with shape (img_height, img_width, 3) with overlaid boxes.
+  """
+  (box_to_display_str_map, box_to_color_map, box_to_instance_masks_map,
+   box_to_instance_boundaries_map, box_to_keypoints_map) = _group_boxes_to_draw(
+       boxes, classes, scores, category_index, instance_masks,
+       instance_boundaries, keypoints, max_boxes_to_draw, min_score_thresh,
+       agnostic_mode, groundtruth_box_visualization_color, skip_scores,
+       skip_labels)
+  if not box_to_color_map:
+    return image
+  im_height, im_width = image.shape[:2]
+  draw_boxes = list(box_to_color_map.keys())
+  rgbs = np.array([_get_rgb(box_to_color_map[box]) for box in draw_boxes])
+
+  # Same blending as draw_mask_on_image_array with alpha 0.4, in uint16.
+  mask_alpha = int(255 * 0.4)
+  pixels = image.reshape([-1, 3])
+  for box, rgb in zip(draw_boxes, rgbs):
+    if instance_masks is not None:
+      indices = np.flatnonzero(box_to_instance_masks_map[box])
+      pixels[indices] = (
+          pixels[indices].astype(np.uint16) * (255 - mask_alpha) +
+          (rgb * mask_alpha + 127).astype(np.uint16)) // 255
+    if instance_boundaries is not None:
+      pixels[np.flatnonzero(box_to_instance_boundaries_map[box])] = _get_rgb(
+          'red')
+
+  box_coordinates = np.array(draw_boxes, dtype=np.float64).reshape([-1, 4])
+  if use_normalized_coordinates:
+    box_coordinates *= [im_height, im_width, im_height, im_width]
+  # Like the PIL polyline drawn by draw_bounding_box_on_image, box edges are
+  # centered on the box coordinates, and the left and bottom edges are shifted
+  # by one pixel.
+  half_thickness = line_thickness / 2.0
+  edge_starts = (np.floor(box_coordinates) - line_thickness // 2 +
+                 [0, 1, 1, 0])
+  edge_ends = edge_starts + line_thickness
+  for starts, ends, rgb in zip(edge_starts, edge_ends, rgbs):
+    _fill_rectangle(image, starts[0], starts[1], ends[0], ends[3], rgb)
+    _fill_rectangle(image, starts[2], starts[1], ends[2], ends[3], rgb)
+    _fill_rectangle(image, starts[0], starts[1], ends[2], ends[1], rgb)
+    _fill_rectangle(image, starts[0], starts[3], ends[2], ends[3], rgb)
+
+  for (top, left, bottom, right), box, rgb in zip(
+      box_coordinates, draw_boxes, rgbs):
+    # Same layout as draw_bounding_box_on_image.
+    bitmaps = [_get_text_bitmap(display_str)
+               for display_str in box_to_display_str_map[box]]
+    total_display_str_height = (1 + 2 * 0.05) * sum(
+        bitmap.shape[0] for bitmap in bitmaps)
+    if top > total_display_str_height:
+      text_bottom = top
+    else:
+      text_bottom = bottom + total_display_str_height
+    for bitmap in bitmaps[::-1]:
+      text_height, text_width = bitmap.shape
+      margin = np.ceil(0.05 * text_height)
+      _fill_rectangle(image, np.floor(text_bottom - text_height - 2 * margin),
+                      np.floor(left), np.floor(text_bottom) + 1,
+                      np.floor(left + text_width) + 1, rgb)
+      _blend_bitmap(image, bitmap,
+                    np.round(text_bottom - text_height - margin),
+                    np.round(left + margin), (0, 0, 0))
+      text_bottom -= text_height - 2 * margin
+
+  if keypoints is not None:
+    keypoint_coordinates = []
+    keypoint_rgbs = []
+    for box, rgb in zip(draw_boxes, rgbs):
+      box_keypoints = np.array(box_to_keypoints_map[box],
+                               dtype=np.float64).reshape([-1, 2])
+      keypoint_coordinates.append(box_keypoints)
+      keypoint_rgbs.append(np.tile(rgb, [len(box_keypoints), 1]))
+    keypoint_coordinates = np.concatenate(keypoint_coordinates)
+    keypoint_rgbs = np.concatenate(keypoint_rgbs)
+    if use_normalized_coordinates:
+      keypoint_coordinates *= [im_height, im_width]
+    # Draws disks of radius line_thickness / 2 with a single scatter.
+    radius = int(np.ceil(half_thickness))
+    offset_y, offset_x = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+    in_disk = offset_y ** 2 + offset_x ** 2 <= half_thickness ** 2
+    offset_y, offset_x = offset_y[in_disk], offset_x[in_disk]
+    centers = np.round(keypoint_coordinates).astype(np.int64)
+    ys = (centers[:, 0:1] + offset_y).ravel()
+    xs = (centers[:, 1:2] + offset_x).ravel()
+    colors = np.repeat(keypoint_rgbs, len(offset_y), axis=0)
+    inside = (ys >= 0) & (ys < im_height) & (xs >= 0) & (xs < im_width)
+    image[ys[inside], xs[inside]] = colors[inside]
+
+  return image
+
+
 def add_cdf_image_summary(values, name):
   """Adds a tf.summary.image for a CDF plot of the values.
 
@@ -752,7 +1023,8 @@ class EvalMetricOpsVisualization(object):
                max_boxes_to_draw=20,
                min_score_thresh=0.2,
                use_normalized_coordinates=True,
-               summary_name_prefix='evaluation_image'):
+               summary_name_prefix='evaluation_image',
+               use_fast_renderer=True):
     """Creates an EvalMetricOpsVisualization.
 
     Args:
@@ -764,6 +1036,9 @@ class EvalMetricOpsVisualization(object):
         normalized coordinates (as opposed to absolute coordiantes).
         Default is True.
       summary_name_prefix: A string prefix for each image summary.
+      use_fast_renderer: Whether to draw the images with
+        render_boxes_and_labels_on_image_array, which avoids PIL conversions
+        and is much faster. Default is True.
     """
 
     self._category_index = category_index
@@ -772,6 +1047,7 @@ class EvalMetricOpsVisualization(object):
     self._min_score_thresh = min_score_thresh
     self._use_normalized_coordinates = use_normalized_coordinates
     self._summary_name_prefix = summary_name_prefix
+    self._use_fast_renderer = use_fast_renderer
     self._images = []
 
   def clear(self):
@@ -872,14 +1148,16 @@ class VisualizeSingleFrameDetections(EvalMetricOpsVisualization):
                max_boxes_to_draw=20,
                min_score_thresh=0.2,
                use_normalized_coordinates=True,
-               summary_name_prefix='Detections_Left_Groundtruth_Right'):
+               summary_name_prefix='Detections_Left_Groundtruth_Right',
+               use_fast_renderer=True):
     super(VisualizeSingleFrameDetections, self).__init__(
         category_index=category_index,
         max_examples_to_draw=max_examples_to_draw,
         max_boxes_to_draw=max_boxes_to_draw,
         min_score_thresh=min_score_thresh,
         use_normalized_coordinates=use_normalized_coordinates,
-        summary_name_prefix=summary_name_prefix)
+        summary_name_prefix=summary_name_prefix,
+        use_fast_renderer=use_fast_renderer)
 
   def images_from_evaluation_dict(self, eval_dict):
     return [draw_side_by_side_evaluation_image(
@@ -887,4 +1165,5 @@ class VisualizeSingleFrameDetections(EvalMetricOpsVisualization):
         self._category_index,
         self._max_boxes_to_draw,
         self._min_score_thresh,
-        self._use_normalized_coordinates)]
+        self._use_normalized_coordinates,
+        self._use_fast_renderer)]
@@ -210,6 +210,40 @@ class VisualizationUtilsTest(tf.test.TestCase):
                                                  color='Blue', alpha=.5)
     self.assertAllEqual(test_image, expected_result)
 
+  def test_render_boxes_and_labels_on_image_array(self):
+    category_index = {1: {'id': 1, 'name': 'dog'}, 2: {'id': 2, 'name': 'cat'}}
+    boxes = np.array([[0.1, 0.1, 0.6, 0.5], [0.4, 0.3, 0.9, 0.9]])
+    classes = np.array([1, 2])
+    scores = np.array([0.9, 0.7])
+    masks = np.zeros([2, 200, 400], dtype=np.uint8)
+    masks[0, 40:100, 60:180] = 1
+    masks[1, 100:160, 140:320] = 1
+    keypoints = np.array([[[0.2, 0.2], [0.3, 0.3]], [[0.5, 0.5], [0.7, 0.8]]])
+    kwargs = {'instance_masks': masks, 'keypoints': keypoints,
+              'use_normalized_coordinates': True, 'min_score_thresh': 0.2}
+    expected_image = (
+        visualization_utils.visualize_boxes_and_labels_on_image_array(
+            self.create_colorful_test_image(), boxes, classes, scores,
+            category_index, **kwargs))
+    test_image = self.create_colorful_test_image()
+    rendered_image = (
+        visualization_utils.render_boxes_and_labels_on_image_array(
+            test_image, boxes, classes, scores, category_index, **kwargs))
+
+    self.assertIs(test_image, rendered_image)
+    # Only a few pixels at box corners and keypoints may differ.
+    different_pixels = np.any(
+        np.abs(rendered_image.astype(np.int32) - expected_image) > 2, axis=2)
+    self.assertLess(np.mean(different_pixels), 0.05)
+
+  def test_render_boxes_and_labels_on_image_array_without_boxes(self):
+    test_image = self.create_colorful_test_image()
+    rendered_image = (
+        visualization_utils.render_boxes_and_labels_on_image_array(
+            test_image.copy(), np.zeros([0, 4]), np.zeros([0], dtype=np.int64),
+            np.zeros([0]), {}))
+    self.assertAllEqual(test_image, rendered_image)
+
   def test_add_cdf_image_summary(self):
     values = [0.1, 0.2, 0.3, 0.4, 0.42, 0.44, 0.46, 0.48, 0.50]
     visualization_utils.add_cdf_image_summary(values, 'PositiveAnchorLoss')
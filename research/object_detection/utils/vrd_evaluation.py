@@ -20,7 +20,7 @@ metrics such as Precision, Recall, Recall@k, of the provided vrd detection
 results.
 It supports the following operations:
 1) Adding ground truth information of images sequentially.
-2) Adding detection results of images sequentially.
+2) Adding detection results of images sequentially or in parallel.
 3) Evaluating detection metrics on already inserted detection results.
 
 Note1: groundtruth should be inserted before evaluation.
@@ -30,6 +30,7 @@ Note2: This module operates on numpy boxes and box lists.
 from abc import abstractmethod
 import collections
 import logging
+import multiprocessing
 import numpy as np
 
 from object_detection.core import standard_fields
@@ -52,6 +53,41 @@ label_data_type = np.dtype([('subject', 'i4'), ('object', 'i4'), ('relation',
                                                                   'i4')])
 
 
+def _enclosing_box_tuples(box_tuples):
+  """Computes the enclosing box of all named boxes of each tuple.
+
+  Args:
+    box_tuples: A numpy array of structures with the shape [M, 1], each
+      structure containing the same number of named bounding boxes. Each box is
+      of the format [y_min, x_min, y_max, x_max].
+
+  Returns:
+    result: A numpy array of structures with the shape [M, 1] of
+      single_box_data_type, where the i-th box encloses all the boxes of the
+      i-th input structure.
+  """
+  boxes = np.stack([box_tuples[field] for field in box_tuples.dtype.names])
+  result = np.zeros(box_tuples.shape[0], dtype=single_box_data_type)
+  result['box'] = np.concatenate(
+      [np.min(boxes[..., :2], axis=0), np.max(boxes[..., 2:], axis=0)], axis=-1)
+  return result
+
+
+def _compute_detection_tp_fp(args):
+  """Labels the detections of a single image, in a worker process."""
+  matching_iou_threshold, detections, groundtruth = args
+  per_image_eval = per_image_vrd_evaluation.PerImageVRDEvaluation(
+      matching_iou_threshold=matching_iou_threshold)
+  detected_box_tuples, detected_scores, detected_class_tuples = detections
+  groundtruth_box_tuples, groundtruth_class_tuples = groundtruth
+  return per_image_eval.compute_detection_tp_fp(
+      detected_box_tuples=detected_box_tuples,
+      detected_scores=detected_scores,
+      detected_class_tuples=detected_class_tuples,
+      groundtruth_box_tuples=groundtruth_box_tuples,
+      groundtruth_class_tuples=groundtruth_class_tuples)
+
+
 class VRDDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
   """A class to evaluate VRD detections.
 
@@ -160,8 +196,8 @@ class VRDDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
     self._negative_labels[image_id] = np.setdiff1d(verified_labels,
                                                    groudtruth_positive_classes)
 
-  def add_single_detected_image_info(self, image_id, detections_dict):
-    """Adds detections for a single image to be used for evaluation.
+  def _select_detections(self, image_id, detections_dict):
+    """Selects the detections of an image with evaluatable labels.
 
     Args:
       image_id: A unique string/integer identifier for the image.
@@ -177,6 +213,13 @@ class VRDDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
           of structures shape [N, 1], representing the class labels of the
           corresponding bounding boxes and possibly additional classes (see
           datatype label_data_type above).
+
+    Returns:
+      detected_box_tuples: A numpy array of structures with the selected
+        detection boxes, pre-processed with _process_detection_boxes.
+      detected_scores: A float numpy array with the selected detection scores.
+      detected_class_tuples: A numpy array of structures with the selected
+        detection labels.
     """
     if image_id not in self._image_ids:
       logging.warn('No groundtruth for the image with id %s.', image_id)
@@ -203,13 +246,58 @@ class VRDDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
       selector &= np.isin(detection_class_tuples[field],
                           self._evaluatable_labels[image_id])
     selector |= negative_selector
+    return (self._process_detection_boxes(detection_box_tuples[selector]),
+            detections_dict[
+                standard_fields.DetectionResultFields.detection_scores][
+                    selector], detection_class_tuples[selector])
+
+  def add_single_detected_image_info(self, image_id, detections_dict):
+    """Adds detections for a single image to be used for evaluation.
+
+    Args:
+      image_id: A unique string/integer identifier for the image.
+      detections_dict: A dictionary containing -
+        standard_fields.DetectionResultFields.detection_boxes: A numpy array of
+          structures with shape [N, 1], representing N tuples, each tuple
+          containing the same number of named bounding boxes.
+          Each box is of the format [y_min, x_min, y_max, x_max] (as an example
+          see datatype vrd_box_data_type, single_box_data_type above).
+        standard_fields.DetectionResultFields.detection_scores: float32 numpy
+          array of shape [N] containing detection scores for the boxes.
+        standard_fields.DetectionResultFields.detection_classes: A numpy array
+          of structures shape [N, 1], representing the class labels of the
+          corresponding bounding boxes and possibly additional classes (see
+          datatype label_data_type above).
+    """
+    detected_box_tuples, detected_scores, detected_class_tuples = (
+        self._select_detections(image_id, detections_dict))
     self._evaluation.add_single_detected_image_info(
         image_key=image_id,
-        detected_box_tuples=self._process_detection_boxes(
-            detection_box_tuples[selector]),
-        detected_scores=detections_dict[
-            standard_fields.DetectionResultFields.detection_scores][selector],
-        detected_class_tuples=detection_class_tuples[selector])
+        detected_box_tuples=detected_box_tuples,
+        detected_scores=detected_scores,
+        detected_class_tuples=detected_class_tuples)
+
+  def add_detected_image_infos(self, image_ids_and_detections,
+                               num_workers=0):
+    """Adds detections for many images to be used for evaluation.
+
+    Equivalent to calling add_single_detected_image_info for each image, but
+    the detections of the images are labeled as true or false positives in
+    parallel.
+
+    Args:
+      image_ids_and_detections: An iterable of (image_id, detections_dict)
+        pairs, see add_single_detected_image_info.
+      num_workers: Number of worker processes labeling the detections. If 0,
+        the detections are labeled in this process.
+    """
+    image_ids = []
+    detections = []
+    for image_id, detections_dict in image_ids_and_detections:
+      image_ids.append(image_id)
+      detections.append(self._select_detections(image_id, detections_dict))
+    self._evaluation.add_detected_image_infos(image_ids, detections,
+                                              num_workers=num_workers)
 
   def evaluate(self, relationships=None):
     """Compute evaluation result.
@@ -352,21 +440,7 @@ class VRDPhraseDetectionEvaluator(VRDDetectionEvaluator):
         where the named bounding box is computed as an enclosing bounding box
         of all bounding boxes of the i-th input structure.
     """
-    first_box_key = groundtruth_box_tuples.dtype.fields.keys()[0]
-    miny = groundtruth_box_tuples[first_box_key][:, 0]
-    minx = groundtruth_box_tuples[first_box_key][:, 1]
-    maxy = groundtruth_box_tuples[first_box_key][:, 2]
-    maxx = groundtruth_box_tuples[first_box_key][:, 3]
-    for fields in groundtruth_box_tuples.dtype.fields:
-      miny = np.minimum(groundtruth_box_tuples[fields][:, 0], miny)
-      minx = np.minimum(groundtruth_box_tuples[fields][:, 1], minx)
-      maxy = np.maximum(groundtruth_box_tuples[fields][:, 2], maxy)
-      maxx = np.maximum(groundtruth_box_tuples[fields][:, 3], maxx)
-    data_result = []
-    for i in range(groundtruth_box_tuples.shape[0]):
-      data_result.append(([miny[i], minx[i], maxy[i], maxx[i]],))
-    result = np.array(data_result, dtype=[('box', 'f4', (4,))])
-    return result
+    return _enclosing_box_tuples(groundtruth_box_tuples)
 
   def _process_detection_boxes(self, detections_box_tuples):
     """Pre-processes boxes before adding them to the VRDDetectionEvaluation.
@@ -388,21 +462,7 @@ class VRDPhraseDetectionEvaluator(VRDDetectionEvaluator):
         where the named bounding box is computed as an enclosing bounding box
         of all bounding boxes of the i-th input structure.
     """
-    first_box_key = detections_box_tuples.dtype.fields.keys()[0]
-    miny = detections_box_tuples[first_box_key][:, 0]
-    minx = detections_box_tuples[first_box_key][:, 1]
-    maxy = detections_box_tuples[first_box_key][:, 2]
-    maxx = detections_box_tuples[first_box_key][:, 3]
-    for fields in detections_box_tuples.dtype.fields:
-      miny = np.minimum(detections_box_tuples[fields][:, 0], miny)
-      minx = np.minimum(detections_box_tuples[fields][:, 1], minx)
-      maxy = np.maximum(detections_box_tuples[fields][:, 2], maxy)
-      maxx = np.maximum(detections_box_tuples[fields][:, 3], maxx)
-    data_result = []
-    for i in range(detections_box_tuples.shape[0]):
-      data_result.append(([miny[i], minx[i], maxy[i], maxx[i]],))
-    result = np.array(data_result, dtype=[('box', 'f4', (4,))])
-    return result
+    return _enclosing_box_tuples(detections_box_tuples)
 
 
 VRDDetectionEvalMetrics = collections.namedtuple('VRDDetectionEvalMetrics', [
@@ -485,15 +545,8 @@ class _VRDDetectionEvaluation(object):
           representing the class labels of the corresponding bounding boxes and
           possibly additional classes.
     """
-    self._detection_keys.add(image_key)
-    if image_key in self._groundtruth_box_tuples:
-      groundtruth_box_tuples = self._groundtruth_box_tuples[image_key]
-      groundtruth_class_tuples = self._groundtruth_class_tuples[image_key]
-    else:
-      groundtruth_box_tuples = np.empty(
-          shape=[0, 4], dtype=detected_box_tuples.dtype)
-      groundtruth_class_tuples = np.array([], dtype=detected_class_tuples.dtype)
-
+    groundtruth_box_tuples, groundtruth_class_tuples = self._get_groundtruth(
+        image_key, detected_box_tuples, detected_class_tuples)
     scores, tp_fp_labels, mapping = (
         self._per_image_eval.compute_detection_tp_fp(
             detected_box_tuples=detected_box_tuples,
@@ -501,7 +554,57 @@ class _VRDDetectionEvaluation(object):
             detected_class_tuples=detected_class_tuples,
             groundtruth_box_tuples=groundtruth_box_tuples,
             groundtruth_class_tuples=groundtruth_class_tuples))
+    self._add_tp_fp_labels(image_key, detected_class_tuples, scores,
+                           tp_fp_labels, mapping)
+
+  def add_detected_image_infos(self, image_keys, detections, num_workers=0):
+    """Adds detections for many images to be used for evaluation.
 
+    Args:
+      image_keys: A list of unique string/integer identifiers for the images.
+      detections: A list with the same length as image_keys of
+          (detected_box_tuples, detected_scores, detected_class_tuples)
+          tuples, see add_single_detected_image_info.
+      num_workers: Number of worker processes labeling the detections as true
+          or false positives. If 0, the detections are labeled in this process.
+    """
+    if not num_workers:
+      for image_key, image_detections in zip(image_keys, detections):
+        self.add_single_detected_image_info(image_key, *image_detections)
+      return
+
+    def _tasks():
+      for image_key, image_detections in zip(image_keys, detections):
+        detected_box_tuples, _, detected_class_tuples = image_detections
+        yield (self._per_image_eval.matching_iou_threshold, image_detections,
+               self._get_groundtruth(image_key, detected_box_tuples,
+                                     detected_class_tuples))
+
+    pool = multiprocessing.Pool(num_workers)
+    try:
+      results = pool.imap(
+          _compute_detection_tp_fp, _tasks(),
+          chunksize=max(1, len(image_keys) // (4 * num_workers)))
+      for image_key, image_detections, result in zip(image_keys, detections,
+                                                      results):
+        self._add_tp_fp_labels(image_key, image_detections[2], *result)
+    finally:
+      pool.terminate()
+      pool.join()
+
+  def _get_groundtruth(self, image_key, detected_box_tuples,
+                       detected_class_tuples):
+    """Returns the groundtruth box and class tuples of an image."""
+    if image_key in self._groundtruth_box_tuples:
+      return (self._groundtruth_box_tuples[image_key],
+              self._groundtruth_class_tuples[image_key])
+    return (np.empty(shape=[0, 4], dtype=detected_box_tuples.dtype),
+            np.array([], dtype=detected_class_tuples.dtype))
+
+  def _add_tp_fp_labels(self, image_key, detected_class_tuples, scores,
+                        tp_fp_labels, mapping):
+    """Accumulates the labeled detections of an image."""
+    self._detection_keys.add(image_key)
     self._scores += [scores]
     self._tp_fp_labels += [tp_fp_labels]
     self._relation_field_values += [detected_class_tuples[mapping]['relation']]
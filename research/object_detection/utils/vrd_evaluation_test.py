@@ -253,5 +253,49 @@ class VRDDetectionEvaluationTest(tf.test.TestCase):
     self.assertAlmostEqual(expected_median_rank_100, metrics.median_rank_100)
 
 
+class VRDParallelDetectionEvaluatorTest(tf.test.TestCase):
+
+  def _evaluate(self, vrd_eval, num_workers):
+    random_state = np.random.RandomState(0)
+    image_ids_and_detections = []
+    for image_id in range(8):
+      centers = random_state.uniform(0, 1, size=(12, 2, 2))
+      boxes = np.concatenate([centers, centers + 0.3], axis=-1)
+      box_tuples = np.zeros(6, dtype=vrd_evaluation.vrd_box_data_type)
+      box_tuples['subject'] = boxes[:6, 0]
+      box_tuples['object'] = boxes[:6, 1]
+      class_tuples = np.zeros(6, dtype=vrd_evaluation.label_data_type)
+      class_tuples['subject'] = random_state.randint(1, 3, size=6)
+      class_tuples['object'] = random_state.randint(1, 3, size=6)
+      class_tuples['relation'] = random_state.randint(1, 3, size=6)
+      vrd_eval.add_single_ground_truth_image_info(
+          image_id, {
+              standard_fields.InputDataFields.groundtruth_boxes: box_tuples,
+              standard_fields.InputDataFields.groundtruth_classes: class_tuples,
+          })
+      detected_box_tuples = box_tuples.copy()
+      detected_box_tuples['subject'] = boxes[6:, 0]
+      image_ids_and_detections.append((image_id, {
+          standard_fields.DetectionResultFields.detection_boxes:
+              np.concatenate([box_tuples, detected_box_tuples]),
+          standard_fields.DetectionResultFields.detection_scores:
+              random_state.uniform(size=12),
+          standard_fields.DetectionResultFields.detection_classes:
+              np.concatenate([class_tuples, class_tuples]),
+      }))
+    vrd_eval.add_detected_image_infos(image_ids_and_detections,
+                                      num_workers=num_workers)
+    return vrd_eval.evaluate()
+
+  def test_parallel_evaluation_matches_sequential_evaluation(self):
+    for evaluator_class in [vrd_evaluation.VRDRelationDetectionEvaluator,
+                            vrd_evaluation.VRDPhraseDetectionEvaluator]:
+      metrics = self._evaluate(evaluator_class(), num_workers=0)
+      parallel_metrics = self._evaluate(evaluator_class(), num_workers=2)
+      self.assertItemsEqual(metrics.keys(), parallel_metrics.keys())
+      for key in metrics:
+        self.assertAlmostEqual(metrics[key], parallel_metrics[key])
+
+
 if __name__ == '__main__':
   tf.test.main()
@@ -0,0 +1,297 @@
+# Copyright 2017 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Measures the throughput of image classification networks on CPU.
+
+Each network of nets_factory.networks_map is benchmarked on synthetic images,
+preprocessed for evaluation with its preprocessing_factory preprocessing, in
+two modes:
+  forward: inference, the network built with is_training=False.
+  forward_backward: a training step, the network built with is_training=True,
+    with the loss, the gradients and the batch norm updates of
+    train_image_classifier.py. The learning rate is zero so that the weights
+    do not change.
+For every network, batch size and mode, the images per second, the latency
+percentiles of a batch, the number of parameters and the peak memory of the
+process are logged and written to a JSON table. Each benchmark runs in its own
+process, so that its peak memory is measured separately.
+
+Usage:
+```shell
+$ python benchmark_image_classifier.py \
+    --model_names=inception_v1,mobilenet_v1,resnet_v1_50 \
+    --batch_sizes=1,8,32 \
+    --output_path=/tmp/benchmark.json
+```
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from nets import nets_factory
+from preprocessing import preprocessing_factory
+
+slim = tf.contrib.slim
+
+MODES = ('forward', 'forward_backward')
+
+tf.app.flags.DEFINE_string(
+    'model_names', 'inception_v1,mobilenet_v1,resnet_v1_50',
+    'Comma separated list of the networks to benchmark, from '
+    'nets_factory.networks_map, or "all".')
+
+tf.app.flags.DEFINE_string(
+    'batch_sizes', '1,8,32', 'Comma separated list of the batch sizes.')
+
+tf.app.flags.DEFINE_string(
+    'modes', ','.join(MODES), 'Comma separated list of the modes, from %s.' %
+    ', '.join(MODES))
+
+tf.app.flags.DEFINE_integer(
+    'num_classes', 1001, 'The number of classes of the networks.')
+
+tf.app.flags.DEFINE_integer(
+    'image_size', None, 'Image size. Defaults to the default image size of '
+    'each network.')
+
+tf.app.flags.DEFINE_float(
+    'weight_decay', 0.00004, 'The weight decay on the model weights.')
+
+tf.app.flags.DEFINE_integer(
+    'num_batches', 20, 'The number of timed batches per benchmark.')
+
+tf.app.flags.DEFINE_integer(
+    'num_warmup_batches', 3,
+    'The number of untimed batches per benchmark, run first.')
+
+tf.app.flags.DEFINE_integer(
+    'num_intra_threads', 0,
+    'The number of threads of an op. 0 lets TensorFlow pick.')
+
+tf.app.flags.DEFINE_integer(
+    'num_inter_threads', 0,
+    'The number of ops run concurrently. 0 lets TensorFlow pick.')
+
+tf.app.flags.DEFINE_string(
+    'output_path', None,
+    'Optional path to the output JSON file. The results are logged in any '
+    'case.')
+
+FLAGS = tf.app.flags.FLAGS
+
+
+def _synthetic_images(model_name, batch_size, image_size):
+  """Returns a batch of preprocessed synthetic images, in a local variable."""
+  preprocessing_fn = preprocessing_factory.get_preprocessing(
+      model_name, is_training=False)
+  raw_image_size = max(256, image_size + 32)
+  raw_image = tf.cast(tf.random_uniform(
+      [raw_image_size, raw_image_size, 3], maxval=256, dtype=tf.int32),
+                      tf.uint8)
+  image = preprocessing_fn(raw_image, image_size, image_size)
+  images = tf.tile(tf.expand_dims(image, 0), [batch_size, 1, 1, 1])
+  images.set_shape([batch_size, image_size, image_size, 3])
+  # The images are preprocessed once, so that the network alone is timed.
+  return tf.Variable(images, trainable=False, name='synthetic_images',
+                     collections=[tf.GraphKeys.LOCAL_VARIABLES])
+
+
+def build_benchmark_op(model_name, batch_size, mode, num_classes=1001,
+                       image_size=None, weight_decay=0.00004):
+  """Builds the op running a network on a batch, in the default graph.
+
+  Args:
+    model_name: The name of the network, in nets_factory.networks_map.
+    batch_size: The number of images per batch.
+    mode: One of MODES.
+    num_classes: The number of classes of the network.
+    image_size: The image size, defaults to the default image size of the
+      network.
+    weight_decay: The l2 coefficient for the model weights.
+
+  Returns:
+    The op and the image size.
+
+  Raises:
+    ValueError: if mode is unknown.
+  """
+  if mode not in MODES:
+    raise ValueError('Unknown mode %s, expected one of %s.' % (mode, MODES))
+  is_training = mode == 'forward_backward'
+  network_fn = nets_factory.get_network_fn(
+      model_name, num_classes=num_classes, weight_decay=weight_decay,
+      is_training=is_training)
+  image_size = image_size or network_fn.default_image_size
+
+  with tf.device('/cpu:0'):
+    images = _synthetic_images(model_name, batch_size, image_size)
+    logits, end_points = network_fn(images)
+    if not is_training:
+      return logits.op, image_size
+
+    # The loss of train_image_classifier.py.
+    labels = slim.one_hot_encoding(
+        tf.random_uniform([batch_size], maxval=num_classes, dtype=tf.int32),
+        num_classes)
+    if 'AuxLogits' in end_points:
+      tf.losses.softmax_cross_entropy(
+          labels, end_points['AuxLogits'], weights=0.4)
+    tf.losses.softmax_cross_entropy(labels, logits)
+    optimizer = tf.train.GradientDescentOptimizer(learning_rate=0.0)
+    return slim.learning.create_train_op(
+        tf.losses.get_total_loss(), optimizer).op, image_size
+
+
+def benchmark_network(model_name, batch_size, mode, num_batches,
+                      num_warmup_batches=3, num_classes=1001, image_size=None,
+                      weight_decay=0.00004, session_config=None):
+  """Measures the throughput and latency of a network.
+
+  Args:
+    model_name: The name of the network, in nets_factory.networks_map.
+    batch_size: The number of images per batch.
+    mode: One of MODES.
+    num_batches: The number of timed batches.
+    num_warmup_batches: The number of untimed batches, run first.
+    num_classes: The number of classes of the network.
+    image_size: The image size, defaults to the default image size of the
+      network.
+    weight_decay: The l2 coefficient for the model weights.
+    session_config: An optional tf.ConfigProto of the session.
+
+  Returns:
+    A dictionary with the 'model_name', 'batch_size', 'mode' and 'image_size'
+    of the benchmark, the 'num_parameters' of the network, the
+    'images_per_second', the 50th, 90th and 99th percentiles and the mean of
+    the latency of a batch in milliseconds, and the 'peak_memory_mb' resident
+    memory of the process.
+  """
+  with tf.Graph().as_default():
+    benchmark_op, image_size = build_benchmark_op(
+        model_name, batch_size, mode, num_classes=num_classes,
+        image_size=image_size, weight_decay=weight_decay)
+    num_parameters = int(sum(np.prod(v.get_shape().as_list())
+                             for v in tf.trainable_variables()))
+    with tf.Session(config=session_config) as sess:
+      sess.run([tf.global_variables_initializer(),
+                tf.local_variables_initializer()])
+      for _ in range(num_warmup_batches):
+        sess.run(benchmark_op)
+      latencies = []
+      for _ in range(num_batches):
+        start_time = time.time()
+        sess.run(benchmark_op)
+        latencies.append(time.time() - start_time)
+  latencies_ms = 1000 * np.array(latencies)
+  return {
+      'model_name': model_name,
+      'batch_size': batch_size,
+      'mode': mode,
+      'image_size': image_size,
+      'num_parameters': num_parameters,
+      'images_per_second': batch_size * num_batches / sum(latencies),
+      'latency_ms_p50': float(np.percentile(latencies_ms, 50)),
+      'latency_ms_p90': float(np.percentile(latencies_ms, 90)),
+      'latency_ms_p99': float(np.percentile(latencies_ms, 99)),
+      'latency_ms_mean': float(np.mean(latencies_ms)),
+      # ru_maxrss is in kilobytes on Linux.
+      'peak_memory_mb': resource.getrusage(
+          resource.RUSAGE_SELF).ru_maxrss / 1024,
+  }
+
+
+def _benchmark_network_in_process(kwargs):
+  return benchmark_network(**kwargs)
+
+
+def _new_process_pool():
+  """Returns a pool of one process, to run a benchmark."""
+  if hasattr(multiprocessing, 'get_context'):
+    # A forked process could inherit the TensorFlow runtime of a session of
+    # this process, which is not fork safe.
+    return multiprocessing.get_context('spawn').Pool(1)
+  return multiprocessing.Pool(1)
+
+
+def benchmark_networks(model_names, batch_sizes, modes=MODES, **kwargs):
+  """Benchmarks networks, each in its own process.
+
+  Args:
+    model_names: A list of names of networks, in nets_factory.networks_map.
+    batch_sizes: A list of batch sizes.
+    modes: A list of modes, from MODES.
+    **kwargs: Arguments of benchmark_network.
+
+  Returns:
+    The list of the results of benchmark_network, for every network, batch
+    size and mode.
+  """
+  results = []
+  for model_name in model_names:
+    for batch_size in batch_sizes:
+      for mode in modes:
+        benchmark_kwargs = dict(kwargs, model_name=model_name,
+                                batch_size=batch_size, mode=mode)
+        # A new process per benchmark, so that the peak memory of the
+        # process is the one of the benchmark.
+        pool = _new_process_pool()
+        try:
+          results.append(pool.apply(_benchmark_network_in_process,
+                                    (benchmark_kwargs,)))
+        finally:
+          pool.close()
+          pool.join()
+        tf.logging.info(
+            '%s, batch size %d, %s: %.1f images/sec, latency %.1f ms (p50) '
+            '%.1f ms (p90) %.1f ms (p99), %.0f MB.', model_name, batch_size,
+            mode, results[-1]['images_per_second'],
+            results[-1]['latency_ms_p50'], results[-1]['latency_ms_p90'],
+            results[-1]['latency_ms_p99'], results[-1]['peak_memory_mb'])
+  return results
+
+
+def main(_):
+  tf.logging.set_verbosity(tf.logging.INFO)
+  if FLAGS.model_names == 'all':
+    model_names = sorted(nets_factory.networks_map)
+  else:
+    model_names = FLAGS.model_names.split(',')
+  session_config = tf.ConfigProto(
+      device_count={'GPU': 0},
+      intra_op_parallelism_threads=FLAGS.num_intra_threads,
+      inter_op_parallelism_threads=FLAGS.num_inter_threads)
+  results = benchmark_networks(
+      model_names, [int(size) for size in FLAGS.batch_sizes.split(',')],
+      modes=FLAGS.modes.split(','),
+      num_batches=FLAGS.num_batches,
+      num_warmup_batches=FLAGS.num_warmup_batches,
+      num_classes=FLAGS.num_classes,
+      image_size=FLAGS.image_size,
+      weight_decay=FLAGS.weight_decay,
+      session_config=session_config)
+  if FLAGS.output_path:
+    with tf.gfile.GFile(FLAGS.output_path, 'w') as fid:
+      json.dump(results, fid, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+  tf.app.run()
@@ -0,0 +1,57 @@
+# Copyright 2017 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for benchmark_image_classifier."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import tensorflow as tf
+
+import benchmark_image_classifier
+
+
+class BenchmarkImageClassifierTest(tf.test.TestCase):
+
+  def testBenchmarkNetwork(self):
+    for mode in benchmark_image_classifier.MODES:
+      result = benchmark_image_classifier.benchmark_network(
+          'lenet', batch_size=2, mode=mode, num_batches=3,
+          num_warmup_batches=1, num_classes=10)
+      self.assertEqual('lenet', result['model_name'])
+      self.assertEqual(2, result['batch_size'])
+      self.assertEqual(mode, result['mode'])
+      self.assertEqual(28, result['image_size'])
+      self.assertGreater(result['num_parameters'], 0)
+      self.assertGreater(result['images_per_second'], 0)
+      self.assertLessEqual(result['latency_ms_p50'], result['latency_ms_p99'])
+      self.assertGreater(result['peak_memory_mb'], 0)
+
+  def testBenchmarkNetworks(self):
+    results = benchmark_image_classifier.benchmark_networks(
+        ['lenet', 'cifarnet'], [1, 2], modes=['forward'], num_batches=2,
+        num_warmup_batches=0, num_classes=10)
+    self.assertEqual([('lenet', 1), ('lenet', 2), ('cifarnet', 1),
+                      ('cifarnet', 2)],
+                     [(r['model_name'], r['batch_size']) for r in results])
+
+  def testUnknownMode(self):
+    with tf.Graph().as_default():
+      with self.assertRaises(ValueError):
+        benchmark_image_classifier.build_benchmark_op('lenet', 1, 'backward')
+
+
+if __name__ == '__main__':
+  tf.test.main()
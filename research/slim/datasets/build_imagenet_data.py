@@ -80,7 +80,9 @@ serialized Example proto. The Example proto contains the following fields:
 Note that the length of xmin is identical to the length of xmax, ymin and ymax
 for each example.
 
-Running this script using 16 threads may take around ~2.5 hours on a HP Z420.
+Images are converted in parallel processes, one shard at a time, and existing
+shards are skipped, so an interrupted conversion resumes where it stopped.
+Running this script using 16 processes may take around ~2.5 hours on a HP Z420.
 """
 from __future__ import absolute_import
 from __future__ import division
@@ -90,12 +92,13 @@ from datetime import datetime
 import os
 import random
 import sys
-import threading
 
 import numpy as np
 from six.moves import xrange  # pylint: disable=redefined-builtin
 import tensorflow as tf
 
+from datasets import dataset_utils
+
 
 tf.app.flags.DEFINE_string('train_directory', '/tmp/',
                            'Training data directory')
@@ -109,8 +112,8 @@ tf.app.flags.DEFINE_integer('train_shards', 1024,
 tf.app.flags.DEFINE_integer('validation_shards', 128,
                             'Number of shards in validation TFRecord files.')
 
-tf.app.flags.DEFINE_integer('num_threads', 8,
-                            'Number of threads to preprocess the images.')
+tf.app.flags.DEFINE_integer('num_workers', 8,
+                            'Number of processes to preprocess the images.')
 
 # The labels file contains a list of valid labels are held in this file.
 # Assumes that the file contains entries as such:
@@ -226,188 +229,40 @@ def _convert_to_example(filename, image_buffer, label, synset, human, bbox,
   return example
 
 
-class ImageCoder(object):
-  """Helper class that provides TensorFlow image coding utilities."""
-
-  def __init__(self):
-    # Create a single Session to run all image coding calls.
-    self._sess = tf.Session()
-
-    # Initializes function that converts PNG to JPEG data.
-    self._png_data = tf.placeholder(dtype=tf.string)
-    image = tf.image.decode_png(self._png_data, channels=3)
-    self._png_to_jpeg = tf.image.encode_jpeg(image, format='rgb', quality=100)
-
-    # Initializes function that converts CMYK JPEG data to RGB JPEG data.
-    self._cmyk_data = tf.placeholder(dtype=tf.string)
-    image = tf.image.decode_jpeg(self._cmyk_data, channels=0)
-    self._cmyk_to_rgb = tf.image.encode_jpeg(image, format='rgb', quality=100)
-
-    # Initializes function that decodes RGB JPEG data.
-    self._decode_jpeg_data = tf.placeholder(dtype=tf.string)
-    self._decode_jpeg = tf.image.decode_jpeg(self._decode_jpeg_data, channels=3)
-
-  def png_to_jpeg(self, image_data):
-    return self._sess.run(self._png_to_jpeg,
-                          feed_dict={self._png_data: image_data})
-
-  def cmyk_to_rgb(self, image_data):
-    return self._sess.run(self._cmyk_to_rgb,
-                          feed_dict={self._cmyk_data: image_data})
-
-  def decode_jpeg(self, image_data):
-    image = self._sess.run(self._decode_jpeg,
-                           feed_dict={self._decode_jpeg_data: image_data})
-    assert len(image.shape) == 3
-    assert image.shape[2] == 3
-    return image
-
-
-def _is_png(filename):
-  """Determine if a file contains a PNG format image.
-
-  Args:
-    filename: string, path of the image file.
-
-  Returns:
-    boolean indicating if the image is a PNG.
-  """
-  # File list from:
-  # https://groups.google.com/forum/embed/?place=forum/torch7#!topic/torch7/fOSTXHIESSU
-  return 'n02105855_2933.JPEG' in filename
-
-
-def _is_cmyk(filename):
-  """Determine if file contains a CMYK JPEG format image.
-
-  Args:
-    filename: string, path of the image file.
-
-  Returns:
-    boolean indicating if the image is a JPEG encoded with CMYK color space.
-  """
-  # File list from:
-  # https://github.com/cytsai/ilsvrc-cmyk-image-list
-  blacklist = ['n01739381_1309.JPEG', 'n02077923_14822.JPEG',
-               'n02447366_23489.JPEG', 'n02492035_15739.JPEG',
-               'n02747177_10752.JPEG', 'n03018349_4028.JPEG',
-               'n03062245_4620.JPEG', 'n03347037_9675.JPEG',
-               'n03467068_12171.JPEG', 'n03529860_11437.JPEG',
-               'n03544143_17228.JPEG', 'n03633091_5218.JPEG',
-               'n03710637_5125.JPEG', 'n03961711_5286.JPEG',
-               'n04033995_2932.JPEG', 'n04258138_17003.JPEG',
-               'n04264628_27969.JPEG', 'n04336792_7448.JPEG',
-               'n04371774_5854.JPEG', 'n04596742_4225.JPEG',
-               'n07583066_647.JPEG', 'n13037406_4650.JPEG']
-  return filename.split('/')[-1] in blacklist
-
-
-def _process_image(filename, coder):
+def _process_image(filename):
   """Process a single image file.
 
   Args:
     filename: string, path to an image file e.g., '/path/to/example.JPG'.
-    coder: instance of ImageCoder to provide TensorFlow image coding utils.
   Returns:
     image_buffer: string, JPEG encoding of RGB image.
     height: integer, image height in pixels.
     width: integer, image width in pixels.
   """
   # Read the image file.
-  image_data = tf.gfile.FastGFile(filename, 'r').read()
-
-  # Clean the dirty data.
-  if _is_png(filename):
-    # 1 image is a PNG.
-    print('Converting PNG to JPEG for %s' % filename)
-    image_data = coder.png_to_jpeg(image_data)
-  elif _is_cmyk(filename):
-    # 22 JPEG images are in CMYK colorspace.
-    print('Converting CMYK to RGB for %s' % filename)
-    image_data = coder.cmyk_to_rgb(image_data)
-
-  # Decode the RGB JPEG.
-  image = coder.decode_jpeg(image_data)
+  image_data = tf.gfile.FastGFile(filename, 'rb').read()
 
-  # Check that image converted to RGB
-  assert len(image.shape) == 3
-  height = image.shape[0]
-  width = image.shape[1]
-  assert image.shape[2] == 3
+  # Decode the image to check it, and clean the dirty data: 1 image is a PNG
+  # and 22 JPEG images are in CMYK colorspace.
+  rgb_image_data, height, width = dataset_utils.to_rgb_jpeg(image_data)
+  if rgb_image_data is not image_data:
+    print('Converting to RGB JPEG for %s' % filename)
+  return rgb_image_data, height, width
 
-  return image_data, height, width
 
-
-def _process_image_files_batch(coder, thread_index, ranges, name, filenames,
-                               synsets, labels, humans, bboxes, num_shards):
-  """Processes and saves list of images as TFRecord in 1 thread.
+def _image_to_example(image):
+  """Converts an image to an Example proto, in a conversion worker process.
 
   Args:
-    coder: instance of ImageCoder to provide TensorFlow image coding utils.
-    thread_index: integer, unique batch to run index is within [0, len(ranges)).
-    ranges: list of pairs of integers specifying ranges of each batches to
-      analyze in parallel.
-    name: string, unique identifier specifying the data set
-    filenames: list of strings; each string is a path to an image file
-    synsets: list of strings; each string is a unique WordNet ID
-    labels: list of integer; each integer identifies the ground truth
-    humans: list of strings; each string is a human-readable label
-    bboxes: list of bounding boxes for each image. Note that each entry in this
-      list might contain from 0+ entries corresponding to the number of bounding
-      box annotations for the image.
-    num_shards: integer number of shards for this data set.
+    image: tuple of the filename, label, synset, human and bbox arguments of
+      _convert_to_example.
+  Returns:
+    Example proto
   """
-  # Each thread produces N shards where N = int(num_shards / num_threads).
-  # For instance, if num_shards = 128, and the num_threads = 2, then the first
-  # thread would produce shards [0, 64).
-  num_threads = len(ranges)
-  assert not num_shards % num_threads
-  num_shards_per_batch = int(num_shards / num_threads)
-
-  shard_ranges = np.linspace(ranges[thread_index][0],
-                             ranges[thread_index][1],
-                             num_shards_per_batch + 1).astype(int)
-  num_files_in_thread = ranges[thread_index][1] - ranges[thread_index][0]
-
-  counter = 0
-  for s in xrange(num_shards_per_batch):
-    # Generate a sharded version of the file name, e.g. 'train-00002-of-00010'
-    shard = thread_index * num_shards_per_batch + s
-    output_filename = '%s-%.5d-of-%.5d' % (name, shard, num_shards)
-    output_file = os.path.join(FLAGS.output_directory, output_filename)
-    writer = tf.python_io.TFRecordWriter(output_file)
-
-    shard_counter = 0
-    files_in_shard = np.arange(shard_ranges[s], shard_ranges[s + 1], dtype=int)
-    for i in files_in_shard:
-      filename = filenames[i]
-      label = labels[i]
-      synset = synsets[i]
-      human = humans[i]
-      bbox = bboxes[i]
-
-      image_buffer, height, width = _process_image(filename, coder)
-
-      example = _convert_to_example(filename, image_buffer, label,
-                                    synset, human, bbox,
-                                    height, width)
-      writer.write(example.SerializeToString())
-      shard_counter += 1
-      counter += 1
-
-      if not counter % 1000:
-        print('%s [thread %d]: Processed %d of %d images in thread batch.' %
-              (datetime.now(), thread_index, counter, num_files_in_thread))
-        sys.stdout.flush()
-
-    writer.close()
-    print('%s [thread %d]: Wrote %d images to %s' %
-          (datetime.now(), thread_index, shard_counter, output_file))
-    sys.stdout.flush()
-    shard_counter = 0
-  print('%s [thread %d]: Wrote %d images to %d shards.' %
-        (datetime.now(), thread_index, counter, num_files_in_thread))
-  sys.stdout.flush()
+  filename, label, synset, human, bbox = image
+  image_buffer, height, width = _process_image(filename)
+  return _convert_to_example(filename, image_buffer, label, synset, human,
+                             bbox, height, width)
 
 
 def _process_image_files(name, filenames, synsets, labels, humans,
@@ -430,35 +285,23 @@ def _process_image_files(name, filenames, synsets, labels, humans,
   assert len(filenames) == len(humans)
   assert len(filenames) == len(bboxes)
 
-  # Break all images into batches with a [ranges[i][0], ranges[i][1]].
-  spacing = np.linspace(0, len(filenames), FLAGS.num_threads + 1).astype(np.int)
-  ranges = []
-  threads = []
-  for i in xrange(len(spacing) - 1):
-    ranges.append([spacing[i], spacing[i+1]])
+  # Break all images into shards, each converted by one worker process.
+  images = list(zip(filenames, labels, synsets, humans, bboxes))
+  spacing = np.linspace(0, len(images), num_shards + 1).astype(np.int)
+  shards = []
+  for shard in xrange(num_shards):
+    # Generate a sharded version of the file name, e.g. 'train-00002-of-00010'
+    output_filename = '%s-%.5d-of-%.5d' % (name, shard, num_shards)
+    output_file = os.path.join(FLAGS.output_directory, output_filename)
+    shards.append((output_file, images[spacing[shard]:spacing[shard + 1]]))
 
-  # Launch a thread for each batch.
-  print('Launching %d threads for spacings: %s' % (FLAGS.num_threads, ranges))
+  print('Launching %d processes for %d shards.' % (FLAGS.num_workers,
+                                                   num_shards))
   sys.stdout.flush()
-
-  # Create a mechanism for monitoring when all threads are finished.
-  coord = tf.train.Coordinator()
-
-  # Create a generic TensorFlow-based utility for converting all image codings.
-  coder = ImageCoder()
-
-  threads = []
-  for thread_index in xrange(len(ranges)):
-    args = (coder, thread_index, ranges, name, filenames,
-            synsets, labels, humans, bboxes, num_shards)
-    t = threading.Thread(target=_process_image_files_batch, args=args)
-    t.start()
-    threads.append(t)
-
-  # Wait for all the threads to terminate.
-  coord.join(threads)
-  print('%s: Finished writing all %d images in data set.' %
-        (datetime.now(), len(filenames)))
+  num_images = dataset_utils.convert_to_tfrecord_shards(
+      _image_to_example, shards, FLAGS.num_workers)
+  print('%s: Finished writing %d of %d images in data set.' %
+        (datetime.now(), num_images, len(filenames)))
   sys.stdout.flush()
 
 
@@ -524,7 +367,7 @@ def _find_image_files(data_dir, labels_file):
   # Shuffle the ordering of all image files in order to guarantee
   # random ordering of the images with respect to label in the
   # saved TFRecord files. Make the randomization repeatable.
-  shuffled_index = range(len(filenames))
+  shuffled_index = list(range(len(filenames)))
   random.seed(12345)
   random.shuffle(shuffled_index)
 
@@ -682,11 +525,6 @@ def _build_bounding_box_lookup(bounding_box_file):
 
 
 def main(unused_argv):
-  assert not FLAGS.train_shards % FLAGS.num_threads, (
-      'Please make the FLAGS.num_threads commensurate with FLAGS.train_shards')
-  assert not FLAGS.validation_shards % FLAGS.num_threads, (
-      'Please make the FLAGS.num_threads commensurate with '
-      'FLAGS.validation_shards')
   print('Saving results to %s' % FLAGS.output_directory)
 
   # Build a map from synset to human-readable label.
@@ -17,10 +17,13 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import io
+import multiprocessing
 import os
 import sys
 import tarfile
 
+from PIL import Image
 from six.moves import urllib
 import tensorflow as tf
 
@@ -77,6 +80,118 @@ def image_to_tfexample(image_data, image_format, height, width, class_id):
   }))
 
 
+def encode_png(image):
+  """Encodes an image as PNG, without a TensorFlow session.
+
+  Args:
+    image: A uint8 numpy array of shape [height, width, channels], with 1, 3
+      or 4 channels.
+
+  Returns:
+    The PNG encoded image, as bytes.
+  """
+  if image.ndim == 3 and image.shape[2] == 1:
+    image = image[:, :, 0]
+  output = io.BytesIO()
+  Image.fromarray(image).save(output, format='PNG')
+  return output.getvalue()
+
+
+def read_image_dims(image_data):
+  """Decodes an encoded image to check it, and returns its dimensions.
+
+  Args:
+    image_data: An encoded image, e.g. JPEG or PNG.
+
+  Returns:
+    The height and width of the image.
+
+  Raises:
+    IOError: if the image cannot be decoded.
+  """
+  image = Image.open(io.BytesIO(image_data))
+  image.load()
+  return image.height, image.width
+
+
+def to_rgb_jpeg(image_data, quality=100):
+  """Re-encodes an image as an RGB JPEG, unless it is an RGB or gray JPEG.
+
+  Args:
+    image_data: An encoded image, e.g. a PNG or a CMYK JPEG.
+    quality: The quality of the re-encoded JPEG.
+
+  Returns:
+    The JPEG encoded image, and its height and width.
+
+  Raises:
+    IOError: if the image cannot be decoded.
+  """
+  image = Image.open(io.BytesIO(image_data))
+  image.load()
+  if image.format != 'JPEG' or image.mode not in ('RGB', 'L'):
+    output = io.BytesIO()
+    image.convert('RGB').save(output, format='JPEG', quality=quality)
+    image_data = output.getvalue()
+  return image_data, image.height, image.width
+
+
+def _convert_shard(args):
+  """Writes a shard of convert_to_tfrecord_shards, in a worker process."""
+  example_fn, output_filename, items = args
+  # The shard only gets its name once complete, see convert_to_tfrecord_shards.
+  temp_filename = output_filename + '.tmp'
+  with tf.python_io.TFRecordWriter(temp_filename) as tfrecord_writer:
+    for item in items:
+      tfrecord_writer.write(example_fn(item).SerializeToString())
+  tf.gfile.Rename(temp_filename, output_filename, overwrite=True)
+  return len(items)
+
+
+def convert_to_tfrecord_shards(example_fn, shards, num_workers=None):
+  """Converts items to sharded TFRecord files of TF-Example protos.
+
+  Each shard is converted by a worker process, so that the conversion, e.g.
+  decoding and encoding images, scales with the number of cores. A shard is
+  written to a temporary file, renamed once the shard is complete, and
+  existing shards are skipped, so that an interrupted conversion resumes
+  where it stopped.
+
+  Args:
+    example_fn: A function mapping an item to a tf.train.Example. It is called
+      in the worker processes, so it must be picklable, e.g. a module level
+      function.
+    shards: A list of (output_filename, items) pairs, where items is a list of
+      picklable items.
+    num_workers: The number of worker processes. Defaults to the number of
+      cores.
+
+  Returns:
+    The number of examples written, excluding existing shards.
+  """
+  pending_shards = [(example_fn, output_filename, items)
+                    for output_filename, items in shards
+                    if not tf.gfile.Exists(output_filename)]
+  if len(pending_shards) < len(shards):
+    print('Skipping %d existing shards.' % (len(shards) - len(pending_shards)))
+
+  num_examples = 0
+  pool = multiprocessing.Pool(num_workers)
+  try:
+    for i, num_shard_examples in enumerate(
+        pool.imap_unordered(_convert_shard, pending_shards)):
+      num_examples += num_shard_examples
+      sys.stdout.write('\r>> Converted shard %d/%d' % (
+          i + 1, len(pending_shards)))
+      sys.stdout.flush()
+  finally:
+    pool.terminate()
+    pool.join()
+  sys.stdout.write('\n')
+  sys.stdout.flush()
+  return num_examples
+
+
 def download_and_uncompress_tarball(tarball_url, dataset_dir):
   """Downloads the `tarball_url` and uncompresses it locally.
 
@@ -30,7 +30,6 @@ import os
 import sys
 import tarfile
 
-import numpy as np
 from six.moves import cPickle
 from six.moves import urllib
 import tensorflow as tf
@@ -61,16 +60,14 @@ _CLASS_NAMES = [
 ]
 
 
-def _add_to_tfrecord(filename, tfrecord_writer, offset=0):
-  """Loads data from the cifar10 pickle files and writes files to a TFRecord.
+def _read_images_and_labels(filename):
+  """Loads the images and labels of a cifar10 pickle file.
 
   Args:
     filename: The filename of the cifar10 pickle file.
-    tfrecord_writer: The TFRecord writer to use for writing.
-    offset: An offset into the absolute number of images previously written.
 
   Returns:
-    The new offset.
+    A list of pairs of a uint8 image of shape [32, 32, 3] and its label.
   """
   with tf.gfile.Open(filename, 'rb') as f:
     if sys.version_info < (3,):
@@ -81,31 +78,24 @@ def _add_to_tfrecord(filename, tfrecord_writer, offset=0):
   images = data[b'data']
   num_images = images.shape[0]
 
-  images = images.reshape((num_images, 3, 32, 32))
+  images = images.reshape((num_images, 3, 32, 32)).transpose((0, 2, 3, 1))
   labels = data[b'labels']
+  return list(zip(images, labels))
 
-  with tf.Graph().as_default():
-    image_placeholder = tf.placeholder(dtype=tf.uint8)
-    encoded_image = tf.image.encode_png(image_placeholder)
 
-    with tf.Session('') as sess:
+def _image_to_tfexample(image_and_label):
+  """Encodes an image as PNG, in a conversion worker process.
 
-      for j in range(num_images):
-        sys.stdout.write('\r>> Reading file [%s] image %d/%d' % (
-            filename, offset + j + 1, offset + num_images))
-        sys.stdout.flush()
-
-        image = np.squeeze(images[j]).transpose((1, 2, 0))
-        label = labels[j]
-
-        png_string = sess.run(encoded_image,
-                              feed_dict={image_placeholder: image})
-
-        example = dataset_utils.image_to_tfexample(
-            png_string, b'png', _IMAGE_SIZE, _IMAGE_SIZE, label)
-        tfrecord_writer.write(example.SerializeToString())
+  Args:
+    image_and_label: A pair of a uint8 image of shape [32, 32, 3] and its
+      label.
 
-  return offset + num_images
+  Returns:
+    A TF-Example of the image.
+  """
+  image, label = image_and_label
+  return dataset_utils.image_to_tfexample(
+      dataset_utils.encode_png(image), b'png', _IMAGE_SIZE, _IMAGE_SIZE, label)
 
 
 def _get_output_filename(dataset_dir, split_name):
@@ -174,21 +164,18 @@ def run(dataset_dir):
 
   dataset_utils.download_and_uncompress_tarball(_DATA_URL, dataset_dir)
 
-  # First, process the training data:
-  with tf.python_io.TFRecordWriter(training_filename) as tfrecord_writer:
-    offset = 0
-    for i in range(_NUM_TRAIN_FILES):
-      filename = os.path.join(dataset_dir,
-                              'cifar-10-batches-py',
-                              'data_batch_%d' % (i + 1))  # 1-indexed.
-      offset = _add_to_tfrecord(filename, tfrecord_writer, offset)
-
-  # Next, process the testing data:
-  with tf.python_io.TFRecordWriter(testing_filename) as tfrecord_writer:
+  # The training and testing data are converted concurrently.
+  training_images = []
+  for i in range(_NUM_TRAIN_FILES):
     filename = os.path.join(dataset_dir,
                             'cifar-10-batches-py',
-                            'test_batch')
-    _add_to_tfrecord(filename, tfrecord_writer)
+                            'data_batch_%d' % (i + 1))  # 1-indexed.
+    training_images.extend(_read_images_and_labels(filename))
+  testing_images = _read_images_and_labels(
+      os.path.join(dataset_dir, 'cifar-10-batches-py', 'test_batch'))
+  dataset_utils.convert_to_tfrecord_shards(
+      _image_to_tfexample, [(training_filename, training_images),
+                            (testing_filename, testing_images)])
 
   # Finally, write the labels file:
   labels_to_class_names = dict(zip(range(len(_CLASS_NAMES)), _CLASS_NAMES))
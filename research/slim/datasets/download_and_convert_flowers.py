@@ -30,7 +30,6 @@ from __future__ import print_function
 import math
 import os
 import random
-import sys
 
 import tensorflow as tf
 
@@ -49,24 +48,21 @@ _RANDOM_SEED = 0
 _NUM_SHARDS = 5
 
 
-class ImageReader(object):
-  """Helper class that provides TensorFlow image coding utilities."""
+def _image_to_tfexample(filename_and_class_id):
+  """Reads an image file and checks it, in a conversion worker process.
 
-  def __init__(self):
-    # Initializes function that decodes RGB JPEG data.
-    self._decode_jpeg_data = tf.placeholder(dtype=tf.string)
-    self._decode_jpeg = tf.image.decode_jpeg(self._decode_jpeg_data, channels=3)
-
-  def read_image_dims(self, sess, image_data):
-    image = self.decode_jpeg(sess, image_data)
-    return image.shape[0], image.shape[1]
+  Args:
+    filename_and_class_id: A pair of the absolute path of a png or jpg image
+      and its class id.
 
-  def decode_jpeg(self, sess, image_data):
-    image = sess.run(self._decode_jpeg,
-                     feed_dict={self._decode_jpeg_data: image_data})
-    assert len(image.shape) == 3
-    assert image.shape[2] == 3
-    return image
+  Returns:
+    A TF-Example of the image.
+  """
+  filename, class_id = filename_and_class_id
+  image_data = tf.gfile.FastGFile(filename, 'rb').read()
+  height, width = dataset_utils.read_image_dims(image_data)
+  return dataset_utils.image_to_tfexample(
+      image_data, b'jpg', height, width, class_id)
 
 
 def _get_filenames_and_classes(dataset_dir):
@@ -104,8 +100,9 @@ def _get_dataset_filename(dataset_dir, split_name, shard_id):
   return os.path.join(dataset_dir, output_filename)
 
 
-def _convert_dataset(split_name, filenames, class_names_to_ids, dataset_dir):
-  """Converts the given filenames to a TFRecord dataset.
+def _get_dataset_shards(split_name, filenames, class_names_to_ids,
+                        dataset_dir):
+  """Splits the given filenames into the shards of a TFRecord dataset.
 
   Args:
     split_name: The name of the dataset, either 'train' or 'validation'.
@@ -113,41 +110,24 @@ def _convert_dataset(split_name, filenames, class_names_to_ids, dataset_dir):
     class_names_to_ids: A dictionary from class names (strings) to ids
       (integers).
     dataset_dir: The directory where the converted datasets are stored.
+
+  Returns:
+    The shards to convert with dataset_utils.convert_to_tfrecord_shards.
   """
   assert split_name in ['train', 'validation']
 
   num_per_shard = int(math.ceil(len(filenames) / float(_NUM_SHARDS)))
 
-  with tf.Graph().as_default():
-    image_reader = ImageReader()
-
-    with tf.Session('') as sess:
-
-      for shard_id in range(_NUM_SHARDS):
-        output_filename = _get_dataset_filename(
-            dataset_dir, split_name, shard_id)
-
-        with tf.python_io.TFRecordWriter(output_filename) as tfrecord_writer:
-          start_ndx = shard_id * num_per_shard
-          end_ndx = min((shard_id+1) * num_per_shard, len(filenames))
-          for i in range(start_ndx, end_ndx):
-            sys.stdout.write('\r>> Converting image %d/%d shard %d' % (
-                i+1, len(filenames), shard_id))
-            sys.stdout.flush()
-
-            # Read the filename:
-            image_data = tf.gfile.FastGFile(filenames[i], 'rb').read()
-            height, width = image_reader.read_image_dims(sess, image_data)
-
-            class_name = os.path.basename(os.path.dirname(filenames[i]))
-            class_id = class_names_to_ids[class_name]
-
-            example = dataset_utils.image_to_tfexample(
-                image_data, b'jpg', height, width, class_id)
-            tfrecord_writer.write(example.SerializeToString())
-
-  sys.stdout.write('\n')
-  sys.stdout.flush()
+  shards = []
+  for shard_id in range(_NUM_SHARDS):
+    output_filename = _get_dataset_filename(dataset_dir, split_name, shard_id)
+    start_ndx = shard_id * num_per_shard
+    end_ndx = min((shard_id+1) * num_per_shard, len(filenames))
+    shards.append((output_filename, [
+        (filename,
+         class_names_to_ids[os.path.basename(os.path.dirname(filename))])
+        for filename in filenames[start_ndx:end_ndx]]))
+  return shards
 
 
 def _clean_up_temporary_files(dataset_dir):
@@ -198,10 +178,11 @@ def run(dataset_dir):
   validation_filenames = photo_filenames[:_NUM_VALIDATION]
 
   # First, convert the training and validation sets.
-  _convert_dataset('train', training_filenames, class_names_to_ids,
-                   dataset_dir)
-  _convert_dataset('validation', validation_filenames, class_names_to_ids,
-                   dataset_dir)
+  shards = (_get_dataset_shards('train', training_filenames,
+                                class_names_to_ids, dataset_dir) +
+            _get_dataset_shards('validation', validation_filenames,
+                                class_names_to_ids, dataset_dir))
+  dataset_utils.convert_to_tfrecord_shards(_image_to_tfexample, shards)
 
   # Finally, write the labels file:
   labels_to_class_names = dict(zip(range(len(class_names)), class_names))
@@ -99,34 +99,36 @@ def _extract_labels(filename, num_labels):
   return labels
 
 
-def _add_to_tfrecord(data_filename, labels_filename, num_images,
-                     tfrecord_writer):
-  """Loads data from the binary MNIST files and writes files to a TFRecord.
+def _read_images_and_labels(data_filename, labels_filename, num_images):
+  """Loads the images and labels of the binary MNIST files.
 
   Args:
     data_filename: The filename of the MNIST images.
     labels_filename: The filename of the MNIST labels.
     num_images: The number of images in the dataset.
-    tfrecord_writer: The TFRecord writer to use for writing.
+
+  Returns:
+    A list of pairs of a uint8 image of shape [28, 28, 1] and its label.
   """
   images = _extract_images(data_filename, num_images)
   labels = _extract_labels(labels_filename, num_images)
+  return list(zip(images, labels))
 
-  shape = (_IMAGE_SIZE, _IMAGE_SIZE, _NUM_CHANNELS)
-  with tf.Graph().as_default():
-    image = tf.placeholder(dtype=tf.uint8, shape=shape)
-    encoded_png = tf.image.encode_png(image)
 
-    with tf.Session('') as sess:
-      for j in range(num_images):
-        sys.stdout.write('\r>> Converting image %d/%d' % (j + 1, num_images))
-        sys.stdout.flush()
+def _image_to_tfexample(image_and_label):
+  """Encodes an image as PNG, in a conversion worker process.
 
-        png_string = sess.run(encoded_png, feed_dict={image: images[j]})
+  Args:
+    image_and_label: A pair of a uint8 image of shape [28, 28, 1] and its
+      label.
 
-        example = dataset_utils.image_to_tfexample(
-            png_string, 'png'.encode(), _IMAGE_SIZE, _IMAGE_SIZE, labels[j])
-        tfrecord_writer.write(example.SerializeToString())
+  Returns:
+    A TF-Example of the image.
+  """
+  image, label = image_and_label
+  return dataset_utils.image_to_tfexample(
+      dataset_utils.encode_png(image), 'png'.encode(), _IMAGE_SIZE,
+      _IMAGE_SIZE, label)
 
 
 def _get_output_filename(dataset_dir, split_name):
@@ -201,17 +203,16 @@ def run(dataset_dir):
 
   _download_dataset(dataset_dir)
 
-  # First, process the training data:
-  with tf.python_io.TFRecordWriter(training_filename) as tfrecord_writer:
-    data_filename = os.path.join(dataset_dir, _TRAIN_DATA_FILENAME)
-    labels_filename = os.path.join(dataset_dir, _TRAIN_LABELS_FILENAME)
-    _add_to_tfrecord(data_filename, labels_filename, 60000, tfrecord_writer)
-
-  # Next, process the testing data:
-  with tf.python_io.TFRecordWriter(testing_filename) as tfrecord_writer:
-    data_filename = os.path.join(dataset_dir, _TEST_DATA_FILENAME)
-    labels_filename = os.path.join(dataset_dir, _TEST_LABELS_FILENAME)
-    _add_to_tfrecord(data_filename, labels_filename, 10000, tfrecord_writer)
+  # The training and testing data are converted concurrently.
+  training_images = _read_images_and_labels(
+      os.path.join(dataset_dir, _TRAIN_DATA_FILENAME),
+      os.path.join(dataset_dir, _TRAIN_LABELS_FILENAME), 60000)
+  testing_images = _read_images_and_labels(
+      os.path.join(dataset_dir, _TEST_DATA_FILENAME),
+      os.path.join(dataset_dir, _TEST_LABELS_FILENAME), 10000)
+  dataset_utils.convert_to_tfrecord_shards(
+      _image_to_tfexample, [(training_filename, training_images),
+                            (testing_filename, testing_images)])
 
   # Finally, write the labels file:
   labels_to_class_names = dict(zip(range(len(_CLASS_NAMES)), _CLASS_NAMES))